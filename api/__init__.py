@@ -159,6 +159,18 @@ def create_app() -> Flask:
     from api.routes import register_routes
     register_routes(api)
 
+    # Background embedding worker needs the app for its own contexts
+    from api.services.embedding_queue import embedding_queue
+    embedding_queue.init_app(app)
+
+    # Background activity writer drains on shutdown
+    from api.services.activity_buffer import activity_buffer
+    activity_buffer.init_app(app)
+
+    # Coalesced agent heartbeats are flushed on shutdown
+    from api.services.heartbeat import heartbeat_service
+    heartbeat_service.init_app(app)
+
     # Create database tables on first request
     with app.app_context():
         db.create_all()
@@ -175,4 +187,8 @@ def create_app() -> Flask:
         from api.models.domain import ensure_default_domain
         ensure_default_domain()
 
+    # Scheduled activity partition maintenance (after migrations created the table)
+    from api.services.activity import activity_service
+    activity_service.init_app(app)
+
     return app
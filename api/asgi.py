@@ -0,0 +1,113 @@
+"""
+Collective Memory Platform - ASGI Entry Point
+
+Serves SSE chat streams on a shared event loop. Every other request is
+handed to the Flask app, which runs in the server's thread pool.
+
+Run with: uvicorn --factory api.asgi:create_asgi_app --host 0.0.0.0 --port 5002
+
+Under gunicorn's threaded WSGI server each chat stream holds a thread
+(and its own event loop) for as long as the model keeps talking, so eight
+concurrent chats exhaust an 8-thread worker. Here a stream is a coroutine:
+the request is authorized and the user's message saved in a worker
+thread, then the model's tokens are relayed from the event loop, which
+serves any number of streams at once. Requires the 'sse' extra
+(starlette, uvicorn).
+"""
+import logging
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.test import EnvironBuilder
+
+logger = logging.getLogger(__name__)
+
+CHAT_STREAM_PATH = '/api/conversations/{conversation_key}/messages/stream'
+
+# Headers of the Flask response that describe its body, not the request
+_BODY_HEADERS = {'content-type', 'content-length'}
+
+
+def create_asgi_app(flask_app=None) -> Starlette:
+    """
+    Create the ASGI application.
+
+    Args:
+        flask_app: Flask app for everything but chat streams (default: create_app())
+    """
+    from api.routes.conversations import prepare_chat_stream
+    from api.services.auth import require_auth
+    from api.services.chat import chat_service
+    from api.utils.streaming import sse_format, sse_error, create_streaming_response
+
+    if flask_app is None:
+        from api import create_app
+        flask_app = create_app()
+
+    @require_auth
+    def authorize(conversation_key):
+        from flask import request
+        stream, error, status = prepare_chat_stream(conversation_key, request.get_json(silent=True))
+        return (error, status) if error else (stream, 200)
+
+    def prepare(request: Request, body: bytes):
+        """
+        Authorize the request and save the user's message, as the WSGI route
+        would, in a Flask request context built from the ASGI request.
+
+        Returns (stream kwargs or None, Flask response). The response carries
+        the error body, or only the headers (CORS) Flask would have added.
+        """
+        environ = EnvironBuilder(
+            path=request.url.path,
+            method=request.method,
+            query_string=request.url.query,
+            headers=list(request.headers.items()),
+            data=body,
+            environ_base={'REMOTE_ADDR': request.client.host} if request.client else None,
+        ).get_environ()
+
+        # A fresh app context, so each worker thread gets its own db session
+        with flask_app.app_context(), flask_app.request_context(environ):
+            result, status = authorize(request.path_params['conversation_key'])
+            if status == 200:
+                response = flask_app.make_response(('', 200))
+            else:
+                result, response = None, flask_app.make_response((result, status))
+            return result, flask_app.process_response(response)
+
+    async def stream_chat(request: Request):
+        body = await request.body()
+        stream, flask_response = await run_in_threadpool(prepare, request, body)
+
+        if stream is None:
+            return Response(
+                flask_response.get_data(),
+                status_code=flask_response.status_code,
+                headers=dict(flask_response.headers),
+            )
+
+        async def events():
+            try:
+                async for chunk in chat_service.stream_response(**stream, app=flask_app):
+                    yield sse_format(chunk.to_dict())
+            except Exception as e:
+                logger.error(f"Chat stream failed: {e}")
+                yield sse_error(str(e))
+
+        headers = {k: v for k, v in flask_response.headers.items() if k.lower() not in _BODY_HEADERS}
+        return StreamingResponse(
+            events(),
+            media_type='text/event-stream',
+            headers=create_streaming_response(headers),
+        )
+
+    return Starlette(routes=[
+        Route(CHAT_STREAM_PATH, stream_chat, methods=['POST']),
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ])
+
@@ -49,11 +49,62 @@ CM_REQUIRE_AUTH = os.getenv('CM_REQUIRE_AUTH', 'false').lower() in ('1', 'true',
 # Domain Settings
 CM_DEFAULT_DOMAIN = os.getenv('CM_DEFAULT_DOMAIN', 'janison.com.au')  # Default domain for existing data
 
+# Graph Cache Settings
+# In-memory adjacency index used for graph traversal (per process, per domain)
+CM_GRAPH_CACHE_ENABLED = os.getenv('CM_GRAPH_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CM_GRAPH_CACHE_MAX_MB = int(os.getenv('CM_GRAPH_CACHE_MAX_MB', '256'))  # Memory budget across all domains
+CM_GRAPH_CACHE_TTL = int(os.getenv('CM_GRAPH_CACHE_TTL', '300'))  # Seconds before an index is rebuilt
+
+# Embedding Settings
+CM_EMBEDDING_PROVIDER = os.getenv('CM_EMBEDDING_PROVIDER', 'openai').lower()  # 'openai' or 'fake' (offline, deterministic)
+CM_EMBEDDING_AUTO = os.getenv('CM_EMBEDDING_AUTO', 'false').lower() in ('1', 'true', 'yes')  # Queue embeddings on entity create/update
+CM_EMBEDDING_BATCH_SIZE = int(os.getenv('CM_EMBEDDING_BATCH_SIZE', '64'))  # Texts per provider call
+CM_EMBEDDING_BATCH_WAIT_MS = int(os.getenv('CM_EMBEDDING_BATCH_WAIT_MS', '200'))  # Max wait to fill a batch
+CM_EMBEDDING_MAX_RETRIES = int(os.getenv('CM_EMBEDDING_MAX_RETRIES', '5'))
+CM_EMBEDDING_QUEUE_SYNC = os.getenv('CM_EMBEDDING_QUEUE_SYNC', 'false').lower() in ('1', 'true', 'yes')  # Process inline (tests)
+
+# Vector Index Settings
+# Semantic search backend; without pgvector an in-process NumPy index is used (per process, per table)
+CM_VECTOR_BACKEND = os.getenv('CM_VECTOR_BACKEND', 'auto').lower()  # 'auto' (pgvector if enabled, else memory), 'pgvector', 'memory' or 'none'
+CM_VECTOR_INDEX_MODE = os.getenv('CM_VECTOR_INDEX_MODE', 'exact').lower()  # 'exact' or 'ivf' (approximate, for large tables)
+CM_VECTOR_INDEX_NPROBE = int(os.getenv('CM_VECTOR_INDEX_NPROBE', '8'))  # Clusters scanned per query in ivf mode
+CM_VECTOR_INDEX_TTL = int(os.getenv('CM_VECTOR_INDEX_TTL', '300'))  # Seconds before changes from other writers are picked up
+CM_VECTOR_INDEX_DIR = os.getenv('CM_VECTOR_INDEX_DIR', '')  # Directory for memory-mapped index snapshots; empty disables
+
+# Embedding Cache Settings
+# Bounded in-process LRU in front of the shared embedding_cache table
+CM_EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('CM_EMBEDDING_CACHE_MAX_ENTRIES', '10000'))  # ~6 KB each at 1536 dims
+CM_EMBEDDING_CACHE_PERSIST = os.getenv('CM_EMBEDDING_CACHE_PERSIST', 'true').lower() in ('1', 'true', 'yes')
+
+# Activity Settings
+# Activities are buffered and bulk-inserted by a background writer
+CM_ACTIVITY_BATCH_SIZE = int(os.getenv('CM_ACTIVITY_BATCH_SIZE', '200'))  # Rows per INSERT
+CM_ACTIVITY_FLUSH_MS = int(os.getenv('CM_ACTIVITY_FLUSH_MS', '500'))  # Max time a row waits to be written
+CM_ACTIVITY_MAX_PENDING = int(os.getenv('CM_ACTIVITY_MAX_PENDING', '10000'))  # Buffered rows before backpressure
+CM_ACTIVITY_BLOCK_MS = int(os.getenv('CM_ACTIVITY_BLOCK_MS', '50'))  # Wait for space before dropping a row
+CM_ACTIVITY_SYNC = os.getenv('CM_ACTIVITY_SYNC', 'false').lower() in ('1', 'true', 'yes')  # Write inline (tests)
+CM_ACTIVITY_PARTITIONS_AHEAD = int(os.getenv('CM_ACTIVITY_PARTITIONS_AHEAD', '3'))  # Daily partitions created in advance
+CM_ACTIVITY_MAINTENANCE_INTERVAL = int(os.getenv('CM_ACTIVITY_MAINTENANCE_INTERVAL', '3600'))  # Seconds; 0 disables the in-process job
+CM_ACTIVITY_ROLLUPS = os.getenv('CM_ACTIVITY_ROLLUPS', 'true').lower() in ('1', 'true', 'yes')  # Serve timeline/summary from rollups
+
+# Heartbeat Settings
+# Agent last-seen updates are coalesced in memory and written in batches
+CM_HEARTBEAT_FLUSH_SECONDS = float(os.getenv('CM_HEARTBEAT_FLUSH_SECONDS', '10'))  # 0 writes inline (tests)
+
+# Auth Cache Settings
+# Validated session tokens and PATs are cached; session activity writes are throttled
+CM_AUTH_CACHE_TTL = float(os.getenv('CM_AUTH_CACHE_TTL', '60'))  # Seconds a token is trusted without a query; 0 disables
+CM_AUTH_CACHE_SIZE = int(os.getenv('CM_AUTH_CACHE_SIZE', '10000'))  # Maximum cached tokens
+CM_SESSION_TOUCH_SECONDS = float(os.getenv('CM_SESSION_TOUCH_SECONDS', '300'))  # Minimum interval between last_activity_at writes
+
 # AI Model API Keys
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 
+# Chat Settings
+CM_CHAT_MODEL = os.getenv('CM_CHAT_MODEL', 'gemini-3-flash-preview')  # Model for persona chat; 'fake-*' streams canned tokens offline
+
 # CORS Settings
 CORS_ORIGINS = [
     'http://localhost:3000',
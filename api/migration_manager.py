@@ -89,14 +89,15 @@ class MigrationManager:
         Tables with FKs must be created after their referenced tables.
         """
         from api.models import (
-            Key, Entity, Relationship, Message, MessageRead, Agent, AgentCheckpoint,
-            Conversation, ChatMessage, Document,
+            Key, Entity, Relationship, Message, MessageRead, Inbox, InboxMessage, Agent, AgentCheckpoint,
+            Conversation, ChatMessage, Document, DocumentChunk,
             User, Session, Domain, Team, TeamMembership,
             Client, Model, Persona,  # Client must come before Model/Persona (FK dependency)
             WorkSession, Project, TeamProject, Repository, ProjectRepository,
-            RepositoryStats, Commit, Metric
+            RepositoryStats, Commit, Metric, CachedEmbedding
         )
         from api.models.activity import Activity
+        from api.models.activity_rollup import ActivityRollup
 
         models = {}
 
@@ -105,7 +106,7 @@ class MigrationManager:
             # Key mapping (no dependencies)
             Key,
             # Base entities and relationships
-            Entity, Relationship, Document,
+            Entity, Relationship, Document, DocumentChunk,
             # Auth and multi-tenancy (no FKs to other app tables)
             User, Session, Domain,
             # Teams (depends on Domain, User)
@@ -117,7 +118,7 @@ class MigrationManager:
             # Agents and checkpoints
             Agent, AgentCheckpoint,
             # Messaging
-            Message, MessageRead,
+            Message, MessageRead, Inbox, InboxMessage,
             # Conversations
             Conversation, ChatMessage,
             # Projects and repositories
@@ -126,7 +127,9 @@ class MigrationManager:
             # Work sessions
             WorkSession,
             # Metrics and activity
-            Metric, Activity,
+            Metric, Activity, ActivityRollup,
+            # Caches
+            CachedEmbedding,
         ]
 
         for model_cls in model_classes:
@@ -450,6 +453,11 @@ class MigrationManager:
                 'column': 'embedding',
                 'index_name': 'documents_embedding_hnsw_idx',
             },
+            {
+                'table': 'document_chunks',
+                'column': 'embedding',
+                'index_name': 'document_chunks_embedding_hnsw_idx',
+            },
         ]
 
         existing_tables = self.get_existing_tables()
@@ -498,6 +506,58 @@ class MigrationManager:
             except Exception as e:
                 logger.warning(f"Could not create HNSW index {idx_config['index_name']}: {e}")
 
+    def ensure_text_search_indexes(self):
+        """
+        Create expression indexes for entity keyword search (PostgreSQL only).
+
+        - ix_entities_search: GIN over the weighted tsvector of name and
+          search properties (Entity.search_document), used by ranked
+          keyword search. Postgres maintains it on every write.
+        - ix_entities_name_lower: b-tree over lower(name), used by exact
+          case-insensitive name lookups (e.g. NER existence checks).
+
+        Model-declared indexes can't express these, so they are created here.
+        """
+        if db.engine.dialect.name != 'postgresql':
+            return
+        if 'entities' not in self.get_existing_tables():
+            return
+
+        from api.models import Entity
+        from api.utils.text_search import index_expression_sql
+
+        text_indexes = [
+            {
+                'index_name': 'ix_entities_search',
+                'using': 'gin',
+                'expression': index_expression_sql(Entity.search_document()),
+            },
+            {
+                'index_name': 'ix_entities_name_lower',
+                'using': 'btree',
+                'expression': 'lower(name)',
+            },
+        ]
+
+        existing_indexes = {idx['name'] for idx in self.get_existing_indexes('entities')}
+        for idx_config in text_indexes:
+            if idx_config['index_name'] in existing_indexes:
+                logger.debug(f"Text search index {idx_config['index_name']} already exists")
+                continue
+
+            sql = f"""
+                CREATE INDEX IF NOT EXISTS {idx_config['index_name']}
+                ON entities
+                USING {idx_config['using']} (({idx_config['expression']}))
+            """
+            try:
+                with db.engine.connect() as conn:
+                    logger.info(f"Creating text search index: {idx_config['index_name']}")
+                    conn.execute(text(sql))
+                    conn.commit()
+            except Exception as e:
+                logger.warning(f"Could not create text search index {idx_config['index_name']}: {e}")
+
     def ensure_system_tables(self):
         """Ensure Table and TableStatus tables exist."""
         if self._system_tables_created:
@@ -678,6 +738,9 @@ class MigrationManager:
         # Create HNSW indexes for vector columns (after tables exist, when enabled)
         self.ensure_hnsw_indexes()
 
+        # Create keyword search indexes (after tables exist)
+        self.ensure_text_search_indexes()
+
         # Seed data if requested
         if seed_data:
             self._seed_default_data()
@@ -8,8 +8,11 @@ from api.models.key import Key
 from api.models.entity import Entity
 from api.models.relationship import Relationship
 from api.models.document import Document
+from api.models.document_chunk import DocumentChunk
+from api.models.embedding_cache import CachedEmbedding
 from api.models.message import Message
 from api.models.message_read import MessageRead
+from api.models.inbox import Inbox, InboxMessage
 from api.models.model import Model
 from api.models.client import Client, ClientType, CLIENT_PERSONA_AFFINITIES, get_client_types, get_client_affinities, is_valid_client, DEFAULT_CLIENTS
 from api.models.agent import Agent
@@ -23,6 +26,7 @@ from api.models.repository_stats import RepositoryStats
 from api.models.commit import Commit
 from api.models.metric import Metric, MetricTypes
 from api.models.activity import Activity, ActivityType
+from api.models.activity_rollup import ActivityRollup
 from api.models.user import User
 from api.models.session import Session
 from api.models.domain import Domain
@@ -43,8 +47,12 @@ __all__ = [
     'Entity',
     'Relationship',
     'Document',
+    'DocumentChunk',
+    'CachedEmbedding',
     'Message',
     'MessageRead',
+    'Inbox',
+    'InboxMessage',
     'Model',
     'Client',
     'ClientType',
@@ -66,6 +74,7 @@ __all__ = [
     'MetricTypes',
     'Activity',
     'ActivityType',
+    'ActivityRollup',
     'User',
     'Session',
     'Domain',
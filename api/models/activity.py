@@ -3,7 +3,7 @@ Collective Memory Platform - Activity Model
 
 Tracks system activities for the activity dashboard.
 """
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from enum import Enum
 from typing import List, Dict, Any, Optional
 from sqlalchemy import Column, String, DateTime, Index, func, text
@@ -31,12 +31,21 @@ class Activity(BaseModel):
     Activity log entry for tracking system events.
 
     Used to power the activity dashboard with real-time visualization.
-    Activities are auto-purged after RETENTION_DAYS.
+
+    On PostgreSQL the table is range-partitioned by created_at into one
+    partition per UTC day (activities_pYYYYMMDD) plus a default partition.
+    Retention drops whole partitions older than RETENTION_DAYS instead of
+    deleting rows, and queries filtered on created_at only scan the
+    partitions in range.
     """
     __tablename__ = 'activities'
 
     RETENTION_DAYS = 7
 
+    PARTITION_PREFIX = 'activities_p'
+    DEFAULT_PARTITION = 'activities_default'
+    UNPARTITIONED_TABLE = 'activities_unpartitioned'
+
     activity_key = Column(String(36), primary_key=True, default=get_key)
     activity_type = Column(String(50), nullable=False, index=True)
     actor = Column(String(100), nullable=False, index=True)  # agent_id or user_key or "system"
@@ -45,12 +54,14 @@ class Activity(BaseModel):
     target_type = Column(String(50), nullable=True)  # 'entity', 'message', 'agent'
     extra_data = Column(JSONB, default=dict)  # extra info like entity_type, name, channel
     domain_key = Column(String(36), nullable=True, index=True)  # domain for multi-tenancy
-    created_at = Column(DateTime(timezone=True), default=get_now, index=True)
+    # Partition key, so it must be part of the primary key
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=get_now, index=True)
 
     __table_args__ = (
         Index('ix_activities_created_type', 'created_at', 'activity_type'),
         Index('ix_activities_actor_created', 'actor', 'created_at'),
         Index('ix_activities_domain_created', 'domain_key', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
 
     _default_fields = ['activity_key', 'activity_type', 'actor', 'user_key', 'target_key', 'target_type', 'extra_data', 'domain_key']
@@ -58,7 +69,7 @@ class Activity(BaseModel):
 
     @classmethod
     def current_schema_version(cls) -> int:
-        return 2
+        return 3
 
     @classmethod
     def migrate(cls) -> bool:
@@ -68,11 +79,15 @@ class Activity(BaseModel):
         For activities created before multi-tenancy, attempts to set domain_key
         based on the actor's (agent's) owning user's domain. Activities with
         actor='system' or unrecognized actors remain without a domain.
+
+        Also converts an unpartitioned activities table to a partitioned one
+        and makes sure upcoming daily partitions exist.
         """
         from api.models.agent import Agent
         from api.models.user import User
 
-        migrated = False
+        migrated = cls.partition_table()
+        cls.ensure_partitions()
         # Only migrate records that have NULL domain_key
         records = cls.query.filter(cls.domain_key.is_(None)).all()
 
@@ -251,7 +266,10 @@ class Activity(BaseModel):
     @classmethod
     def purge_old(cls) -> int:
         """
-        Delete activities older than RETENTION_DAYS.
+        Delete activities older than RETENTION_DAYS row by row.
+
+        Only used when the table is not partitioned (e.g. not on PostgreSQL);
+        see drop_expired_partitions.
 
         Returns:
             Number of records deleted
@@ -263,6 +281,241 @@ class Activity(BaseModel):
 
         return result
 
+    # ========== Partitioning ==========
+
+    @classmethod
+    def is_partitioned(cls) -> bool:
+        """Check whether the activities table is a partitioned PostgreSQL table."""
+        if db.engine.dialect.name != 'postgresql':
+            return False
+        relkind = db.session.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+            {'table': cls.__tablename__}
+        ).scalar()
+        return relkind == 'p'
+
+    @classmethod
+    def partition_name(cls, day: date) -> str:
+        """Name of the partition holding activities created on day (UTC)."""
+        return f"{cls.PARTITION_PREFIX}{day:%Y%m%d}"
+
+    @staticmethod
+    def _day_bounds(day: date) -> tuple[datetime, datetime]:
+        start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        return start, start + timedelta(days=1)
+
+    @classmethod
+    def list_partitions(cls) -> List[date]:
+        """Days that currently have a partition attached, oldest first."""
+        names = db.session.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:table)"
+            ),
+            {'table': cls.__tablename__}
+        ).scalars()
+
+        days = []
+        for name in names:
+            if name.startswith(cls.PARTITION_PREFIX):
+                days.append(datetime.strptime(name[len(cls.PARTITION_PREFIX):], '%Y%m%d').date())
+        return sorted(days)
+
+    @classmethod
+    def _create_partition(cls, day: date) -> None:
+        """
+        Create and attach the partition for day.
+
+        Rows that landed in the default partition before the day's partition
+        existed are moved into it, since PostgreSQL refuses to attach a
+        partition whose range overlaps rows in the default partition.
+        """
+        name = cls.partition_name(day)
+        start, end = cls._day_bounds(day)
+        bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        params = {'start': start, 'end': end}
+
+        stranded = db.session.execute(
+            text(
+                f"SELECT EXISTS(SELECT 1 FROM {cls.DEFAULT_PARTITION} "
+                f"WHERE created_at >= :start AND created_at < :end)"
+            ),
+            params
+        ).scalar()
+
+        if not stranded:
+            db.session.execute(text(f"CREATE TABLE {name} PARTITION OF {cls.__tablename__} FOR VALUES {bounds}"))
+            return
+
+        db.session.execute(text(f"CREATE TABLE {name} (LIKE {cls.__tablename__} INCLUDING DEFAULTS)"))
+        db.session.execute(
+            text(
+                f"WITH moved AS ("
+                f"DELETE FROM {cls.DEFAULT_PARTITION} "
+                f"WHERE created_at >= :start AND created_at < :end RETURNING *"
+                f") INSERT INTO {name} SELECT * FROM moved"
+            ),
+            params
+        )
+        db.session.execute(text(f"ALTER TABLE {cls.__tablename__} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+
+    @classmethod
+    def ensure_partitions(
+        cls,
+        days_ahead: Optional[int] = None,
+        start: Optional[date] = None,
+        commit: bool = True
+    ) -> List[str]:
+        """
+        Create the default partition and daily partitions up to days_ahead.
+
+        Args:
+            days_ahead: Days after today to create (default CM_ACTIVITY_PARTITIONS_AHEAD)
+            start: First day to create (default today, UTC)
+            commit: Whether to commit (False when part of a larger transaction)
+
+        Returns:
+            Names of the partitions created
+        """
+        if not cls.is_partitioned():
+            return []
+
+        from api import config
+        if days_ahead is None:
+            days_ahead = config.CM_ACTIVITY_PARTITIONS_AHEAD
+
+        db.session.execute(
+            text(f"CREATE TABLE IF NOT EXISTS {cls.DEFAULT_PARTITION} PARTITION OF {cls.__tablename__} DEFAULT")
+        )
+
+        existing = set(cls.list_partitions())
+        today = get_now().date()
+        day = start or today
+        created = []
+        while day <= today + timedelta(days=days_ahead):
+            if day not in existing:
+                cls._create_partition(day)
+                created.append(cls.partition_name(day))
+            day += timedelta(days=1)
+
+        if commit:
+            db.session.commit()
+        return created
+
+    @classmethod
+    def drop_expired_partitions(
+        cls,
+        retention_days: Optional[int] = None,
+        drop: bool = True,
+        commit: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Detach (and by default drop) partitions older than the retention period.
+
+        A partition is expired once its whole day is before the cutoff, so
+        retention is rounded up to whole days. Stray rows in the default
+        partition are deleted.
+
+        Args:
+            retention_days: Days to keep (default RETENTION_DAYS)
+            drop: Drop detached partitions (False keeps them as standalone tables)
+            commit: Whether to commit (False when part of a larger transaction)
+
+        Returns:
+            Dict with 'partitions' (names detached) and 'deleted' (default partition rows)
+        """
+        if retention_days is None:
+            retention_days = cls.RETENTION_DAYS
+        cutoff = get_now() - timedelta(days=retention_days)
+
+        expired = [day for day in cls.list_partitions() if day + timedelta(days=1) <= cutoff.date()]
+        for day in expired:
+            name = cls.partition_name(day)
+            db.session.execute(text(f"ALTER TABLE {cls.__tablename__} DETACH PARTITION {name}"))
+            if drop:
+                db.session.execute(text(f"DROP TABLE {name}"))
+
+        deleted = db.session.execute(
+            text(f"DELETE FROM {cls.DEFAULT_PARTITION} WHERE created_at < :cutoff"),
+            {'cutoff': cutoff}
+        ).rowcount
+
+        if commit:
+            db.session.commit()
+        return {
+            'partitions': [cls.partition_name(day) for day in expired],
+            'dropped': drop,
+            'deleted': deleted,
+        }
+
+    @classmethod
+    def partition_table(cls) -> bool:
+        """
+        Convert an existing unpartitioned activities table in place.
+
+        Runs in one transaction under an advisory lock, so concurrent workers
+        starting up do not race. Rows already past retention are not copied.
+
+        Returns:
+            True if the table was converted
+        """
+        if db.engine.dialect.name != 'postgresql':
+            return False
+
+        db.session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {'name': cls.__tablename__})
+        relkind = db.session.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+            {'table': cls.__tablename__}
+        ).scalar()
+        if relkind != 'r':
+            db.session.commit()
+            return False
+
+        legacy = cls.UNPARTITIONED_TABLE
+        cutoff = get_now() - timedelta(days=cls.RETENTION_DAYS)
+
+        db.session.execute(text(f"ALTER TABLE {cls.__tablename__} RENAME TO {legacy}"))
+
+        # Free the index and constraint names for the new parent table
+        constraints = db.session.execute(
+            text("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table) AND contype = 'p'"),
+            {'table': legacy}
+        ).scalars().all()
+        for name in constraints:
+            db.session.execute(text(f'ALTER TABLE {legacy} DROP CONSTRAINT "{name}"'))
+        indexes = db.session.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :table"),
+            {'table': legacy}
+        ).scalars().all()
+        for name in indexes:
+            db.session.execute(text(f'DROP INDEX "{name}"'))
+
+        cls.__table__.create(bind=db.session.connection())
+
+        oldest = db.session.execute(
+            text(f"SELECT min(created_at) FROM {legacy} WHERE created_at >= :cutoff"),
+            {'cutoff': cutoff}
+        ).scalar()
+        cls.ensure_partitions(start=oldest.astimezone(timezone.utc).date() if oldest else None, commit=False)
+
+        columns = ', '.join(column.name for column in cls.__table__.columns)
+        source = ', '.join(
+            'COALESCE(created_at, now())' if column.name == 'created_at' else column.name
+            for column in cls.__table__.columns
+        )
+        db.session.execute(
+            text(
+                f"INSERT INTO {cls.__tablename__} ({columns}) "
+                f"SELECT {source} FROM {legacy} "
+                f"WHERE created_at >= :cutoff OR created_at IS NULL"
+            ),
+            {'cutoff': cutoff}
+        )
+        db.session.execute(text(f"DROP TABLE {legacy}"))
+        db.session.commit()
+        return True
+
     @classmethod
     def get_activity_types(cls) -> List[str]:
         """Get list of available activity types."""
@@ -0,0 +1,376 @@
+"""
+Collective Memory Platform - Activity Rollup Model
+
+Pre-aggregated activity counts for the activity dashboard.
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Column, String, DateTime, Integer, Index, and_, func, or_, text
+
+from api.models.base import BaseModel, db, get_now
+
+
+class ActivityRollup(BaseModel):
+    """
+    Activity counts per bucket, domain, activity type and actor.
+
+    Rows exist at three granularities (minute, hour and day buckets, all
+    aligned to UTC) and are updated incrementally by the activity buffer in
+    the same transaction that inserts the raw activities. Timeline and
+    summary queries read the coarsest granularity that fits, so their cost
+    depends on the time range rather than the raw activity volume.
+
+    Activities without a domain are stored with domain_key '' because the
+    domain is part of the primary key.
+    """
+    __tablename__ = 'activity_rollups'
+
+    GRANULARITIES = {
+        'minute': timedelta(minutes=1),
+        'hour': timedelta(hours=1),
+        'day': timedelta(days=1),
+    }
+
+    # Days each granularity is kept
+    RETENTION_DAYS = {
+        'minute': 7,
+        'hour': 90,
+        'day': 730,
+    }
+
+    granularity = Column(String(10), primary_key=True)  # 'minute', 'hour' or 'day'
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # bucket start (UTC)
+    domain_key = Column(String(36), primary_key=True, default='')
+    activity_type = Column(String(50), primary_key=True)
+    actor = Column(String(100), primary_key=True)
+    activity_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_activity_rollups_domain_bucket', 'granularity', 'domain_key', 'bucket'),
+    )
+
+    _default_fields = ['granularity', 'bucket', 'domain_key', 'activity_type', 'actor', 'activity_count']
+
+    @classmethod
+    def migrate(cls) -> bool:
+        """Build rollups from raw activities the first time the table is used."""
+        if db.session.query(cls.bucket).first() is not None:
+            return False
+        return cls.rebuild() > 0
+
+    # ========== Bucketing ==========
+
+    @classmethod
+    def floor(cls, moment: datetime, granularity: str) -> datetime:
+        """Start of the bucket containing moment."""
+        moment = moment.astimezone(timezone.utc)
+        if granularity == 'minute':
+            return moment.replace(second=0, microsecond=0)
+        if granularity == 'hour':
+            return moment.replace(minute=0, second=0, microsecond=0)
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def ceil(cls, moment: datetime, granularity: str) -> datetime:
+        """Start of the first bucket at or after moment."""
+        start = cls.floor(moment, granularity)
+        return start if start == moment else start + cls.GRANULARITIES[granularity]
+
+    @classmethod
+    def granularity_for(cls, bucket_minutes: int) -> str:
+        """Coarsest granularity whose buckets fit evenly into bucket_minutes."""
+        for granularity in ('day', 'hour', 'minute'):
+            step = int(cls.GRANULARITIES[granularity].total_seconds() // 60)
+            if bucket_minutes % step == 0:
+                return granularity
+        return 'minute'
+
+    @classmethod
+    def finest_retained(cls, moment: datetime) -> str:
+        """Finest granularity still kept for moment."""
+        age = get_now() - moment
+        for granularity in ('minute', 'hour', 'day'):
+            if age <= timedelta(days=cls.RETENTION_DAYS[granularity]):
+                return granularity
+        return 'day'
+
+    @classmethod
+    def cover(cls, since: datetime, until: datetime) -> List[Tuple[str, datetime, datetime]]:
+        """
+        Split [since, until) into aligned (granularity, start, end) segments.
+
+        Whole days are read from day rollups, the remaining whole hours from
+        hour rollups and the edges from minute rollups. since is first
+        rounded down to the finest granularity still retained for it.
+        """
+        since = cls.floor(since, cls.finest_retained(since))
+        until = cls.ceil(until, 'minute')
+
+        def split(start, end, levels):
+            if start >= end:
+                return []
+            granularity = levels[0]
+            if len(levels) == 1:
+                return [(granularity, start, end)]
+            inner_start = cls.ceil(start, granularity)
+            inner_end = cls.floor(end, granularity)
+            if inner_start >= inner_end:
+                return split(start, end, levels[1:])
+            return (
+                split(start, inner_start, levels[1:])
+                + [(granularity, inner_start, inner_end)]
+                + split(inner_end, end, levels[1:])
+            )
+
+        return split(since, until, ['day', 'hour', 'minute'])
+
+    # ========== Writes ==========
+
+    @classmethod
+    def add_rows(cls, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add raw activity rows to every granularity with one upsert.
+
+        Rows are counted in memory first, so a batch of heartbeats from one
+        agent becomes a single increment per bucket. Keys are upserted in
+        sorted order so concurrent writers lock rows in the same order.
+        Does not commit; the caller's transaction also inserts the raw rows.
+
+        Returns number of rollup rows touched.
+        """
+        counts: Counter = Counter()
+        for row in rows:
+            created_at = row.get('created_at') or get_now()
+            for granularity in cls.GRANULARITIES:
+                counts[(
+                    granularity,
+                    cls.floor(created_at, granularity),
+                    row.get('domain_key') or '',
+                    row['activity_type'],
+                    row['actor'],
+                )] += 1
+
+        if not counts:
+            return 0
+
+        values = [
+            {
+                'granularity': granularity,
+                'bucket': bucket,
+                'domain_key': domain_key,
+                'activity_type': activity_type,
+                'actor': actor,
+                'activity_count': count,
+            }
+            for (granularity, bucket, domain_key, activity_type, actor), count in sorted(counts.items())
+        ]
+
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            insert = None
+
+        if insert is not None:
+            statement = insert(cls.__table__).values(values)
+            statement = statement.on_conflict_do_update(
+                index_elements=[c.name for c in cls.__table__.primary_key.columns],
+                set_={'activity_count': cls.__table__.c.activity_count + statement.excluded.activity_count}
+            )
+            db.session.execute(statement)
+        else:
+            for value in values:
+                existing = db.session.get(cls, tuple(value[c.name] for c in cls.__table__.primary_key.columns))
+                if existing:
+                    existing.activity_count += value['activity_count']
+                else:
+                    db.session.add(cls(**value))
+        return len(values)
+
+    @classmethod
+    def rebuild(cls, since: Optional[datetime] = None) -> int:
+        """
+        Recompute rollups from raw activities.
+
+        Deletes rollups from the start of the day containing since and
+        re-aggregates the raw rows from there in SQL. since defaults to the
+        oldest raw activity, so history that only survives in hour and day
+        rollups is kept.
+
+        Returns number of rollup rows written.
+        """
+        from api.models.activity import Activity
+
+        if since is None:
+            since = db.session.query(func.min(Activity.created_at)).scalar()
+            if since is None:
+                return 0
+        since = cls.floor(since, 'day')
+        db.session.execute(cls.__table__.delete().where(cls.bucket >= since))
+
+        written = 0
+        for granularity in cls.GRANULARITIES:
+            bucket = func.date_trunc(granularity, func.timezone('UTC', Activity.created_at))
+            select = db.session.query(
+                func.timezone('UTC', bucket).label('bucket'),
+                func.coalesce(Activity.domain_key, '').label('domain_key'),
+                Activity.activity_type,
+                Activity.actor,
+                func.count().label('activity_count'),
+            ).filter(
+                Activity.created_at >= since
+            ).group_by(text('1'), text('2'), Activity.activity_type, Activity.actor)
+
+            rows = [
+                {
+                    'granularity': granularity,
+                    'bucket': row.bucket,
+                    'domain_key': row.domain_key,
+                    'activity_type': row.activity_type,
+                    'actor': row.actor,
+                    'activity_count': row.activity_count,
+                }
+                for row in select.all()
+            ]
+            if rows:
+                db.session.execute(cls.__table__.insert(), rows)
+                written += len(rows)
+
+        db.session.commit()
+        return written
+
+    @classmethod
+    def purge_old(cls, commit: bool = True) -> int:
+        """
+        Delete rollups past each granularity's retention.
+
+        Returns number of rows deleted.
+        """
+        now = get_now()
+        deleted = db.session.query(cls).filter(or_(*[
+            and_(cls.granularity == granularity, cls.bucket < now - timedelta(days=days))
+            for granularity, days in cls.RETENTION_DAYS.items()
+        ])).delete(synchronize_session=False)
+        if commit:
+            db.session.commit()
+        return deleted
+
+    # ========== Reads ==========
+
+    @classmethod
+    def get_summary(
+        cls,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        domain_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get activity counts by type, in the same shape as Activity.get_summary.
+
+        Args:
+            since: Only count activities after this time (default: everything retained)
+            until: Only count activities before this time (default: now)
+            domain_key: Filter by domain (for multi-tenancy)
+
+        Returns:
+            Dict with 'summary' (type -> count) and 'total' count
+        """
+        if since is None:
+            since = get_now() - timedelta(days=cls.RETENTION_DAYS['day'])
+        segments = cls.cover(since, until or get_now())
+
+        query = db.session.query(
+            cls.activity_type,
+            func.sum(cls.activity_count).label('activity_count')
+        ).filter(or_(*[
+            and_(cls.granularity == granularity, cls.bucket >= start, cls.bucket < end)
+            for granularity, start, end in segments
+        ]) if segments else text('false'))
+
+        if domain_key:
+            query = query.filter(cls.domain_key == domain_key)
+
+        summary = {r.activity_type: int(r.activity_count) for r in query.group_by(cls.activity_type).all()}
+
+        return {
+            'summary': summary,
+            'total': sum(summary.values())
+        }
+
+    @classmethod
+    def get_timeline(
+        cls,
+        hours: int = 24,
+        bucket_minutes: int = 60,
+        since: Optional[datetime] = None,
+        domain_key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get time-bucketed activity counts, in the same shape as Activity.get_timeline.
+
+        Reads the coarsest rollup whose buckets fit evenly into bucket_minutes.
+        The first bucket counts from the start of the rollup bucket containing
+        since.
+
+        Args:
+            hours: Number of hours to look back
+            bucket_minutes: Size of each time bucket in minutes
+            since: Override start time (defaults to hours ago)
+            domain_key: Filter by domain (for multi-tenancy)
+
+        Returns:
+            List of dicts with timestamp, total, and per-type counts
+        """
+        if since is None:
+            since = get_now() - timedelta(hours=hours)
+
+        granularity = cls.granularity_for(bucket_minutes)
+        bucket_seconds = bucket_minutes * 60
+        bucket_expr = func.to_timestamp(
+            func.floor(
+                func.extract('epoch', cls.bucket) / bucket_seconds
+            ) * bucket_seconds
+        ).label('bucket')
+
+        query = db.session.query(
+            bucket_expr,
+            cls.activity_type,
+            func.sum(cls.activity_count).label('activity_count')
+        ).filter(
+            cls.granularity == granularity,
+            cls.bucket >= cls.floor(since, granularity)
+        )
+
+        if domain_key:
+            query = query.filter(cls.domain_key == domain_key)
+
+        results = query.group_by(text("1"), cls.activity_type).order_by(text("1")).all()
+
+        timeline: Dict[datetime, Dict[str, int]] = {}
+        for r in results:
+            counts = timeline.setdefault(r.bucket, {'total': 0})
+            counts[r.activity_type] = int(r.activity_count)
+            counts['total'] += int(r.activity_count)
+
+        return [
+            {
+                'timestamp': ts.isoformat(),
+                **counts
+            }
+            for ts, counts in sorted(timeline.items())
+        ]
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary."""
+        return {
+            'granularity': self.granularity,
+            'bucket': self.bucket.isoformat() if self.bucket else None,
+            'domain_key': self.domain_key or None,
+            'activity_type': self.activity_type,
+            'actor': self.actor,
+            'activity_count': self.activity_count,
+        }
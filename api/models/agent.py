@@ -295,26 +295,25 @@ class Agent(BaseModel):
 
         # Expand model and persona to full objects for UI
         if expand_relations:
-            if self.model_key:
-                from api.models import Model
-                model = Model.get_by_key(self.model_key)
-                if model:
-                    result['model'] = {
-                        'model_key': model.model_key,
-                        'name': model.name,
-                        'provider': model.provider,
-                        'model_id': model.model_id,
-                    }
-
-            if self.persona_key:
-                from api.models import Persona
-                persona = Persona.get_by_key(self.persona_key)
-                if persona:
-                    result['persona'] = {
-                        'persona_key': persona.persona_key,
-                        'name': persona.name,
-                        'role': persona.role,
-                        'color': persona.color,
-                    }
+            from api.models import Model, Persona
+            from api.services.relations import relation_loader
+
+            model = relation_loader.get(Model, self.model_key)
+            if model:
+                result['model'] = {
+                    'model_key': model.model_key,
+                    'name': model.name,
+                    'provider': model.provider,
+                    'model_id': model.model_id,
+                }
+
+            persona = relation_loader.get(Persona, self.persona_key)
+            if persona:
+                result['persona'] = {
+                    'persona_key': persona.persona_key,
+                    'name': persona.name,
+                    'role': persona.role,
+                    'color': persona.color,
+                }
 
         return result
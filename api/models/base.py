@@ -7,7 +7,7 @@ Enhanced with schema versioning and migration support.
 from datetime import datetime, timezone
 from typing import Optional, Type, TypeVar, List, Dict, Any
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, inspect
 from sqlalchemy.dialects.postgresql import JSONB
 import uuid
 
@@ -169,10 +169,14 @@ class BaseModel(db.Model):
         """
         Convert the model to a dictionary.
 
-        Override in subclasses for custom serialization.
+        Override in subclasses for custom serialization. Deferred columns
+        (embedding vectors) are left out, so serializing never loads them.
         """
         result = {}
+        mapper = inspect(self).mapper
         for column in self.__table__.columns:
+            if mapper.get_property_by_column(column).deferred:
+                continue
             value = getattr(self, column.name)
             if isinstance(value, datetime):
                 value = value.isoformat()
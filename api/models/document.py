@@ -5,9 +5,9 @@ Documents with vector embeddings for semantic search.
 """
 
 import os
-from sqlalchemy import Column, String, Text, Float, DateTime, ForeignKey, Index
+from sqlalchemy import Column, String, Text, Float, DateTime, ForeignKey, Index, event, inspect
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, deferred, object_session, relationship
 
 try:
     from pgvector.sqlalchemy import Vector
@@ -40,11 +40,15 @@ class Document(BaseModel):
     content = Column(Text, nullable=False)
     content_type = Column(String(50), default='markdown')
 
-    # Vector embedding (1536 dimensions for OpenAI text-embedding-3-small)
+    # Vector embedding (1536 dimensions for OpenAI text-embedding-3-small).
+    # Deferred: queries leave it out unless it is accessed or undeferred.
     if PGVECTOR_ENABLED:
-        embedding = Column(Vector(1536), nullable=True)
+        embedding = deferred(Column(Vector(1536), nullable=True))
     else:
-        embedding = Column(Text, nullable=True)  # Fallback for dev / DB without pgvector extension
+        embedding = deferred(Column(Text, nullable=True))  # Fallback for dev / DB without pgvector extension
+
+    # Loaded with the row instead of the vector
+    has_embedding = column_property(embedding.columns[0].isnot(None))
 
     # Metadata
     # NOTE: "metadata" is reserved by SQLAlchemy's Declarative API, so we use a different
@@ -94,6 +98,9 @@ class Document(BaseModel):
         """
         Semantic similarity search using cosine distance.
 
+        Runs in Postgres with pgvector, or on the in-process vector index
+        (api.utils.vector_index) when pgvector is not enabled.
+
         Args:
             query_embedding: Query embedding vector (1536 dimensions)
             limit: Maximum results
@@ -103,10 +110,13 @@ class Document(BaseModel):
         Returns:
             List of documents ordered by similarity
         """
-        if not PGVECTOR_ENABLED:
+        from api.utils.vector_index import vector_index_cache
+
+        backend = vector_index_cache.backend
+        if backend is None:
             raise RuntimeError(
-                "pgvector semantic search disabled. "
-                "Enable with CM_ENABLE_PGVECTOR=true and ensure the Postgres pgvector extension is installed."
+                "Semantic search disabled. Enable pgvector with CM_ENABLE_PGVECTOR=true "
+                "(and the Postgres pgvector extension), or install numpy for the in-process index."
             )
 
         query = cls.query.filter(cls.embedding.isnot(None))
@@ -114,6 +124,15 @@ class Document(BaseModel):
         if content_type:
             query = query.filter(cls.content_type == content_type)
 
+        if backend == 'memory':
+            return vector_index_cache.search_models(
+                query, query_embedding, limit=limit, threshold=threshold,
+                where={'content_type': content_type}
+            )
+
+        if threshold is not None:
+            query = query.filter(cls.embedding.cosine_distance(query_embedding) <= 1 - threshold)
+
         # Order by cosine distance (smaller = more similar)
         query = query.order_by(
             cls.embedding.cosine_distance(query_embedding)
@@ -141,7 +160,7 @@ class Document(BaseModel):
             'metadata': self.extra_data,
             'source': self.source,
             'entity_key': self.entity_key,
-            'has_embedding': self.embedding is not None,
+            'has_embedding': self.embedding is not None if self.has_embedding is None else bool(self.has_embedding),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -166,6 +185,10 @@ class Document(BaseModel):
             raise ValueError(f"Embedding must be 1536 dimensions, got {len(embedding)}")
         self.embedding = embedding
 
+    def embedding_text(self) -> str:
+        """Build the text representation embedded for this document (title and content)."""
+        return f"{self.title}\n\n{self.content}"
+
     def generate_embedding(self, embedding_service=None) -> list:
         """
         Generate and set embedding from content.
@@ -179,8 +202,34 @@ class Document(BaseModel):
         if embedding_service is None:
             from api.services import embedding_service
 
-        # Combine title and content for embedding
-        text = f"{self.title}\n\n{self.content}"
-        embedding = embedding_service.get_embedding(text)
+        embedding = embedding_service.get_embedding(self.embedding_text())
         self.set_embedding(embedding)
         return embedding
+
+
+# ========== Vector index maintenance ==========
+
+# Columns the in-process vector index stores or filters on
+_VECTOR_INDEX_FIELDS = ('embedding', 'content_type')
+
+
+@event.listens_for(Document, 'after_insert')
+def _document_vector_inserted(mapper, connection, target):
+    """Load a row inserted with an embedding into the in-process vector index on commit."""
+    if inspect(target).attrs.embedding.history.has_changes():
+        _document_vector_written(mapper, connection, target)
+
+
+@event.listens_for(Document, 'after_update')
+def _document_vector_updated(mapper, connection, target):
+    """Reload a row whose vector or filter columns changed, on commit."""
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _VECTOR_INDEX_FIELDS):
+        _document_vector_written(mapper, connection, target)
+
+
+@event.listens_for(Document, 'after_delete')
+def _document_vector_written(mapper, connection, target):
+    """Reload (or drop) the row in the in-process vector index once the write commits."""
+    from api.utils.vector_index import vector_index_cache
+    vector_index_cache.record_write(object_session(target), 'documents', target.document_key)
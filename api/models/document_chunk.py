@@ -0,0 +1,229 @@
+"""
+Collective Memory Platform - Document Chunk Model
+
+Chunks of ingested documents, each with its own embedding.
+"""
+
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index, event, inspect
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import backref, column_property, deferred, joinedload, object_session, relationship
+
+from api.models.base import BaseModel, db, get_key, get_now
+from api.models.document import PGVECTOR_ENABLED, Document, Vector
+
+
+class DocumentChunk(BaseModel):
+    """
+    One chunk of a document, as produced by DocumentProcessor.
+
+    Chunks are what semantic search and context assembly rank, so a long
+    document is matched by its most relevant passage rather than as a
+    whole. content_hash identifies the embedded text, so re-ingesting a
+    document only re-embeds the chunks that changed.
+    """
+    __tablename__ = 'document_chunks'
+
+    chunk_key = Column(String(36), primary_key=True, default=get_key)
+    document_key = Column(String(36), ForeignKey('documents.document_key', ondelete='CASCADE'), nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=False)  # sha256 hex of embedding_text()
+
+    # [start_offset, end_offset) of the chunk in the document's content
+    start_offset = Column(Integer, nullable=False, default=0)
+    end_offset = Column(Integer, nullable=False, default=0)
+    section_header = Column(String(500), nullable=True)
+
+    # Deferred like Document.embedding
+    if PGVECTOR_ENABLED:
+        embedding = deferred(Column(Vector(1536), nullable=True))
+    else:
+        embedding = deferred(Column(Text, nullable=True))
+
+    has_embedding = column_property(embedding.columns[0].isnot(None))
+
+    # NOTE: "metadata" is reserved by SQLAlchemy's Declarative API (see Document)
+    extra_data = Column("metadata", JSONB, default=dict)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), default=get_now)
+    updated_at = Column(DateTime(timezone=True), default=get_now, onupdate=get_now)
+
+    # Relationships (deleting a document deletes its chunks through the ORM,
+    # so the vector index hooks below see each one)
+    document = relationship('Document', backref=backref(
+        'chunks', cascade='all, delete-orphan', lazy='dynamic', order_by='DocumentChunk.chunk_index'
+    ))
+
+    # Indexes
+    __table_args__ = (
+        Index('ix_document_chunks_document_key', 'document_key', 'chunk_index'),
+    )
+
+    _default_fields = ['chunk_key', 'document_key', 'chunk_index', 'start_offset', 'end_offset']
+    _readonly_fields = ['chunk_key', 'created_at']
+
+    @classmethod
+    def current_schema_version(cls) -> int:
+        return 1
+
+    @staticmethod
+    def text_for(title: str, section_header: str, content: str) -> str:
+        """Text embedded for a chunk: document title, section header and chunk content."""
+        return "\n\n".join(part for part in (title, section_header, content) if part)
+
+    def embedding_text(self) -> str:
+        """Build the text representation embedded for this chunk."""
+        return self.text_for(self.document.title if self.document else '', self.section_header, self.content)
+
+    @classmethod
+    def sync(cls, document, chunks: list) -> list[str]:
+        """
+        Replace a document's stored chunks with freshly processed ones.
+
+        A stored chunk whose content_hash matches a new chunk is kept,
+        with its embedding, and only moved to the new index and offsets.
+        New chunks are inserted without an embedding and stored chunks
+        with no match are deleted. Commits.
+
+        Args:
+            document: The Document the chunks belong to
+            chunks: DocumentChunk dataclasses from DocumentProcessor
+
+        Returns:
+            Keys of the chunks that need an embedding
+        """
+        from api.services.embedding import EmbeddingCache
+
+        stored: dict[str, list['DocumentChunk']] = {}
+        for row in cls.query.filter_by(document_key=document.document_key).order_by(cls.chunk_index).all():
+            stored.setdefault(row.content_hash, []).append(row)
+
+        stale = []
+        for chunk in chunks:
+            section_header = chunk.metadata.get('section_header') or None
+            content_hash = EmbeddingCache.text_hash(cls.text_for(document.title, section_header, chunk.content))
+
+            matches = stored.get(content_hash)
+            row = matches.pop(0) if matches else cls(
+                chunk_key=get_key(),
+                document_key=document.document_key,
+                content=chunk.content,
+                content_hash=content_hash,
+                section_header=section_header,
+            )
+            row.chunk_index = chunk.chunk_index
+            row.start_offset = chunk.start_offset
+            row.end_offset = chunk.end_offset
+            row.extra_data = chunk.metadata
+            db.session.add(row)
+            if not row.has_embedding:
+                stale.append(row.chunk_key)
+
+        for rows in stored.values():
+            for row in rows:
+                db.session.delete(row)
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return stale
+
+    @classmethod
+    def search_semantic(
+        cls,
+        query_embedding: list,
+        limit: int = 10,
+        document_key: str = None,
+        threshold: float = None
+    ) -> list['DocumentChunk']:
+        """
+        Semantic similarity search over chunks using cosine distance.
+
+        Runs in Postgres with pgvector, or on the in-process vector index
+        when pgvector is not enabled (as Document.search_semantic).
+
+        Args:
+            query_embedding: Query embedding vector (1536 dimensions)
+            limit: Maximum results
+            document_key: Only search the chunks of this document
+            threshold: Optional similarity threshold (0-1, higher is more similar)
+
+        Returns:
+            List of chunks ordered by similarity
+        """
+        from api.utils.vector_index import vector_index_cache
+
+        backend = vector_index_cache.backend
+        if backend is None:
+            raise RuntimeError(
+                "Semantic search disabled. Enable pgvector with CM_ENABLE_PGVECTOR=true "
+                "(and the Postgres pgvector extension), or install numpy for the in-process index."
+            )
+
+        # Callers show the chunk with its document's title
+        query = cls.query.filter(cls.embedding.isnot(None)).options(
+            joinedload(cls.document).load_only(Document.title, Document.content_type)
+        )
+
+        if document_key:
+            query = query.filter(cls.document_key == document_key)
+
+        if backend == 'memory':
+            return vector_index_cache.search_models(
+                query, query_embedding, limit=limit, threshold=threshold,
+                where={'document_key': document_key}
+            )
+
+        if threshold is not None:
+            query = query.filter(cls.embedding.cosine_distance(query_embedding) <= 1 - threshold)
+
+        return query.order_by(
+            cls.embedding.cosine_distance(query_embedding)
+        ).limit(limit).all()
+
+    def to_dict(self, include_content: bool = True) -> dict:
+        """Convert to dictionary."""
+        result = {
+            'chunk_key': self.chunk_key,
+            'document_key': self.document_key,
+            'chunk_index': self.chunk_index,
+            'section_header': self.section_header,
+            'start_offset': self.start_offset,
+            'end_offset': self.end_offset,
+            'content_hash': self.content_hash,
+            'metadata': self.extra_data,
+            'has_embedding': self.embedding is not None if self.has_embedding is None else bool(self.has_embedding),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+        if include_content:
+            result['content'] = self.content
+
+        return result
+
+
+# ========== Vector index maintenance ==========
+
+@event.listens_for(DocumentChunk, 'after_insert')
+def _chunk_vector_inserted(mapper, connection, target):
+    """Load a chunk inserted with an embedding into the in-process vector index on commit."""
+    if inspect(target).attrs.embedding.history.has_changes():
+        _chunk_vector_written(mapper, connection, target)
+
+
+@event.listens_for(DocumentChunk, 'after_update')
+def _chunk_vector_updated(mapper, connection, target):
+    """Reload a chunk whose vector changed, on commit."""
+    if inspect(target).attrs.embedding.history.has_changes():
+        _chunk_vector_written(mapper, connection, target)
+
+
+@event.listens_for(DocumentChunk, 'after_delete')
+def _chunk_vector_written(mapper, connection, target):
+    """Reload (or drop) the chunk in the in-process vector index once the write commits."""
+    from api.utils.vector_index import vector_index_cache
+    vector_index_cache.record_write(object_session(target), 'document_chunks', target.chunk_key)
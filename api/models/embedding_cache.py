@@ -0,0 +1,99 @@
+"""
+Collective Memory Platform - Embedding Cache Model
+
+Persistent, shared store of generated embeddings keyed by content hash.
+"""
+
+from sqlalchemy import Column, String, Integer, DateTime, LargeBinary
+from api.models.base import BaseModel, db, get_now
+
+
+class CachedEmbedding(BaseModel):
+    """
+    Embedding vector cached by (model, dimensions, text hash).
+
+    Shared by all workers and survives restarts, so identical text is only
+    sent to the embedding provider once. Vectors are stored as packed
+    float32 bytes (4 bytes per dimension).
+    """
+    __tablename__ = 'embedding_cache'
+
+    model = Column(String(100), primary_key=True)
+    dimensions = Column(Integer, primary_key=True)
+    text_hash = Column(String(64), primary_key=True)  # sha256 hex of the embedded text
+
+    vector = Column(LargeBinary, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), default=get_now)
+
+    @classmethod
+    def get_many(cls, model: str, dimensions: int, text_hashes: list[str]) -> dict[str, bytes]:
+        """
+        Get packed vectors for the given text hashes. Returns dict of text_hash -> bytes.
+
+        Reads on its own connection, so callers' sessions are never touched.
+        """
+        if not text_hashes:
+            return {}
+        table = cls.__table__
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                db.select(table.c.text_hash, table.c.vector).where(
+                    table.c.model == model,
+                    table.c.dimensions == dimensions,
+                    table.c.text_hash.in_(text_hashes)
+                )
+            ).all()
+        return {text_hash: bytes(vector) for text_hash, vector in rows}
+
+    @classmethod
+    def put_many(cls, model: str, dimensions: int, vectors: dict[str, bytes]) -> None:
+        """
+        Store packed vectors keyed by text hash in one statement.
+
+        Writes in its own transaction on its own connection, so it neither
+        commits nor rolls back the caller's session. Existing rows are left
+        untouched, so concurrent writers of the same text never conflict.
+        """
+        if not vectors:
+            return
+
+        rows = [
+            {
+                'model': model,
+                'dimensions': dimensions,
+                'text_hash': text_hash,
+                'vector': vector,
+                'created_at': get_now(),
+            }
+            for text_hash, vector in vectors.items()
+        ]
+
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            insert = None
+
+        if insert is None:
+            existing = cls.get_many(model, dimensions, list(vectors))
+            rows = [row for row in rows if row['text_hash'] not in existing]
+            if not rows:
+                return
+
+        with db.engine.begin() as connection:
+            if insert is not None:
+                connection.execute(insert(cls.__table__).values(rows).on_conflict_do_nothing())
+            else:
+                connection.execute(cls.__table__.insert(), rows)
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary (without the vector bytes)."""
+        return {
+            'model': self.model,
+            'dimensions': self.dimensions,
+            'text_hash': self.text_hash,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
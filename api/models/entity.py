@@ -5,9 +5,13 @@ Knowledge graph entities representing concepts, people, projects, etc.
 """
 
 import os
-from sqlalchemy import Column, String, Float, DateTime, Index, Text
+from sqlalchemy import (
+    Column, String, Float, DateTime, Index, Integer, Text, column, event, false, func, inspect,
+    literal, select, values,
+)
 from sqlalchemy.dialects.postgresql import JSONB
-from typing import List, Optional
+from sqlalchemy.orm import column_property, deferred, object_session
+from typing import List, Optional, Tuple
 
 try:
     from pgvector.sqlalchemy import Vector
@@ -56,11 +60,15 @@ class Entity(BaseModel):
     confidence = Column(Float, default=1.0)
     source = Column(String(100), nullable=True)
 
-    # Vector embedding (1536 dimensions for OpenAI text-embedding-3-small)
+    # Vector embedding (1536 dimensions for OpenAI text-embedding-3-small).
+    # Deferred: queries leave it out unless it is accessed or undeferred.
     if PGVECTOR_ENABLED:
-        embedding = Column(Vector(1536), nullable=True)
+        embedding = deferred(Column(Vector(1536), nullable=True))
     else:
-        embedding = Column(Text, nullable=True)  # Fallback for dev / DB without pgvector extension
+        embedding = deferred(Column(Text, nullable=True))  # Fallback for dev / DB without pgvector extension
+
+    # Loaded with the row instead of the vector
+    has_embedding = column_property(embedding.columns[0].isnot(None))
 
     created_at = Column(DateTime(timezone=True), default=get_now)
     updated_at = Column(DateTime(timezone=True), default=get_now, onupdate=get_now)
@@ -75,6 +83,11 @@ class Entity(BaseModel):
     _default_fields = ['entity_key', 'entity_type', 'name', 'properties', 'domain_key']
     _readonly_fields = ['entity_key', 'created_at']
 
+    # Properties searched along with the name. MigrationManager indexes this
+    # exact document; after changing it, drop ix_entities_search so the
+    # next migration rebuilds it.
+    SEARCH_PROPERTIES = ('description', 'summary', 'aliases')
+
     @classmethod
     def current_schema_version(cls) -> int:
         return 3  # Added work_session_key for session tracking
@@ -84,6 +97,24 @@ class Entity(BaseModel):
         """Get entities by type."""
         return cls.query.filter_by(entity_type=entity_type).limit(limit).all()
 
+    @classmethod
+    def search_document(cls):
+        """Text search document: name, then SEARCH_PROPERTIES (see api.utils.text_search)."""
+        from api.utils.text_search import search_document
+        return search_document(cls.name, cls.properties, cls.SEARCH_PROPERTIES)
+
+    @classmethod
+    def text_match(cls, text: str):
+        """Filter clause for entities whose name or search properties match text."""
+        from api.utils.text_search import text_match
+        return text_match(text, cls.name, cls.search_document())
+
+    @classmethod
+    def text_order(cls, text: str) -> list:
+        """ORDER BY expressions ranking text matches, best first."""
+        from api.utils.text_search import text_order
+        return text_order(text, cls.name, cls.search_document())
+
     @classmethod
     def search_by_name(
         cls,
@@ -93,7 +124,11 @@ class Entity(BaseModel):
         domain_key: str = None
     ) -> list['Entity']:
         """
-        Search entities by name (case-insensitive contains).
+        Ranked keyword search over names and search properties.
+
+        On PostgreSQL every term must match a word prefix; names rank above
+        properties and an exact name comes first. Served by the
+        ix_entities_search GIN index.
 
         Args:
             name_query: Search string
@@ -102,9 +137,9 @@ class Entity(BaseModel):
             domain_key: Optional domain filter (used if user not provided)
 
         Returns:
-            List of matching entities
+            List of matching entities, best match first
         """
-        query = cls.query.filter(cls.name.ilike(f'%{name_query}%'))
+        query = cls.query.filter(cls.text_match(name_query))
 
         # Apply scope filtering if user provided
         if user:
@@ -114,7 +149,7 @@ class Entity(BaseModel):
             # Fall back to domain filter if no user
             query = query.filter(cls.domain_key == domain_key)
 
-        return query.limit(limit).all()
+        return query.order_by(*cls.text_order(name_query), cls.entity_key).limit(limit).all()
 
     @classmethod
     def get_by_domain(cls, domain_key: str, limit: int = 100) -> list['Entity']:
@@ -134,6 +169,9 @@ class Entity(BaseModel):
         """
         Semantic similarity search using cosine distance.
 
+        Runs in Postgres with pgvector, or on the in-process vector index
+        (api.utils.vector_index) when pgvector is not enabled.
+
         Args:
             query_embedding: Query embedding vector (1536 dimensions)
             limit: Maximum results
@@ -145,10 +183,13 @@ class Entity(BaseModel):
         Returns:
             List of entities ordered by similarity
         """
-        if not PGVECTOR_ENABLED:
+        from api.utils.vector_index import vector_index_cache
+
+        backend = vector_index_cache.backend
+        if backend is None:
             raise RuntimeError(
-                "pgvector semantic search disabled. "
-                "Enable with CM_ENABLE_PGVECTOR=true and ensure the Postgres pgvector extension is installed."
+                "Semantic search disabled. Enable pgvector with CM_ENABLE_PGVECTOR=true "
+                "(and the Postgres pgvector extension), or install numpy for the in-process index."
             )
 
         query = cls.query.filter(cls.embedding.isnot(None))
@@ -164,6 +205,16 @@ class Entity(BaseModel):
             # Fall back to domain filter if no user
             query = query.filter(cls.domain_key == domain_key)
 
+        if backend == 'memory':
+            return vector_index_cache.search_models(
+                query, query_embedding, limit=limit, threshold=threshold,
+                where={'entity_type': entity_type, 'domain_key': None if user else domain_key},
+                user=user
+            )
+
+        if threshold is not None:
+            query = query.filter(cls.embedding.cosine_distance(query_embedding) <= 1 - threshold)
+
         # Order by cosine distance (smaller = more similar)
         query = query.order_by(
             cls.embedding.cosine_distance(query_embedding)
@@ -171,6 +222,9 @@ class Entity(BaseModel):
 
         return query.all()
 
+    # Rank offset for reciprocal-rank fusion; larger values flatten the gap between top ranks
+    HYBRID_RRF_K = 60
+
     @classmethod
     def search_hybrid(
         cls,
@@ -178,51 +232,123 @@ class Entity(BaseModel):
         query_embedding: List[float],
         limit: int = 10,
         keyword_weight: float = 0.3,
+        entity_type: str = None,
         user: 'User' = None,
-        domain_key: str = None
-    ) -> List['Entity']:
+        domain_key: str = None,
+        candidates: int = None
+    ) -> List[Tuple['Entity', dict]]:
         """
-        Hybrid search combining keyword and semantic search.
+        Hybrid search fusing keyword and semantic ranks (weighted RRF).
+
+        Each side ranks its own candidates: keyword matches (as
+        search_by_name) and nearest embeddings. An entity scores
+        keyword_weight / (k + keyword rank) + (1 - keyword_weight) / (k + semantic rank),
+        summed over the lists it appears in. Fusion, scope and type filters
+        and the final ordering run in one SQL statement; with the in-process
+        vector index the semantic ranks are passed in as a VALUES list.
 
         Args:
             keyword: Keyword to search for in name
             query_embedding: Query embedding vector
             limit: Maximum results
-            keyword_weight: Weight for keyword results (0-1)
+            keyword_weight: Weight for keyword ranks (0-1); semantic ranks get the rest
+            entity_type: Filter by entity type
             user: Optional user for scope filtering
             domain_key: Optional domain filter (used if user not provided)
+            candidates: Candidates taken from each side (default: 4 x limit, at least 20)
 
         Returns:
-            List of entities with combined ranking
+            (entity, scores) pairs, best first. scores has 'score',
+            'keyword_rank' and 'semantic_rank' (None if not in that list).
         """
-        if not PGVECTOR_ENABLED:
-            # Fall back to keyword search only
-            return cls.search_by_name(keyword, limit=limit, user=user, domain_key=domain_key)
+        from api.utils.vector_index import vector_index_cache
 
-        # Get keyword matches (with scope filtering)
-        keyword_results = cls.search_by_name(keyword, limit=limit * 2, user=user, domain_key=domain_key)
-        keyword_keys = {e.entity_key for e in keyword_results}
+        candidates = candidates or max(limit * 4, 20)
+        keyword_weight = min(max(keyword_weight, 0.0), 1.0)
 
-        # Get semantic matches (with scope filtering)
-        semantic_results = cls.search_semantic(query_embedding, limit=limit * 2, user=user, domain_key=domain_key)
-
-        # Combine results with simple fusion
-        seen = set()
-        combined = []
-
-        # Add keyword matches first (weighted higher)
-        for entity in keyword_results:
-            if entity.entity_key not in seen:
-                combined.append(entity)
-                seen.add(entity.entity_key)
+        base = cls.query
+        if entity_type:
+            base = base.filter(cls.entity_type == entity_type)
+        if user:
+            from api.services.scope import scope_service
+            base = scope_service.filter_query_by_scope(base, user, cls)
+        elif domain_key:
+            base = base.filter(cls.domain_key == domain_key)
+
+        keyword_ranks = cls._ranked(
+            base.filter(cls.text_match(keyword)), cls.text_order(keyword), candidates, 'keyword_ranks'
+        )
+
+        backend = vector_index_cache.backend
+        if backend == 'pgvector':
+            semantic_ranks = cls._ranked(
+                base.filter(cls.embedding.isnot(None)),
+                [cls.embedding.cosine_distance(query_embedding)],
+                candidates, 'semantic_ranks'
+            )
+        else:
+            hits = []
+            if backend == 'memory':
+                hits = vector_index_cache.search(
+                    cls.__tablename__, [query_embedding], candidates,
+                    where={'entity_type': entity_type, 'domain_key': None if user else domain_key},
+                    user=user
+                )[0]
+            if hits:
+                ranks = values(
+                    column('entity_key', String), column('rank', Integer), name='vector_ranks'
+                ).data([(key, rank) for rank, (key, _) in enumerate(hits, 1)])
+                # Joined back to the filtered query, guarding against index lag
+                semantic_ranks = base.join(ranks, ranks.c.entity_key == cls.entity_key).with_entities(
+                    cls.entity_key.label('entity_key'), ranks.c.rank.label('rank')
+                ).subquery('semantic_ranks')
+            else:
+                semantic_ranks = base.filter(false()).with_entities(
+                    cls.entity_key.label('entity_key'), literal(0).label('rank')
+                ).subquery('semantic_ranks')
+
+        k = cls.HYBRID_RRF_K
+        score = (
+            func.coalesce(keyword_weight / (k + keyword_ranks.c.rank), 0.0)
+            + func.coalesce((1 - keyword_weight) / (k + semantic_ranks.c.rank), 0.0)
+        )
+        fused = select(
+            func.coalesce(keyword_ranks.c.entity_key, semantic_ranks.c.entity_key).label('entity_key'),
+            keyword_ranks.c.rank.label('keyword_rank'),
+            semantic_ranks.c.rank.label('semantic_rank'),
+            score.label('score'),
+        ).select_from(
+            keyword_ranks.join(semantic_ranks, keyword_ranks.c.entity_key == semantic_ranks.c.entity_key, full=True)
+        ).subquery('fused')
+
+        rows = cls.query.join(fused, fused.c.entity_key == cls.entity_key).add_columns(
+            fused.c.score, fused.c.keyword_rank, fused.c.semantic_rank
+        ).order_by(fused.c.score.desc(), cls.entity_key).limit(limit).all()
+
+        return [
+            (entity, {'score': float(score), 'keyword_rank': keyword_rank, 'semantic_rank': semantic_rank})
+            for entity, score, keyword_rank, semantic_rank in rows
+        ]
 
-        # Add semantic matches
-        for entity in semantic_results:
-            if entity.entity_key not in seen:
-                combined.append(entity)
-                seen.add(entity.entity_key)
+    @classmethod
+    def _ranked(cls, query, order_by: list, limit: int, name: str):
+        """
+        Subquery of (entity_key, rank) for the first limit rows of query in order_by order.
 
-        return combined[:limit]
+        The limit is applied before numbering, so an ORDER BY ... LIMIT the
+        planner can serve from an index (e.g. HNSW) stays intact.
+        """
+        sort_keys = [expression.label(f'sort_{i}') for i, expression in enumerate(order_by)]
+        # No tie-breaker here: ORDER BY <distance> alone is what the HNSW index serves
+        top = query.with_entities(cls.entity_key.label('entity_key'), *sort_keys).order_by(
+            *order_by
+        ).limit(limit).subquery()
+        return select(
+            top.c.entity_key,
+            func.row_number().over(
+                order_by=[top.c[f'sort_{i}'] for i in range(len(order_by))] + [top.c.entity_key]
+            ).label('rank'),
+        ).subquery(name)
 
     def set_embedding(self, embedding: List[float]) -> None:
         """
@@ -235,6 +361,15 @@ class Entity(BaseModel):
             raise ValueError(f"Embedding must be 1536 dimensions, got {len(embedding)}")
         self.embedding = embedding
 
+    def embedding_text(self) -> str:
+        """Build the text representation embedded for this entity (name, type and short properties)."""
+        parts = [self.name, f"({self.entity_type})"]
+        if self.properties:
+            for key, value in self.properties.items():
+                if isinstance(value, str) and len(value) < 200:
+                    parts.append(f"{key}: {value}")
+        return " ".join(parts)
+
     def generate_embedding(self, embedding_service=None) -> List[float]:
         """
         Generate and set embedding from entity name and properties.
@@ -248,15 +383,7 @@ class Entity(BaseModel):
         if embedding_service is None:
             from api.services import embedding_service
 
-        # Build text representation
-        parts = [self.name, f"({self.entity_type})"]
-        if self.properties:
-            for key, value in self.properties.items():
-                if isinstance(value, str) and len(value) < 200:
-                    parts.append(f"{key}: {value}")
-
-        text = " ".join(parts)
-        embedding = embedding_service.get_embedding(text)
+        embedding = embedding_service.get_embedding(self.embedding_text())
         self.set_embedding(embedding)
         return embedding
 
@@ -264,11 +391,10 @@ class Entity(BaseModel):
         """Convert to dictionary with optional relationships and embedding."""
         result = super().to_dict()
 
-        # Add embedding info
-        result['has_embedding'] = self.embedding is not None
-        if not include_embedding:
-            # Remove raw embedding from result (it's included by super().to_dict())
-            result.pop('embedding', None)
+        # Add embedding info; the vector itself is only loaded on request
+        result['has_embedding'] = self._has_embedding()
+        if include_embedding:
+            result['embedding'] = self.embedding
 
         # Resolve scope_name for human-readable display
         if self.scope_type and self.scope_key:
@@ -288,22 +414,30 @@ class Entity(BaseModel):
 
         return result
 
+    def _has_embedding(self) -> bool:
+        """has_embedding from SQL, or from the vector on objects not loaded from the database."""
+        if self.has_embedding is None:
+            return self.embedding is not None
+        return bool(self.has_embedding)
+
     def _resolve_scope_name(self) -> str | None:
         """Resolve the scope_key to a human-readable name."""
         if not self.scope_type or not self.scope_key:
             return None
 
+        from api.services.relations import relation_loader
+
         if self.scope_type == 'domain':
             from api.models.domain import Domain
-            domain = Domain.get_by_key(self.scope_key)
+            domain = relation_loader.get(Domain, self.scope_key)
             return domain.name if domain else None
         elif self.scope_type == 'team':
             from api.models.team import Team
-            team = Team.get_by_key(self.scope_key)
+            team = relation_loader.get(Team, self.scope_key)
             return team.name if team else None
         elif self.scope_type == 'user':
             from api.models.user import User
-            user = User.get_by_key(self.scope_key)
+            user = relation_loader.get(User, self.scope_key)
             return user.display_name if user else None
 
         return None
@@ -388,3 +522,31 @@ class Entity(BaseModel):
         """Get the type of the source bridge if present."""
         bridge = self.parse_source_bridge(self.source)
         return bridge['type'] if bridge else None
+
+
+# ========== Vector index maintenance ==========
+
+# Columns the in-process vector index stores or filters on
+_VECTOR_INDEX_FIELDS = ('embedding', 'entity_type', 'domain_key', 'scope_type', 'scope_key')
+
+
+@event.listens_for(Entity, 'after_insert')
+def _entity_vector_inserted(mapper, connection, target):
+    """Load a row inserted with an embedding into the in-process vector index on commit."""
+    if inspect(target).attrs.embedding.history.has_changes():
+        _entity_vector_written(mapper, connection, target)
+
+
+@event.listens_for(Entity, 'after_update')
+def _entity_vector_updated(mapper, connection, target):
+    """Reload a row whose vector or filter columns changed, on commit."""
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _VECTOR_INDEX_FIELDS):
+        _entity_vector_written(mapper, connection, target)
+
+
+@event.listens_for(Entity, 'after_delete')
+def _entity_vector_written(mapper, connection, target):
+    """Reload (or drop) the row in the in-process vector index once the write commits."""
+    from api.utils.vector_index import vector_index_cache
+    vector_index_cache.record_write(object_session(target), 'entities', target.entity_key)
@@ -0,0 +1,415 @@
+"""
+Collective Memory Platform - Inbox Models
+
+Per-reader unread message sets, maintained as messages are sent and read.
+"""
+import hashlib
+from typing import Tuple, Union
+
+from sqlalchemy import (
+    Column, String, DateTime, Integer, Boolean, ForeignKey, Index,
+    and_, delete, exists, func, literal, or_, select, update
+)
+from sqlalchemy.dialects.postgresql import JSONB, insert
+
+from api.models.base import BaseModel, db, get_now
+
+
+READER_TYPES = ('agent', 'user')
+
+
+class Inbox(BaseModel):
+    """
+    Unread messages and counts for one agent or user.
+
+    An inbox holds an InboxMessage row for each message the reader can see
+    and has not read, plus the number of those rows. It is built on the
+    first lookup from the same visibility rules as Message.get_for_agent
+    and get_for_user, and after that it is kept current by the transaction
+    that changes it:
+
+    - sending a message adds it to every inbox that can see it (fan_out:
+      one INSERT ... SELECT over the inboxes table, covering broadcast and
+      team scopes)
+    - MessageRead.mark_read removes it from the reader's inbox (withdraw)
+    - deleting a message, or changing who can see it, withdraws it from all
+      inboxes
+
+    So "unread for X" is a range scan of X's rows, and "unread count for X"
+    is a primary key lookup, however long X's history is.
+
+    visibility is a hash of the inputs that decide what the reader sees
+    (user, domain, teams). A lookup with different inputs rebuilds the
+    inbox. Bulk deletes of messages or read records that bypass the ORM
+    must call recount(). check() compares inboxes against the full query,
+    and rebuild() repairs them (python -m api.scripts.rebuild_inboxes).
+    """
+    __tablename__ = 'inboxes'
+
+    # Visibility of an inbox whose messages are still being filled in
+    PENDING = ''
+
+    reader_key = Column(String(100), primary_key=True)  # agent_key or user_key
+    reader_type = Column(String(10), nullable=False, default='agent')  # agent or user
+    user_key = Column(String(36), nullable=True, index=True)  # User linked to an agent reader
+    domain_key = Column(String(36), nullable=True, index=True)
+    team_keys = Column(JSONB, nullable=False, default=list)
+    visibility = Column(String(64), nullable=False, default=PENDING)
+    unread_count = Column(Integer, nullable=False, default=0)
+    autonomous_count = Column(Integer, nullable=False, default=0)
+    built_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=get_now, onupdate=get_now)
+
+    _default_fields = ['reader_key', 'reader_type', 'unread_count', 'autonomous_count', 'built_at']
+
+    @staticmethod
+    def visibility_hash(reader_type: str = 'agent', user_key: str = None,
+                        team_keys: list[str] = None, domain_key: str = None) -> str:
+        """Hash of the visibility inputs used to build an inbox."""
+        raw = '|'.join([reader_type, user_key or '', domain_key or '', ','.join(sorted(team_keys or []))])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    # ========== Maintenance (called from mapper events) ==========
+
+    @classmethod
+    def _recipients(cls, message):
+        """
+        Condition on (inbox, message) for inboxes that can see the message.
+
+        The fan-out side of Message.visible_to_agent and visible_to_user;
+        check() verifies the two agree.
+        """
+        agent = or_(
+            and_(message.scope == 'agent-agent', or_(cls.reader_key == message.from_key, cls.reader_key == message.to_key)),
+            and_(message.scope == 'agent-user', cls.reader_key == message.from_key),
+            and_(message.scope == 'user-agent', cls.reader_key == message.to_key),
+            and_(message.scope.in_(('user-agents', 'agent-agents')), cls.user_key == message.user_key),
+        )
+        user = or_(
+            and_(message.scope == 'agent-user', cls.reader_key == message.to_key),
+            and_(message.scope == 'user-agent', cls.reader_key == message.from_key),
+            and_(message.scope == 'user-agents', or_(cls.reader_key == message.from_key, cls.reader_key == message.user_key)),
+        )
+        return or_(
+            and_(message.scope == 'broadcast-domain', cls.domain_key == message.domain_key),
+            and_(message.scope == 'broadcast-team', cls.team_keys.contains(func.jsonb_build_array(message.team_key))),
+            and_(cls.reader_type == 'agent', agent),
+            and_(cls.reader_type == 'user', user),
+        )
+
+    @classmethod
+    def _adjust(cls, changed, sign: int):
+        """UPDATE moving inbox counts by sign for each (reader_key, autonomous) row in changed."""
+        totals = select(
+            changed.c.reader_key,
+            func.count().label('unread'),
+            func.count().filter(changed.c.autonomous == True).label('autonomous'),
+        ).group_by(changed.c.reader_key).subquery()
+        return update(cls).where(cls.reader_key == totals.c.reader_key).values(
+            unread_count=cls.unread_count + sign * totals.c.unread,
+            autonomous_count=cls.autonomous_count + sign * totals.c.autonomous,
+        )
+
+    @classmethod
+    def fan_out(cls, connection, message_key: str, reader_key: str = None) -> None:
+        """
+        Add a message to every inbox that can see it and has not read it.
+
+        One statement: the INSERT ... SELECT and the count update run as a
+        data-modifying CTE on the caller's connection.
+
+        Args:
+            connection: Connection of the flush that wrote the message
+            message_key: The message to deliver
+            reader_key: Only deliver to this reader's inbox
+        """
+        from api.models.message import Message
+        from api.models.message_read import MessageRead
+
+        rows = select(
+            cls.reader_key, Message.message_key, Message.created_at, func.coalesce(Message.autonomous, False)
+        ).where(
+            Message.message_key == message_key,
+            cls._recipients(Message),
+            ~exists().where(MessageRead.message_key == Message.message_key, MessageRead.reader_key == cls.reader_key),
+        )
+        if reader_key is not None:
+            rows = rows.where(cls.reader_key == reader_key)
+
+        added = insert(InboxMessage.__table__).from_select(
+            ['reader_key', 'message_key', 'created_at', 'autonomous'], rows
+        ).on_conflict_do_nothing().returning(
+            InboxMessage.reader_key, InboxMessage.autonomous
+        ).cte('added')
+        connection.execute(cls._adjust(added, 1))
+
+    @classmethod
+    def withdraw(cls, connection, message_keys: Union[str, list[str]], reader_key: str = None) -> None:
+        """
+        Remove messages from inboxes (all of them, or reader_key's).
+
+        Args:
+            connection: Connection of the transaction that read or removed the messages
+            message_keys: The message, or messages, to remove
+            reader_key: Only remove them from this reader's inbox
+        """
+        if isinstance(message_keys, str):
+            message_keys = [message_keys]
+        if not message_keys:
+            return
+
+        removed = delete(InboxMessage).where(InboxMessage.message_key.in_(message_keys))
+        if reader_key is not None:
+            removed = removed.where(InboxMessage.reader_key == reader_key)
+        removed = removed.returning(InboxMessage.reader_key, InboxMessage.autonomous).cte('removed')
+        connection.execute(cls._adjust(removed, -1))
+
+    # ========== Lookups ==========
+
+    @classmethod
+    def _visible(cls, reader_key: str, reader_type: str, user_key: str = None,
+                 team_keys: list[str] = None, domain_key: str = None):
+        """Message filter for everything the reader can see."""
+        from api.models.message import Message
+
+        if reader_type == 'user':
+            return Message.visible_to_user(reader_key, team_keys=team_keys, domain_key=domain_key)
+        return Message.visible_to_agent(reader_key, user_key=user_key, team_keys=team_keys, domain_key=domain_key)
+
+    @classmethod
+    def _unread(cls, inbox) -> 'select':
+        """Select (message_key, created_at, autonomous) of the messages an inbox should hold."""
+        from api.models.message import Message
+        from api.models.message_read import MessageRead
+
+        return select(
+            Message.message_key, Message.created_at, func.coalesce(Message.autonomous, False)
+        ).where(
+            cls._visible(inbox.reader_key, inbox.reader_type, inbox.user_key, inbox.team_keys, inbox.domain_key),
+            ~exists().where(MessageRead.message_key == Message.message_key, MessageRead.reader_key == inbox.reader_key),
+        )
+
+    @classmethod
+    def build(cls, reader_key: str, reader_type: str = 'agent', user_key: str = None,
+              team_keys: list[str] = None, domain_key: str = None) -> None:
+        """
+        (Re)build an inbox from the full unread query.
+
+        Runs on its own connection and commits there, so it can be called
+        from read paths without committing or rolling back the caller's
+        session. The caller's transaction must not hold uncommitted writes
+        to this inbox, or the build waits on them.
+
+        The inbox row is committed first, so messages sent while the
+        existing ones are copied in are fanned out to it as well.
+        """
+        values = {
+            'reader_key': reader_key,
+            'reader_type': reader_type,
+            'user_key': user_key,
+            'domain_key': domain_key,
+            'team_keys': sorted(team_keys or []),
+            'visibility': cls.PENDING,
+            'built_at': None,
+        }
+        statement = insert(cls.__table__).values(unread_count=0, autonomous_count=0, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=['reader_key'],
+            set_={name: statement.excluded[name] for name in values if name != 'reader_key'}
+        )
+        with db.engine.begin() as connection:
+            connection.execute(statement)
+
+        with db.engine.begin() as connection:
+            inbox = connection.execute(
+                select(cls.reader_key, cls.reader_type, cls.user_key, cls.team_keys, cls.domain_key).where(
+                    cls.reader_key == reader_key
+                )
+            ).one()
+            connection.execute(delete(InboxMessage.__table__).where(InboxMessage.reader_key == reader_key))
+            unread = cls._unread(inbox).subquery()
+            connection.execute(
+                insert(InboxMessage.__table__).from_select(
+                    ['reader_key', 'message_key', 'created_at', 'autonomous'],
+                    select(literal(reader_key), *unread.c)
+                ).on_conflict_do_nothing()
+            )
+            connection.execute(cls._recount_statement(
+                [reader_key], visibility=cls.visibility_hash(reader_type, user_key, team_keys, domain_key),
+                built_at=get_now()
+            ))
+
+    @classmethod
+    def get_counts(
+        cls,
+        reader_key: str,
+        user_key: str = None,
+        team_keys: list[str] = None,
+        domain_key: str = None,
+        reader_type: str = 'agent'
+    ) -> Tuple[int, int]:
+        """
+        Get (unread, autonomous) message counts for a reader.
+
+        Counts the same messages as Message.get_for_agent(unread_only=True)
+        (or get_for_user for reader_type='user') with the same arguments,
+        building the inbox first if it does not exist for them. Neither
+        flushes nor commits the caller's session (see build()).
+
+        Args:
+            reader_key: The agent's or user's key
+            user_key: The user_key linked to an agent reader
+            team_keys: List of team_keys the reader can access
+            domain_key: The reader's domain_key
+            reader_type: 'agent' or 'user'
+        """
+        visibility = cls.visibility_hash(reader_type, user_key, team_keys, domain_key)
+
+        def current():
+            with db.session.no_autoflush:
+                return db.session.query(cls.visibility, cls.unread_count, cls.autonomous_count).filter(
+                    cls.reader_key == reader_key
+                ).first()
+
+        inbox = current()
+        if inbox is None or inbox.visibility != visibility:
+            cls.build(reader_key, reader_type, user_key=user_key, team_keys=team_keys, domain_key=domain_key)
+            inbox = current()
+        return max(inbox.unread_count, 0), max(inbox.autonomous_count, 0)
+
+    @classmethod
+    def query_unread(
+        cls,
+        reader_key: str,
+        user_key: str = None,
+        team_keys: list[str] = None,
+        team_key_filter: str = None,
+        domain_key: str = None,
+        reader_type: str = 'agent'
+    ):
+        """
+        Query of a reader's unread messages, newest first.
+
+        Same rows as Message.get_for_agent / get_for_user(unread_only=True)
+        as long as team_key_filter, if given, is one of team_keys.
+        """
+        from api.models.message import Message
+
+        cls.get_counts(reader_key, user_key=user_key, team_keys=team_keys, domain_key=domain_key,
+                       reader_type=reader_type)
+
+        query = Message.query.join(InboxMessage, and_(
+            InboxMessage.message_key == Message.message_key,
+            InboxMessage.reader_key == reader_key
+        ))
+        if team_keys and team_key_filter:
+            query = query.filter(or_(Message.scope != 'broadcast-team', Message.team_key == team_key_filter))
+        return query.order_by(InboxMessage.created_at.desc())
+
+    # ========== Consistency ==========
+
+    @classmethod
+    def recount(cls, reader_keys: list[str] = None, **values) -> int:
+        """
+        Set counts from the inbox rows. Does not commit.
+
+        Call after deleting messages or read records in bulk, which removes
+        inbox rows (by cascade) without going through withdraw().
+
+        Returns number of inboxes updated.
+        """
+        return db.session.execute(
+            cls._recount_statement(reader_keys, **values), execution_options={'synchronize_session': False}
+        ).rowcount
+
+    @classmethod
+    def _recount_statement(cls, reader_keys: list[str] = None, **values):
+        """UPDATE setting inbox counts (and values) from the inbox rows."""
+        unread = select(func.count()).where(InboxMessage.reader_key == cls.reader_key).scalar_subquery()
+        autonomous = select(func.count()).where(
+            InboxMessage.reader_key == cls.reader_key, InboxMessage.autonomous == True
+        ).scalar_subquery()
+        statement = update(cls.__table__).values(unread_count=unread, autonomous_count=autonomous, **values)
+        if reader_keys is not None:
+            statement = statement.where(cls.__table__.c.reader_key.in_(reader_keys))
+        return statement
+
+    @classmethod
+    def check(cls, reader_keys: list[str] = None) -> list[dict]:
+        """
+        Compare inboxes with the full unread query for their stored inputs.
+
+        Returns one dict per inconsistent inbox: reader_key, missing and
+        extra message counts, and the stored and actual unread counts.
+        """
+        query = db.session.query(cls).filter(cls.visibility != cls.PENDING)
+        if reader_keys is not None:
+            query = query.filter(cls.reader_key.in_(reader_keys))
+
+        problems = []
+        for inbox in query.order_by(cls.reader_key).all():
+            expected = {row[0] for row in db.session.execute(cls._unread(inbox))}
+            actual = {row[0] for row in db.session.query(InboxMessage.message_key).filter(
+                InboxMessage.reader_key == inbox.reader_key
+            )}
+            missing, extra = expected - actual, actual - expected
+            if missing or extra or inbox.unread_count != len(actual):
+                problems.append({
+                    'reader_key': inbox.reader_key,
+                    'missing': len(missing),
+                    'extra': len(extra),
+                    'stored_count': inbox.unread_count,
+                    'actual_count': len(expected),
+                })
+        return problems
+
+    @classmethod
+    def rebuild(cls, reader_keys: list[str] = None) -> int:
+        """
+        Rebuild inboxes from their stored visibility inputs.
+
+        Returns number of inboxes rebuilt.
+        """
+        query = db.session.query(
+            cls.reader_key, cls.reader_type, cls.user_key, cls.team_keys, cls.domain_key
+        )
+        if reader_keys is not None:
+            query = query.filter(cls.reader_key.in_(reader_keys))
+
+        inboxes = query.all()
+        for inbox in inboxes:
+            cls.build(inbox.reader_key, inbox.reader_type, user_key=inbox.user_key,
+                      team_keys=inbox.team_keys, domain_key=inbox.domain_key)
+        return len(inboxes)
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary."""
+        return {
+            'reader_key': self.reader_key,
+            'reader_type': self.reader_type,
+            'unread_count': self.unread_count,
+            'autonomous_count': self.autonomous_count,
+            'built_at': self.built_at.isoformat() if self.built_at else None,
+        }
+
+
+class InboxMessage(BaseModel):
+    """
+    One unread message in a reader's inbox.
+
+    created_at and autonomous are copied from the message so listing and
+    counting a reader's unread messages only touches this table's index.
+    """
+    __tablename__ = 'inbox_messages'
+
+    reader_key = Column(String(100), ForeignKey('inboxes.reader_key', ondelete='CASCADE'), primary_key=True)
+    message_key = Column(String(36), ForeignKey('messages.message_key', ondelete='CASCADE'), primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    autonomous = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index('ix_inbox_messages_reader_created', 'reader_key', 'created_at'),
+        Index('ix_inbox_messages_message', 'message_key'),
+    )
+
+    _default_fields = ['reader_key', 'message_key', 'created_at', 'autonomous']
@@ -15,9 +15,11 @@ Scope types define message visibility and routing:
 Threading:
 - reply_to_key links to the parent message (null for top-level messages)
 
-Read tracking is handled per-agent via the MessageRead table.
+Read tracking is handled per-agent via the MessageRead table. Unread
+messages and counts are served from per-reader inboxes (see Inbox).
 """
-from sqlalchemy import Column, String, DateTime, Boolean, Index, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, Index, ForeignKey, event, func, inspect, literal, select
+from sqlalchemy.orm import aliased
 from sqlalchemy.dialects.postgresql import JSONB
 
 from api.models.base import BaseModel, db, get_key, get_now
@@ -104,6 +106,11 @@ class Message(BaseModel):
     ]
     _readonly_fields = ['message_key', 'created_at']
 
+    # Guards thread queries against reply_to_key cycles
+    MAX_THREAD_DEPTH = 1000
+    # Reply levels get_thread loads unless asked for more
+    DEFAULT_THREAD_DEPTH = 10
+
     @classmethod
     def current_schema_version(cls) -> int:
         return 12  # Added work_session_key for session tracking
@@ -167,38 +174,20 @@ class Message(BaseModel):
         return query.order_by(cls.created_at.desc()).limit(limit).all()
 
     @classmethod
-    def get_for_agent(
+    def visible_to_agent(
         cls,
         agent_key: str,
         user_key: str = None,
-        limit: int = 50,
-        unread_only: bool = False,
         team_keys: list[str] = None,
         team_key_filter: str = None,
         domain_key: str = None
-    ) -> list['Message']:
+    ):
         """
-        Get messages visible to a specific agent.
+        Build the filter for messages visible to an agent.
 
-        An agent can see messages where:
-        - scope=broadcast-domain and same domain_key
-        - scope=broadcast-team and team_key in agent's team_keys
-        - scope=agent-agent and (from_key=agent_key or to_key=agent_key)
-        - scope=agent-user and from_key=agent_key
-        - scope=user-agent and to_key=agent_key
-        - scope=user-agents and user_key matches agent's linked user
-        - scope=agent-agents and user_key matches agent's linked user
-
-        Args:
-            agent_key: The agent's key
-            user_key: The user_key linked to this agent (for user-agents/agent-agents)
-            limit: Maximum messages to return
-            unread_only: Only return unread messages
-            team_keys: List of team_keys the agent can access
-            team_key_filter: Filter to a specific team only
-            domain_key: The agent's domain_key
+        Shared by get_for_agent and inboxes so both agree on what an agent
+        can see. See get_for_agent for the visibility rules.
         """
-        from api.models.message_read import MessageRead
         from sqlalchemy import or_, and_
 
         conditions = []
@@ -273,7 +262,59 @@ class Message(BaseModel):
                 )
             )
 
-        query = cls.query.filter(or_(*conditions))
+        return or_(*conditions)
+
+    @classmethod
+    def get_for_agent(
+        cls,
+        agent_key: str,
+        user_key: str = None,
+        limit: int = 50,
+        unread_only: bool = False,
+        team_keys: list[str] = None,
+        team_key_filter: str = None,
+        domain_key: str = None
+    ) -> list['Message']:
+        """
+        Get messages visible to a specific agent.
+
+        An agent can see messages where:
+        - scope=broadcast-domain and same domain_key
+        - scope=broadcast-team and team_key in agent's team_keys
+        - scope=agent-agent and (from_key=agent_key or to_key=agent_key)
+        - scope=agent-user and from_key=agent_key
+        - scope=user-agent and to_key=agent_key
+        - scope=user-agents and user_key matches agent's linked user
+        - scope=agent-agents and user_key matches agent's linked user
+
+        Args:
+            agent_key: The agent's key
+            user_key: The user_key linked to this agent (for user-agents/agent-agents)
+            limit: Maximum messages to return
+            unread_only: Only return unread messages
+            team_keys: List of team_keys the agent can access
+            team_key_filter: Filter to a specific team only
+            domain_key: The agent's domain_key
+        """
+        if unread_only and cls._inbox_covers(team_keys, team_key_filter):
+            from api.models.inbox import Inbox
+            return Inbox.query_unread(
+                agent_key,
+                user_key=user_key,
+                team_keys=team_keys,
+                team_key_filter=team_key_filter,
+                domain_key=domain_key
+            ).limit(limit).all()
+
+        from api.models.message_read import MessageRead
+
+        query = cls.query.filter(cls.visible_to_agent(
+            agent_key,
+            user_key=user_key,
+            team_keys=team_keys,
+            team_key_filter=team_key_filter,
+            domain_key=domain_key
+        ))
 
         if unread_only:
             # Subquery to find messages this agent has read
@@ -285,34 +326,19 @@ class Message(BaseModel):
         return query.order_by(cls.created_at.desc()).limit(limit).all()
 
     @classmethod
-    def get_for_user(
+    def visible_to_user(
         cls,
         user_key: str,
-        limit: int = 50,
-        unread_only: bool = False,
         team_keys: list[str] = None,
         team_key_filter: str = None,
         domain_key: str = None
-    ) -> list['Message']:
+    ):
         """
-        Get messages visible to a specific user.
-
-        A user can see messages where:
-        - scope=broadcast-domain and same domain_key
-        - scope=broadcast-team and team_key in user's team_keys
-        - scope=agent-user and to_key=user_key
-        - scope=user-agent and from_key=user_key
-        - scope=user-agents and from_key=user_key or user_key matches
+        Build the filter for messages visible to a user.
 
-        Args:
-            user_key: The user's key
-            limit: Maximum messages to return
-            unread_only: Only return unread messages (uses user_key for read tracking)
-            team_keys: List of team_keys the user can access
-            team_key_filter: Filter to a specific team only
-            domain_key: The user's domain_key
+        Shared by get_for_user and inboxes. See get_for_user for the
+        visibility rules.
         """
-        from api.models.message_read import MessageRead
         from sqlalchemy import or_, and_
 
         conditions = []
@@ -367,7 +393,54 @@ class Message(BaseModel):
             )
         )
 
-        query = cls.query.filter(or_(*conditions))
+        return or_(*conditions)
+
+    @classmethod
+    def get_for_user(
+        cls,
+        user_key: str,
+        limit: int = 50,
+        unread_only: bool = False,
+        team_keys: list[str] = None,
+        team_key_filter: str = None,
+        domain_key: str = None
+    ) -> list['Message']:
+        """
+        Get messages visible to a specific user.
+
+        A user can see messages where:
+        - scope=broadcast-domain and same domain_key
+        - scope=broadcast-team and team_key in user's team_keys
+        - scope=agent-user and to_key=user_key
+        - scope=user-agent and from_key=user_key
+        - scope=user-agents and from_key=user_key or user_key matches
+
+        Args:
+            user_key: The user's key
+            limit: Maximum messages to return
+            unread_only: Only return unread messages (uses user_key for read tracking)
+            team_keys: List of team_keys the user can access
+            team_key_filter: Filter to a specific team only
+            domain_key: The user's domain_key
+        """
+        if unread_only and cls._inbox_covers(team_keys, team_key_filter):
+            from api.models.inbox import Inbox
+            return Inbox.query_unread(
+                user_key,
+                team_keys=team_keys,
+                team_key_filter=team_key_filter,
+                domain_key=domain_key,
+                reader_type='user'
+            ).limit(limit).all()
+
+        from api.models.message_read import MessageRead
+
+        query = cls.query.filter(cls.visible_to_user(
+            user_key,
+            team_keys=team_keys,
+            team_key_filter=team_key_filter,
+            domain_key=domain_key
+        ))
 
         if unread_only:
             # Use user_key for read tracking
@@ -378,34 +451,42 @@ class Message(BaseModel):
 
         return query.order_by(cls.created_at.desc()).limit(limit).all()
 
+    @staticmethod
+    def _inbox_covers(team_keys: list[str] = None, team_key_filter: str = None) -> bool:
+        """Whether the reader's inbox holds every message a team_key_filter lookup can return."""
+        return not (team_keys and team_key_filter and team_key_filter not in team_keys)
+
     @classmethod
-    def get_unread_count(cls, agent_key: str = None, channel: str = None, domain_key: str = None) -> int:
+    def get_unread_count(
+        cls,
+        agent_key: str = None,
+        channel: str = None,
+        domain_key: str = None,
+        user_key: str = None,
+        team_keys: list[str] = None
+    ) -> int:
         """
-        Get count of unread messages for an agent.
+        Get count of unread messages for an agent, from the agent's inbox.
 
         Args:
             agent_key: Count unread for this specific agent (required)
             channel: Filter by channel (optional)
             domain_key: The agent's domain_key
+            user_key: The user_key linked to this agent
+            team_keys: List of team_keys the agent can access
         """
-        from api.models.message_read import MessageRead
+        from api.models.inbox import Inbox
 
         if not agent_key:
             return 0
 
-        # Get messages visible to this agent
-        query = cls.query.filter(cls.domain_key == domain_key) if domain_key else cls.query
-
         if channel:
-            query = query.filter(cls.channel == channel)
-
-        # Exclude messages they've read
-        read_subquery = db.session.query(MessageRead.message_key).filter(
-            MessageRead.reader_key == agent_key
-        ).scalar_subquery()
-        query = query.filter(~cls.message_key.in_(read_subquery))
+            return Inbox.query_unread(
+                agent_key, user_key=user_key, team_keys=team_keys, domain_key=domain_key
+            ).filter(cls.channel == channel).order_by(None).count()
 
-        return query.count()
+        unread, _ = Inbox.get_counts(agent_key, user_key=user_key, team_keys=team_keys, domain_key=domain_key)
+        return unread
 
     @classmethod
     def get_unread_autonomous_count(
@@ -416,7 +497,7 @@ class Message(BaseModel):
         domain_key: str = None
     ) -> int:
         """
-        Get count of unread autonomous messages for an agent.
+        Get count of unread autonomous messages for an agent, from the agent's inbox.
 
         Args:
             agent_key: The agent's key
@@ -424,49 +505,10 @@ class Message(BaseModel):
             team_keys: List of team_keys the agent can access
             domain_key: The agent's domain_key
         """
-        from api.models.message_read import MessageRead
-        from sqlalchemy import or_, and_
-
-        conditions = []
-
-        # Only autonomous messages
-        base_filter = cls.autonomous == True
-
-        # Build visibility conditions (same as get_for_agent)
-        if domain_key:
-            conditions.append(
-                and_(cls.scope == 'broadcast-domain', cls.domain_key == domain_key)
-            )
-
-        if team_keys:
-            conditions.append(
-                and_(cls.scope == 'broadcast-team', cls.team_key.in_(team_keys))
-            )
-
-        conditions.append(
-            and_(cls.scope == 'agent-agent', or_(cls.from_key == agent_key, cls.to_key == agent_key))
-        )
-        conditions.append(
-            and_(cls.scope == 'user-agent', cls.to_key == agent_key)
-        )
-
-        if user_key:
-            conditions.append(
-                and_(cls.scope == 'user-agents', cls.user_key == user_key)
-            )
-            conditions.append(
-                and_(cls.scope == 'agent-agents', cls.user_key == user_key)
-            )
-
-        query = cls.query.filter(base_filter, or_(*conditions))
-
-        # Exclude messages they've read
-        read_subquery = db.session.query(MessageRead.message_key).filter(
-            MessageRead.reader_key == agent_key
-        ).scalar_subquery()
-        query = query.filter(~cls.message_key.in_(read_subquery))
+        from api.models.inbox import Inbox
 
-        return query.count()
+        _, autonomous = Inbox.get_counts(agent_key, user_key=user_key, team_keys=team_keys, domain_key=domain_key)
+        return autonomous
 
     def mark_read(self, reader_key: str = None) -> bool:
         """
@@ -531,45 +573,103 @@ class Message(BaseModel):
         return Message.query.filter_by(reply_to_key=self.message_key).count()
 
     @classmethod
-    def get_thread(cls, message_key: str) -> dict:
-        """
-        Get a full thread starting from a message.
-        Returns the root message and all descendants.
-        """
-        msg = cls.get_by_key(message_key)
-        if not msg:
-            return None
+    def get_reply_counts(cls, message_keys: list[str]) -> dict:
+        """Get reply counts for many messages with one query. Messages without replies are omitted."""
+        if not message_keys:
+            return {}
+        rows = db.session.query(cls.reply_to_key, func.count()).filter(
+            cls.reply_to_key.in_(message_keys)
+        ).group_by(cls.reply_to_key).all()
+        return dict(rows)
 
-        # Walk up to find root
-        root = msg
-        while root.reply_to_key:
-            parent = root.get_parent()
-            if parent:
-                root = parent
-            else:
-                break
+    @classmethod
+    def _thread_root(cls, message_key: str):
+        """Scalar subquery for the root of the thread containing a message (recursive CTE up reply_to_key)."""
+        ancestors = select(
+            cls.message_key, cls.reply_to_key, literal(0).label('hops')
+        ).where(cls.message_key == message_key).cte('ancestors', recursive=True)
+        ancestors = ancestors.union_all(
+            select(cls.message_key, cls.reply_to_key, ancestors.c.hops + 1).where(
+                cls.message_key == ancestors.c.reply_to_key,
+                ancestors.c.hops < cls.MAX_THREAD_DEPTH
+            )
+        )
+        return select(ancestors.c.message_key).order_by(ancestors.c.hops.desc()).limit(1).scalar_subquery()
 
-        return {
-            'root': root,
-            'replies': cls._get_nested_replies(root.message_key)
-        }
+    @classmethod
+    def _subtree(cls, start, max_depth: int = None):
+        """Recursive CTE of (message_key, depth) for a message and every reply below it."""
+        limit = min(max_depth, cls.MAX_THREAD_DEPTH) if max_depth is not None else cls.MAX_THREAD_DEPTH
+        subtree = select(
+            cls.message_key, literal(0).label('depth')
+        ).where(cls.message_key == start).cte('subtree', recursive=True)
+        return subtree.union_all(
+            select(cls.message_key, subtree.c.depth + 1).where(
+                cls.reply_to_key == subtree.c.message_key,
+                subtree.c.depth < limit
+            )
+        )
 
     @classmethod
-    def _get_nested_replies(cls, message_key: str, depth: int = 0, max_depth: int = 10) -> list:
-        """Recursively get nested replies."""
-        if depth >= max_depth:
-            return []
+    def get_subtree_keys(cls, message_key: str) -> set[str]:
+        """Get the keys of a message and all its replies, nested, with one query."""
+        subtree = cls._subtree(message_key)
+        return {row[0] for row in db.session.execute(select(subtree.c.message_key))}
+
+    @classmethod
+    def get_thread(cls, message_key: str, max_depth: int = DEFAULT_THREAD_DEPTH) -> dict:
+        """
+        Get the full thread containing a message, with one query.
 
-        replies = cls.query.filter_by(reply_to_key=message_key)\
-            .order_by(cls.created_at.asc()).all()
+        Recursive CTEs walk up reply_to_key to the root and back down
+        through every reply; each row carries its depth and reply count.
+        The tree is assembled in memory.
 
-        result = []
-        for reply in replies:
-            result.append({
-                'message': reply,
-                'replies': cls._get_nested_replies(reply.message_key, depth + 1, max_depth)
-            })
-        return result
+        Args:
+            message_key: Any message in the thread
+            max_depth: Only load replies this many levels below the root
+                (default 10); None loads the whole thread, up to MAX_THREAD_DEPTH
+
+        Returns:
+            None if the message does not exist, otherwise a dict with:
+            - root: the root Message
+            - replies: nested [{'message', 'depth', 'reply_count', 'replies'}]
+            - reply_count: direct replies to the root
+            - nodes: message_key -> node, for every loaded message
+            - entity_keys: entity keys linked anywhere in the thread
+            - message_count, depth: size and depth of the loaded tree
+        """
+        replies = aliased(cls)
+        subtree = cls._subtree(cls._thread_root(message_key), max_depth)
+        reply_count = select(func.count()).where(replies.reply_to_key == cls.message_key).scalar_subquery()
+
+        rows = db.session.query(cls, subtree.c.depth, reply_count).join(
+            subtree, subtree.c.message_key == cls.message_key
+        ).order_by(subtree.c.depth, cls.created_at.asc()).all()
+        if not rows:
+            return None
+
+        nodes = {}
+        entity_keys = {}
+        for message, depth, count in rows:
+            if message.message_key in nodes:
+                continue  # Seen at a smaller depth (reply_to_key cycle)
+            node = {'message': message, 'depth': depth, 'reply_count': count, 'replies': []}
+            nodes[message.message_key] = node
+            if depth > 0:
+                nodes[message.reply_to_key]['replies'].append(node)
+            entity_keys.update(dict.fromkeys(message.entity_keys or []))
+
+        root = next(iter(nodes.values()))
+        return {
+            'root': root['message'],
+            'replies': root['replies'],
+            'reply_count': root['reply_count'],
+            'nodes': nodes,
+            'entity_keys': list(entity_keys),
+            'message_count': len(nodes),
+            'depth': max(node['depth'] for node in nodes.values()),
+        }
 
     @classmethod
     def get_thread_entity_keys(cls, message_key: str) -> list[str]:
@@ -579,24 +679,10 @@ class Message(BaseModel):
         thread = cls.get_thread(message_key)
         if not thread:
             return []
+        return thread['entity_keys']
 
-        entity_keys = set()
-
-        root = thread.get('root')
-        if root and root.entity_keys:
-            entity_keys.update(root.entity_keys)
-
-        def collect_from_replies(replies):
-            for item in replies:
-                msg = item.get('message')
-                if msg and msg.entity_keys:
-                    entity_keys.update(msg.entity_keys)
-                collect_from_replies(item.get('replies', []))
-
-        collect_from_replies(thread.get('replies', []))
-        return list(entity_keys)
-
-    def to_dict(self, include_read_status: bool = True, for_reader: str = None, include_readers: bool = False, include_thread_info: bool = False) -> dict:
+    def to_dict(self, include_read_status: bool = True, for_reader: str = None, include_readers: bool = False,
+                include_thread_info: bool = False, reply_count: int = None) -> dict:
         """
         Convert to dictionary.
 
@@ -605,6 +691,7 @@ class Message(BaseModel):
             for_reader: Check read status for this specific agent/user key
             include_readers: Include list of keys who have read this message
             include_thread_info: Include reply_count and has_parent indicators
+            reply_count: Known reply count (from get_thread or get_reply_counts), saves a query
         """
         result = super().to_dict()
         if include_read_status:
@@ -621,7 +708,35 @@ class Message(BaseModel):
             result['read_count'] = len(reads)
 
         if include_thread_info:
-            result['reply_count'] = self.get_reply_count()
+            result['reply_count'] = reply_count if reply_count is not None else self.get_reply_count()
             result['has_parent'] = self.reply_to_key is not None
 
         return result
+
+
+# Columns that decide who can see a message, and how it is counted
+_INBOX_FIELDS = ('scope', 'from_key', 'to_key', 'user_key', 'domain_key', 'team_key', 'autonomous')
+
+
+@event.listens_for(Message, 'after_insert')
+def _message_sent(mapper, connection, target):
+    """Deliver a new message to the inboxes that can see it."""
+    from api.models.inbox import Inbox
+    Inbox.fan_out(connection, target.message_key)
+
+
+@event.listens_for(Message, 'after_update')
+def _message_changed(mapper, connection, target):
+    """Redeliver a message whose audience or autonomous flag changed."""
+    from api.models.inbox import Inbox
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _INBOX_FIELDS):
+        Inbox.withdraw(connection, target.message_key)
+        Inbox.fan_out(connection, target.message_key)
+
+
+@event.listens_for(Message, 'before_delete')
+def _message_deleted(mapper, connection, target):
+    """Remove a message from inboxes before its row goes."""
+    from api.models.inbox import Inbox
+    Inbox.withdraw(connection, target.message_key)
@@ -4,7 +4,7 @@ Collective Memory Platform - MessageRead Model
 Tracks which agents/users have read which messages.
 Enables per-reader read tracking for broadcast/channel messages.
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint, event
 
 from api.models.base import BaseModel, db, get_key, get_now
 
@@ -21,6 +21,9 @@ class MessageRead(BaseModel):
     MessageRead record when they read the message.
 
     For direct messages (to_key is set), the recipient creates a record.
+
+    Creating a record removes the message from the reader's Inbox, and
+    deleting one puts it back.
     """
     __tablename__ = 'message_reads'
 
@@ -93,15 +96,51 @@ class MessageRead(BaseModel):
         read_keys_set = {r[0] for r in read_keys}
         return [mk for mk in message_keys if mk not in read_keys_set]
 
+    @classmethod
+    def mark_many_read(cls, reader_key: str, message_keys: list[str]) -> list[str]:
+        """
+        Mark messages as read by a reader with one multi-row upsert, and commit.
+
+        Messages the reader already read are skipped. The messages must exist.
+        Returns the keys of the newly marked messages.
+        """
+        from sqlalchemy.dialects.postgresql import insert
+        from api.models.inbox import Inbox
+
+        message_keys = list(dict.fromkeys(k for k in message_keys if k))
+        if not message_keys:
+            return []
+
+        now = get_now()
+        statement = insert(cls.__table__).values([
+            {'read_key': get_key(), 'message_key': message_key, 'reader_key': reader_key, 'read_at': now}
+            for message_key in message_keys
+        ]).on_conflict_do_nothing(constraint='uq_message_reader_read').returning(cls.message_key)
+
+        marked = [row[0] for row in db.session.execute(statement)]
+        # Core inserts skip the mapper events, so update the inbox here
+        Inbox.withdraw(db.session.connection(), marked, reader_key)
+        db.session.commit()
+        return marked
+
     @classmethod
     def mark_all_read_for_reader(cls, reader_key: str, message_keys: list[str]) -> int:
         """
         Mark multiple messages as read by a reader.
         Returns count of newly marked messages.
         """
-        count = 0
-        for message_key in message_keys:
-            if not cls.has_read(message_key, reader_key):
-                cls.mark_read(message_key, reader_key)
-                count += 1
-        return count
+        return len(cls.mark_many_read(reader_key, message_keys))
+
+
+@event.listens_for(MessageRead, 'after_insert')
+def _message_read(mapper, connection, target):
+    """A read message leaves the reader's inbox."""
+    from api.models.inbox import Inbox
+    Inbox.withdraw(connection, target.message_key, target.reader_key)
+
+
+@event.listens_for(MessageRead, 'after_delete')
+def _message_unread(mapper, connection, target):
+    """Deleting a read record makes the message unread again."""
+    from api.models.inbox import Inbox
+    Inbox.fan_out(connection, target.message_key, target.reader_key)
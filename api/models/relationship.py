@@ -59,20 +59,31 @@ class Relationship(BaseModel):
         return cls.query.filter_by(relationship_type=relationship_type).limit(limit).all()
 
     @classmethod
-    def get_path(cls, from_key: str, to_key: str, max_hops: int = 3) -> list[list['Relationship']]:
+    def get_path(cls, from_key: str, to_key: str, max_hops: int = 3, k: int = 1) -> list[list['Relationship']]:
         """
-        Find paths between two entities.
+        Find the shortest paths between two entities.
 
-        Returns list of paths, where each path is a list of relationships.
-        Simple BFS implementation for now.
+        Paths are undirected: a relationship can be walked against its
+        direction, so unlike the earlier direct-edge lookup a one-hop path
+        may be a to_key -> from_key relationship. Returns list of paths,
+        where each path is a list of relationships ordered from from_key to
+        to_key. See GraphTraversal.find_paths.
+
+        Paths through relationships deleted since the adjacency cache last
+        saw them (e.g. by writers that bypass its hooks) are dropped.
         """
-        # TODO: Implement proper graph traversal
-        # For Phase 1, just return direct relationships
-        direct = cls.query.filter_by(
-            from_entity_key=from_key,
-            to_entity_key=to_key
-        ).all()
-        return [[r] for r in direct] if direct else []
+        from api.utils.graph import GraphTraversal
+
+        result = GraphTraversal.find_paths(from_key, to_key, max_depth=max_hops, k=k)
+        if not result:
+            return []
+
+        path_keys = [[r['relationship_key'] for r in path['relationships']] for path in result['paths']]
+        loaded = {
+            r.relationship_key: r
+            for r in GraphTraversal._load_relationships([key for keys in path_keys for key in keys])
+        }
+        return [[loaded[key] for key in keys] for keys in path_keys if all(key in loaded for key in keys)]
 
     def to_dict(self, include_entities: bool = False) -> dict:
         """Convert to dictionary with optional entity details."""
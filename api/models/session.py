@@ -5,7 +5,8 @@ Server-side session management for user authentication.
 """
 import secrets
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index, event
+from sqlalchemy.orm.attributes import set_committed_value
 
 from api.models.base import BaseModel, db, get_key, get_now
 
@@ -223,8 +224,11 @@ class Session(BaseModel):
     @classmethod
     def revoke_all_for_user(cls, user_key: str) -> int:
         """Revoke all sessions for a user. Returns count deleted."""
+        from api.services.auth_cache import auth_cache
+
         result = cls.query.filter_by(user_key=user_key).delete()
         db.session.commit()
+        auth_cache.invalidate_user(user_key)
         return result
 
     def touch(self) -> None:
@@ -232,6 +236,22 @@ class Session(BaseModel):
         self.last_activity_at = get_now()
         db.session.commit()
 
+    def record_activity(self) -> datetime:
+        """
+        Write last_activity_at on its own connection.
+
+        Unlike touch(), this does not commit (and so expire) the request's
+        session. Returns the timestamp written.
+        """
+        when = get_now()
+        table = self.__table__
+        with db.engine.begin() as connection:
+            connection.execute(
+                table.update().where(table.c.session_key == self.session_key).values(last_activity_at=when)
+            )
+        set_committed_value(self, 'last_activity_at', when)
+        return when
+
     def extend(self, hours: int = None) -> None:
         """Extend session expiry."""
         if hours is None:
@@ -282,3 +302,11 @@ class Session(BaseModel):
                 }
 
         return result
+
+
+@event.listens_for(Session, 'after_update')
+@event.listens_for(Session, 'after_delete')
+def _session_changed(mapper, connection, target):
+    """Logout, revocation or extension makes a cached session token stale."""
+    from api.services.auth_cache import auth_cache
+    auth_cache.invalidate_session(target.session_key)
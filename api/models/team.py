@@ -3,7 +3,7 @@ Collective Memory Platform - Team Model
 
 Team structure for organizing users within domains.
 """
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index, event, inspect
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -353,3 +353,22 @@ class TeamMembership(BaseModel):
             }
 
         return result
+
+
+# ========== Access context invalidation ==========
+
+@event.listens_for(TeamMembership, 'after_insert')
+@event.listens_for(TeamMembership, 'after_update')
+@event.listens_for(TeamMembership, 'after_delete')
+@event.listens_for(Team, 'after_delete')
+def _memberships_changed(mapper, connection, target):
+    """Membership or team changes make resolved access contexts stale."""
+    from api.services.scope import scope_service
+    scope_service.invalidate_access_contexts()
+
+
+@event.listens_for(Team, 'after_update')
+def _team_status_changed(mapper, connection, target):
+    """Archiving or reactivating a team changes who can see its scope."""
+    if inspect(target).attrs.status.history.has_changes():
+        _memberships_changed(mapper, connection, target)
@@ -5,7 +5,7 @@ User authentication and profile management.
 """
 import secrets
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Text, DateTime, Boolean, Index, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, Boolean, Index, ForeignKey, event, inspect
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -301,3 +301,20 @@ class User(BaseModel):
             }
 
         return result
+
+
+@event.listens_for(User, 'after_update')
+def _user_access_changed(mapper, connection, target):
+    """Role or domain changes make resolved access contexts stale."""
+    state = inspect(target)
+    if state.attrs.role.history.has_changes() or state.attrs.domain_key.history.has_changes():
+        from api.services.scope import scope_service
+        scope_service.invalidate_access_contexts()
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    """PAT rotation, suspension or any other change makes cached tokens stale."""
+    from api.services.auth_cache import auth_cache
+    auth_cache.invalidate_user(target.user_key)
@@ -232,9 +232,10 @@ class WorkSession(BaseModel):
     def _get_project_info(self) -> Optional[dict]:
         """Get enriched project information."""
         from api.models.project import Project
+        from api.services.relations import relation_loader
 
         # First try to find in Project table (new style)
-        project = Project.query.get(self.project_key)
+        project = relation_loader.get(Project, self.project_key)
         if project:
             return {
                 'project_key': project.project_key,
@@ -248,7 +249,7 @@ class WorkSession(BaseModel):
 
         # Fall back to Entity (old style - project_key is an entity_key)
         from api.models.entity import Entity
-        entity = Entity.get_by_key(self.project_key)
+        entity = relation_loader.get(Entity, self.project_key)
         if entity:
             props = entity.properties or {}
             return {
@@ -268,8 +269,9 @@ class WorkSession(BaseModel):
         from api.models.agent import Agent
         from api.models.persona import Persona
         from api.models.model import Model
+        from api.services.relations import relation_loader
 
-        agent = Agent.query.filter_by(agent_id=self.agent_id).first()
+        agent = relation_loader.get(Agent, self.agent_id, column='agent_id')
         if not agent:
             return None
 
@@ -283,17 +285,15 @@ class WorkSession(BaseModel):
         }
 
         # Get persona name
-        if agent.persona_key:
-            persona = Persona.query.get(agent.persona_key)
-            if persona:
-                result['persona_name'] = persona.name
-                result['persona_role'] = persona.role
+        persona = relation_loader.get(Persona, agent.persona_key)
+        if persona:
+            result['persona_name'] = persona.name
+            result['persona_role'] = persona.role
 
         # Get model name
-        if agent.model_key:
-            model = Model.query.get(agent.model_key)
-            if model:
-                result['model_name'] = model.name
-                result['model_id'] = model.model_id
+        model = relation_loader.get(Model, agent.model_key)
+        if model:
+            result['model_name'] = model.name
+            result['model_id'] = model.model_id
 
         return result
@@ -1,7 +1,8 @@
 """
 Collective Memory Platform - AI Model Providers
 
-Multi-provider abstraction for Claude, GPT, and Gemini models.
+Multi-provider abstraction for Claude, GPT, and Gemini models (and a fake
+provider for offline development and load tests).
 """
 
 from .base import BaseModelProvider, StreamChunk, Message
@@ -9,6 +10,7 @@ from .registry import ProviderRegistry, get_provider
 from .anthropic import AnthropicProvider
 from .openai import OpenAIProvider
 from .google import GoogleProvider
+from .fake import FakeProvider
 
 __all__ = [
     'BaseModelProvider',
@@ -19,4 +21,5 @@ __all__ = [
     'AnthropicProvider',
     'OpenAIProvider',
     'GoogleProvider',
+    'FakeProvider',
 ]
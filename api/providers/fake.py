@@ -0,0 +1,61 @@
+"""
+Collective Memory Platform - Fake Provider
+
+Offline provider that streams canned tokens at a fixed rate.
+"""
+
+import asyncio
+import logging
+from typing import AsyncGenerator, List, Optional
+
+from .base import BaseModelProvider, StreamChunk, Message
+
+logger = logging.getLogger(__name__)
+
+
+class FakeProvider(BaseModelProvider):
+    """
+    Provider for 'fake-*' models, for development and load tests.
+
+    Echoes the last user message back one word per token, padded to
+    `tokens` tokens, emitting tokens_per_second of them with asyncio.sleep
+    between tokens. Like a real provider it holds no thread while waiting.
+    """
+
+    def __init__(self, tokens_per_second: float = 50.0, tokens: int = 20):
+        self.tokens_per_second = tokens_per_second
+        self.tokens = tokens
+
+    @property
+    def name(self) -> str:
+        return 'fake'
+
+    @property
+    def supported_models(self) -> List[str]:
+        return ['fake-']
+
+    async def stream_completion(
+        self,
+        messages: List[Message],
+        model: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> AsyncGenerator[StreamChunk, None]:
+        """Stream min(tokens, max_tokens) tokens at tokens_per_second."""
+        prompt = next((m.content for m in reversed(messages) if m.role == 'user'), '')
+        words = (prompt.split() or ['token'])
+        count = min(self.tokens, max_tokens)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+
+        for i in range(count):
+            await asyncio.sleep(delay)
+            yield StreamChunk(content=words[i % len(words)] + ' ', done=False)
+
+        yield StreamChunk(
+            content="",
+            done=True,
+            finish_reason="stop",
+            usage={'input_tokens': len(words), 'output_tokens': count}
+        )
@@ -65,7 +65,7 @@ class GoogleProvider(BaseModelProvider):
         temperature: float = 0.7,
         **kwargs
     ) -> AsyncGenerator[StreamChunk, None]:
-        """Stream completion from Gemini using synchronous streaming."""
+        """Stream completion from Gemini using the SDK's async client."""
 
         # Convert messages to Gemini format using proper genai_types
         contents = []
@@ -90,16 +90,15 @@ class GoogleProvider(BaseModelProvider):
             resolved_model = self._resolve_model(model)
             logger.info(f"Calling Gemini API: model={resolved_model}, messages={len(contents)}")
 
-            # Use streaming API method
-            response_stream = self.client.models.generate_content_stream(
+            # Use the async streaming API so the event loop is never blocked
+            response_stream = await self.client.aio.models.generate_content_stream(
                 model=resolved_model,
                 contents=contents,
                 config=config,
             )
 
             chunk_count = 0
-            # Iterate through synchronous stream
-            for chunk in response_stream:
+            async for chunk in response_stream:
                 if hasattr(chunk, 'text') and chunk.text:
                     chunk_count += 1
                     yield StreamChunk(
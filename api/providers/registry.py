@@ -11,6 +11,7 @@ from .base import BaseModelProvider
 from .anthropic import AnthropicProvider
 from .openai import OpenAIProvider
 from .google import GoogleProvider
+from .fake import FakeProvider
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ class ProviderRegistry:
         'anthropic': AnthropicProvider,
         'openai': OpenAIProvider,
         'google': GoogleProvider,
+        'fake': FakeProvider,
     }
 
     @classmethod
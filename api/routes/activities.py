@@ -208,16 +208,20 @@ def register_activity_routes(api: Api):
         @ns.doc('purge_activities')
         @ns.marshal_with(response_model)
         def post(self):
-            """Manually trigger purge of old activities."""
+            """Manually run activity maintenance: create upcoming partitions and retire expired ones."""
             try:
-                deleted = activity_service.purge_old()
+                result = activity_service.run_maintenance()
+                if result['skipped']:
+                    return {
+                        'success': True,
+                        'msg': 'Activity maintenance is already running',
+                        'data': {**result, 'retention_days': Activity.RETENTION_DAYS}
+                    }
                 return {
                     'success': True,
-                    'msg': f'Purged {deleted} old activity records',
-                    'data': {
-                        'deleted': deleted,
-                        'retention_days': Activity.RETENTION_DAYS
-                    }
+                    'msg': f"Retired {len(result['detached'])} activity partitions "
+                           f"and purged {result['deleted']} old activity records",
+                    'data': {**result, 'retention_days': Activity.RETENTION_DAYS}
                 }
             except Exception as e:
                 return {'success': False, 'msg': str(e)}, 500
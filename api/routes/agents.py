@@ -9,7 +9,9 @@ from flask_restx import Api, Resource, Namespace, fields
 from api.models import Agent, AgentCheckpoint, Model, Persona, Session, Team, Client, is_valid_client, get_client_affinities
 from api.services.checkpoint import checkpoint_service
 from api.services.activity import activity_service
+from api.services.agent_bootstrap import agent_bootstrap_service
 from api.services.auth import require_auth, require_auth_strict
+from api.services.relations import relation_loader
 
 
 def get_user_domain_key() -> str | None:
@@ -69,6 +71,22 @@ def register_agent_routes(api: Api):
         'project_name': fields.String(description='Project/Repository name (optional)'),
     })
 
+    agent_bootstrap = ns.model('AgentBootstrap', {
+        'agent_id': fields.String(required=True, description='Agent ID'),
+        'client': fields.String(required=True, description='Client type: claude-code, claude-desktop, codex, gemini-cli, cursor'),
+        'model_id': fields.String(description='API model identifier (e.g., claude-opus-4-5-20251101)'),
+        'model_key': fields.String(description='Model key (alternative to model_id)'),
+        'persona': fields.String(description='Persona role (e.g., backend-code)'),
+        'focus': fields.String(description='Current work focus'),
+        'capabilities': fields.List(fields.String, description='Agent capabilities'),
+        'team_key': fields.String(description='Explicit active team (optional - auto-detected)'),
+        'team_slug': fields.String(description='Explicit active team slug (optional)'),
+        'project_key': fields.String(description='Explicit project key (optional - auto-detected)'),
+        'repository_url': fields.String(description='Git remote URL of the working copy (optional)'),
+        'project_name': fields.String(description='Project name to use if no project is found, e.g. the repository name (optional)'),
+        'directory_name': fields.String(description='Working directory name, matched against projects (optional)'),
+    })
+
     status_update = ns.model('StatusUpdate', {
         'current_task': fields.String(description='Current task description'),
         'progress': fields.String(description='Progress: not_started, in_progress, blocked, completed'),
@@ -121,7 +139,7 @@ def register_agent_routes(api: Api):
                 'success': True,
                 'msg': f'Found {len(agents)} agents',
                 'data': {
-                    'agents': [a.to_dict() for a in agents]
+                    'agents': relation_loader.serialize_agents(agents)
                 }
             }
 
@@ -146,248 +164,304 @@ def register_agent_routes(api: Api):
             - role: Legacy field (deprecated, use persona_key)
             - capabilities: List of capabilities
             """
-            data = request.json
+            return _register_agent(request.json)
+
+    @ns.route('/bootstrap')
+    class AgentBootstrap(Resource):
+        @ns.doc('bootstrap_agent')
+        @ns.expect(agent_bootstrap)
+        @ns.marshal_with(response_model)
+        @require_auth
+        def post(self):
+            """Resolve an agent's startup context and register it in one request.
 
+            Replaces the chain of lookups an MCP client makes on identify:
+            user, teams and scopes (/auth/me), project detection by project_key,
+            repository URL or directory name, model and persona lookups,
+            registration (/agents/register), the user's existing agents and the
+            active work session.
+
+            The active team is resolved from team_key/team_slug, or detected
+            from the project and agent_id. Unknown models and personas are
+            reported as null rather than failing registration.
+            """
+            data = request.json or {}
             if not data.get('agent_id'):
                 return {'success': False, 'msg': 'agent_id is required'}, 400
 
-            # Get the authenticated user
-            user_key = g.current_user.user_key if g.current_user else None
-            if not user_key:
+            user = g.current_user
+            if not user:
                 return {'success': False, 'msg': 'Authentication required to register agents'}, 401
 
-            # Validate client - REQUIRED
-            client = data.get('client')
-            if not client:
-                return {
-                    'success': False,
-                    'msg': 'client is required. Valid options: claude-code, claude-desktop, codex, gemini-cli, cursor'
-                }, 400
-            if not is_valid_client(client):
-                return {
-                    'success': False,
-                    'msg': f"Invalid client type: '{client}'. Valid options: claude-code, claude-desktop, codex, gemini-cli, cursor"
-                }, 400
+            context = agent_bootstrap_service.resolve(user, data)
+            project, team = context['project'], context['team']
+            registration = {
+                'agent_id': data['agent_id'],
+                'client': data.get('client'),
+                'focus': data.get('focus'),
+                'capabilities': data.get('capabilities'),
+                'model_key': context['model']['model_key'] if context['model'] else None,
+                'persona_key': context['persona']['persona_key'] if context['persona'] else None,
+                'team_key': team['team_key'] if team else None,
+                'project_key': project['project_key'] if project else None,
+                'project_name': context['project_name'],
+            }
 
-            # Get or derive client_key from client type
-            client_key = data.get('client_key')
-            if not client_key:
-                # Auto-derive from client type
-                client_key = Client.map_client_type_to_key(client)
-            elif not client_key.startswith('client-'):
-                client_key = f'client-{client_key}'
+            result = _register_agent({k: v for k, v in registration.items() if v is not None})
+            result, status = result if isinstance(result, tuple) else (result, 200)
+            if not result.get('success'):
+                return result, status
 
-            # Validate client_key exists in database (optional - may not be seeded yet)
-            client_ref = Client.get_by_key(client_key)
-            # Don't fail if client doesn't exist - it may not be seeded yet
+            context['agent'] = result['data']
+            context['work_session'] = agent_bootstrap_service.get_active_work_session(user)
+            return {
+                'success': True,
+                'msg': result['msg'],
+                'data': context
+            }, status
+
+    def _register_agent(data):
+        """Register or reconnect an agent for the current user. Returns a response, or (response, status)."""
+        if not data.get('agent_id'):
+            return {'success': False, 'msg': 'agent_id is required'}, 400
+
+        # Get the authenticated user
+        user_key = g.current_user.user_key if g.current_user else None
+        if not user_key:
+            return {'success': False, 'msg': 'Authentication required to register agents'}, 401
+
+        # Validate client - REQUIRED
+        client = data.get('client')
+        if not client:
+            return {
+                'success': False,
+                'msg': 'client is required. Valid options: claude-code, claude-desktop, codex, gemini-cli, cursor'
+            }, 400
+        if not is_valid_client(client):
+            return {
+                'success': False,
+                'msg': f"Invalid client type: '{client}'. Valid options: claude-code, claude-desktop, codex, gemini-cli, cursor"
+            }, 400
+
+        # Get or derive client_key from client type
+        client_key = data.get('client_key')
+        if not client_key:
+            # Auto-derive from client type
+            client_key = Client.map_client_type_to_key(client)
+        elif not client_key.startswith('client-'):
+            client_key = f'client-{client_key}'
+
+        # Validate client_key exists in database (optional - may not be seeded yet)
+        client_ref = Client.get_by_key(client_key)
+        # Don't fail if client doesn't exist - it may not be seeded yet
+
+        # Validate model_key if provided
+        model_key = data.get('model_key')
+        if model_key:
+            model = Model.get_by_key(model_key)
+            if not model:
+                return {'success': False, 'msg': f"Model not found: '{model_key}'"}, 404
+
+        # Validate persona_key if provided
+        persona_key = data.get('persona_key')
+        persona = None
+        if persona_key:
+            persona = Persona.get_by_key(persona_key)
+            if not persona:
+                return {'success': False, 'msg': f"Persona not found: '{persona_key}'"}, 404
+
+        # Check affinity warning
+        affinity_warning = None
+        if client and persona:
+            suggested_clients = persona.suggested_clients or []
+            if client not in suggested_clients:
+                affinity_roles = get_client_affinities(client)
+                affinity_warning = f"Persona '{persona.role}' is not typically used with client '{client}'. Suggested personas for {client}: {affinity_roles}"
+
+        # Get user info for initials suffix and denormalization
+        user = g.current_user
+        user_initials = user.initials.lower() if user and user.initials else None
+        user_name = user.display_name if user else None
+
+        # Resolve team_key and get team_name FIRST (needed for membership_slug)
+        team_key = data.get('team_key')
+        team_name = None
+        if team_key:
+            team = Team.get_by_key(team_key)
+            if team:
+                team_name = team.name
+            else:
+                return {'success': False, 'msg': f"Team not found: '{team_key}'"}, 404
+
+        # Get membership slug for the active team (if applicable)
+        membership_slug = None
+        if team_key and user:
+            from api.models.team import TeamMembership
+            membership = TeamMembership.get_user_membership(user.user_key, team_key)
+            if membership:
+                # Use existing slug or generate from initials
+                membership_slug = membership.slug or membership.ensure_slug()
+
+        # Use membership_slug if available, otherwise fall back to user_initials
+        suffix = membership_slug or user_initials
+
+        # Auto-suffix agent_id with suffix if not already present
+        agent_id = data['agent_id']
+        if suffix:
+            # Check if agent_id already ends with suffix
+            if not agent_id.endswith(f'-{suffix}'):
+                # Check if already has short alphanumeric suffix that we should replace
+                parts = agent_id.rsplit('-', 1)
+                if len(parts) == 2 and len(parts[1]) <= 10 and parts[1].replace('-', '').isalnum():
+                    # Replace existing suffix with user's suffix
+                    agent_id = f"{parts[0]}-{suffix}"
+                else:
+                    # Append suffix
+                    agent_id = f"{agent_id}-{suffix}"
 
-            # Validate model_key if provided
-            model_key = data.get('model_key')
-            if model_key:
-                model = Model.get_by_key(model_key)
-                if not model:
-                    return {'success': False, 'msg': f"Model not found: '{model_key}'"}, 404
+        # Get project info
+        project_key = data.get('project_key')
+        project_name = data.get('project_name')
+
+        # Check if agent already exists
+        existing = Agent.get_by_agent_id(agent_id)
+
+        if existing:
+            # Update existing agent (reconnection)
+            # Link to current user if not already linked
+            if not existing.user_key:
+                existing.user_key = user_key
+            elif existing.user_key != user_key:
+                # Agent belongs to different user - deny access
+                return {'success': False, 'msg': 'Agent is registered to a different user'}, 403
 
-            # Validate persona_key if provided
-            persona_key = data.get('persona_key')
-            persona = None
+            if client:
+                existing.client = client
+            if client_key:
+                existing.client_key = client_key
+            if model_key:
+                existing.model_key = model_key
             if persona_key:
-                persona = Persona.get_by_key(persona_key)
-                if not persona:
-                    return {'success': False, 'msg': f"Persona not found: '{persona_key}'"}, 404
-
-            # Check affinity warning
-            affinity_warning = None
-            if client and persona:
-                suggested_clients = persona.suggested_clients or []
-                if client not in suggested_clients:
-                    affinity_roles = get_client_affinities(client)
-                    affinity_warning = f"Persona '{persona.role}' is not typically used with client '{client}'. Suggested personas for {client}: {affinity_roles}"
-
-            # Get user info for initials suffix and denormalization
-            user = g.current_user
-            user_initials = user.initials.lower() if user and user.initials else None
-            user_name = user.display_name if user else None
+                existing.persona_key = persona_key
+            if data.get('focus'):
+                existing.update_focus(data['focus'])
+            if data.get('role'):
+                existing.role = data['role']
+            if data.get('capabilities'):
+                existing.capabilities = data['capabilities']
 
-            # Resolve team_key and get team_name FIRST (needed for membership_slug)
-            team_key = data.get('team_key')
-            team_name = None
-            if team_key:
-                team = Team.get_by_key(team_key)
-                if team:
-                    team_name = team.name
-                else:
-                    return {'success': False, 'msg': f"Team not found: '{team_key}'"}, 404
-
-            # Get membership slug for the active team (if applicable)
-            membership_slug = None
-            if team_key and user:
-                from api.models.team import TeamMembership
-                membership = TeamMembership.get_user_membership(user.user_key, team_key)
-                if membership:
-                    # Use existing slug or generate from initials
-                    membership_slug = membership.slug or membership.ensure_slug()
-
-            # Use membership_slug if available, otherwise fall back to user_initials
-            suffix = membership_slug or user_initials
-
-            # Auto-suffix agent_id with suffix if not already present
-            agent_id = data['agent_id']
-            if suffix:
-                # Check if agent_id already ends with suffix
-                if not agent_id.endswith(f'-{suffix}'):
-                    # Check if already has short alphanumeric suffix that we should replace
-                    parts = agent_id.rsplit('-', 1)
-                    if len(parts) == 2 and len(parts[1]) <= 10 and parts[1].replace('-', '').isalnum():
-                        # Replace existing suffix with user's suffix
-                        agent_id = f"{parts[0]}-{suffix}"
-                    else:
-                        # Append suffix
-                        agent_id = f"{agent_id}-{suffix}"
-
-            # Get project info
-            project_key = data.get('project_key')
-            project_name = data.get('project_name')
-
-            # Check if agent already exists
-            existing = Agent.get_by_agent_id(agent_id)
-
-            if existing:
-                # Update existing agent (reconnection)
-                # Link to current user if not already linked
-                if not existing.user_key:
-                    existing.user_key = user_key
-                elif existing.user_key != user_key:
-                    # Agent belongs to different user - deny access
-                    return {'success': False, 'msg': 'Agent is registered to a different user'}, 403
-
-                if client:
-                    existing.client = client
-                if client_key:
-                    existing.client_key = client_key
-                if model_key:
-                    existing.model_key = model_key
-                if persona_key:
-                    existing.persona_key = persona_key
-                if data.get('focus'):
-                    existing.update_focus(data['focus'])
-                if data.get('role'):
-                    existing.role = data['role']
-                if data.get('capabilities'):
-                    existing.capabilities = data['capabilities']
-
-                # Update denormalized user info
-                existing.user_name = user_name
-                existing.user_initials = user_initials.upper() if user_initials else None
-
-                # Update team association if provided
-                if team_key:
-                    existing.team_key = team_key
-                    existing.team_name = team_name
-
-                # Update project association if provided
-                if project_key:
-                    existing.project_key = project_key
-                if project_name:
-                    existing.project_name = project_name
-
-                existing.update_heartbeat()
-                existing.save()
-
-                # Record reconnection activity
-                activity_service.record_agent_registered(
-                    actor=existing.agent_id,
-                    agent_key=existing.agent_key,
-                    client=existing.client,
-                    persona=existing.persona_key,
-                    model=existing.model_key,
-                    is_reconnect=True,
-                    domain_key=get_user_domain_key(),
-                    user_key=get_user_key()
-                )
+            # Update denormalized user info
+            existing.user_name = user_name
+            existing.user_initials = user_initials.upper() if user_initials else None
 
-                # Create or update session for this agent connection
-                session = Session.create_for_user(
-                    user_key=user_key,
-                    remember_me=True,  # Agent sessions are long-lived
-                    user_agent=f"MCP/{client}" if client else "MCP/unknown",
-                    ip_address=request.remote_addr,
-                    agent_key=existing.agent_key,
-                    cleanup_old=False  # Don't cleanup - agents may have multiple sessions
-                )
+            # Update team association if provided
+            if team_key:
+                existing.team_key = team_key
+                existing.team_name = team_name
+
+            # Update project association if provided
+            if project_key:
+                existing.project_key = project_key
+            if project_name:
+                existing.project_name = project_name
+
+            existing.update_heartbeat()
+            existing.save()
+
+            # Record reconnection activity
+            activity_service.record_agent_registered(
+                actor=existing.agent_id,
+                agent_key=existing.agent_key,
+                client=existing.client,
+                persona=existing.persona_key,
+                model=existing.model_key,
+                is_reconnect=True,
+                domain_key=get_user_domain_key(),
+                user_key=get_user_key()
+            )
 
-                result = {
-                    'success': True,
-                    'msg': 'Agent updated',
-                    'data': existing.to_dict()
-                }
-                result['data']['session_key'] = session.session_key
-                if affinity_warning:
-                    result['data']['affinity_warning'] = affinity_warning
-                return result
-
-            # Create new agent linked to the authenticated user
-            agent = Agent(
-                agent_id=agent_id,  # Use processed agent_id with initials suffix
+            # Create or update session for this agent connection
+            session = Session.create_for_user(
                 user_key=user_key,
-                client=client,
-                client_key=client_key,
-                model_key=model_key,
-                persona_key=persona_key,
-                focus=data.get('focus'),
-                role=data.get('role'),
-                capabilities=data.get('capabilities', []),
-                status={'progress': 'not_started'},
-                # Denormalized user info
-                user_name=user_name,
-                user_initials=user_initials.upper() if user_initials else None,
-                # Team association
-                team_key=team_key,
-                team_name=team_name,
-                # Project association
-                project_key=project_key,
-                project_name=project_name,
+                remember_me=True,  # Agent sessions are long-lived
+                user_agent=f"MCP/{client}" if client else "MCP/unknown",
+                ip_address=request.remote_addr,
+                agent_key=existing.agent_key,
+                cleanup_old=False  # Don't cleanup - agents may have multiple sessions
             )
 
-            # Update focus timestamp if focus provided
-            if data.get('focus'):
-                from api.models.base import get_now
-                agent.focus_updated_at = get_now()
-
-            try:
-                agent.save()
-                # Record registration activity
-                activity_service.record_agent_registered(
-                    actor=agent.agent_id,
-                    agent_key=agent.agent_key,
-                    client=agent.client,
-                    persona=agent.persona_key,
-                    model=agent.model_key,
-                    domain_key=get_user_domain_key(),
-                    user_key=get_user_key()
-                )
+            result = {
+                'success': True,
+                'msg': 'Agent updated',
+                'data': existing.to_dict()
+            }
+            result['data']['session_key'] = session.session_key
+            if affinity_warning:
+                result['data']['affinity_warning'] = affinity_warning
+            return result
+
+        # Create new agent linked to the authenticated user
+        agent = Agent(
+            agent_id=agent_id,  # Use processed agent_id with initials suffix
+            user_key=user_key,
+            client=client,
+            client_key=client_key,
+            model_key=model_key,
+            persona_key=persona_key,
+            focus=data.get('focus'),
+            role=data.get('role'),
+            capabilities=data.get('capabilities', []),
+            status={'progress': 'not_started'},
+            # Denormalized user info
+            user_name=user_name,
+            user_initials=user_initials.upper() if user_initials else None,
+            # Team association
+            team_key=team_key,
+            team_name=team_name,
+            # Project association
+            project_key=project_key,
+            project_name=project_name,
+        )
+
+        # Update focus timestamp if focus provided
+        if data.get('focus'):
+            from api.models.base import get_now
+            agent.focus_updated_at = get_now()
+
+        try:
+            agent.save()
+            # Record registration activity
+            activity_service.record_agent_registered(
+                actor=agent.agent_id,
+                agent_key=agent.agent_key,
+                client=agent.client,
+                persona=agent.persona_key,
+                model=agent.model_key,
+                domain_key=get_user_domain_key(),
+                user_key=get_user_key()
+            )
 
-                # Create session for this agent connection
-                session = Session.create_for_user(
-                    user_key=user_key,
-                    remember_me=True,  # Agent sessions are long-lived
-                    user_agent=f"MCP/{client}" if client else "MCP/unknown",
-                    ip_address=request.remote_addr,
-                    agent_key=agent.agent_key,
-                    cleanup_old=False  # Don't cleanup - agents may have multiple sessions
-                )
+            # Create session for this agent connection
+            session = Session.create_for_user(
+                user_key=user_key,
+                remember_me=True,  # Agent sessions are long-lived
+                user_agent=f"MCP/{client}" if client else "MCP/unknown",
+                ip_address=request.remote_addr,
+                agent_key=agent.agent_key,
+                cleanup_old=False  # Don't cleanup - agents may have multiple sessions
+            )
 
-                result = {
-                    'success': True,
-                    'msg': 'Agent registered',
-                    'data': agent.to_dict()
-                }
-                result['data']['session_key'] = session.session_key
-                if affinity_warning:
-                    result['data']['affinity_warning'] = affinity_warning
-                return result, 201
-            except Exception as e:
-                return {'success': False, 'msg': str(e)}, 500
+            result = {
+                'success': True,
+                'msg': 'Agent registered',
+                'data': agent.to_dict()
+            }
+            result['data']['session_key'] = session.session_key
+            if affinity_warning:
+                result['data']['affinity_warning'] = affinity_warning
+            return result, 201
+        except Exception as e:
+            return {'success': False, 'msg': str(e)}, 500
 
     def _check_agent_access(agent_key_or_id):
         """Helper to check if user has access to an agent."""
@@ -405,6 +479,24 @@ def register_agent_routes(api: Api):
 
         return agent, None, None
 
+    def _record_session_activity(session_key):
+        """Slide a work session's auto-close for the current user. Returns False if it is gone or closed."""
+        from api.models import WorkSession
+
+        user = g.current_user
+        if not user or user.is_guest:
+            return False
+
+        session = WorkSession.get_by_key(session_key)
+        if not session or session.status != 'active':
+            return False
+        if session.user_key != user.user_key and not user.is_admin:
+            return False
+
+        session.update_activity()
+        session.save()
+        return True
+
     @ns.route('/<string:agent_key>')
     @ns.param('agent_key', 'Agent Key or Agent ID')
     class AgentDetail(Resource):
@@ -535,22 +627,47 @@ def register_agent_routes(api: Api):
     @ns.param('agent_id', 'Agent ID')
     class AgentHeartbeat(Resource):
         @ns.doc('agent_heartbeat')
+        @ns.param('compact', 'Return only counts and milestone; last-seen writes are coalesced', type=bool, default=False)
+        @ns.param('session_key', 'Also record activity in this work session (compact mode)', type=str)
         @ns.marshal_with(response_model)
         @require_auth
         def post(self, agent_id):
-            """Update agent heartbeat. Returns unread message count including autonomous tasks."""
-            from api.models import Message
+            """
+            Update agent heartbeat. Returns unread message count including autonomous tasks.
+
+            compact=true is the cheap path used by the MCP server on every tool
+            call: last-seen is coalesced by the heartbeat service and only the
+            fields the MCP server reads are returned, plus unread_preview (the
+            newest unread messages) so it can show them without fetching them.
+            With session_key it also does the work of
+            POST /work-sessions/<key>/activity and reports session_active, so
+            the MCP server needs one request instead of two. Counts in both
+            modes come from the agent's inbox.
+            """
+            from api.models import Inbox
+            from api.services.heartbeat import heartbeat_service
+            from api.services.scope import scope_service
 
             agent, error, status = _check_agent_access(agent_id)
             if error:
                 return error, status
 
-            try:
-                agent.update_heartbeat()
+            compact = request.args.get('compact', 'false').lower() == 'true'
 
-                # Get unread message counts for this agent
-                unread_count = Message.get_unread_count(agent_key=agent.agent_key)
-                autonomous_count = Message.get_unread_autonomous_count(agent_key=agent.agent_key)
+            try:
+                if compact:
+                    heartbeat_service.touch(agent.agent_key)
+                else:
+                    agent.update_heartbeat()
+
+                # Unread counts from the agent's inbox (same visibility as get_messages)
+                access_context = scope_service.get_access_context(g.current_user)
+                visibility = {
+                    'user_key': get_user_key(),
+                    'team_keys': access_context.team_keys if access_context else None,
+                    'domain_key': get_user_domain_key(),
+                }
+                unread_count, autonomous_count = Inbox.get_counts(agent.agent_key, **visibility)
 
                 # Record activity with message counts
                 activity_service.record_agent_heartbeat(
@@ -564,11 +681,27 @@ def register_agent_routes(api: Api):
                 )
 
                 # Build response with message notification and focused mode info
-                agent_data = agent.to_dict()
+                if compact:
+                    agent_data = {
+                        'agent_key': agent.agent_key,
+                        'agent_id': agent.agent_id,
+                        'current_milestone': None,
+                        'unread_preview': [],
+                    }
+                    if unread_count:
+                        # The MCP server shows these on the next tool result instead of calling get_messages
+                        preview = Inbox.query_unread(agent.agent_key, **visibility).limit(5).all()
+                        agent_data['unread_preview'] = [message.to_dict(include_read_status=False) for message in preview]
+                else:
+                    agent_data = agent.to_dict()
                 agent_data['unread_messages'] = unread_count
                 agent_data['autonomous_tasks'] = autonomous_count
                 agent_data['recommended_heartbeat_seconds'] = 30 if agent.is_focused else 300
 
+                session_key = request.args.get('session_key')
+                if compact and session_key:
+                    agent_data['session_active'] = _record_session_activity(session_key)
+
                 # Include current milestone for MCP reminder display
                 if agent.current_milestone_key:
                     agent_data['current_milestone'] = {
@@ -7,10 +7,75 @@ from flask import request, Response, g
 from flask_restx import Api, Resource, Namespace, fields
 import json
 
+from api import config
 from api.models import Conversation, ChatMessage, Persona, db
 from api.services.auth import require_auth, require_auth_strict
 
 
+def _check_conversation_access(conversation_key):
+    """Helper to check if user has access to a conversation."""
+    conversation = Conversation.get_by_key(conversation_key)
+    if not conversation:
+        return None, {'success': False, 'msg': 'Conversation not found'}, 404
+
+    # Check domain access
+    if g.current_user and g.current_user.domain_key:
+        if conversation.domain_key and conversation.domain_key != g.current_user.domain_key:
+            return None, {'success': False, 'msg': 'Conversation not found'}, 404
+
+    return conversation, None, None
+
+
+def prepare_chat_stream(conversation_key: str, data: dict):
+    """
+    Validate a streaming chat request and save the user's message.
+
+    Shared by the WSGI stream route below and the ASGI one in api.asgi.
+    Runs in a request context after require_auth.
+
+    Returns:
+        (stream kwargs for chat_service.stream_response, None, None),
+        or (None, error, status)
+    """
+    conversation, error, status = _check_conversation_access(conversation_key)
+    if error:
+        return None, error, status
+
+    if not (data or {}).get('content'):
+        return None, {'success': False, 'msg': 'content is required'}, 400
+
+    persona = conversation.persona
+    if not persona:
+        return None, {'success': False, 'msg': 'Conversation has no associated persona'}, 400
+
+    # Save user message
+    user_message = ChatMessage(
+        conversation_key=conversation_key,
+        role='user',
+        content=data['content']
+    )
+    user_message.save()
+
+    # Get conversation history for context
+    messages = conversation.get_messages(limit=20)
+    history = [
+        {'role': m.role, 'content': m.content}
+        for m in messages[:-1]  # Exclude the just-added user message
+    ]
+
+    return {
+        'conversation_key': conversation_key,
+        'user_message': data['content'],
+        'persona_key': persona.persona_key,
+        'model': config.CM_CHAT_MODEL,
+        'system_prompt': persona.system_prompt or f"You are {persona.name}. {persona.role or ''}",
+        'history': history,
+        'inject_context': True,
+        'max_tokens': 4086,
+        'temperature': data.get('temperature', 0.7),
+    }, None, None
+
+
 def register_conversation_routes(api: Api):
     """Register conversation routes with the API."""
 
@@ -138,19 +203,6 @@ def register_conversation_routes(api: Api):
             except Exception as e:
                 return {'success': False, 'msg': str(e)}, 500
 
-    def _check_conversation_access(conversation_key):
-        """Helper to check if user has access to a conversation."""
-        conversation = Conversation.get_by_key(conversation_key)
-        if not conversation:
-            return None, {'success': False, 'msg': 'Conversation not found'}, 404
-
-        # Check domain access
-        if g.current_user and g.current_user.domain_key:
-            if conversation.domain_key and conversation.domain_key != g.current_user.domain_key:
-                return None, {'success': False, 'msg': 'Conversation not found'}, 404
-
-        return conversation, None, None
-
     @ns.route('/<string:conversation_key>')
     @ns.param('conversation_key', 'Conversation identifier')
     class ConversationDetail(Resource):
@@ -344,7 +396,7 @@ def register_conversation_routes(api: Api):
                             conversation_key=conversation_key,
                             user_message=data['content'],
                             persona_key=persona.persona_key,
-                            model='gemini-3-flash-preview',
+                            model=config.CM_CHAT_MODEL,
                             system_prompt=persona.system_prompt or f"You are {persona.name}. {persona.role or ''}",
                             history=history,
                             inject_context=True,
@@ -388,37 +440,17 @@ def register_conversation_routes(api: Api):
             Send a message and stream the AI response.
 
             Returns Server-Sent Events (SSE) with streaming content.
+            Under the ASGI server (api.asgi) this path is served on the
+            event loop instead; this route remains for WSGI deployments.
             """
             import asyncio
             from api.services.chat import chat_service
             from api.utils.streaming import sse_format, sse_error, create_streaming_response
 
-            conversation, error, status = _check_conversation_access(conversation_key)
+            stream, error, status = prepare_chat_stream(conversation_key, request.json)
             if error:
                 return error, status
 
-            data = request.json
-
-            if not data.get('content'):
-                return {'success': False, 'msg': 'content is required'}, 400
-
-            # Save user message
-            user_message = ChatMessage(
-                conversation_key=conversation_key,
-                role='user',
-                content=data['content']
-            )
-            user_message.save()
-
-            persona = conversation.persona
-
-            # Get conversation history for context
-            messages = conversation.get_messages(limit=20)
-            history = [
-                {'role': m.role, 'content': m.content}
-                for m in messages[:-1]  # Exclude the just-added user message
-            ]
-
             # Capture app for use in async context
             from flask import current_app
             app = current_app._get_current_object()
@@ -430,18 +462,7 @@ def register_conversation_routes(api: Api):
 
                 try:
                     async def stream_chunks():
-                        async for chunk in chat_service.stream_response(
-                            conversation_key=conversation_key,
-                            user_message=data['content'],
-                            persona_key=persona.persona_key,
-                            model='gemini-3-flash-preview',
-                            system_prompt=persona.system_prompt or f"You are {persona.name}. {persona.role or ''}",
-                            history=history,
-                            inject_context=True,
-                            max_tokens=4086,
-                            temperature=data.get('temperature', 0.7),
-                            app=app,
-                        ):
+                        async for chunk in chat_service.stream_response(**stream, app=app):
                             yield sse_format(chunk.to_dict())
 
                     # Run async generator in sync context
@@ -7,8 +7,25 @@ CRUD operations for documents with embedding support.
 from flask import request
 from flask_restx import Api, Resource, Namespace, fields
 
-from api.models import Document, Entity, db
-from api.services import embedding_service, document_processor
+from api.models import Document, DocumentChunk, Entity, db
+from api.services import embedding_service, embedding_queue, document_processor
+
+
+def sync_document_chunks(document: Document) -> tuple[list[DocumentChunk], int]:
+    """
+    Chunk a document, store its chunks and queue the changed ones for embedding.
+
+    Returns the stored chunks and how many of them were queued.
+    """
+    chunks = document_processor.process_markdown(
+        document.content,
+        title=document.title,
+        source=document.source
+    )
+    stale = DocumentChunk.sync(document, chunks)
+    if stale:
+        embedding_queue.enqueue_chunks(stale)
+    return document.chunks.all(), len(stale)
 
 
 def register_document_routes(api: Api):
@@ -41,7 +58,7 @@ def register_document_routes(api: Api):
         'metadata': fields.Raw(description='Additional metadata'),
         'source': fields.String(description='Source identifier'),
         'entity_key': fields.String(description='Linked entity key'),
-        'generate_embedding': fields.Boolean(description='Generate embedding on create', default=False),
+        'generate_embedding': fields.Boolean(description='Queue embedding generation on create', default=False),
     })
 
     response_model = ns.model('Response', {
@@ -118,11 +135,12 @@ def register_document_routes(api: Api):
             )
 
             try:
-                # Generate embedding if requested
+                document.save()
+
+                # Queue embedding if requested
                 if data.get('generate_embedding', False):
-                    document.generate_embedding(embedding_service)
+                    embedding_queue.enqueue_document(document.document_key)
 
-                document.save()
                 return {
                     'success': True,
                     'msg': 'Document created',
@@ -184,12 +202,19 @@ def register_document_routes(api: Api):
             if 'entity_key' in data:
                 document.entity_key = data['entity_key']
 
+            # Ingested documents keep their chunks in step with the content
+            rechunk = ('content' in data or 'title' in data) and document.chunks.count() > 0
+
             try:
-                # Regenerate embedding if content changed and requested
+                document.save()
+
+                if rechunk:
+                    sync_document_chunks(document)
+
+                # Queue re-embedding if content changed and requested
                 if data.get('generate_embedding', False):
-                    document.generate_embedding(embedding_service)
+                    embedding_queue.enqueue_document(document.document_key)
 
-                document.save()
                 return {
                     'success': True,
                     'msg': 'Document updated',
@@ -241,6 +266,30 @@ def register_document_routes(api: Api):
             except Exception as e:
                 return {'success': False, 'msg': f'Embedding error: {str(e)}'}, 500
 
+    @ns.route('/<string:document_key>/chunks')
+    @ns.param('document_key', 'Document identifier')
+    class DocumentChunks(Resource):
+        @ns.doc('list_document_chunks')
+        @ns.param('include_content', 'Include chunk content', type=bool, default=True)
+        @ns.marshal_with(response_model)
+        def get(self, document_key):
+            """List a document's stored chunks in order."""
+            include_content = request.args.get('include_content', 'true').lower() == 'true'
+
+            document = Document.get_by_key(document_key)
+            if not document:
+                return {'success': False, 'msg': 'Document not found'}, 404
+
+            chunks = document.chunks.all()
+            return {
+                'success': True,
+                'msg': f'Found {len(chunks)} chunks',
+                'data': {
+                    'document_key': document_key,
+                    'chunks': [c.to_dict(include_content=include_content) for c in chunks],
+                }
+            }
+
     @ns.route('/ingest')
     class DocumentIngest(Resource):
         @ns.doc('ingest_document')
@@ -249,8 +298,10 @@ def register_document_routes(api: Api):
             """
             Process and embed a markdown document.
 
-            Splits document into chunks and creates embeddings.
-            Returns the main document with chunk metadata.
+            Splits the document into chunks, stores them, and embeds the
+            document and its chunks in the background. Passing the
+            document_key of an existing document re-ingests it: only
+            chunks whose content hash changed are embedded again.
             """
             data = request.json
 
@@ -265,39 +316,45 @@ def register_document_routes(api: Api):
                 if not entity:
                     return {'success': False, 'msg': 'Entity not found'}, 404
 
+            document = None
+            if data.get('document_key'):
+                document = Document.get_by_key(data['document_key'])
+                if not document:
+                    return {'success': False, 'msg': 'Document not found'}, 404
+
             try:
-                # Process document into chunks
-                chunks = document_processor.process_markdown(
-                    data['content'],
-                    title=data['title'],
-                    source=data.get('source')
-                )
-
-                # Create main document
-                document = Document(
-                    title=data['title'],
-                    content=data['content'],
-                    content_type=data.get('content_type', 'markdown'),
-                    extra_data={
-                        **data.get('metadata', {}),
-                        'chunk_count': len(chunks),
-                    },
-                    source=data.get('source'),
-                    entity_key=data.get('entity_key')
-                )
-
-                # Generate embedding for main document
-                document.generate_embedding(embedding_service)
+                if document is None:
+                    document = Document()
+                    status = 201
+                else:
+                    status = 200
+
+                document.title = data['title']
+                document.content = data['content']
+                document.content_type = data.get('content_type', document.content_type or 'markdown')
+                document.source = data.get('source', document.source)
+                document.entity_key = data.get('entity_key', document.entity_key)
                 document.save()
 
+                chunks, queued = sync_document_chunks(document)
+                document.extra_data = {
+                    **(data.get('metadata') or document.extra_data or {}),
+                    'chunk_count': len(chunks),
+                }
+                document.save()
+
+                # Embed main document in the background
+                embedding_queue.enqueue_document(document.document_key)
+
                 return {
                     'success': True,
-                    'msg': f'Document ingested with {len(chunks)} chunks',
+                    'msg': f'Document ingested with {len(chunks)} chunks ({queued} to embed)',
                     'data': {
                         'document': document.to_dict(),
-                        'chunks': document_processor.chunks_to_dict(chunks)
+                        'chunks': [c.to_dict() for c in chunks],
+                        'chunks_queued': queued,
                     }
-                }, 201
+                }, status
 
             except Exception as e:
                 return {'success': False, 'msg': f'Ingest error: {str(e)}'}, 500
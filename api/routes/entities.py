@@ -6,10 +6,14 @@ CRUD operations for knowledge graph entities.
 from flask import request, g
 from flask_restx import Api, Resource, Namespace, fields
 
+from api import config
 from api.models import Entity, db
 from api.services.activity import activity_service
 from api.services.auth import require_auth, require_auth_strict, require_domain_admin, require_write_access
+from api.services.embedding_queue import embedding_queue
+from api.services.relations import relation_loader
 from api.services.scope import scope_service
+from api.utils.adjacency import adjacency_cache
 
 
 def get_actor() -> str:
@@ -76,7 +80,7 @@ def register_entity_routes(api: Api):
     class EntityList(Resource):
         @ns.doc('list_entities')
         @ns.param('type', 'Filter by entity type')
-        @ns.param('search', 'Search by name')
+        @ns.param('search', 'Keyword search over names and search properties, best match first')
         @ns.param('scope_type', 'Filter by scope type: domain, team, or user')
         @ns.param('scope_key', 'Filter by specific scope key (requires scope_type)')
         @ns.param('limit', 'Maximum results', type=int, default=100)
@@ -133,7 +137,8 @@ def register_entity_routes(api: Api):
             if entity_type:
                 query = query.filter_by(entity_type=entity_type)
             if search:
-                query = query.filter(Entity.name.ilike(f'%{search}%'))
+                query = query.filter(Entity.text_match(search)).order_by(*Entity.text_order(search),
+                                                                         Entity.entity_key)
 
             total = query.count()
             entities = query.limit(limit).offset(offset).all()
@@ -154,7 +159,7 @@ def register_entity_routes(api: Api):
                 'success': True,
                 'msg': f'Found {total} entities',
                 'data': {
-                    'entities': [e.to_dict() for e in entities],
+                    'entities': relation_loader.serialize_entities(entities),
                     'total': total,
                     'limit': limit,
                     'offset': offset
@@ -213,6 +218,8 @@ def register_entity_routes(api: Api):
 
             try:
                 entity.save()
+                if config.CM_EMBEDDING_AUTO:
+                    embedding_queue.enqueue_entity(entity.entity_key)
                 # Record activity
                 activity_service.record_entity_created(
                     actor=get_actor(),
@@ -360,6 +367,9 @@ def register_entity_routes(api: Api):
 
             try:
                 entity.save()
+                adjacency_cache.entity_changed(entity)
+                if config.CM_EMBEDDING_AUTO:
+                    embedding_queue.enqueue_entity(entity.entity_key)
                 # Record activity
                 activity_service.record_entity_updated(
                     actor=get_actor(),
@@ -401,11 +411,14 @@ def register_entity_routes(api: Api):
                 # Delete all relationships involving this entity first
                 relationships = Relationship.get_by_entity(entity_key)
                 rel_count = len(relationships)
+                deleted_edges = [(r.relationship_key, r.from_entity_key, r.to_entity_key) for r in relationships]
                 for rel in relationships:
                     db.session.delete(rel)
 
                 # Now delete the entity
                 entity.delete()
+                for edge in deleted_edges:
+                    adjacency_cache.relationship_deleted(*edge)
 
                 # Record activity
                 activity_service.record_entity_deleted(
@@ -459,6 +472,52 @@ def register_entity_routes(api: Api):
             except Exception as e:
                 return {'success': False, 'msg': f'Embedding error: {str(e)}'}, 500
 
+    @ns.route('/<string:entity_key>/path/<string:to_entity_key>')
+    @ns.param('entity_key', 'Source entity identifier')
+    @ns.param('to_entity_key', 'Target entity identifier')
+    class EntityPath(Resource):
+        @ns.doc('find_entity_path')
+        @ns.param('max_depth', 'Maximum hops in a path (1-6)', type=int, default=4)
+        @ns.param('k', 'Number of shortest paths to return (1-10)', type=int, default=1)
+        @ns.param('types', 'Comma-separated relationship types to follow')
+        @ns.param('directed', 'Only follow relationships from source to target', type=bool, default=False)
+        @ns.marshal_with(response_model)
+        @require_auth
+        def get(self, entity_key, to_entity_key):
+            """
+            Find the shortest paths between two entities.
+
+            Runs a bidirectional search over the relationship graph. Entities
+            outside the user's accessible scopes are never traversed.
+            """
+            from api.utils.graph import GraphTraversal
+
+            max_depth = min(max(request.args.get('max_depth', 4, type=int), 1), 6)
+            k = min(max(request.args.get('k', 1, type=int), 1), 10)
+            directed = request.args.get('directed', 'false').lower() == 'true'
+            types = request.args.get('types')
+            relationship_types = [t.strip() for t in types.split(',') if t.strip()] if types else None
+
+            user = g.current_user if hasattr(g, 'current_user') else None
+
+            result = GraphTraversal.find_paths(
+                entity_key,
+                to_entity_key,
+                max_depth=max_depth,
+                k=k,
+                relationship_types=relationship_types,
+                directed=directed,
+                user=user
+            )
+            if result is None:
+                return {'success': False, 'msg': 'Entity not found'}, 404
+
+            return {
+                'success': True,
+                'msg': f"Found {len(result['paths'])} paths",
+                'data': result
+            }
+
     move_scope_model = ns.model('MoveScope', {
         'scope_type': fields.String(required=True, description='Target scope type: domain, team, or user'),
         'scope_key': fields.String(required=True, description='Target scope key (domain_key, team_key, or user_key)'),
@@ -549,6 +608,7 @@ def register_entity_routes(api: Api):
                     ent.scope_type = target_scope_type
                     ent.scope_key = target_scope_key
                     ent.save()
+                    adjacency_cache.entity_changed(ent)
                     updated_keys.append(ent_key)
 
                 # Record activity
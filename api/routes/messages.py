@@ -19,10 +19,11 @@ Read tracking modes:
 from flask import request, g
 from flask_restx import Api, Resource, Namespace, fields
 
-from api.models import Message, MessageRead
+from api.models import Message, MessageRead, Inbox
 from api.models.message import VALID_SCOPES
 from api.services.activity import activity_service
 from api.services.auth import require_auth, require_auth_strict, require_write_access
+from api.services.scope import scope_service
 
 
 def get_user_domain_key() -> str | None:
@@ -74,8 +75,7 @@ def is_agent_key(key: str) -> bool:
 def get_user_team_keys() -> list[str]:
     """Get list of team_keys the current user is a member of."""
     if hasattr(g, 'current_user') and g.current_user:
-        teams = g.current_user.get_teams()
-        return [t.team_key for t in teams]
+        return scope_service.get_access_context(g.current_user).team_keys
     return []
 
 
@@ -130,6 +130,14 @@ def register_message_routes(api: Api):
         'team_key': fields.String(description='Team key for broadcast-team scope'),
     })
 
+    mark_read_request = ns.model('MarkMessagesRead', {
+        'reader_key': fields.String(required=True, description='Key of agent/user marking as read'),
+        'message_keys': fields.List(fields.String(), description='Messages to mark read'),
+        'up_to': fields.String(description='Instead of message_keys: mark every unread message created at or before this ISO8601 timestamp'),
+        'channel': fields.String(description='With up_to: only this channel'),
+        'team_key': fields.String(description='With up_to: only this team'),
+    })
+
     response_model = ns.model('Response', {
         'success': fields.Boolean(description='Operation success status'),
         'msg': fields.String(description='Response message'),
@@ -217,12 +225,17 @@ def register_message_routes(api: Api):
                     messages = [m for m in messages if m.created_at and m.created_at >= since_dt]
                 if entity_key:
                     messages = [m for m in messages if m.entity_keys and entity_key in m.entity_keys]
+                reply_counts = Message.get_reply_counts([m.message_key for m in messages]) if include_thread_info else {}
 
                 return {
                     'success': True,
                     'msg': f'Retrieved {len(messages)} messages for agent {for_agent}',
                     'data': {
-                        'messages': [m.to_dict(for_reader=for_agent, include_readers=include_readers, include_thread_info=include_thread_info) for m in messages]
+                        'messages': [
+                            m.to_dict(for_reader=for_agent, include_readers=include_readers, include_thread_info=include_thread_info,
+                                      reply_count=reply_counts.get(m.message_key, 0) if include_thread_info else None)
+                            for m in messages
+                        ]
                     }
                 }
 
@@ -244,12 +257,17 @@ def register_message_routes(api: Api):
                     messages = [m for m in messages if m.created_at and m.created_at >= since_dt]
                 if entity_key:
                     messages = [m for m in messages if m.entity_keys and entity_key in m.entity_keys]
+                reply_counts = Message.get_reply_counts([m.message_key for m in messages]) if include_thread_info else {}
 
                 return {
                     'success': True,
                     'msg': f'Retrieved {len(messages)} messages for user {for_user}',
                     'data': {
-                        'messages': [m.to_dict(for_reader=for_user, include_readers=include_readers, include_thread_info=include_thread_info) for m in messages]
+                        'messages': [
+                            m.to_dict(for_reader=for_user, include_readers=include_readers, include_thread_info=include_thread_info,
+                                      reply_count=reply_counts.get(m.message_key, 0) if include_thread_info else None)
+                            for m in messages
+                        ]
                     }
                 }
 
@@ -294,12 +312,17 @@ def register_message_routes(api: Api):
                 query = query.filter(Message.read_at.is_(None))
 
             messages = query.order_by(Message.created_at.desc()).limit(limit).all()
+            reply_counts = Message.get_reply_counts([m.message_key for m in messages]) if include_thread_info else {}
 
             return {
                 'success': True,
                 'msg': f'Retrieved {len(messages)} messages',
                 'data': {
-                    'messages': [m.to_dict(include_readers=include_readers, include_thread_info=include_thread_info) for m in messages]
+                    'messages': [
+                        m.to_dict(include_readers=include_readers, include_thread_info=include_thread_info,
+                                  reply_count=reply_counts.get(m.message_key, 0) if include_thread_info else None)
+                        for m in messages
+                    ]
                 }
             }
 
@@ -527,6 +550,79 @@ def register_message_routes(api: Api):
                 return False
         return True
 
+    @ns.route('/mark-read')
+    class MarkMessagesRead(Resource):
+        @ns.doc('mark_messages_read')
+        @ns.expect(mark_read_request)
+        @ns.marshal_with(response_model)
+        @require_auth
+        def post(self):
+            """
+            Mark many messages as read in one transaction.
+
+            Takes either message_keys, or an up_to timestamp that marks every
+            unread message created at or before it (optionally only in
+            channel or team_key). Keys the caller cannot access are skipped.
+            """
+            from datetime import datetime
+            from api.models import InboxMessage
+
+            data = request.json or {}
+            reader_key = data.get('reader_key')
+            message_keys = data.get('message_keys')
+            up_to = data.get('up_to')
+            channel = data.get('channel')
+            team_key_filter = data.get('team_key')
+
+            if not reader_key:
+                return {'success': False, 'msg': 'reader_key is required'}, 400
+            if (message_keys is None) == (up_to is None):
+                return {'success': False, 'msg': 'Provide either message_keys or up_to'}, 400
+            if team_key_filter and not user_can_access_team(team_key_filter):
+                return {'success': False, 'msg': 'Cannot access messages from this team'}, 403
+
+            user_domain = get_user_domain_key()
+            user_team_keys = get_user_team_keys()
+
+            if up_to is not None:
+                try:
+                    up_to_dt = datetime.fromisoformat(up_to.replace('Z', '+00:00'))
+                except (AttributeError, ValueError):
+                    return {'success': False, 'msg': 'up_to must be an ISO8601 timestamp'}, 400
+
+                reader_type = 'user' if is_user_key(reader_key) else 'agent'
+                query = Inbox.query_unread(
+                    reader_key,
+                    user_key=get_user_key() if reader_type == 'agent' else None,
+                    team_keys=user_team_keys,
+                    team_key_filter=team_key_filter,
+                    domain_key=user_domain,
+                    reader_type=reader_type
+                ).filter(InboxMessage.created_at <= up_to_dt)
+                if channel:
+                    query = query.filter(Message.channel == channel)
+                candidates = [row[0] for row in query.with_entities(Message.message_key)]
+            else:
+                if not isinstance(message_keys, list):
+                    return {'success': False, 'msg': 'message_keys must be a list'}, 400
+                messages = Message.query.filter(Message.message_key.in_(message_keys)).all() if message_keys else []
+                candidates = [
+                    m.message_key for m in messages
+                    if _check_message_access(m, user_domain, user_team_keys)
+                ]
+
+            try:
+                marked = MessageRead.mark_many_read(reader_key, candidates)
+                return {
+                    'success': True,
+                    'msg': f'Marked {len(marked)} messages as read by {reader_key}',
+                    'data': {'marked_count': len(marked), 'message_keys': marked}
+                }
+            except Exception as e:
+                from api.models import db
+                db.session.rollback()
+                return {'success': False, 'msg': str(e)}, 500
+
     @ns.route('/mark-read/<string:message_key>')
     @ns.param('message_key', 'Message identifier')
     class MarkMessageRead(Resource):
@@ -582,6 +678,7 @@ def register_message_routes(api: Api):
                     MessageRead.query.delete()
                     count = Message.query.delete()
 
+                Inbox.recount()
                 db.session.commit()
 
                 return {
@@ -624,7 +721,7 @@ def register_message_routes(api: Api):
                         user_key=reader_key,
                         limit=1000,
                         unread_only=True,
-                        team_keys=user_team_keys if not team_key_filter else None,
+                        team_keys=user_team_keys,
                         team_key_filter=team_key_filter,
                         domain_key=user_domain
                     )
@@ -634,7 +731,7 @@ def register_message_routes(api: Api):
                         user_key=user_key,
                         limit=1000,
                         unread_only=True,
-                        team_keys=user_team_keys if not team_key_filter else None,
+                        team_keys=user_team_keys,
                         team_key_filter=team_key_filter,
                         domain_key=user_domain
                     )
@@ -776,7 +873,7 @@ def register_message_routes(api: Api):
         @ns.marshal_with(response_model)
         @require_auth
         def get(self, message_key):
-            """Get a single message with full thread context."""
+            """Get a single message with full thread context (replies up to 10 levels below the root)."""
             include_thread = request.args.get('include_thread', 'true').lower() == 'true'
             include_readers = request.args.get('include_readers', 'true').lower() == 'true'
             include_entities = request.args.get('include_entities', 'false').lower() == 'true'
@@ -791,34 +888,47 @@ def register_message_routes(api: Api):
             if not _check_message_access(message, user_domain, user_team_keys):
                 return {'success': False, 'msg': 'Message not found'}, 404
 
+            # Whole thread in one query: parent, replies, reply counts and entity keys
+            # (replies down to Message.DEFAULT_THREAD_DEPTH levels below the root)
+            thread = Message.get_thread(message_key) if include_thread or include_entities else None
+            nodes = thread['nodes'] if thread else {}
+            node = nodes.get(message_key)
+
             result = message.to_dict(
                 for_reader=for_reader,
                 include_readers=include_readers,
-                include_thread_info=True
+                include_thread_info=True,
+                reply_count=node['reply_count'] if node else None
             )
 
             if include_thread:
                 if message.reply_to_key:
-                    parent = message.get_parent()
+                    parent_node = nodes.get(message.reply_to_key)
+                    parent = parent_node['message'] if parent_node else message.get_parent()
                     if parent:
                         result['parent'] = parent.to_dict(
                             for_reader=for_reader,
                             include_readers=False,
-                            include_thread_info=True
+                            include_thread_info=True,
+                            reply_count=parent_node['reply_count'] if parent_node else None
                         )
 
-                replies = message.get_replies(limit=100)
+                if node:
+                    replies = [(r['message'], r['reply_count']) for r in node['replies'][:100]]
+                else:
+                    replies = [(r, None) for r in message.get_replies(limit=100)]
                 result['replies'] = [
                     r.to_dict(
                         for_reader=for_reader,
                         include_readers=False,
-                        include_thread_info=True
-                    ) for r in replies
+                        include_thread_info=True,
+                        reply_count=count
+                    ) for r, count in replies
                 ]
 
             if include_entities:
                 from api.models import Entity
-                thread_entity_keys = Message.get_thread_entity_keys(message_key)
+                thread_entity_keys = thread['entity_keys'] if thread else []
                 if thread_entity_keys:
                     entities = Entity.query.filter(Entity.entity_key.in_(thread_entity_keys)).all()
                     result['linked_entities'] = [e.to_dict() for e in entities]
@@ -847,18 +957,12 @@ def register_message_routes(api: Api):
             if not _check_message_access(message, user_domain, user_team_keys):
                 return {'success': False, 'msg': 'Message not found'}, 404
 
-            def collect_thread_keys(msg_key: str, keys: set):
-                keys.add(msg_key)
-                replies = Message.query.filter_by(reply_to_key=msg_key).all()
-                for reply in replies:
-                    collect_thread_keys(reply.message_key, keys)
-
             try:
-                thread_keys = set()
-                collect_thread_keys(message_key, thread_keys)
+                thread_keys = Message.get_subtree_keys(message_key)
 
                 MessageRead.query.filter(MessageRead.message_key.in_(thread_keys)).delete(synchronize_session=False)
                 Message.query.filter(Message.message_key.in_(thread_keys)).delete(synchronize_session=False)
+                Inbox.recount()
 
                 db.session.commit()
 
@@ -9,6 +9,7 @@ from flask_restx import Api, Resource, Namespace, fields
 from api.models import Relationship, Entity
 from api.services.activity import activity_service
 from api.services.auth import require_auth, require_auth_strict, require_write_access
+from api.utils.adjacency import adjacency_cache
 
 
 def get_actor() -> str:
@@ -146,6 +147,7 @@ def register_relationship_routes(api: Api):
 
             try:
                 relationship.save()
+                adjacency_cache.relationship_saved(relationship, from_entity, to_entity)
                 # Record activity
                 activity_service.record_relationship_created(
                     actor=get_actor(),
@@ -195,10 +197,12 @@ def register_relationship_routes(api: Api):
                 return {'success': False, 'msg': 'Relationship not found'}, 404
 
             data = request.json
+            previous = (relationship.from_entity_key, relationship.to_entity_key)
             relationship.update_from_dict(data)
 
             try:
                 relationship.save()
+                adjacency_cache.relationship_saved(relationship, previous=previous)
                 return {
                     'success': True,
                     'msg': 'Relationship updated',
@@ -223,6 +227,7 @@ def register_relationship_routes(api: Api):
                 to_key = relationship.to_entity_key
 
                 relationship.delete()
+                adjacency_cache.relationship_deleted(relationship_key, from_key, to_key)
 
                 # Record activity
                 activity_service.record_relationship_deleted(
@@ -7,7 +7,7 @@ Semantic and hybrid search endpoints.
 from flask import request, g
 from flask_restx import Api, Resource, Namespace, fields
 
-from api.models import Entity, Document
+from api.models import Entity, Document, DocumentChunk
 from api.services import embedding_service
 from api.services.activity import activity_service
 
@@ -61,6 +61,8 @@ def register_search_routes(api: Api):
             Semantic search across entities and documents.
 
             Uses OpenAI embeddings for semantic similarity matching.
+            Documents are ranked whole; chunks are the best-matching
+            passages of ingested documents.
             """
             query = request.args.get('query')
             if not query:
@@ -79,6 +81,7 @@ def register_search_routes(api: Api):
                     'query': query,
                     'entities': [],
                     'documents': [],
+                    'chunks': [],
                 }
 
                 # Search entities (with scope filtering)
@@ -108,6 +111,16 @@ def register_search_routes(api: Api):
                             d.to_dict(include_content=False)
                             for d in documents
                         ]
+
+                        # Best passages of ingested documents
+                        chunks = DocumentChunk.search_semantic(
+                            query_embedding,
+                            limit=limit
+                        )
+                        results['chunks'] = [
+                            {**c.to_dict(), 'title': c.document.title}
+                            for c in chunks
+                        ]
                     except RuntimeError as e:
                         # pgvector not available
                         results['documents_error'] = str(e)
@@ -139,12 +152,14 @@ def register_search_routes(api: Api):
         @ns.param('query', 'Search query (used for both keyword and semantic)', required=True)
         @ns.param('type', 'Filter entities by type')
         @ns.param('limit', 'Maximum results', type=int, default=10)
+        @ns.param('keyword_weight', 'Weight of keyword ranks vs semantic ranks (0-1)', type=float, default=0.3)
         @ns.marshal_with(response_model)
         def get(self):
             """
             Hybrid search combining keyword and semantic matching.
 
-            Keyword matches are weighted higher for exact name matches.
+            Keyword and semantic ranks are fused with weighted reciprocal-rank
+            scoring; each entity carries its score and ranks.
             """
             query = request.args.get('query')
             if not query:
@@ -152,42 +167,41 @@ def register_search_routes(api: Api):
 
             entity_type = request.args.get('type')
             limit = request.args.get('limit', 10, type=int)
+            keyword_weight = request.args.get('keyword_weight', 0.3, type=float)
 
             try:
                 # Generate query embedding
                 query_embedding = embedding_service.get_embedding(query)
 
-                # Hybrid search (with scope filtering)
+                # Hybrid search (with scope and type filtering)
                 user = g.current_user if hasattr(g, 'current_user') else None
-                entities = Entity.search_hybrid(
+                results = Entity.search_hybrid(
                     keyword=query,
                     query_embedding=query_embedding,
                     limit=limit,
+                    keyword_weight=keyword_weight,
+                    entity_type=entity_type,
                     user=user,
                     domain_key=get_user_domain_key() if not user else None
                 )
 
-                # Filter by type if specified
-                if entity_type:
-                    entities = [e for e in entities if e.entity_type == entity_type]
-
                 # Record search activity
                 activity_service.record_search(
                     actor=get_actor(),
                     query=query,
                     search_type='hybrid',
                     entity_type=entity_type,
-                    result_count=len(entities),
+                    result_count=len(results),
                     domain_key=get_user_domain_key(),
                     user_key=get_user_key()
                 )
 
                 return {
                     'success': True,
-                    'msg': f'Found {len(entities)} entities',
+                    'msg': f'Found {len(results)} entities',
                     'data': {
                         'query': query,
-                        'entities': [e.to_dict() for e in entities],
+                        'entities': [{**e.to_dict(), **scores} for e, scores in results],
                     }
                 }
 
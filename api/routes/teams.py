@@ -9,6 +9,7 @@ from flask_restx import Api, Resource, Namespace, fields
 from api.models import Team, TeamMembership, User, db
 from api.services.auth import require_auth_strict, require_domain_admin
 from api.services.activity import activity_service
+from api.services.scope import scope_service
 
 
 def get_user_domain_key() -> str | None:
@@ -35,9 +36,10 @@ def is_team_admin(user: User, team: Team) -> bool:
 
 def is_team_member(user: User, team: Team) -> bool:
     """Check if user is a member of the team."""
-    if user.is_admin:
+    context = scope_service.get_access_context(user)
+    if context.is_admin:
         return True
-    return user.is_team_member(team.team_key)
+    return team.team_key in context.roles
 
 
 def register_team_routes(api: Api):
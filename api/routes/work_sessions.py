@@ -12,6 +12,7 @@ import logging
 from api.models import WorkSession, Entity, Project, Metric, db
 from api.services.auth import require_auth_strict, require_write_access
 from api.services.activity import activity_service
+from api.services.relations import relation_loader
 
 logger = logging.getLogger(__name__)
 
@@ -222,7 +223,7 @@ def register_work_session_routes(api: Api):
                 'success': True,
                 'msg': f'Found {len(sessions)} work sessions',
                 'data': {
-                    'sessions': [s.to_dict() for s in sessions],
+                    'sessions': relation_loader.serialize_work_sessions(sessions),
                     'total': total,
                     'limit': limit,
                     'offset': offset
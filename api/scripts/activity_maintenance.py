@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Activity Maintenance
+====================
+
+Creates upcoming daily activity partitions and detaches or drops partitions
+older than the retention period. Meant to run from cron when the in-process
+scheduler is disabled (CM_ACTIVITY_MAINTENANCE_INTERVAL=0).
+
+Usage:
+    python -m api.scripts.activity_maintenance [--detach-only] [--days-ahead N]
+
+Options:
+    --detach-only  Detach expired partitions but keep them as standalone tables
+    --days-ahead   Daily partitions to create after today (default: CM_ACTIVITY_PARTITIONS_AHEAD)
+"""
+
+import sys
+import os
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from api import config
+from api.models import db
+from api.models.activity import Activity
+from api.services.activity import activity_service
+
+
+def create_app():
+    """Create Flask app for maintenance context."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = config.SQLALCHEMY_DATABASE_URI
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain activity partitions')
+    parser.add_argument('--detach-only', action='store_true',
+                        help='Detach expired partitions without dropping them')
+    parser.add_argument('--days-ahead', type=int, default=config.CM_ACTIVITY_PARTITIONS_AHEAD,
+                        help='Daily partitions to create after today')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if not Activity.is_partitioned():
+            print("  activities is not partitioned; deleting expired rows instead")
+        result = activity_service.run_maintenance(drop=not args.detach_only, days_ahead=args.days_ahead)
+
+    if result['skipped']:
+        print("  Another maintenance run holds the lock; nothing done")
+        return
+    print(f"  created: {', '.join(result['created']) or 'none'}")
+    action = 'dropped' if result['dropped'] else 'detached'
+    print(f"  {action}: {', '.join(result['detached']) or 'none'}")
+    print(f"  deleted rows: {result['deleted']}")
+
+
+if __name__ == '__main__':
+    main()
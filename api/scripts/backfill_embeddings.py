@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Backfill Embeddings
+===================
+
+Generates embeddings for entities, documents and document chunks whose
+embedding IS NULL, using the embedding queue's micro-batches (one provider
+call and one bulk UPDATE per batch).
+
+Usage:
+    python -m api.scripts.backfill_embeddings [--kind entity|document|chunk] [--limit N] [--batch-size N]
+
+Options:
+    --kind        Only backfill this kind (default: all three)
+    --limit       Maximum rows per kind
+    --batch-size  Texts per provider call (default: CM_EMBEDDING_BATCH_SIZE)
+
+Set CM_EMBEDDING_PROVIDER=fake to run without calling OpenAI.
+"""
+
+import sys
+import os
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from api import config
+from api.models import db
+from api.services.embedding_queue import EmbeddingQueue
+
+
+def create_app():
+    """Create Flask app for backfill context."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = config.SQLALCHEMY_DATABASE_URI
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill missing embeddings')
+    parser.add_argument('--kind', choices=EmbeddingQueue.KINDS, help='Only backfill this kind')
+    parser.add_argument('--limit', type=int, help='Maximum rows per kind')
+    parser.add_argument('--batch-size', type=int, default=config.CM_EMBEDDING_BATCH_SIZE,
+                        help='Texts per provider call')
+    args = parser.parse_args()
+
+    queue = EmbeddingQueue(batch_size=args.batch_size, max_retries=config.CM_EMBEDDING_MAX_RETRIES)
+
+    app = create_app()
+    with app.app_context():
+        results = queue.backfill(kinds=[args.kind] if args.kind else None, limit=args.limit)
+
+    for kind, count in results.items():
+        print(f"  {kind}: {count} embedded")
+    stats = queue.get_stats()
+    print(f"  {stats['batches']} batches, {stats['retries']} retries, {stats['failed']} failed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Rebuild Inboxes
+===============
+
+Checks per-reader inboxes (unread messages and counts) against the full
+unread query and rebuilds them. Inboxes are built on first lookup and
+maintained on send and read, so this is only needed after writes that
+bypassed the ORM, or to verify that they did not.
+
+Usage:
+    python -m api.scripts.rebuild_inboxes [--check] [--repair] [--reader KEY ...]
+
+Options:
+    --check   Report inconsistent inboxes and exit 1 if there are any
+    --repair  With --check, rebuild the inconsistent inboxes
+    --reader  Only these readers (agent_key or user_key); default all
+"""
+
+import sys
+import os
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from api import config
+from api.models import db, Inbox
+
+
+def create_app():
+    """Create Flask app for maintenance context."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = config.SQLALCHEMY_DATABASE_URI
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and rebuild per-reader inboxes')
+    parser.add_argument('--check', action='store_true',
+                        help='Report inconsistent inboxes instead of rebuilding all')
+    parser.add_argument('--repair', action='store_true',
+                        help='With --check, rebuild the inconsistent inboxes')
+    parser.add_argument('--reader', nargs='+', metavar='KEY',
+                        help='Only these readers')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if not args.check:
+            count = Inbox.rebuild(args.reader)
+            print(f"  rebuilt {count} inbox(es)")
+            return
+
+        problems = Inbox.check(args.reader)
+        for problem in problems:
+            print(f"  {problem['reader_key']}: {problem['missing']} missing, {problem['extra']} extra, "
+                  f"count {problem['stored_count']} (expected {problem['actual_count']})")
+        if not problems:
+            print("  all inboxes consistent")
+            return
+
+        if args.repair:
+            count = Inbox.rebuild([p['reader_key'] for p in problems])
+            print(f"  rebuilt {count} inbox(es)")
+        else:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
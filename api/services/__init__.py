@@ -7,13 +7,19 @@ Business logic services for AI chat, context retrieval, embeddings, NER, checkpo
 from .context import ContextService, context_service
 from .chat import ChatService, chat_service
 from .checkpoint import CheckpointService, checkpoint_service
-from .embedding import EmbeddingService, embedding_service
+from .embedding import EmbeddingCache, EmbeddingService, embedding_service
+from .embedding_queue import EmbeddingQueue, embedding_queue
 from .ner import NERService, ner_service
 from .document_processor import DocumentProcessor, document_processor
 from .seeding import SeedingService, seeding_service, seed_all
 from .github import GitHubService, get_github_service, github_service
+from .activity_buffer import ActivityBuffer, activity_buffer
 from .activity import ActivityService, activity_service
-from .scope import ScopeService, scope_service
+from .heartbeat import HeartbeatService, heartbeat_service
+from .auth_cache import AuthCache, auth_cache
+from .agent_bootstrap import AgentBootstrapService, agent_bootstrap_service
+from .relations import RelationLoader, relation_loader
+from .scope import AccessContext, ScopeService, scope_service
 
 __all__ = [
     'ContextService',
@@ -22,8 +28,11 @@ __all__ = [
     'chat_service',
     'CheckpointService',
     'checkpoint_service',
+    'EmbeddingCache',
     'EmbeddingService',
     'embedding_service',
+    'EmbeddingQueue',
+    'embedding_queue',
     'NERService',
     'ner_service',
     'DocumentProcessor',
@@ -34,8 +43,19 @@ __all__ = [
     'GitHubService',
     'get_github_service',
     'github_service',
+    'ActivityBuffer',
+    'activity_buffer',
     'ActivityService',
     'activity_service',
+    'HeartbeatService',
+    'heartbeat_service',
+    'AuthCache',
+    'auth_cache',
+    'AgentBootstrapService',
+    'agent_bootstrap_service',
+    'RelationLoader',
+    'relation_loader',
+    'AccessContext',
     'ScopeService',
     'scope_service',
 ]
@@ -3,27 +3,60 @@ Collective Memory Platform - Activity Service
 
 Service for recording and querying system activities.
 """
-import random
+import atexit
+import logging
+import threading
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List
 
+from sqlalchemy import text
+
+from api import config
 from api.models.base import db, get_key, get_now
 from api.models.activity import Activity, ActivityType
+from api.models.activity_rollup import ActivityRollup
+from api.services.activity_buffer import activity_buffer
+
+logger = logging.getLogger(__name__)
 
 
 class ActivityService:
     """
     Service for recording system activities.
 
-    Provides convenience methods for recording different activity types
-    and includes opportunistic purging of old records.
+    Provides convenience methods for recording different activity types.
+    Rows are written through the activity buffer, so recording never blocks
+    on the database and recent activities can take up to
+    CM_ACTIVITY_FLUSH_MS to appear.
+
+    Partition creation and retention run from a maintenance job, either the
+    in-process scheduler started by init_app (every
+    CM_ACTIVITY_MAINTENANCE_INTERVAL seconds) or the activity_maintenance
+    script, never from a request.
     """
 
-    # Purge check probability (1 in N requests will trigger purge check)
-    PURGE_CHECK_PROBABILITY = 100
+    def __init__(self, maintenance_interval: int = 3600):
+        """
+        Initialize activity service.
 
-    def __init__(self):
-        self._last_purge_check: Optional[datetime] = None
+        Args:
+            maintenance_interval: Seconds between scheduled maintenance runs (0 disables)
+        """
+        self.maintenance_interval = maintenance_interval
+        self._app = None
+        self._maintenance_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def init_app(self, app) -> None:
+        """Start the scheduled maintenance job for this app."""
+        self._app = app
+        if self.maintenance_interval <= 0 or self._maintenance_thread is not None:
+            return
+        self._maintenance_thread = threading.Thread(
+            target=self._maintenance_loop, name='activity-maintenance', daemon=True
+        )
+        self._maintenance_thread.start()
+        atexit.register(self._stop.set)
 
     def record(
         self,
@@ -48,27 +81,22 @@ class ActivityService:
             user_key: User who performed the action
 
         Returns:
-            The created Activity record
+            The Activity record (transient; it is written by the activity buffer)
         """
-        activity = Activity(
-            activity_key=get_key(),
-            activity_type=activity_type,
-            actor=actor,
-            user_key=user_key,
-            target_key=target_key,
-            target_type=target_type,
-            extra_data=extra_data or {},
-            domain_key=domain_key,
-            created_at=get_now()
-        )
-
-        db.session.add(activity)
-        db.session.commit()
-
-        # Opportunistic purge check
-        self._maybe_purge()
-
-        return activity
+        row = {
+            'activity_key': get_key(),
+            'activity_type': activity_type,
+            'actor': actor,
+            'user_key': user_key,
+            'target_key': target_key,
+            'target_type': target_type,
+            'extra_data': extra_data or {},
+            'domain_key': domain_key,
+            'created_at': get_now(),
+        }
+        activity_buffer.add(row)
+
+        return Activity(**row)
 
     def record_message_sent(
         self,
@@ -467,6 +495,8 @@ class ActivityService:
         """
         Get activity summary by type.
 
+        Served from activity rollups unless CM_ACTIVITY_ROLLUPS is off.
+
         Args:
             hours: Look back this many hours
             since: Start time (overrides hours)
@@ -480,6 +510,8 @@ class ActivityService:
             from datetime import timedelta
             since = get_now() - timedelta(hours=hours)
 
+        if config.CM_ACTIVITY_ROLLUPS:
+            return ActivityRollup.get_summary(since=since, until=until, domain_key=domain_key)
         return Activity.get_summary(since=since, until=until, domain_key=domain_key)
 
     def get_timeline(
@@ -492,6 +524,9 @@ class ActivityService:
         """
         Get time-bucketed activity data.
 
+        Served from the coarsest activity rollup that fits bucket_minutes
+        unless CM_ACTIVITY_ROLLUPS is off.
+
         Args:
             hours: Number of hours to look back
             bucket_minutes: Bucket size in minutes
@@ -501,7 +536,8 @@ class ActivityService:
         Returns:
             List of timeline data points
         """
-        return Activity.get_timeline(
+        timeline_source = ActivityRollup if config.CM_ACTIVITY_ROLLUPS else Activity
+        return timeline_source.get_timeline(
             hours=hours,
             bucket_minutes=bucket_minutes,
             since=since,
@@ -512,38 +548,77 @@ class ActivityService:
         """
         Purge activities older than retention period.
 
+        Drops expired partitions when the table is partitioned, otherwise
+        deletes old rows.
+
         Returns:
-            Number of records deleted
+            Number of rows deleted (rows in dropped partitions are not counted)
         """
+        if Activity.is_partitioned():
+            return Activity.drop_expired_partitions()['deleted']
         return Activity.purge_old()
 
-    def _maybe_purge(self) -> None:
+    def run_maintenance(self, drop: bool = True, days_ahead: Optional[int] = None) -> Dict[str, Any]:
         """
-        Opportunistically purge old records.
+        Create upcoming partitions, retire expired ones and purge old rollups.
 
-        Runs approximately once per PURGE_CHECK_PROBABILITY calls,
-        and only if enough time has passed since last purge.
-        """
-        # Random check to avoid purging on every request
-        if random.randint(1, self.PURGE_CHECK_PROBABILITY) != 1:
-            return
+        Runs in one transaction. On PostgreSQL a transaction-level advisory
+        lock makes concurrent runs (one scheduler per worker) skip instead
+        of queueing behind each other.
 
-        # Don't purge more than once per hour
-        now = get_now()
-        if self._last_purge_check:
-            from datetime import timedelta
-            if now - self._last_purge_check < timedelta(hours=1):
-                return
+        Args:
+            drop: Drop expired partitions (False only detaches them)
+            days_ahead: Daily partitions to create after today (default CM_ACTIVITY_PARTITIONS_AHEAD)
 
-        self._last_purge_check = now
+        Returns:
+            Dict with 'created', 'detached', 'dropped', 'deleted', 'rollups_deleted' and 'skipped'
+        """
+        result = {
+            'created': [], 'detached': [], 'dropped': False,
+            'deleted': 0, 'rollups_deleted': 0, 'skipped': False,
+        }
+
+        if not Activity.is_partitioned():
+            result['deleted'] = Activity.purge_old()
+            result['rollups_deleted'] = ActivityRollup.purge_old()
+            return result
+
+        locked = db.session.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:name))"),
+            {'name': Activity.DEFAULT_PARTITION}
+        ).scalar()
+        if not locked:
+            db.session.rollback()
+            result['skipped'] = True
+            return result
 
         try:
-            deleted = self.purge_old()
-            if deleted > 0:
-                print(f"[ActivityService] Purged {deleted} old activity records")
-        except Exception as e:
-            print(f"[ActivityService] Purge failed: {e}")
+            result['created'] = Activity.ensure_partitions(days_ahead=days_ahead, commit=False)
+            expired = Activity.drop_expired_partitions(drop=drop, commit=False)
+            result['rollups_deleted'] = ActivityRollup.purge_old(commit=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        result['detached'] = expired['partitions']
+        result['dropped'] = drop
+        result['deleted'] = expired['deleted']
+        return result
+
+    def _maintenance_loop(self) -> None:
+        while not self._stop.wait(self.maintenance_interval):
+            with self._app.app_context():
+                try:
+                    result = self.run_maintenance()
+                    if result['created'] or result['detached'] or result['deleted']:
+                        logger.info(
+                            f"Activity maintenance: created {len(result['created'])} partitions, "
+                            f"retired {len(result['detached'])}, deleted {result['deleted']} rows"
+                        )
+                except Exception as e:
+                    logger.error(f"Activity maintenance failed: {e}")
 
 
 # Global service instance
-activity_service = ActivityService()
+activity_service = ActivityService(maintenance_interval=config.CM_ACTIVITY_MAINTENANCE_INTERVAL)
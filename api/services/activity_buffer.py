@@ -0,0 +1,264 @@
+"""
+Collective Memory Platform - Activity Buffer
+
+Write-behind buffer that batches activity rows into bulk inserts.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from api import config
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    """
+    Write-behind buffer for activity rows.
+
+    Requests hand finished row dicts to add() and return immediately. A
+    worker thread inserts them with one bulk INSERT per batch, flushing
+    whenever batch_size rows are waiting or the oldest row has waited
+    flush_ms. Ordering is preserved because created_at is set when the
+    activity is recorded, not when it is written.
+
+    Backpressure: once max_pending rows are buffered, add() blocks for up
+    to block_ms waiting for the worker to catch up, then drops the row.
+    Activities are telemetry, so a write failure never fails a request.
+
+    In sync mode, or before init_app has been called, rows are inserted
+    inline in the caller's app context.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        flush_ms: int = 500,
+        max_pending: int = 10000,
+        block_ms: int = 50,
+        sync: bool = False
+    ):
+        """
+        Initialize activity buffer.
+
+        Args:
+            batch_size: Maximum rows per INSERT
+            flush_ms: Maximum time a row waits before being written
+            max_pending: Rows buffered before add() applies backpressure
+            block_ms: How long add() waits for space before dropping a row
+            sync: Insert rows inline instead of on the worker thread
+        """
+        self.batch_size = batch_size
+        self.flush_ms = flush_ms
+        self.max_pending = max_pending
+        self.block_ms = block_ms
+        self.sync = sync
+
+        self._app = None
+        self._rows: deque = deque()  # (monotonic time added, row)
+        self._flush_requested = False
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+        self.blocked = 0
+
+    def init_app(self, app) -> None:
+        """Bind to an app so the worker thread can open app contexts."""
+        self._app = app
+        atexit.register(self.shutdown)
+
+    # ========== Add ==========
+
+    def add(self, row: Dict[str, Any]) -> bool:
+        """
+        Buffer one activity row for writing.
+
+        Returns False if the row was dropped because the buffer stayed full.
+        """
+        if self.sync or self._app is None:
+            return self._write_inline([row])
+
+        with self._cond:
+            if len(self._rows) >= self.max_pending:
+                self.blocked += 1
+                self._cond.notify_all()
+                deadline = time.monotonic() + self.block_ms / 1000
+                while len(self._rows) >= self.max_pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.dropped += 1
+                        logger.warning("Activity buffer full, dropping activity row")
+                        return False
+                    self._cond.wait(timeout=remaining)
+
+            self._rows.append((time.monotonic(), row))
+            self._ensure_worker()
+            if len(self._rows) == 1 or len(self._rows) >= min(self.batch_size, self.max_pending):
+                self._cond.notify_all()
+        return True
+
+    def _write_inline(self, rows: List[Dict[str, Any]]) -> bool:
+        """Insert rows in the caller's session. Failures are logged, not raised."""
+        from api.models import db
+        try:
+            self._insert(rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Activity write failed: {e}")
+            with self._cond:
+                self.failed += len(rows)
+            return False
+        with self._cond:
+            self.written += len(rows)
+            self.batches += 1
+        return True
+
+    @staticmethod
+    def _insert(rows: List[Dict[str, Any]]) -> None:
+        """Bulk insert rows with one executemany INSERT and fold them into the rollups."""
+        from api.models import db, Activity, ActivityRollup
+        db.session.execute(Activity.__table__.insert(), rows)
+        if config.CM_ACTIVITY_ROLLUPS:
+            ActivityRollup.add_rows(rows)
+
+    # ========== Worker ==========
+
+    def _ensure_worker(self) -> None:
+        """Start the worker thread if needed. Caller holds the lock."""
+        if self._worker is None or not self._worker.is_alive():
+            self._stopping = False
+            self._worker = threading.Thread(target=self._run, name='activity-buffer', daemon=True)
+            self._worker.start()
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """
+        Wait for a batch of rows. Caller holds the lock.
+
+        Returns once batch_size rows are waiting, the buffer is full, the
+        oldest row has waited flush_ms, or a flush or shutdown was requested.
+        """
+        while True:
+            if not self._rows:
+                if self._stopping:
+                    return []
+                self._cond.wait()
+                continue
+
+            if len(self._rows) >= min(self.batch_size, self.max_pending):
+                break
+            if self._stopping or self._flush_requested:
+                break
+            remaining = self._rows[0][0] + self.flush_ms / 1000 - time.monotonic()
+            if remaining <= 0:
+                break
+            self._cond.wait(timeout=remaining)
+
+        count = min(self.batch_size, len(self._rows))
+        batch = [self._rows.popleft()[1] for _ in range(count)]
+        if not self._rows:
+            self._flush_requested = False
+        self._in_flight += len(batch)
+        self._cond.notify_all()  # Wake producers waiting for space
+        return batch
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert one batch in the worker's own app context."""
+        from api.models import db
+        with self._app.app_context():
+            try:
+                self._insert(rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+                if not batch:
+                    self._cond.notify_all()
+                    return
+
+            written = False
+            try:
+                self._write(batch)
+                written = True
+            except Exception as e:
+                logger.error(f"Activity batch of {len(batch)} rows failed: {e}")
+
+            with self._cond:
+                self._in_flight -= len(batch)
+                if written:
+                    self.written += len(batch)
+                    self.batches += 1
+                else:
+                    self.failed += len(batch)
+                self._cond.notify_all()
+
+    # ========== Lifecycle ==========
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write every buffered row now and wait for it to land.
+
+        Returns True if the buffer drained within the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._rows:
+                self._flush_requested = True
+            self._cond.notify_all()
+            while self._rows or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+        return True
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Write all buffered rows and stop the worker thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None and worker.is_alive():
+            worker.join(timeout=timeout)
+
+    def get_stats(self) -> Dict:
+        """Get buffer statistics."""
+        with self._cond:
+            return {
+                'pending': len(self._rows),
+                'in_flight': self._in_flight,
+                'written': self.written,
+                'batches': self.batches,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'blocked': self.blocked,
+                'batch_size': self.batch_size,
+                'flush_ms': self.flush_ms,
+                'max_pending': self.max_pending,
+                'sync': self.sync,
+            }
+
+
+# Global buffer instance
+activity_buffer = ActivityBuffer(
+    batch_size=config.CM_ACTIVITY_BATCH_SIZE,
+    flush_ms=config.CM_ACTIVITY_FLUSH_MS,
+    max_pending=config.CM_ACTIVITY_MAX_PENDING,
+    block_ms=config.CM_ACTIVITY_BLOCK_MS,
+    sync=config.CM_ACTIVITY_SYNC,
+)
@@ -0,0 +1,328 @@
+"""
+Collective Memory Platform - Agent Bootstrap Service
+
+Resolves everything an agent needs at startup in one request.
+"""
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api.models.user import User
+
+
+def _normalize(name: str) -> str:
+    return (name or '').lower().replace('-', ' ').replace('_', ' ')
+
+
+class AgentBootstrapService:
+    """
+    Startup context for MCP agents.
+
+    identify() used to make a request per fact it needed: the user and
+    teams, the project for the repository or working directory, the model,
+    the persona, the agent's previous registrations and the active work
+    session. resolve() answers all of these with a handful of batched
+    queries, applying the same matching rules the MCP client used, so
+    agent startup costs one round-trip.
+    """
+
+    # ========== User context ==========
+
+    @staticmethod
+    def get_teams(user: 'User') -> list[dict]:
+        """Active teams with the user's membership, like /auth/me, in one query."""
+        from api.models.team import Team, TeamMembership
+
+        rows = TeamMembership.query.join(Team, Team.team_key == TeamMembership.team_key).filter(
+            TeamMembership.user_key == user.user_key,
+            Team.status == 'active'
+        ).with_entities(Team, TeamMembership).all()
+
+        return [{
+            'team_key': team.team_key,
+            'name': team.name,
+            'slug': team.slug,
+            'description': team.description,
+            'role': membership.role,
+            'membership_slug': membership.slug,
+        } for team, membership in rows]
+
+    # ========== Projects ==========
+
+    @staticmethod
+    def _with_teams(projects: list) -> list[dict]:
+        """Project dicts with their team associations, loaded with two IN queries."""
+        from api.models.team import Team
+        from api.models.team_project import TeamProject
+
+        if not projects:
+            return []
+
+        associations = TeamProject.query.filter(
+            TeamProject.project_key.in_([p.project_key for p in projects])
+        ).all()
+        team_keys = {a.team_key for a in associations}
+        teams = {
+            t.team_key: t for t in Team.query.filter(Team.team_key.in_(team_keys)).all()
+        } if team_keys else {}
+
+        by_project = {}
+        for association in associations:
+            data = association.to_dict()
+            team = teams.get(association.team_key)
+            data['team'] = {'team_key': team.team_key, 'name': team.name, 'slug': team.slug} if team else None
+            by_project.setdefault(association.project_key, []).append(data)
+
+        result = []
+        for project in projects:
+            data = project.to_dict()
+            data['teams'] = by_project.get(project.project_key, [])
+            result.append(data)
+        return result
+
+    def get_projects(self, user: 'User') -> list[dict]:
+        """Active projects visible to the user (as GET /projects), with teams."""
+        from api.models.project import Project
+
+        query = Project.query.filter_by(status='active')
+        if not user.is_admin:
+            if not user.domain_key:
+                return []
+            query = query.filter_by(domain_key=user.domain_key)
+        return self._with_teams(query.order_by(Project.name).all())
+
+    def lookup_repository(self, repository_url: str) -> tuple[Optional[dict], list[dict]]:
+        """Repository for a URL and its linked projects, as /repositories/lookup."""
+        from api.models.project import Project
+        from api.models.project_repository import ProjectRepository
+        from api.models.repository import Repository
+
+        repository = Repository.find_by_url(repository_url)
+        if not repository:
+            return None, []
+
+        project_keys = [
+            a.project_key for a in ProjectRepository.get_projects_for_repository(repository.repository_key)
+        ]
+        projects = Project.query.filter(Project.project_key.in_(project_keys)).all() if project_keys else []
+        projects.sort(key=lambda p: project_keys.index(p.project_key))
+        return repository.to_dict(), self._with_teams(projects)
+
+    @staticmethod
+    def match_directory(directory_name: str, projects: list[dict]) -> Optional[dict]:
+        """
+        Match a working directory name to a project.
+
+        Tries, in order: repository_name, then project name, exactly and then
+        with '-' and ' ' normalized to '_'. All comparisons ignore case.
+        """
+        if not directory_name or not projects:
+            return None
+
+        def exact(value):
+            return (value or '').lower()
+
+        def normalized(value):
+            return exact(value).replace('-', '_').replace(' ', '_')
+
+        for transform in (exact, normalized):
+            target = transform(directory_name)
+            for field in ('repository_name', 'name'):
+                for project in projects:
+                    if project.get(field) and transform(project[field]) == target:
+                        return project
+        return None
+
+    def find_project(
+        self,
+        user: 'User',
+        project_key: str = None,
+        repository_url: str = None,
+        directory_name: str = None
+    ) -> dict:
+        """
+        Detect the agent's project.
+
+        Priority: explicit project_key > repository URL > directory name.
+        When nothing matches, 'projects' lists the user's projects so the
+        agent can pick one.
+        """
+        from api.models.project import Project
+
+        found = {'project': None, 'method': None, 'repository': None, 'projects': []}
+
+        if project_key:
+            project = Project.get_by_key(project_key)
+            if project:
+                found.update(project=self._with_teams([project])[0], method='explicit')
+                return found
+
+        if repository_url:
+            repository, projects = self.lookup_repository(repository_url)
+            found['repository'] = repository
+            if projects:
+                found.update(project=projects[0], method='git_remote')
+                return found
+
+        projects = self.get_projects(user)
+        matched = self.match_directory(directory_name, projects)
+        if matched:
+            found.update(project=matched, method='directory_match')
+        elif not project_key:
+            found['projects'] = projects
+        return found
+
+    # ========== Team, model and persona ==========
+
+    @staticmethod
+    def resolve_team(
+        teams: list[dict],
+        team_key: str = None,
+        team_slug: str = None,
+        project: dict = None,
+        project_name: str = None,
+        agent_id: str = None
+    ) -> tuple[Optional[dict], Optional[str]]:
+        """
+        Pick the agent's active team from the user's teams.
+
+        Returns (team, method) where method is one of explicit_team_key,
+        explicit_team_slug, project or agent_id. An explicit team the user
+        is not a member of resolves to no team.
+        """
+        if team_key:
+            return next((t for t in teams if t['team_key'] == team_key), None), 'explicit_team_key'
+        if team_slug:
+            return next((t for t in teams if t['slug'] == team_slug), None), 'explicit_team_slug'
+        if not teams:
+            return None, None
+
+        # Project name against team slugs and names
+        if project_name:
+            name = _normalize(project_name)
+            for team in teams:
+                slug, team_name = _normalize(team['slug']), _normalize(team['name'])
+                if slug and (slug == name or name in slug or slug in name):
+                    return team, 'project'
+                if team_name and (team_name == name or name in team_name or team_name in name):
+                    return team, 'project'
+
+        # Team slugs and names within the agent_id
+        if agent_id:
+            normalized_id = _normalize(agent_id)
+            for team in teams:
+                slug, team_name = _normalize(team['slug']), (team['name'] or '').lower()
+                if slug and slug in normalized_id:
+                    return team, 'agent_id'
+                if team_name and team_name in normalized_id:
+                    return team, 'agent_id'
+
+        # The project's own teams, preferring owner over contributor over viewer
+        role_priority = {'owner': 0, 'contributor': 1, 'viewer': 2}
+        for association in sorted((project or {}).get('teams', []), key=lambda a: role_priority.get(a.get('role'), 3)):
+            team = next((t for t in teams if t['team_key'] == association['team_key']), None)
+            if team:
+                return team, 'project'
+        return None, None
+
+    @staticmethod
+    def resolve_model(model_id: str = None, model_key: str = None) -> Optional[dict]:
+        """Find a model by API model_id, falling back to model_key."""
+        from api.models import Model
+
+        model = None
+        if model_key:
+            model = Model.get_by_key(model_key)
+        elif model_id:
+            model = Model.get_by_model_id(model_id)
+            if not model and len(model_id) == 36 and model_id.count('-') == 4:
+                model = Model.get_by_key(model_id)
+        if not model:
+            return None
+        return {'model_key': model.model_key, 'model_id': model.model_id, 'name': model.name}
+
+    @staticmethod
+    def resolve_persona(role: str = None) -> Optional[dict]:
+        """Find an active persona by role."""
+        from api.models import Persona
+
+        if not role:
+            return None
+        personas = Persona.get_by_role(role)
+        if not personas:
+            return None
+        return {'persona_key': personas[0].persona_key, 'role': personas[0].role, 'name': personas[0].name}
+
+    @staticmethod
+    def get_active_work_session(user: 'User') -> Optional[dict]:
+        """The user's active work session, expiring it if it has timed out."""
+        from api.models import WorkSession
+
+        session = WorkSession.get_active_for_user(user.user_key)
+        if not session:
+            return None
+        if session.is_expired():
+            session.expire()
+            session.save()
+            return None
+        return session.to_dict()
+
+    # ========== Bootstrap ==========
+
+    def resolve(self, user: 'User', options: dict) -> dict:
+        """
+        Resolve an agent's startup context before registration.
+
+        Args:
+            user: The authenticated user
+            options: The bootstrap request: agent_id, model_id, model_key,
+                persona, team_key, team_slug, project_key, repository_url,
+                project_name (e.g. the git repository name) and directory_name
+
+        Returns:
+            Dict with user, teams, scopes, project, team, model, persona
+            and existing_agents. The work session is looked up after
+            registration, see get_active_work_session().
+        """
+        from api.models import Agent
+        from api.services.relations import relation_loader
+        from api.services.scope import scope_service
+
+        teams = self.get_teams(user)
+        found = self.find_project(
+            user,
+            project_key=options.get('project_key'),
+            repository_url=options.get('repository_url'),
+            directory_name=options.get('directory_name'),
+        )
+        project = found['project']
+        project_name = project.get('name') if project else options.get('project_name')
+
+        team, team_method = self.resolve_team(
+            teams,
+            team_key=options.get('team_key'),
+            team_slug=options.get('team_slug'),
+            project=project,
+            project_name=project_name,
+            agent_id=options.get('agent_id'),
+        )
+
+        return {
+            'user': user.to_dict(include_domain=True),
+            'teams': teams,
+            'available_scopes': scope_service.get_user_accessible_scopes(user),
+            'default_scope': scope_service.get_default_scope(user),
+            'project': project,
+            'project_name': project_name,
+            'project_detection_method': found['method'],
+            'repository': found['repository'],
+            'projects': found['projects'],
+            'team': team,
+            'team_method': team_method if team else None,
+            'model': self.resolve_model(options.get('model_id'), options.get('model_key')),
+            'persona': self.resolve_persona(options.get('persona')),
+            'existing_agents': relation_loader.serialize_agents(Agent.get_by_user_key(user.user_key)),
+        }
+
+
+# Global agent bootstrap service instance
+agent_bootstrap_service = AgentBootstrapService()
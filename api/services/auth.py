@@ -8,6 +8,8 @@ from functools import wraps
 from flask import request, g, current_app
 
 from api.models.base import db
+from api.services.auth_cache import auth_cache
+from api.services.scope import scope_service
 
 
 def hash_password(password: str) -> str:
@@ -28,6 +30,10 @@ def get_user_from_request():
     1. Session cookie (cm_session) - for web UI
     2. Authorization header with Bearer token - for PAT/API access
 
+    Validated tokens are served from auth_cache, and a session's
+    last_activity_at is written at most once per CM_SESSION_TOUCH_SECONDS,
+    so most authenticated requests neither query nor write for auth.
+
     Returns:
         tuple: (User | None, Session | None)
     """
@@ -37,20 +43,31 @@ def get_user_from_request():
     # 1. Check session cookie (web UI)
     session_token = request.cookies.get('cm_session')
     if session_token:
-        session = Session.get_by_token(session_token)
-        if session:
-            user = User.get_by_key(session.user_key)
-            if user and user.is_active:
-                # Touch session to update last activity
-                session.touch()
-                return user, session
+        cached = auth_cache.get('session', session_token)
+        if cached:
+            user, session = cached
+        else:
+            user = None
+            session = Session.get_by_token(session_token)
+            if session:
+                user = User.get_by_key(session.user_key)
+                if user and user.is_active:
+                    auth_cache.put('session', session_token, user, session)
+        if session and user and user.is_active and session.is_valid:
+            if auth_cache.activity_due(session):
+                auth_cache.activity_written(session.session_key, session.record_activity())
+            return user, session
 
     # 2. Check Authorization header with PAT (MCP/API)
     auth_header = request.headers.get('Authorization', '')
     if auth_header.startswith('Bearer '):
         pat = auth_header[7:]
+        cached = auth_cache.get('pat', pat)
+        if cached:
+            return cached[0], None
         user = User.get_by_pat(pat)
         if user:
+            auth_cache.put('pat', pat, user)
             return user, None
 
     return None, None
@@ -83,13 +100,15 @@ def require_auth(f):
     Decorator to require authentication.
 
     If CM_REQUIRE_AUTH is False, allows anonymous access.
-    Sets g.current_user and g.current_session if authenticated.
+    Sets g.current_user and g.current_session if authenticated, and resolves
+    g.access_context once for the scope checks made by the request.
     """
     @wraps(f)
     def decorated(*args, **kwargs):
         user, session = get_user_from_request()
         g.current_user = user
         g.current_session = session
+        g.access_context = scope_service.get_access_context(user)
 
         # Check if auth is required
         if is_auth_required() and not user:
@@ -115,6 +134,7 @@ def require_auth_strict(f):
 
         g.current_user = user
         g.current_session = session
+        g.access_context = scope_service.get_access_context(user)
         return f(*args, **kwargs)
 
     return decorated
@@ -0,0 +1,236 @@
+"""
+Collective Memory Platform - Auth Cache
+
+Caches validated session tokens and PATs so authenticated reads do not
+query or write the database on every request.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from api import config
+from api.models.base import get_now
+
+
+class _Entry:
+    """Column snapshots of a validated user and, for cookies, their session."""
+
+    __slots__ = ('user_key', 'user', 'session_key', 'session', 'deadline')
+
+    def __init__(self, user_key: str, user: dict, session_key: Optional[str], session: Optional[dict], deadline: float):
+        self.user_key = user_key
+        self.user = user
+        self.session_key = session_key
+        self.session = session
+        self.deadline = deadline
+
+
+class AuthCache:
+    """
+    Bounded TTL cache of validated tokens.
+
+    Maps a session token or PAT (by hash) to column snapshots of the user
+    and session it resolved to. On a hit, get() rebuilds the objects as
+    persistent instances of the request's db.session without a query, so
+    routes can use, update or delete them as usual.
+
+    Entries live for at most ttl_seconds and never past the session's
+    expiry, and the least recently used are evicted beyond max_entries.
+    Model event hooks invalidate a user's entries whenever the user row
+    changes (PAT rotation, suspension, role changes) and a session's entry
+    when it is extended or revoked (logout), so within one process a
+    cached token is never honoured after it stops being valid. Other
+    processes see such changes within ttl_seconds.
+
+    activity_due() throttles last_activity_at: a session's activity is
+    written at most once per touch_seconds, so read-only requests do not
+    commit.
+
+    With ttl_seconds <= 0 nothing is cached.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 10000, touch_seconds: float = 300.0):
+        """
+        Initialize auth cache.
+
+        Args:
+            ttl_seconds: How long a validated token is trusted without a query
+            max_entries: Maximum tokens held in memory
+            touch_seconds: Minimum interval between last_activity_at writes per session
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.touch_seconds = touch_seconds
+
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._by_user: Dict[str, set] = {}
+        self._by_session: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def token_hash(kind: str, token: str) -> str:
+        """Hash a token for use as a cache key. kind is 'session' or 'pat'."""
+        return hashlib.sha256(f"{kind}:{token}".encode()).hexdigest()
+
+    @staticmethod
+    def _snapshot(instance) -> dict:
+        from sqlalchemy import inspect
+        return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+    @staticmethod
+    def _restore(model, values: dict):
+        """Attach a snapshot to the current db.session without loading it."""
+        from sqlalchemy.orm import make_transient_to_detached
+        from api.models import db
+
+        instance = model(**values)
+        make_transient_to_detached(instance)
+        return db.session.merge(instance, load=False)
+
+    # ========== Lookup ==========
+
+    def get(self, kind: str, token: str) -> Optional[Tuple[object, Optional[object]]]:
+        """
+        Look up a token.
+
+        Returns (User, Session | None) bound to the current db.session,
+        or None if the token is not cached.
+        """
+        if self.ttl_seconds <= 0:
+            return None
+
+        key = self.token_hash(kind, token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.deadline <= time.monotonic():
+                self._forget(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            user_values, session_values = copy.deepcopy(entry.user), copy.deepcopy(entry.session)
+
+        from api.models import User, Session
+        user = self._restore(User, user_values)
+        session = self._restore(Session, session_values) if session_values else None
+        return user, session
+
+    def put(self, kind: str, token: str, user, session=None) -> None:
+        """Cache a token validated against the database."""
+        if self.ttl_seconds <= 0:
+            return
+
+        ttl = self.ttl_seconds
+        if session is not None:
+            ttl = min(ttl, (session.expires_at - get_now()).total_seconds())
+            if ttl <= 0:
+                return
+
+        key = self.token_hash(kind, token)
+        entry = _Entry(
+            user.user_key,
+            self._snapshot(user),
+            session.session_key if session is not None else None,
+            self._snapshot(session) if session is not None else None,
+            time.monotonic() + ttl,
+        )
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = entry
+            self._by_user.setdefault(entry.user_key, set()).add(key)
+            if entry.session_key:
+                self._by_session[entry.session_key] = key
+            while len(self._entries) > self.max_entries:
+                self._forget(next(iter(self._entries)))
+                self.evictions += 1
+
+    # ========== Session activity ==========
+
+    def activity_due(self, session) -> bool:
+        """Whether a session's last_activity_at is older than touch_seconds."""
+        last = session.last_activity_at
+        return last is None or get_now() - last >= timedelta(seconds=self.touch_seconds)
+
+    def activity_written(self, session_key: str, when: datetime) -> None:
+        """Record a last_activity_at write in the cached snapshot."""
+        with self._lock:
+            key = self._by_session.get(session_key)
+            if key is not None:
+                self._entries[key].session['last_activity_at'] = when
+
+    # ========== Invalidation ==========
+
+    def _forget(self, key: str) -> None:
+        """Remove an entry and its index references. Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_user.get(entry.user_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry.user_key]
+        if entry.session_key and self._by_session.get(entry.session_key) == key:
+            del self._by_session[entry.session_key]
+
+    def invalidate_user(self, user_key: str) -> int:
+        """Drop every cached token of a user. Returns number of entries dropped."""
+        with self._lock:
+            keys = list(self._by_user.get(user_key, ()))
+            for key in keys:
+                self._forget(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def invalidate_session(self, session_key: str) -> bool:
+        """Drop a session's cached token. Returns whether it was cached."""
+        with self._lock:
+            key = self._by_session.get(session_key)
+            if key is None:
+                return False
+            self._forget(key)
+            self.invalidations += 1
+            return True
+
+    def clear(self) -> int:
+        """Drop all entries. Returns number of entries cleared."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._by_user.clear()
+            self._by_session.clear()
+            return count
+
+    def get_stats(self) -> Dict:
+        """Get auth cache statistics."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'touch_seconds': self.touch_seconds,
+            }
+
+
+# Global auth cache instance
+auth_cache = AuthCache(
+    ttl_seconds=config.CM_AUTH_CACHE_TTL,
+    max_entries=config.CM_AUTH_CACHE_SIZE,
+    touch_seconds=config.CM_SESSION_TOUCH_SECONDS,
+)
@@ -5,6 +5,7 @@ Orchestrates AI persona chat with streaming responses.
 Integrates providers and context injection.
 """
 
+import asyncio
 import logging
 from datetime import datetime
 from typing import AsyncGenerator, Dict, Any, Optional, List
@@ -120,24 +121,18 @@ class ChatService:
             inject_context: Whether to inject knowledge graph context
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
+            app: Flask app; database work then runs in worker threads
 
         Yields:
             ChatStreamChunk objects
         """
-        from api.models import ChatMessage
-        from api.models import db
-
         history = history or []
 
         # Get context from knowledge graph (within app context if provided)
         context = None
         if inject_context:
             try:
-                if app:
-                    with app.app_context():
-                        context = self.context_service.get_context(user_message)
-                else:
-                    context = self.context_service.get_context(user_message)
+                context = await self._run_sync(app, self.context_service.get_context, user_message)
 
                 yield ChatStreamChunk(
                     type='context',
@@ -216,30 +211,8 @@ class ChatService:
             return
 
         # Save assistant message to database (within app context)
-        message_key = None
         try:
-            if app:
-                with app.app_context():
-                    assistant_message = ChatMessage(
-                        conversation_key=conversation_key,
-                        role='assistant',
-                        content=full_content,
-                        created_at=datetime.utcnow()
-                    )
-                    db.session.add(assistant_message)
-                    db.session.commit()
-                    message_key = assistant_message.message_key
-            else:
-                # Fallback if no app provided (shouldn't happen in normal use)
-                assistant_message = ChatMessage(
-                    conversation_key=conversation_key,
-                    role='assistant',
-                    content=full_content,
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(assistant_message)
-                db.session.commit()
-                message_key = assistant_message.message_key
+            message_key = await self._run_sync(app, self._save_assistant_message, conversation_key, full_content)
 
             yield ChatStreamChunk(
                 type='done',
@@ -251,16 +224,50 @@ class ChatService:
 
         except Exception as e:
             logger.error(f"Message save error: {e}")
-            try:
-                db.session.rollback()
-            except Exception:
-                pass
             yield ChatStreamChunk(
                 type='error',
                 content=f"Failed to save message: {str(e)}",
                 done=True
             )
 
+    @staticmethod
+    def _save_assistant_message(conversation_key: str, content: str) -> str:
+        """Persist the assistant's reply. Returns its message_key."""
+        from api.models import ChatMessage, db
+
+        try:
+            assistant_message = ChatMessage(
+                conversation_key=conversation_key,
+                role='assistant',
+                content=content,
+                created_at=datetime.utcnow()
+            )
+            db.session.add(assistant_message)
+            db.session.commit()
+            return assistant_message.message_key
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    async def _run_sync(app, func, *args):
+        """
+        Run blocking database work for a stream.
+
+        With an app, the work runs in a worker thread under its own app
+        context, so a stream served on a shared event loop (api.asgi) never
+        blocks the other streams. Without one it runs inline, in the
+        caller's context.
+        """
+        if app is None:
+            return func(*args)
+
+        def run():
+            with app.app_context():
+                return func(*args)
+
+        return await asyncio.to_thread(run)
+
     async def get_response(
         self,
         conversation_key: str,
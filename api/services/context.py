@@ -5,7 +5,6 @@ Provides optimized context retrieval from the knowledge graph for AI prompts.
 Features in-memory caching, token limiting, and semantic search.
 """
 
-import os
 import hashlib
 import logging
 from datetime import datetime, timedelta
@@ -14,13 +13,6 @@ from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
-# Check if semantic search is available
-try:
-    from pgvector.sqlalchemy import Vector
-    SEMANTIC_SEARCH_AVAILABLE = os.getenv("CM_ENABLE_PGVECTOR", "false").lower() in ("1", "true", "yes")
-except ImportError:
-    SEMANTIC_SEARCH_AVAILABLE = False
-
 
 @dataclass
 class CacheEntry:
@@ -52,7 +44,7 @@ class ContextService:
     - In-memory caching with configurable TTL
     - Token limiting to prevent context overflow
     - Entity and relationship retrieval
-    - Semantic search (when pgvector is available)
+    - Semantic search (pgvector, or the in-process vector index)
     """
 
     def __init__(
@@ -74,7 +66,7 @@ class ContextService:
         self.cache_ttl = cache_ttl
         self.max_tokens = max_tokens
         self.max_entities = max_entities
-        self.use_semantic_search = use_semantic_search and SEMANTIC_SEARCH_AVAILABLE
+        self.use_semantic_search = use_semantic_search
         self._cache: Dict[str, CacheEntry] = {}
         self._embedding_service = None
 
@@ -177,9 +169,11 @@ class ContextService:
             lines.append("\n## Relevant Documents")
             for doc in documents:
                 title = doc.get('title', 'Untitled')
+                if doc.get('section_header'):
+                    title = f"{title}: {doc['section_header']}"
                 content = doc.get('content', '')
-                # Truncate content for context
-                if len(content) > 300:
+                # Truncate whole-document content for context (chunks are already bounded)
+                if not doc.get('chunk_key') and len(content) > 300:
                     content = content[:300] + "..."
                 lines.append(f"### {title}")
                 lines.append(content)
@@ -208,7 +202,7 @@ class ContextService:
         Returns:
             ContextResult with formatted context and metadata
         """
-        from api.models import Entity, Relationship, Document
+        from api.models import Entity, Relationship, Document, DocumentChunk
 
         max_entities = max_entities or self.max_entities
 
@@ -233,8 +227,11 @@ class ContextService:
         entities = []
         documents = []
 
-        # Try semantic search first if available
-        if self.use_semantic_search:
+        # Try semantic search first if available. An in-process index that
+        # is still building is skipped rather than waited for.
+        from api.utils.vector_index import vector_index_cache
+        tables = ['entities', 'documents', 'document_chunks'] if include_documents else ['entities']
+        if self.use_semantic_search and all([vector_index_cache.ready(table) for table in tables]):
             try:
                 query_embedding = self.embedding_service.get_embedding(query)
 
@@ -251,20 +248,36 @@ class ContextService:
                         'properties': entity.properties or {}
                     })
 
-                # Semantic document search
+                # Semantic document search: the best chunks of ingested
+                # documents, else the start of the best whole documents
                 if include_documents:
-                    semantic_docs = Document.search_semantic(
+                    semantic_chunks = DocumentChunk.search_semantic(
                         query_embedding,
                         limit=3
                     )
-                    for doc in semantic_docs:
+                    for chunk in semantic_chunks:
                         documents.append({
-                            'document_key': doc.document_key,
-                            'title': doc.title,
-                            'content': doc.content[:500] if doc.content else '',
-                            'content_type': doc.content_type,
+                            'document_key': chunk.document_key,
+                            'chunk_key': chunk.chunk_key,
+                            'title': chunk.document.title,
+                            'section_header': chunk.section_header,
+                            'content': chunk.content,
+                            'content_type': chunk.document.content_type,
                         })
 
+                    if not documents:
+                        semantic_docs = Document.search_semantic(
+                            query_embedding,
+                            limit=3
+                        )
+                        for doc in semantic_docs:
+                            documents.append({
+                                'document_key': doc.document_key,
+                                'title': doc.title,
+                                'content': doc.content[:500] if doc.content else '',
+                                'content_type': doc.content_type,
+                            })
+
                 logger.debug(f"Semantic search: {len(entities)} entities, {len(documents)} documents")
 
             except Exception as e:
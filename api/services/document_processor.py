@@ -6,7 +6,7 @@ Processes markdown/text documents for embedding with chunking and metadata.
 
 import re
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
@@ -14,11 +14,13 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class DocumentChunk:
-    """A chunk of a processed document."""
+    """A chunk of a processed document, with its [start_offset, end_offset) span in the source."""
     content: str
     metadata: Dict[str, Any]
     chunk_index: int
     total_chunks: int
+    start_offset: int = 0
+    end_offset: int = 0
 
 
 class DocumentProcessor:
@@ -85,29 +87,32 @@ class DocumentProcessor:
             section_content = section['content'].strip()
             if not section_content:
                 continue
+            section_start = section['offset'] + len(section['content']) - len(section['content'].lstrip())
 
             # Chunk the section content
-            text_chunks = self._chunk_text(
+            spans = self._chunk_spans(
                 section_content,
                 self.chunk_size,
                 self.overlap
             )
 
-            for i, chunk_text in enumerate(text_chunks):
+            for i, (start, end) in enumerate(spans):
                 metadata = {
                     'title': title,
                     'source': source,
                     'section_header': section.get('header', ''),
                     'section_level': section.get('level', 0),
                     'section_chunk_index': i,
-                    'section_chunk_count': len(text_chunks),
+                    'section_chunk_count': len(spans),
                 }
 
                 all_chunks.append(DocumentChunk(
-                    content=chunk_text,
+                    content=section_content[start:end],
                     metadata=metadata,
                     chunk_index=chunk_index,
-                    total_chunks=0  # Updated below
+                    total_chunks=0,  # Updated below
+                    start_offset=section_start + start,
+                    end_offset=section_start + end,
                 ))
                 chunk_index += 1
 
@@ -138,28 +143,33 @@ class DocumentProcessor:
         if not content or not content.strip():
             return []
 
-        chunks = self._chunk_text(content.strip(), self.chunk_size, self.overlap)
+        text = content.strip()
+        text_start = len(content) - len(content.lstrip())
+        spans = self._chunk_spans(text, self.chunk_size, self.overlap)
 
         return [
             DocumentChunk(
-                content=chunk_text,
+                content=text[start:end],
                 metadata={
                     'title': title,
                     'source': source,
                     'chunk_index': i,
-                    'chunk_count': len(chunks),
+                    'chunk_count': len(spans),
                 },
                 chunk_index=i,
-                total_chunks=len(chunks)
+                total_chunks=len(spans),
+                start_offset=text_start + start,
+                end_offset=text_start + end,
             )
-            for i, chunk_text in enumerate(chunks)
+            for i, (start, end) in enumerate(spans)
         ]
 
     def _split_by_headers(self, content: str) -> List[Dict[str, Any]]:
         """
         Split markdown by headers.
 
-        Returns list of sections with header, level, and content.
+        Returns list of sections with header, level, content, and the
+        offset in content where the section's content starts.
         """
         # Pattern matches # Header, ## Header, etc.
         header_pattern = r'^(#{1,6})\s+(.+)$'
@@ -168,10 +178,13 @@ class DocumentProcessor:
         current_section = {
             'header': '',
             'level': 0,
-            'content': ''
+            'content': '',
+            'offset': 0
         }
 
+        position = 0
         for line in content.split('\n'):
+            line_end = position + len(line) + 1
             match = re.match(header_pattern, line)
             if match:
                 # Save previous section if it has content
@@ -182,10 +195,12 @@ class DocumentProcessor:
                 current_section = {
                     'header': match.group(2).strip(),
                     'level': len(match.group(1)),
-                    'content': ''
+                    'content': '',
+                    'offset': line_end
                 }
             else:
                 current_section['content'] += line + '\n'
+            position = line_end
 
         # Don't forget the last section
         if current_section['content'].strip():
@@ -205,17 +220,30 @@ class DocumentProcessor:
         Tries to break at sentence boundaries when possible.
         """
         text = text.strip()
-        if not text:
+        return [text[start:end] for start, end in self._chunk_spans(text, chunk_size, overlap)]
+
+    def _chunk_spans(
+        self,
+        text: str,
+        chunk_size: int,
+        overlap: int
+    ) -> List[Tuple[int, int]]:
+        """
+        (start, end) spans of text's overlapping chunks, as _chunk_text.
+
+        Spans exclude the whitespace that _chunk_text strips.
+        """
+        if not text.strip():
             return []
 
         if len(text) <= chunk_size:
-            return [text]
+            return [self._strip_span(text, 0, len(text))]
 
         chunks = []
         start = 0
 
         while start < len(text):
-            end = start + chunk_size
+            end = min(start + chunk_size, len(text))
 
             # If we're not at the end, try to break at a sentence boundary
             if end < len(text):
@@ -237,17 +265,22 @@ class DocumentProcessor:
 
                 end = best_break
 
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
+            if text[start:end].strip():
+                chunks.append(self._strip_span(text, start, end))
+            if end >= len(text):
+                break
 
             # Move start position with overlap
             start = end - overlap
-            if start >= len(text):
-                break
 
         return chunks
 
+    @staticmethod
+    def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+        """Narrow a span to exclude leading and trailing whitespace."""
+        chunk = text[start:end]
+        return start + len(chunk) - len(chunk.lstrip()), end - (len(chunk) - len(chunk.rstrip()))
+
     def chunks_to_dict(self, chunks: List[DocumentChunk]) -> List[Dict[str, Any]]:
         """Convert chunks to dictionary format."""
         return [
@@ -256,6 +289,8 @@ class DocumentProcessor:
                 'metadata': chunk.metadata,
                 'chunk_index': chunk.chunk_index,
                 'total_chunks': chunk.total_chunks,
+                'start_offset': chunk.start_offset,
+                'end_offset': chunk.end_offset,
             }
             for chunk in chunks
         ]
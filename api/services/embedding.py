@@ -7,24 +7,199 @@ Provides OpenAI text-embedding-3-small embeddings with caching.
 import hashlib
 import logging
 import os
+import random
+import threading
+from array import array
+from collections import OrderedDict
+from types import SimpleNamespace
 from typing import List, Dict, Optional
-from dataclasses import dataclass
-from datetime import datetime, timedelta
 
 import openai
+from flask import has_app_context
+
+from api import config
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class EmbeddingCacheEntry:
-    """Cached embedding with TTL."""
-    embedding: List[float]
-    created_at: datetime
-    ttl_seconds: int = 3600  # 1 hour default
+def pack_embedding(embedding: List[float]) -> bytes:
+    """Pack an embedding as float32 bytes (4 bytes per dimension)."""
+    return array('f', embedding).tobytes()
+
+
+def unpack_embedding(data: bytes) -> List[float]:
+    """Unpack float32 bytes into a list of floats."""
+    values = array('f')
+    values.frombytes(data)
+    return values.tolist()
+
+
+class FakeEmbeddingClient:
+    """
+    Deterministic in-process stand-in for the OpenAI embeddings API.
+
+    Enabled with CM_EMBEDDING_PROVIDER=fake for offline development and tests.
+    Each text maps to a fixed unit vector seeded from its hash, so identical
+    text always embeds identically. Every call is recorded in `calls`, and
+    `fail_next` makes the next N calls raise to exercise retries.
+    """
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+        self.fail_next = 0
+        self.embeddings = self
+
+    def create(self, model: str, input, dimensions: int) -> SimpleNamespace:
+        inputs = [input] if isinstance(input, str) else list(input)
+        self.calls.append(inputs)
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            raise RuntimeError("Fake embedding provider failure")
+        return SimpleNamespace(data=[
+            SimpleNamespace(embedding=self.embed(text, dimensions)) for text in inputs
+        ])
+
+    @staticmethod
+    def embed(text: str, dimensions: int) -> List[float]:
+        """Deterministic unit vector for text, rounded to float32."""
+        rng = random.Random(hashlib.sha256(text.encode()).digest())
+        values = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+        norm = sum(v * v for v in values) ** 0.5
+        return unpack_embedding(pack_embedding([v / norm for v in values]))
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by (model, dimensions, text hash).
+
+    Tier 1 is a bounded in-process LRU of packed float32 vectors.
+    Tier 2 is the shared embedding_cache table, used when an app context
+    is available, so all workers and restarts reuse the same vectors.
+    Store reads and writes use their own connection and never commit or
+    roll back the caller's session. Store errors are logged and treated
+    as misses.
+    """
 
-    def is_expired(self) -> bool:
-        return datetime.utcnow() > self.created_at + timedelta(seconds=self.ttl_seconds)
+    def __init__(self, max_entries: int = 10000, persist: bool = True):
+        """
+        Initialize embedding cache.
+
+        Args:
+            max_entries: Maximum vectors held in memory
+            persist: Whether to read and write the embedding_cache table
+        """
+        self.max_entries = max_entries
+        self.persist = persist
+        self._memory: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.store_writes = 0
+        self.store_errors = 0
+        self.evictions = 0
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Hash text for use as a cache key."""
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _use_store(self) -> bool:
+        return self.persist and has_app_context()
+
+    def _remember(self, key: tuple, packed: bytes) -> None:
+        """Add to the in-memory LRU. Caller holds the lock."""
+        self._memory[key] = packed
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, model: str, dimensions: int, text_hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up embeddings by text hash.
+
+        Returns dict of text_hash -> embedding for every hit. Store hits are
+        promoted into the in-memory LRU.
+        """
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            for text_hash in text_hashes:
+                key = (model, dimensions, text_hash)
+                packed = self._memory.get(key)
+                if packed is not None:
+                    self._memory.move_to_end(key)
+                    found[text_hash] = packed
+            self.memory_hits += len(found)
+
+        missing = [h for h in dict.fromkeys(text_hashes) if h not in found]
+        if missing and self._use_store():
+            from api.models import CachedEmbedding
+            try:
+                stored = CachedEmbedding.get_many(model, dimensions, missing)
+            except Exception as e:
+                logger.warning(f"Embedding cache store read failed: {e}")
+                stored = {}
+                with self._lock:
+                    self.store_errors += 1
+
+            with self._lock:
+                for text_hash, packed in stored.items():
+                    self._remember((model, dimensions, text_hash), packed)
+                self.store_hits += len(stored)
+            found.update(stored)
+
+        with self._lock:
+            self.misses += sum(1 for h in missing if h not in found)
+
+        return {text_hash: unpack_embedding(packed) for text_hash, packed in found.items()}
+
+    def put_many(self, model: str, dimensions: int, embeddings: Dict[str, List[float]]) -> None:
+        """Store embeddings by text hash in memory and, if enabled, in the shared table."""
+        if not embeddings:
+            return
+
+        packed = {text_hash: pack_embedding(embedding) for text_hash, embedding in embeddings.items()}
+        with self._lock:
+            for text_hash, data in packed.items():
+                self._remember((model, dimensions, text_hash), data)
+
+        if self._use_store():
+            from api.models import CachedEmbedding
+            try:
+                CachedEmbedding.put_many(model, dimensions, packed)
+                with self._lock:
+                    self.store_writes += len(packed)
+            except Exception as e:
+                logger.warning(f"Embedding cache store write failed: {e}")
+                with self._lock:
+                    self.store_errors += 1
+
+    def clear(self) -> int:
+        """Clear the in-memory tier. Returns number of entries cleared."""
+        with self._lock:
+            count = len(self._memory)
+            self._memory.clear()
+        return count
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.memory_hits + self.store_hits + self.misses
+            return {
+                'memory_entries': len(self._memory),
+                'memory_bytes': sum(len(v) for v in self._memory.values()),
+                'max_entries': self.max_entries,
+                'persist': self.persist,
+                'memory_hits': self.memory_hits,
+                'store_hits': self.store_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.memory_hits + self.store_hits) / lookups, 4) if lookups else None,
+                'store_writes': self.store_writes,
+                'store_errors': self.store_errors,
+                'evictions': self.evictions,
+            }
 
 
 class EmbeddingService:
@@ -34,36 +209,50 @@ class EmbeddingService:
     Provides:
     - Single text embedding generation
     - Batch embedding generation (more efficient)
-    - In-memory caching to reduce API calls
+    - Two-tier caching (in-process LRU + shared table) to reduce API calls
     """
 
     MODEL = "text-embedding-3-small"
     DIMENSIONS = 1536
 
-    def __init__(self, cache_ttl: int = 3600):
+    def __init__(self, cache: Optional[EmbeddingCache] = None):
         """
         Initialize embedding service.
 
         Args:
-            cache_ttl: Cache time-to-live in seconds (default 1 hour)
+            cache: Embedding cache (default built from config)
         """
-        self.cache_ttl = cache_ttl
-        self._cache: Dict[str, EmbeddingCacheEntry] = {}
+        self.cache = cache or EmbeddingCache(
+            max_entries=config.CM_EMBEDDING_CACHE_MAX_ENTRIES,
+            persist=config.CM_EMBEDDING_CACHE_PERSIST
+        )
         self._client = None
 
     @property
     def client(self) -> openai.OpenAI:
-        """Lazy initialization of OpenAI client."""
+        """Lazy initialization of OpenAI client (or the fake client when configured)."""
         if self._client is None:
+            if config.CM_EMBEDDING_PROVIDER == 'fake':
+                self._client = FakeEmbeddingClient()
+                return self._client
             api_key = os.getenv('OPENAI_API_KEY')
             if not api_key:
                 raise ValueError("OPENAI_API_KEY environment variable is required")
             self._client = openai.OpenAI(api_key=api_key)
         return self._client
 
-    def _get_cache_key(self, text: str) -> str:
-        """Generate cache key from text."""
-        return hashlib.sha256(text.encode()).hexdigest()[:32]
+    @property
+    def cache_model(self) -> str:
+        """
+        Model key for cached vectors: 'fake' while the fake client is active.
+
+        Keeps fake vectors in the shared embedding_cache table apart from
+        real ones, so a process using the real provider never reads them.
+        """
+        if isinstance(self._client, FakeEmbeddingClient) or (
+                self._client is None and config.CM_EMBEDDING_PROVIDER == 'fake'):
+            return 'fake'
+        return self.MODEL
 
     def get_embedding(self, text: str, use_cache: bool = True) -> List[float]:
         """
@@ -79,39 +268,7 @@ class EmbeddingService:
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
 
-        # Check cache
-        cache_key = self._get_cache_key(text)
-        if use_cache and cache_key in self._cache:
-            entry = self._cache[cache_key]
-            if not entry.is_expired():
-                logger.debug(f"Cache hit for embedding: {cache_key[:8]}...")
-                return entry.embedding
-            else:
-                del self._cache[cache_key]
-
-        # Generate embedding
-        try:
-            response = self.client.embeddings.create(
-                model=self.MODEL,
-                input=text,
-                dimensions=self.DIMENSIONS
-            )
-            embedding = response.data[0].embedding
-
-            # Cache result
-            if use_cache:
-                self._cache[cache_key] = EmbeddingCacheEntry(
-                    embedding=embedding,
-                    created_at=datetime.utcnow(),
-                    ttl_seconds=self.cache_ttl
-                )
-
-            logger.debug(f"Generated embedding for text: {text[:50]}...")
-            return embedding
-
-        except Exception as e:
-            logger.error(f"Error generating embedding: {str(e)}")
-            raise
+        return self.get_embeddings_batch([text], use_cache=use_cache)[0]
 
     def get_embeddings_batch(
         self,
@@ -133,73 +290,52 @@ class EmbeddingService:
         if not texts:
             return []
 
-        results = [None] * len(texts)
-        texts_to_embed = []
-        text_indices = []
-
-        # Check cache for each text
         for i, text in enumerate(texts):
             if not text or not text.strip():
                 raise ValueError(f"Text at index {i} cannot be empty")
 
-            cache_key = self._get_cache_key(text)
-            if use_cache and cache_key in self._cache:
-                entry = self._cache[cache_key]
-                if not entry.is_expired():
-                    results[i] = entry.embedding
-                    continue
-                else:
-                    del self._cache[cache_key]
+        hashes = [EmbeddingCache.text_hash(text) for text in texts]
+        cache_model = self.cache_model
+        cached = self.cache.get_many(cache_model, self.DIMENSIONS, hashes) if use_cache else {}
 
-            texts_to_embed.append(text)
-            text_indices.append(i)
+        # Embed each distinct uncached text once
+        to_embed: Dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in cached and text_hash not in to_embed:
+                to_embed[text_hash] = text
 
-        # Generate embeddings for uncached texts
-        if texts_to_embed:
+        generated: Dict[str, List[float]] = {}
+        if to_embed:
             try:
                 response = self.client.embeddings.create(
                     model=self.MODEL,
-                    input=texts_to_embed,
+                    input=list(to_embed.values()),
                     dimensions=self.DIMENSIONS
                 )
+                for text_hash, embedding_data in zip(to_embed, response.data):
+                    generated[text_hash] = embedding_data.embedding
 
-                for j, embedding_data in enumerate(response.data):
-                    original_index = text_indices[j]
-                    embedding = embedding_data.embedding
-                    results[original_index] = embedding
-
-                    # Cache result
-                    if use_cache:
-                        cache_key = self._get_cache_key(texts_to_embed[j])
-                        self._cache[cache_key] = EmbeddingCacheEntry(
-                            embedding=embedding,
-                            created_at=datetime.utcnow(),
-                            ttl_seconds=self.cache_ttl
-                        )
-
-                logger.debug(f"Generated {len(texts_to_embed)} embeddings in batch")
+                logger.debug(f"Generated {len(generated)} embeddings in batch")
 
             except Exception as e:
                 logger.error(f"Error generating batch embeddings: {str(e)}")
                 raise
 
-        return results
+            if use_cache:
+                self.cache.put_many(cache_model, self.DIMENSIONS, generated)
+
+        return [cached.get(h) or generated[h] for h in hashes]
 
     def clear_cache(self) -> int:
-        """Clear all cached embeddings. Returns number of entries cleared."""
-        count = len(self._cache)
-        self._cache.clear()
-        return count
+        """Clear in-memory cached embeddings. Returns number of entries cleared."""
+        return self.cache.clear()
 
     def get_cache_stats(self) -> Dict:
         """Get cache statistics."""
-        now = datetime.utcnow()
-        expired = sum(1 for e in self._cache.values() if e.is_expired())
         return {
-            'total_entries': len(self._cache),
-            'expired_entries': expired,
-            'active_entries': len(self._cache) - expired,
-            'cache_ttl_seconds': self.cache_ttl,
+            'model': self.MODEL,
+            'dimensions': self.DIMENSIONS,
+            **self.cache.get_stats(),
         }
 
 
@@ -0,0 +1,461 @@
+"""
+Collective Memory Platform - Embedding Queue
+
+Background embedding pipeline with micro-batching, retries and bulk write-back.
+"""
+
+import atexit
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Text, bindparam
+
+from api import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(order=True)
+class EmbeddingJob:
+    """A pending embedding for one entity, document or document chunk."""
+    not_before: float
+    kind: str = field(compare=False)
+    key: str = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class EmbeddingQueue:
+    """
+    Queue of entities, documents and document chunks waiting for embeddings.
+
+    A worker thread collects pending rows into micro-batches (bounded by
+    batch_size and max_wait_ms), embeds them with one get_embeddings_batch
+    call and writes the vectors back with one bulk UPDATE per model.
+    Failed batches are retried with exponential backoff.
+
+    In sync mode, or before init_app has been called, enqueued rows are
+    processed inline in the caller's app context, without committing or
+    rolling back the caller's session. A failed inline batch is handed to
+    the worker thread for its retries, so callers never wait on backoff.
+    """
+
+    KINDS = ('entity', 'document', 'chunk')
+
+    def __init__(
+        self,
+        embedding_service=None,
+        batch_size: int = 64,
+        max_wait_ms: int = 200,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        sync: bool = False
+    ):
+        """
+        Initialize embedding queue.
+
+        Args:
+            embedding_service: EmbeddingService instance (default global service)
+            batch_size: Maximum texts per provider call
+            max_wait_ms: Maximum time to wait for a batch to fill
+            max_retries: Attempts before a job is dropped
+            backoff_base: First retry delay in seconds, doubled per attempt
+            backoff_max: Maximum retry delay in seconds
+            sync: Process jobs inline instead of on the worker thread
+        """
+        self._embedding_service = embedding_service
+        self.batch_size = batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sync = sync
+
+        self._app = None
+        self._retry_app = None  # App for the worker when only inline retries started it
+        self._jobs: List[EmbeddingJob] = []
+        self._pending: set[Tuple[str, str]] = set()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self.embedded = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed = 0
+        self.skipped = 0
+
+    @property
+    def embedding_service(self):
+        """Lazy load embedding service to avoid circular imports."""
+        if self._embedding_service is None:
+            from api.services.embedding import embedding_service
+            self._embedding_service = embedding_service
+        return self._embedding_service
+
+    def init_app(self, app) -> None:
+        """Bind to an app so the worker thread can open app contexts."""
+        self._app = app
+        atexit.register(self.shutdown)
+
+    # ========== Enqueue ==========
+
+    def enqueue(self, kind: str, keys: List[str]) -> int:
+        """
+        Queue rows for embedding. Rows already pending are not queued twice.
+
+        Returns number of rows queued.
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown embedding kind: {kind}")
+
+        if self.sync or self._app is None:
+            keys = list(dict.fromkeys(keys))
+            for start in range(0, len(keys), self.batch_size):
+                failed = self._process_batch([EmbeddingJob(0.0, kind, key) for key in keys[start:start + self.batch_size]])
+                if failed:
+                    self._retry_in_worker(failed)
+            return len(keys)
+
+        queued = 0
+        now = time.monotonic()
+        with self._cond:
+            for key in keys:
+                if (kind, key) in self._pending:
+                    continue
+                self._pending.add((kind, key))
+                self._jobs.append(EmbeddingJob(now, kind, key))
+                queued += 1
+            self._ensure_worker()
+            self._cond.notify_all()
+        return queued
+
+    def enqueue_entity(self, entity_key: str) -> int:
+        """Queue one entity for embedding."""
+        return self.enqueue('entity', [entity_key])
+
+    def enqueue_document(self, document_key: str) -> int:
+        """Queue one document for embedding."""
+        return self.enqueue('document', [document_key])
+
+    def enqueue_chunks(self, chunk_keys: List[str]) -> int:
+        """Queue document chunks for embedding, batch_size per provider call."""
+        return self.enqueue('chunk', chunk_keys)
+
+    # ========== Worker ==========
+
+    def _ensure_worker(self) -> None:
+        """Start the worker thread if needed. Caller holds the lock."""
+        if self._worker is None or not self._worker.is_alive():
+            self._stopping = False
+            self._worker = threading.Thread(target=self._run, name='embedding-queue', daemon=True)
+            self._worker.start()
+
+    def _take_batch(self) -> List[EmbeddingJob]:
+        """
+        Wait for a batch of due jobs. Caller holds the lock.
+
+        Returns once batch_size jobs are due, max_wait_ms has passed since
+        the first due job, or the queue is stopping.
+        """
+        deadline = None
+        while True:
+            now = time.monotonic()
+            due = [job for job in self._jobs if job.not_before <= now]
+
+            if due and (len(due) >= self.batch_size or self._stopping):
+                break
+            if due and deadline is None:
+                deadline = now + self.max_wait_ms / 1000
+            if deadline is not None and now >= deadline:
+                break
+            if self._stopping and not self._jobs:
+                return []
+
+            waits = [job.not_before - now for job in self._jobs if job.not_before > now]
+            if deadline is not None:
+                waits.append(deadline - now)
+            self._cond.wait(timeout=min(waits) if waits else None)
+
+        due.sort()
+        batch = due[:self.batch_size]
+        taken = {id(job) for job in batch}
+        self._jobs = [job for job in self._jobs if id(job) not in taken]
+        for job in batch:
+            self._pending.discard((job.kind, job.key))
+        self._in_flight += len(batch)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+                if not batch:
+                    self._cond.notify_all()
+                    return
+
+            try:
+                with (self._app or self._retry_app).app_context():
+                    failed = self._process_batch(batch, inline=False)
+            except Exception as e:
+                logger.error(f"Embedding batch crashed: {e}")
+                failed = batch
+
+            with self._cond:
+                self._in_flight -= len(batch)
+                for job in failed:
+                    self._schedule_retry(job)
+                self._cond.notify_all()
+
+    def _schedule_retry(self, job: EmbeddingJob) -> None:
+        """Requeue a failed job with backoff, or drop it. Caller holds the lock."""
+        job.attempts += 1
+        if job.attempts >= self.max_retries or self._stopping:
+            self.failed += 1
+            logger.error(f"Giving up embedding {job.kind} {job.key} after {job.attempts} attempts")
+            return
+        if (job.kind, job.key) in self._pending:
+            return  # Re-queued by a newer write in the meantime
+
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (job.attempts - 1)))
+        job.not_before = time.monotonic() + delay * (0.5 + random.random() / 2)
+        self._jobs.append(job)
+        self._pending.add((job.kind, job.key))
+        self.retries += 1
+
+    def _retry_in_worker(self, jobs: List[EmbeddingJob]) -> None:
+        """Hand jobs that failed inline to the worker thread for retries with backoff."""
+        from flask import current_app, has_app_context
+
+        if self._app is None and self._retry_app is None:
+            if not has_app_context():
+                self.failed += len(jobs)
+                logger.error(f"Dropping {len(jobs)} failed embeddings: no app for the worker to retry them in")
+                return
+            self._retry_app = current_app._get_current_object()
+
+        with self._cond:
+            self._ensure_worker()
+            for job in jobs:
+                self._schedule_retry(job)
+            self._cond.notify_all()
+
+    def _process_with_retries(self, batch: List[EmbeddingJob]) -> None:
+        """
+        Process a batch inline, sleeping between retries.
+
+        Only for backfill(), which is a blocking maintenance call; enqueue()
+        never waits on backoff.
+        """
+        while batch:
+            failed = self._process_batch(batch)
+            if not failed:
+                return
+            attempts = failed[0].attempts + 1
+            if attempts >= self.max_retries:
+                self.failed += len(failed)
+                logger.error(f"Giving up embedding {len(failed)} rows after {attempts} attempts")
+                return
+            for job in failed:
+                job.attempts = attempts
+            self.retries += len(failed)
+            time.sleep(min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1))))
+            batch = failed
+
+    # ========== Batch processing ==========
+
+    @staticmethod
+    def _model_for(kind: str):
+        from api.models import Entity, Document, DocumentChunk
+        return {'entity': Entity, 'document': Document, 'chunk': DocumentChunk}[kind]
+
+    @staticmethod
+    def _column_value(model_cls, embedding: List[float]):
+        """Vectors go to pgvector columns as-is and to the text fallback as JSON."""
+        if isinstance(model_cls.__table__.c.embedding.type, Text):
+            return json.dumps(embedding)
+        return embedding
+
+    def _process_batch(self, batch: List[EmbeddingJob], inline: bool = True) -> List[EmbeddingJob]:
+        """
+        Embed a batch and write vectors back.
+
+        Loads current rows (one query per kind), embeds their text in one
+        provider call, then writes every vector in one transaction on its
+        own connection, with one executemany UPDATE per kind.
+
+        Inline, rows are read through the caller's session without flushing
+        it, the session is never committed or rolled back, and only the
+        embedding attributes of the loaded rows are expired afterwards. The
+        rows' own changes should be committed before they are enqueued, or
+        the write-back waits on the caller's row locks. The worker releases
+        its read transaction during the provider call.
+
+        Returns the jobs that failed and should be retried.
+        """
+        from api.models import db
+
+        rows = {}
+        with db.session.no_autoflush:
+            for kind in self.KINDS:
+                keys = [job.key for job in batch if job.kind == kind]
+                if not keys:
+                    continue
+                model_cls = self._model_for(kind)
+                pk = model_cls.__table__.primary_key.columns.values()[0]
+                for row in model_cls.query.filter(pk.in_(keys)).all():
+                    rows[(kind, getattr(row, pk.name))] = row
+
+            jobs = [job for job in batch if (job.kind, job.key) in rows]
+            self.skipped += len(batch) - len(jobs)  # Deleted since they were queued
+            if not jobs:
+                return []
+
+            texts = [rows[(job.kind, job.key)].embedding_text() for job in jobs]
+        if not inline:
+            db.session.rollback()
+
+        try:
+            embeddings = self.embedding_service.get_embeddings_batch(texts)
+        except Exception as e:
+            logger.warning(f"Embedding batch of {len(jobs)} failed: {e}")
+            return jobs
+
+        from api.utils.vector_index import vector_index_cache
+
+        written = []
+        try:
+            with db.engine.begin() as connection:
+                for kind in self.KINDS:
+                    model_cls = self._model_for(kind)
+                    table = model_cls.__table__
+                    pk = table.primary_key.columns.values()[0]
+                    params = [
+                        {'b_key': job.key, 'b_embedding': self._column_value(model_cls, embedding)}
+                        for job, embedding in zip(jobs, embeddings) if job.kind == kind
+                    ]
+                    if params:
+                        connection.execute(
+                            table.update().where(pk == bindparam('b_key')).values(
+                                embedding=bindparam('b_embedding', type_=table.c.embedding.type)
+                            ),
+                            params
+                        )
+                        written.extend((table.name, param['b_key']) for param in params)
+        except Exception as e:
+            logger.warning(f"Embedding write-back of {len(jobs)} rows failed: {e}")
+            return jobs
+
+        # Core updates skip mapper events and session hooks
+        vector_index_cache.mark_dirty(written)
+        if inline:
+            for job in jobs:
+                db.session.expire(rows[(job.kind, job.key)], ['embedding', 'has_embedding'])
+
+        self.batches += 1
+        self.embedded += len(jobs)
+        logger.debug(f"Embedded {len(jobs)} rows in one batch")
+        return []
+
+    # ========== Backfill ==========
+
+    def backfill(self, kinds: Optional[List[str]] = None, limit: Optional[int] = None) -> Dict[str, int]:
+        """
+        Embed every row whose embedding IS NULL, in micro-batches.
+
+        Runs inline in the caller's app context. Rows that keep failing are
+        skipped so the backfill always terminates.
+
+        Args:
+            kinds: Kinds to backfill (default all)
+            limit: Maximum rows per kind
+
+        Returns:
+            dict of kind -> rows embedded
+        """
+        from api.models import db
+
+        results = {}
+        for kind in kinds or self.KINDS:
+            model_cls = self._model_for(kind)
+            pk = model_cls.__table__.primary_key.columns.values()[0]
+
+            embedded = 0
+            failed_keys: set[str] = set()
+            while limit is None or embedded < limit:
+                size = self.batch_size if limit is None else min(self.batch_size, limit - embedded)
+                query = db.session.query(pk).filter(model_cls.embedding.is_(None))
+                if failed_keys:
+                    query = query.filter(pk.notin_(failed_keys))
+                keys = [row[0] for row in query.order_by(pk).limit(size).all()]
+                if not keys:
+                    break
+
+                before = self.embedded
+                self._process_with_retries([EmbeddingJob(0.0, kind, key) for key in keys])
+                done = self.embedded - before
+                if done < len(keys):
+                    failed_keys.update(keys)
+                embedded += done
+
+            results[kind] = embedded
+            logger.info(f"Backfilled embeddings for {embedded} {kind} rows")
+        return results
+
+    # ========== Lifecycle ==========
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued job is processed (including retries).
+
+        Returns True if the queue drained within the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._jobs or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+        return True
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Drain due jobs and stop the worker thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None and worker.is_alive():
+            worker.join(timeout=timeout)
+
+    def get_stats(self) -> Dict:
+        """Get queue statistics."""
+        with self._cond:
+            return {
+                'queued': len(self._jobs),
+                'in_flight': self._in_flight,
+                'embedded': self.embedded,
+                'batches': self.batches,
+                'retries': self.retries,
+                'failed': self.failed,
+                'skipped': self.skipped,
+                'batch_size': self.batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'sync': self.sync,
+            }
+
+
+# Global queue instance
+embedding_queue = EmbeddingQueue(
+    batch_size=config.CM_EMBEDDING_BATCH_SIZE,
+    max_wait_ms=config.CM_EMBEDDING_BATCH_WAIT_MS,
+    max_retries=config.CM_EMBEDDING_MAX_RETRIES,
+    sync=config.CM_EMBEDDING_QUEUE_SYNC,
+)
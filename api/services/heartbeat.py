@@ -0,0 +1,196 @@
+"""
+Collective Memory Platform - Heartbeat Service
+
+Coalesces agent last-seen updates into periodic batched writes.
+"""
+
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from api import config
+from api.models.base import get_now
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatService:
+    """
+    Coalesced agent heartbeats.
+
+    touch() keeps only the latest heartbeat per agent in memory. A worker
+    thread writes every pending timestamp with one executemany UPDATE each
+    flush_seconds, so an agent that heartbeats on every tool call costs one
+    row update per interval instead of one commit per call. last_heartbeat
+    only ever moves forward, so a late flush cannot overwrite a newer
+    timestamp written directly through Agent.update_heartbeat().
+
+    With flush_seconds <= 0, or before init_app has been called, updates
+    are written inline in the caller's app context.
+    """
+
+    def __init__(self, flush_seconds: float = 10.0):
+        """
+        Initialize heartbeat service.
+
+        Args:
+            flush_seconds: How often pending heartbeats are written
+        """
+        self.flush_seconds = flush_seconds
+
+        self._app = None
+        self._pending: Dict[str, datetime] = {}
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self.touched = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed = 0
+
+    def init_app(self, app) -> None:
+        """Bind to an app so the worker thread can open app contexts."""
+        self._app = app
+        atexit.register(self.shutdown)
+
+    def touch(self, agent_key: str, when: Optional[datetime] = None) -> None:
+        """Record that an agent was seen."""
+        when = when or get_now()
+
+        with self._cond:
+            self.touched += 1
+
+        if self.flush_seconds <= 0 or self._app is None:
+            self._write_inline({agent_key: when})
+            return
+
+        with self._cond:
+            current = self._pending.get(agent_key)
+            if current is None or when > current:
+                self._pending[agent_key] = when
+            self._ensure_worker()
+
+    def last_seen(self, agent_key: str) -> Optional[datetime]:
+        """Get an agent's heartbeat that has not been written yet, if any."""
+        with self._cond:
+            return self._pending.get(agent_key)
+
+    @staticmethod
+    def _update(pending: Dict[str, datetime]) -> None:
+        """Write pending heartbeats with one executemany UPDATE."""
+        from sqlalchemy import bindparam, or_
+        from api.models import db, Agent
+
+        table = Agent.__table__
+        statement = table.update().where(
+            table.c.agent_key == bindparam('key'),
+            or_(table.c.last_heartbeat.is_(None), table.c.last_heartbeat < bindparam('seen'))
+        ).values(last_heartbeat=bindparam('seen'))
+        db.session.execute(statement, [
+            {'key': agent_key, 'seen': seen}
+            for agent_key, seen in sorted(pending.items())
+        ])
+
+    def _write_inline(self, pending: Dict[str, datetime]) -> None:
+        """Write heartbeats in the caller's session. Failures are logged, not raised."""
+        from api.models import db
+        try:
+            self._update(pending)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Heartbeat write failed: {e}")
+            with self._cond:
+                self.failed += len(pending)
+            return
+        with self._cond:
+            self.written += len(pending)
+            self.flushes += 1
+
+    # ========== Worker ==========
+
+    def _ensure_worker(self) -> None:
+        """Start the worker thread if needed. Caller holds the lock."""
+        if self._worker is None or not self._worker.is_alive():
+            self._stopping = False
+            self._worker = threading.Thread(target=self._run, name='heartbeat-flush', daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(timeout=self.flush_seconds)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def _write(self, pending: Dict[str, datetime]) -> None:
+        """Write pending heartbeats in the worker's own app context."""
+        from api.models import db
+        with self._app.app_context():
+            try:
+                self._update(pending)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def flush(self) -> int:
+        """
+        Write all pending heartbeats now.
+
+        Returns number of agents written.
+        """
+        with self._cond:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        if self._app is None:
+            self._write_inline(pending)
+            return len(pending)
+
+        try:
+            self._write(pending)
+        except Exception as e:
+            logger.error(f"Heartbeat flush of {len(pending)} agents failed: {e}")
+            with self._cond:
+                self.failed += len(pending)
+            return 0
+
+        with self._cond:
+            self.written += len(pending)
+            self.flushes += 1
+        return len(pending)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Write pending heartbeats and stop the worker thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None and worker.is_alive():
+            worker.join(timeout=timeout)
+        else:
+            self.flush()
+
+    def get_stats(self) -> Dict:
+        """Get heartbeat statistics."""
+        with self._cond:
+            return {
+                'pending': len(self._pending),
+                'touched': self.touched,
+                'written': self.written,
+                'flushes': self.flushes,
+                'failed': self.failed,
+                'flush_seconds': self.flush_seconds,
+            }
+
+
+# Global heartbeat service instance
+heartbeat_service = HeartbeatService(flush_seconds=config.CM_HEARTBEAT_FLUSH_SECONDS)
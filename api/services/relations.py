@@ -0,0 +1,111 @@
+"""
+Collective Memory Platform - Relation Loader
+
+Batched relation expansion for serializing lists of models.
+"""
+from typing import Iterable, Optional
+
+from flask import has_request_context, request
+
+
+class RelationLoader:
+    """
+    Per-request identity cache for the rows that to_dict() expands.
+
+    Agent.to_dict, WorkSession.to_dict and Entity.to_dict expand foreign
+    keys (model, persona, agent, project, scope) through get(). For a list,
+    the serialize_* methods first collect the keys of the whole page and
+    load() them with one IN query per type, so a page of 200 agents costs
+    two queries instead of 400.
+
+    Rows (and misses) are remembered for the rest of the request only.
+    Outside a request, get() is a plain lookup.
+    """
+
+    _environ_key = 'cm.relation_cache'
+
+    @classmethod
+    def _cache(cls) -> Optional[dict]:
+        if not has_request_context():
+            return None
+        return request.environ.setdefault(cls._environ_key, {})
+
+    @staticmethod
+    def _column(model, column: Optional[str]):
+        if column is None:
+            return list(model.__table__.primary_key.columns)[0]
+        return model.__table__.columns[column]
+
+    def load(self, model, keys: Iterable[str], column: str = None) -> dict:
+        """
+        Load rows by key with one IN query for the keys not yet cached.
+
+        Args:
+            model: Model class
+            keys: Values of column to load (None values are ignored)
+            column: Column to match (default: the primary key)
+
+        Returns:
+            Dict of key -> row for every key found
+        """
+        keys = {key for key in keys if key}
+        cache = self._cache()
+        if cache is None:
+            cache = {}
+        col = self._column(model, column)
+
+        missing = [key for key in keys if (model, col.name, key) not in cache]
+        if missing:
+            found = {}
+            for row in model.query.filter(col.in_(missing)).all():
+                found.setdefault(getattr(row, col.key), row)
+            for key in missing:
+                cache[(model, col.name, key)] = found.get(key)
+
+        return {key: cache[(model, col.name, key)] for key in keys if cache[(model, col.name, key)] is not None}
+
+    def get(self, model, key: Optional[str], column: str = None):
+        """Get one row by key, from the request's cache if already loaded."""
+        if not key:
+            return None
+        return self.load(model, [key], column).get(key)
+
+    # ========== Serializers ==========
+
+    def prefetch_agents(self, agents: list) -> None:
+        """Load the models and personas Agent.to_dict expands."""
+        from api.models import Model, Persona
+
+        self.load(Model, (a.model_key for a in agents))
+        self.load(Persona, (a.persona_key for a in agents))
+
+    def serialize_agents(self, agents: list, **kwargs) -> list[dict]:
+        """Agent.to_dict for a list, with relations batch-loaded."""
+        if kwargs.get('expand_relations', True):
+            self.prefetch_agents(agents)
+        return [agent.to_dict(**kwargs) for agent in agents]
+
+    def serialize_work_sessions(self, sessions: list, **kwargs) -> list[dict]:
+        """WorkSession.to_dict for a list, with projects and agents batch-loaded."""
+        from api.models import Agent, Entity, Project
+
+        if kwargs.get('include_project', True):
+            projects = self.load(Project, (s.project_key for s in sessions))
+            # Legacy sessions reference a project entity instead
+            self.load(Entity, (s.project_key for s in sessions if s.project_key not in projects))
+        if kwargs.get('include_agent', True):
+            agents = self.load(Agent, (s.agent_id for s in sessions), column='agent_id')
+            self.prefetch_agents(list(agents.values()))
+        return [session.to_dict(**kwargs) for session in sessions]
+
+    def serialize_entities(self, entities: list, **kwargs) -> list[dict]:
+        """Entity.to_dict for a list, with scope names batch-loaded."""
+        from api.models import Domain, Team, User
+
+        for scope_type, model in (('domain', Domain), ('team', Team), ('user', User)):
+            self.load(model, (e.scope_key for e in entities if e.scope_type == scope_type))
+        return [entity.to_dict(**kwargs) for entity in entities]
+
+
+# Global relation loader instance
+relation_loader = RelationLoader()
@@ -3,14 +3,120 @@ Collective Memory Platform - Scope Service
 
 Centralized scope and access control logic for team-based visibility.
 """
-from typing import TYPE_CHECKING
-from sqlalchemy import or_, and_
+import itertools
+from dataclasses import dataclass, field
+from typing import Optional, TYPE_CHECKING
+from flask import g, has_request_context
+from sqlalchemy import or_, and_, func
 
 if TYPE_CHECKING:
     from api.models.user import User
     from api.models.team import Team, TeamMembership
 
 
+# Bumped whenever memberships, teams or user roles change; contexts built
+# under an older version are rebuilt on next use.
+_access_versions = itertools.count(1)
+_access_version = next(_access_versions)
+
+
+@dataclass
+class AccessContext:
+    """
+    Resolved access facts for one user, computed once per request.
+
+    Holds everything scope checks need so they don't re-query team
+    memberships: admin flags, domain, active teams and membership roles.
+    SQL scope predicates are compiled once per model class.
+    """
+    user_key: str
+    domain_key: Optional[str]
+    is_admin: bool
+    is_domain_admin: bool
+    is_guest: bool
+    teams: tuple  # ((team_key, name, role), ...) for active teams
+    roles: dict  # team_key -> role, for every membership
+    version: int
+    _clauses: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def team_keys(self) -> list[str]:
+        return [team_key for team_key, _, _ in self.teams]
+
+    def can_access(self, scope_type: str, scope_key: str) -> bool:
+        """Same rules as ScopeService.can_access_scope."""
+        if self.is_admin:
+            return True
+
+        # System scope is accessible to everyone (read-only)
+        if scope_type == 'system':
+            return True
+
+        if scope_type == 'domain':
+            return self.domain_key == scope_key
+        elif scope_type == 'team':
+            return scope_key in self.team_keys
+        elif scope_type == 'user':
+            return self.user_key == scope_key
+
+        # NULL or unknown scope_type - check domain
+        return self.domain_key == scope_key if scope_key else True
+
+    def sees(self, domain_key: Optional[str], scope_type: Optional[str], scope_key: Optional[str]) -> bool:
+        """Whether ScopeService.filter_query_by_scope keeps a row with these values."""
+        if self.is_admin:
+            return True
+        if scope_type == 'system':
+            return scope_key is None
+        if scope_type in (None, 'domain'):
+            return self.domain_key is not None and domain_key == self.domain_key
+        if scope_type == 'team':
+            return scope_key in self.team_keys
+        if scope_type == 'user':
+            return scope_key == self.user_key
+        return False
+
+    def clause(self, model_class):
+        """
+        SQL expression equivalent to can_access for each row of model_class.
+
+        Mirrors can_access(row.scope_type, row.scope_key or row.domain_key).
+        Returns None if the user can access everything.
+        """
+        if self.is_admin:
+            return None
+        if model_class in self._clauses:
+            return self._clauses[model_class]
+
+        scope_type = model_class.scope_type
+        effective_key = func.coalesce(model_class.scope_key, model_class.domain_key)
+
+        if self.domain_key:
+            domain_match = effective_key == self.domain_key
+        else:
+            domain_match = effective_key.is_(None)
+
+        team_keys = self.team_keys
+        team_match = effective_key.in_(team_keys) if team_keys else None
+
+        conditions = [
+            scope_type == 'system',
+            and_(scope_type == 'domain', domain_match),
+            and_(scope_type == 'user', effective_key == self.user_key),
+            # NULL or unknown scope_type - check domain (no key means visible)
+            and_(
+                or_(scope_type.is_(None), scope_type.notin_(['system', 'domain', 'team', 'user'])),
+                or_(effective_key.is_(None), effective_key == self.domain_key)
+                if self.domain_key else effective_key.is_(None)
+            ),
+        ]
+        if team_match is not None:
+            conditions.append(and_(scope_type == 'team', team_match))
+
+        self._clauses[model_class] = or_(*conditions)
+        return self._clauses[model_class]
+
+
 class ScopeService:
     """
     Centralized scope and access control logic.
@@ -21,6 +127,63 @@ class ScopeService:
     - Default scope selection for new entities
     """
 
+    @staticmethod
+    def get_access_context(user: 'User') -> Optional[AccessContext]:
+        """
+        Get the resolved access context for a user.
+
+        Built with a single membership query and reused for the rest of
+        the request (and for the lifetime of the user instance) until
+        memberships, teams or roles change.
+        """
+        if user is None:
+            return None
+
+        if has_request_context():
+            context = g.get('access_context')
+            if context and context.user_key == user.user_key and context.version == _access_version:
+                return context
+
+        context = getattr(user, '_access_context', None)
+        if context is None or context.version != _access_version:
+            context = ScopeService._build_access_context(user)
+            user._access_context = context
+
+        if has_request_context():
+            g.access_context = context
+        return context
+
+    @staticmethod
+    def _build_access_context(user: 'User') -> AccessContext:
+        from api.models.base import db
+        from api.models.team import Team, TeamMembership
+
+        version = _access_version
+        rows = db.session.query(
+            TeamMembership.team_key, TeamMembership.role, Team.name, Team.status
+        ).join(
+            Team, Team.team_key == TeamMembership.team_key
+        ).filter(
+            TeamMembership.user_key == user.user_key
+        ).order_by(TeamMembership.joined_at).all()
+
+        return AccessContext(
+            user_key=user.user_key,
+            domain_key=user.domain_key,
+            is_admin=user.is_admin,
+            is_domain_admin=user.is_domain_admin,
+            is_guest=user.is_guest,
+            teams=tuple((team_key, name, role) for team_key, role, name, status in rows if status == 'active'),
+            roles={team_key: role for team_key, role, _, _ in rows},
+            version=version,
+        )
+
+    @staticmethod
+    def invalidate_access_contexts() -> None:
+        """Mark every cached access context stale. Called when memberships, teams or roles change."""
+        global _access_version
+        _access_version = next(_access_versions)
+
     @staticmethod
     def get_user_accessible_scopes(user: 'User') -> list[dict]:
         """
@@ -32,8 +195,7 @@ class ScopeService:
         - name: Human-readable name
         - access_level: 'admin', 'owner', 'member', or 'viewer'
         """
-        from api.models.team import TeamMembership
-
+        context = ScopeService.get_access_context(user)
         scopes = []
 
         # System scope (always accessible to everyone)
@@ -51,19 +213,16 @@ class ScopeService:
                 'scope_type': 'domain',
                 'scope_key': user.domain_key,
                 'name': domain_name,
-                'access_level': 'admin' if user.is_domain_admin else 'member'
+                'access_level': 'admin' if context.is_domain_admin else 'member'
             })
 
         # Team scopes
-        for team in user.get_teams():
-            membership = TeamMembership.query.filter_by(
-                team_key=team.team_key, user_key=user.user_key
-            ).first()
+        for team_key, name, role in context.teams:
             scopes.append({
                 'scope_type': 'team',
-                'scope_key': team.team_key,
-                'name': team.name,
-                'access_level': membership.role if membership else 'member'
+                'scope_key': team_key,
+                'name': name,
+                'access_level': role or 'member'
             })
 
         # Personal scope
@@ -89,7 +248,8 @@ class ScopeService:
         Returns:
             Filtered query
         """
-        if user.is_admin:
+        context = ScopeService.get_access_context(user)
+        if context.is_admin:
             return query  # Admins see everything
 
         conditions = []
@@ -100,16 +260,16 @@ class ScopeService:
         )
 
         # Domain-scoped (NULL scope_type or explicit domain)
-        if user.domain_key:
+        if context.domain_key:
             conditions.append(
                 and_(
                     or_(model_class.scope_type.is_(None), model_class.scope_type == 'domain'),
-                    model_class.domain_key == user.domain_key
+                    model_class.domain_key == context.domain_key
                 )
             )
 
         # Team-scoped
-        team_keys = [t.team_key for t in user.get_teams()]
+        team_keys = context.team_keys
         if team_keys:
             conditions.append(
                 and_(model_class.scope_type == 'team', model_class.scope_key.in_(team_keys))
@@ -117,7 +277,7 @@ class ScopeService:
 
         # User-scoped (own items)
         conditions.append(
-            and_(model_class.scope_type == 'user', model_class.scope_key == user.user_key)
+            and_(model_class.scope_type == 'user', model_class.scope_key == context.user_key)
         )
 
         if conditions:
@@ -137,22 +297,24 @@ class ScopeService:
         Returns:
             True if user can access the scope
         """
-        if user.is_admin:
-            return True
+        return ScopeService.get_access_context(user).can_access(scope_type, scope_key)
 
-        # System scope is accessible to everyone (read-only)
-        if scope_type == 'system':
-            return True
+    @staticmethod
+    def access_clause(user: 'User', model_class):
+        """
+        Build a SQL expression equivalent to can_access_scope for each row.
 
-        if scope_type == 'domain':
-            return user.domain_key == scope_key
-        elif scope_type == 'team':
-            return any(t.team_key == scope_key for t in user.get_teams())
-        elif scope_type == 'user':
-            return user.user_key == scope_key
+        Mirrors can_access_scope(user, row.scope_type, row.scope_key or row.domain_key)
+        so per-row Python checks can be pushed into the query.
 
-        # NULL or unknown scope_type - check domain
-        return user.domain_key == scope_key if scope_key else True
+        Args:
+            user: The user making the request
+            model_class: The model class being queried (must have scope_type, scope_key, domain_key)
+
+        Returns:
+            SQLAlchemy boolean clause, or None if the user can access everything
+        """
+        return ScopeService.get_access_context(user).clause(model_class)
 
     @staticmethod
     def can_write_to_scope(user: 'User', scope_type: str, scope_key: str) -> bool:
@@ -167,27 +329,22 @@ class ScopeService:
         Returns:
             True if user can write in the scope
         """
-        from api.models.team import TeamMembership
-
-        if user.is_admin:
+        context = ScopeService.get_access_context(user)
+        if context.is_admin:
             return True
 
         if scope_type == 'domain':
             # Domain admins can write to domain scope
-            return user.domain_key == scope_key and user.is_domain_admin
+            return context.domain_key == scope_key and context.is_domain_admin
         elif scope_type == 'team':
             # Check team membership and role
-            membership = TeamMembership.query.filter_by(
-                team_key=scope_key,
-                user_key=user.user_key
-            ).first()
-            return membership and membership.can_write
+            return context.roles.get(scope_key) in ('owner', 'admin', 'member')
         elif scope_type == 'user':
             # Only the user can write to their personal scope
-            return user.user_key == scope_key
+            return context.user_key == scope_key
 
         # NULL scope_type - domain admins can write
-        return user.is_domain_admin
+        return context.is_domain_admin
 
     @staticmethod
     def get_default_scope(user: 'User', session_state: dict = None) -> dict:
@@ -207,20 +364,22 @@ class ScopeService:
         Returns:
             dict with 'scope_type' and 'scope_key'
         """
+        context = ScopeService.get_access_context(user)
+
         # Check session for active team
         if session_state and session_state.get('active_team_key'):
             team_key = session_state['active_team_key']
-            if any(t.team_key == team_key for t in user.get_teams()):
+            if team_key in context.team_keys:
                 return {'scope_type': 'team', 'scope_key': team_key}
 
         # Single team? Use it
-        teams = user.get_teams()
-        if len(teams) == 1:
-            return {'scope_type': 'team', 'scope_key': teams[0].team_key}
+        team_keys = context.team_keys
+        if len(team_keys) == 1:
+            return {'scope_type': 'team', 'scope_key': team_keys[0]}
 
         # Fall back to domain
-        if user.domain_key:
-            return {'scope_type': 'domain', 'scope_key': user.domain_key}
+        if context.domain_key:
+            return {'scope_type': 'domain', 'scope_key': context.domain_key}
 
         # Personal scope as last resort
         return {'scope_type': 'user', 'scope_key': user.user_key}
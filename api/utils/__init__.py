@@ -2,6 +2,9 @@
 Collective Memory Platform - Utilities
 """
 from api.utils.keys import get_key, get_now
+from api.utils.adjacency import AdjacencyCache, adjacency_cache
 from api.utils.graph import GraphTraversal
+from api.utils.vector_index import VectorIndex, VectorIndexCache, vector_index_cache
 
-__all__ = ['get_key', 'get_now', 'GraphTraversal']
+__all__ = ['get_key', 'get_now', 'AdjacencyCache', 'adjacency_cache', 'GraphTraversal',
+           'VectorIndex', 'VectorIndexCache', 'vector_index_cache']
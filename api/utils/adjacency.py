@@ -0,0 +1,564 @@
+"""
+Collective Memory Platform - Adjacency Cache
+
+Process-wide, in-memory adjacency index of the knowledge graph.
+
+Each domain gets a compact CSR (compressed sparse row) index built lazily
+from the relationships table. Writes made through the API are applied
+incrementally as a small overlay that is folded back into the CSR arrays
+once it grows. Indexes are bounded by a memory budget with LRU eviction
+and a TTL, which also bounds staleness from writers that bypass the hooks
+(other workers, bulk scripts).
+"""
+import logging
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional
+
+
+from api import config
+
+logger = logging.getLogger(__name__)
+
+# (domain_key, scope_type, scope_key) of an entity
+NodeScope = tuple
+# (relationship_key, from_entity_key, to_entity_key, relationship_type)
+Edge = tuple
+
+# Rough per-entry overhead of an added edge in the overlay
+_OVERLAY_EDGE_BYTES = 400
+
+
+class AdjacencyIndex:
+    """
+    CSR adjacency index of all relationships touching one domain.
+
+    Each relationship is stored once per endpoint, so neighbors are found
+    in both directions. Node scopes are interned since a domain usually has
+    only a handful of distinct (domain, scope_type, scope_key) triples.
+    """
+
+    def __init__(self, domain_key: Optional[str]):
+        self.domain_key = domain_key
+        self.built_at = time.monotonic()
+
+        # Nodes
+        self.node_keys: list[str] = []
+        self.node_index: dict[str, int] = {}
+        self.node_scope_ids = array('i')
+        self.scopes: list[NodeScope] = []
+
+        # CSR: neighbors of node i are adj_rels[offsets[i]:offsets[i + 1]]
+        self.offsets = array('i', [0])
+        self.adj_rels = array('i')
+
+        # Relationships
+        self.rel_keys: list[str] = []
+        self.rel_from = array('i')
+        self.rel_to = array('i')
+        self.rel_type_ids = array('i')
+        self.rel_types: list[str] = []
+
+        # Incremental overlay applied on top of the CSR arrays
+        self._added: dict[str, Edge] = {}
+        self._added_by_node: dict[str, list[str]] = {}
+        self._removed: set[str] = set()
+        self._scope_overrides: dict[str, NodeScope] = {}
+
+        self._base_bytes = 0
+
+    @classmethod
+    def from_rows(cls, domain_key: Optional[str], rows: Iterable[tuple]) -> 'AdjacencyIndex':
+        """
+        Build an index from relationship rows.
+
+        Each row is (relationship_key, from_entity_key, to_entity_key,
+        relationship_type, from_scope, to_scope) where a scope is a
+        (domain_key, scope_type, scope_key) tuple.
+        """
+        index = cls(domain_key)
+        scope_ids: dict[NodeScope, int] = {}
+        type_ids: dict[str, int] = {}
+        degrees: list[int] = []
+
+        def intern_node(key: str, scope: NodeScope) -> int:
+            node_id = index.node_index.get(key)
+            if node_id is None:
+                node_id = len(index.node_keys)
+                index.node_index[key] = node_id
+                index.node_keys.append(key)
+                scope_id = scope_ids.get(scope)
+                if scope_id is None:
+                    scope_id = scope_ids[scope] = len(index.scopes)
+                    index.scopes.append(scope)
+                index.node_scope_ids.append(scope_id)
+                degrees.append(0)
+            return node_id
+
+        for rel_key, from_key, to_key, rel_type, from_scope, to_scope in rows:
+            from_id = intern_node(from_key, tuple(from_scope))
+            to_id = intern_node(to_key, tuple(to_scope))
+            type_id = type_ids.get(rel_type)
+            if type_id is None:
+                type_id = type_ids[rel_type] = len(index.rel_types)
+                index.rel_types.append(rel_type)
+
+            index.rel_keys.append(rel_key)
+            index.rel_from.append(from_id)
+            index.rel_to.append(to_id)
+            index.rel_type_ids.append(type_id)
+
+            degrees[from_id] += 1
+            if to_id != from_id:
+                degrees[to_id] += 1
+
+        # Prefix sums, then fill each node's slice in relationship order
+        offsets = array('i', [0]) * (len(degrees) + 1)
+        for node_id, degree in enumerate(degrees):
+            offsets[node_id + 1] = offsets[node_id] + degree
+        cursor = array('i', offsets[:-1]) if degrees else array('i')
+        adj_rels = array('i', [0]) * offsets[-1]
+        for rel_id in range(len(index.rel_keys)):
+            from_id = index.rel_from[rel_id]
+            to_id = index.rel_to[rel_id]
+            adj_rels[cursor[from_id]] = rel_id
+            cursor[from_id] += 1
+            if to_id != from_id:
+                adj_rels[cursor[to_id]] = rel_id
+                cursor[to_id] += 1
+
+        index.offsets = offsets
+        index.adj_rels = adj_rels
+        index._base_bytes = index._estimate_base_bytes()
+        return index
+
+    def _estimate_base_bytes(self) -> int:
+        """Approximate memory held by the CSR arrays, keys and lookup dict."""
+        arrays = (
+            self.node_scope_ids, self.offsets, self.adj_rels,
+            self.rel_from, self.rel_to, self.rel_type_ids,
+        )
+        total = sum(a.itemsize * len(a) for a in arrays)
+        total += sum(sys.getsizeof(k) for k in self.node_keys)
+        total += sum(sys.getsizeof(k) for k in self.rel_keys)
+        total += sys.getsizeof(self.node_index) + sys.getsizeof(self.node_keys) + sys.getsizeof(self.rel_keys)
+        return total
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint including the overlay."""
+        overlay = len(self._added) + len(self._removed) + len(self._scope_overrides)
+        return self._base_bytes + overlay * _OVERLAY_EDGE_BYTES
+
+    @property
+    def overlay_size(self) -> int:
+        """Number of pending incremental changes not yet folded into the CSR."""
+        return len(self._added) + len(self._removed)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.rel_keys) - len(self._removed) + len(self._added)
+
+    def has_node(self, entity_key: str) -> bool:
+        return entity_key in self.node_index or entity_key in self._scope_overrides
+
+    def node_scope(self, entity_key: str) -> Optional[NodeScope]:
+        """Get the (domain_key, scope_type, scope_key) of a node, if known."""
+        scope = self._scope_overrides.get(entity_key)
+        if scope is not None:
+            return scope
+        node_id = self.node_index.get(entity_key)
+        if node_id is None:
+            return None
+        return self.scopes[self.node_scope_ids[node_id]]
+
+    def edges(self, entity_key: str) -> Iterator[Edge]:
+        """Yield (relationship_key, from_key, to_key, relationship_type) for every edge touching a node."""
+        node_id = self.node_index.get(entity_key)
+        if node_id is not None:
+            removed = self._removed
+            for i in range(self.offsets[node_id], self.offsets[node_id + 1]):
+                rel_id = self.adj_rels[i]
+                rel_key = self.rel_keys[rel_id]
+                if removed and rel_key in removed:
+                    continue
+                yield (
+                    rel_key,
+                    self.node_keys[self.rel_from[rel_id]],
+                    self.node_keys[self.rel_to[rel_id]],
+                    self.rel_types[self.rel_type_ids[rel_id]],
+                )
+
+        for rel_key in list(self._added_by_node.get(entity_key, ())):
+            edge = self._added.get(rel_key)
+            if edge is not None:
+                yield edge
+
+    def iter_rows(self) -> Iterator[tuple]:
+        """Yield every current edge as a from_rows() row, overlay included."""
+        for rel_id, rel_key in enumerate(self.rel_keys):
+            if rel_key in self._removed:
+                continue
+            from_key = self.node_keys[self.rel_from[rel_id]]
+            to_key = self.node_keys[self.rel_to[rel_id]]
+            yield (
+                rel_key, from_key, to_key, self.rel_types[self.rel_type_ids[rel_id]],
+                self.node_scope(from_key), self.node_scope(to_key),
+            )
+        for rel_key, from_key, to_key, rel_type in list(self._added.values()):
+            yield (rel_key, from_key, to_key, rel_type, self.node_scope(from_key), self.node_scope(to_key))
+
+    def _base_contains(self, rel_key: str, entity_key: str) -> bool:
+        """Check whether a relationship is in the CSR slice of a node."""
+        node_id = self.node_index.get(entity_key)
+        if node_id is None:
+            return False
+        for i in range(self.offsets[node_id], self.offsets[node_id + 1]):
+            if self.rel_keys[self.adj_rels[i]] == rel_key:
+                return True
+        return False
+
+    def add_edge(self, edge: Edge, from_scope: NodeScope, to_scope: NodeScope) -> None:
+        """Record a new relationship in the overlay."""
+        rel_key, from_key, to_key, _ = edge
+        self._added[rel_key] = edge
+        self._added_by_node.setdefault(from_key, []).append(rel_key)
+        if to_key != from_key:
+            self._added_by_node.setdefault(to_key, []).append(rel_key)
+        for key, scope in ((from_key, from_scope), (to_key, to_scope)):
+            if scope is not None and self.node_scope(key) != scope:
+                self._scope_overrides[key] = scope
+
+    def remove_edge(self, rel_key: str, from_key: str, to_key: str) -> bool:
+        """
+        Drop a relationship from the index.
+
+        Returns:
+            True if the relationship was present
+        """
+        edge = self._added.pop(rel_key, None)
+        if edge is not None:
+            for key in (edge[1], edge[2]):
+                node_rels = self._added_by_node.get(key)
+                if node_rels and rel_key in node_rels:
+                    node_rels.remove(rel_key)
+            return True
+        if rel_key not in self._removed and self._base_contains(rel_key, from_key):
+            self._removed.add(rel_key)
+            return True
+        return False
+
+    def set_node_scope(self, entity_key: str, scope: NodeScope) -> None:
+        """Record a changed entity scope (e.g. after a move-scope)."""
+        if self.has_node(entity_key):
+            self._scope_overrides[entity_key] = scope
+
+    def compacted(self) -> 'AdjacencyIndex':
+        """Return a fresh index with the overlay folded into the CSR arrays."""
+        index = AdjacencyIndex.from_rows(self.domain_key, self.iter_rows())
+        # Keep the original build time so the TTL still bounds staleness
+        index.built_at = self.built_at
+        return index
+
+
+class AdjacencyCache:
+    """
+    LRU cache of per-domain AdjacencyIndex objects.
+
+    Provides:
+    - Lazy per-domain index builds from the relationships table
+    - Incremental updates from relationship and entity write routes
+    - Memory budget with least-recently-used eviction
+    - TTL-based rebuilds to bound staleness across workers
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: int = 300,
+        enabled: bool = True,
+        compact_threshold: int = 1024
+    ):
+        """
+        Initialize adjacency cache.
+
+        Args:
+            max_bytes: Memory budget across all domain indexes
+            ttl_seconds: Rebuild an index from the database after this many seconds
+            enabled: Whether graph traversal should use the cache
+            compact_threshold: Minimum overlay size before folding it into the CSR
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.compact_threshold = compact_threshold
+        self._indexes: 'OrderedDict[Optional[str], AdjacencyIndex]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._build_locks: dict[Optional[str], threading.Lock] = {}
+        self._stats = {'hits': 0, 'builds': 0, 'evictions': 0, 'compactions': 0}
+
+    # ========== Index Management ==========
+
+    def _build_index(self, domain_key: Optional[str]) -> AdjacencyIndex:
+        """
+        Load all relationships touching a domain into a new index.
+
+        Reads the domain's entity scopes by domain_key, then scans the
+        relationships table once, keeping edges with an endpoint in the
+        domain. Neither query joins, so the build does not depend on the
+        planner's row estimates (a freshly bulk-loaded graph has none).
+        """
+        from api.models import db, Entity, Relationship
+
+        started = time.monotonic()
+        scope_columns = (Entity.entity_key, Entity.domain_key, Entity.scope_type, Entity.scope_key)
+
+        in_domain = Entity.domain_key.is_(None) if domain_key is None else Entity.domain_key == domain_key
+        scopes: dict[str, NodeScope] = {
+            key: (domain, scope_type, scope_key)
+            for key, domain, scope_type, scope_key
+            in db.session.query(*scope_columns).filter(in_domain).yield_per(10000)
+        }
+
+        edges = [
+            tuple(r) for r in db.session.query(
+                Relationship.relationship_key,
+                Relationship.from_entity_key,
+                Relationship.to_entity_key,
+                Relationship.relationship_type,
+            ).yield_per(10000)
+            if r[1] in scopes or r[2] in scopes
+        ]
+
+        # Endpoints in other domains
+        outside = list({key for edge in edges for key in edge[1:3] if key not in scopes})
+        for i in range(0, len(outside), 1000):
+            for key, domain, scope_type, scope_key in db.session.query(*scope_columns).filter(
+                Entity.entity_key.in_(outside[i:i + 1000])
+            ):
+                scopes[key] = (domain, scope_type, scope_key)
+
+        # Edges to entities that no longer exist are left out, as an inner join would
+        rows = (
+            (rel_key, from_key, to_key, rel_type, scopes[from_key], scopes[to_key])
+            for rel_key, from_key, to_key, rel_type in edges
+            if from_key in scopes and to_key in scopes
+        )
+
+        index = AdjacencyIndex.from_rows(domain_key, rows)
+        index.built_at = started
+        logger.info(
+            f"Built adjacency index for domain {domain_key!r}: {len(index.node_keys)} nodes, "
+            f"{len(index.rel_keys)} edges, {index.nbytes // 1024} KB in "
+            f"{(time.monotonic() - started) * 1000:.0f} ms"
+        )
+        return index
+
+    def _evict(self) -> None:
+        """Evict least recently used indexes until within the memory budget."""
+        total = sum(index.nbytes for index in self._indexes.values())
+        while total > self.max_bytes and len(self._indexes) > 1:
+            domain_key, index = self._indexes.popitem(last=False)
+            total -= index.nbytes
+            self._stats['evictions'] += 1
+            logger.debug(f"Evicted adjacency index for domain {domain_key!r}")
+
+    def get_index(self, domain_key: Optional[str]) -> AdjacencyIndex:
+        """Get the index for a domain, building it on first use or after the TTL."""
+        with self._lock:
+            index = self._indexes.get(domain_key)
+            if index is not None and time.monotonic() - index.built_at < self.ttl_seconds:
+                self._indexes.move_to_end(domain_key)
+                self._stats['hits'] += 1
+                return index
+
+            build_lock = self._build_locks.setdefault(domain_key, threading.Lock())
+
+        # Build outside the cache lock so other domains stay readable; the
+        # per-domain lock makes concurrent misses wait for one build
+        with build_lock:
+            with self._lock:
+                index = self._indexes.get(domain_key)
+                if index is not None and time.monotonic() - index.built_at < self.ttl_seconds:
+                    self._indexes.move_to_end(domain_key)
+                    self._stats['hits'] += 1
+                    return index
+
+            index = self._build_index(domain_key)
+
+            with self._lock:
+                self._indexes[domain_key] = index
+                self._indexes.move_to_end(domain_key)
+                self._stats['builds'] += 1
+                self._evict()
+            return index
+
+    def _loaded(self) -> list[AdjacencyIndex]:
+        with self._lock:
+            return list(self._indexes.values())
+
+    def _maybe_compact(self, index: AdjacencyIndex) -> None:
+        """Fold a large overlay back into CSR arrays."""
+        if index.overlay_size < max(self.compact_threshold, len(index.rel_keys) // 10):
+            return
+        # Copy and swap under the lock, so no overlay edit lands on the old
+        # index after it has been copied
+        with self._lock:
+            if self._indexes.get(index.domain_key) is index:
+                self._indexes[index.domain_key] = index.compacted()
+                self._stats['compactions'] += 1
+
+    # ========== Lookups ==========
+
+    def domain_of(self, entity_key: str) -> tuple[bool, Optional[str]]:
+        """
+        Find an entity's domain, checking loaded indexes before the database.
+
+        Returns:
+            tuple of (found, domain_key)
+        """
+        for index in reversed(self._loaded()):
+            scope = index.node_scope(entity_key)
+            if scope is not None:
+                return True, scope[0]
+
+        from api.models import db, Entity
+        row = db.session.query(Entity.domain_key).filter(Entity.entity_key == entity_key).first()
+        if row is None:
+            return False, None
+        return True, row[0]
+
+    def edges(self, entity_key: str, domain_key: Optional[str]) -> Iterator[Edge]:
+        """Yield every edge touching an entity from its domain's index."""
+        return self.get_index(domain_key).edges(entity_key)
+
+    def node_scope(self, entity_key: str, domain_key: Optional[str]) -> Optional[NodeScope]:
+        """Get an entity's (domain_key, scope_type, scope_key) from a domain index."""
+        return self.get_index(domain_key).node_scope(entity_key)
+
+    # ========== Incremental Updates ==========
+
+    @staticmethod
+    def _entity_scope(entity) -> NodeScope:
+        return (entity.domain_key, entity.scope_type, entity.scope_key)
+
+    def _lookup_scope(self, entity_key: str) -> Optional[NodeScope]:
+        """Find an entity's scope in loaded indexes, falling back to the database."""
+        for index in self._loaded():
+            scope = index.node_scope(entity_key)
+            if scope is not None:
+                return scope
+
+        from api.models import db, Entity
+        row = db.session.query(
+            Entity.domain_key, Entity.scope_type, Entity.scope_key
+        ).filter(Entity.entity_key == entity_key).first()
+        return tuple(row) if row is not None else None
+
+    def relationship_saved(
+        self,
+        relationship,
+        from_entity=None,
+        to_entity=None,
+        previous: Optional[tuple[str, str]] = None
+    ) -> None:
+        """
+        Apply a created or updated relationship to loaded indexes.
+
+        Args:
+            relationship: The committed Relationship
+            from_entity: Optional source Entity (avoids a scope lookup)
+            to_entity: Optional target Entity (avoids a scope lookup)
+            previous: (from_entity_key, to_entity_key) before an update
+        """
+        if not self._indexes:
+            return
+
+        edge = (
+            relationship.relationship_key,
+            relationship.from_entity_key,
+            relationship.to_entity_key,
+            relationship.relationship_type,
+        )
+        from_scope = self._entity_scope(from_entity) if from_entity else self._lookup_scope(edge[1])
+        to_scope = self._entity_scope(to_entity) if to_entity else self._lookup_scope(edge[2])
+        domains = {s[0] for s in (from_scope, to_scope) if s is not None}
+        old_from, old_to = previous or (edge[1], edge[2])
+
+        for index in self._loaded():
+            with self._lock:
+                # Endpoints or type may have changed on update, so drop any old copy first
+                index.remove_edge(edge[0], old_from, old_to)
+                if index.domain_key in domains:
+                    index.add_edge(edge, from_scope, to_scope)
+            self._maybe_compact(index)
+
+    def relationship_deleted(self, relationship_key: str, from_entity_key: str, to_entity_key: str) -> None:
+        """Remove a deleted relationship from loaded indexes."""
+        for index in self._loaded():
+            with self._lock:
+                index.remove_edge(relationship_key, from_entity_key, to_entity_key)
+            self._maybe_compact(index)
+
+    def entity_changed(self, entity) -> None:
+        """Apply an entity's current domain and scope to loaded indexes."""
+        scope = self._entity_scope(entity)
+        for index in self._loaded():
+            current = index.node_scope(entity.entity_key)
+            if current is None or current == scope:
+                continue
+            if current[0] != scope[0]:
+                # Domain moves change which indexes hold the node's edges
+                self.invalidate()
+                return
+            with self._lock:
+                index.set_node_scope(entity.entity_key, scope)
+
+    def invalidate(self, domain_key: Optional[str] = ...) -> None:
+        """Drop one domain's index, or every index when no domain is given."""
+        with self._lock:
+            if domain_key is ...:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(domain_key, None)
+
+    def clear(self) -> int:
+        """Drop all indexes. Returns number of indexes cleared."""
+        with self._lock:
+            count = len(self._indexes)
+            self._indexes.clear()
+            return count
+
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        with self._lock:
+            domains = [
+                {
+                    'domain_key': index.domain_key,
+                    'nodes': len(index.node_keys),
+                    'edges': index.edge_count,
+                    'overlay_size': index.overlay_size,
+                    'bytes': index.nbytes,
+                    'age_seconds': round(time.monotonic() - index.built_at, 1),
+                }
+                for index in self._indexes.values()
+            ]
+            return {
+                'enabled': self.enabled,
+                'max_bytes': self.max_bytes,
+                'total_bytes': sum(d['bytes'] for d in domains),
+                'ttl_seconds': self.ttl_seconds,
+                'domains': domains,
+                **self._stats,
+            }
+
+
+# Global cache instance
+adjacency_cache = AdjacencyCache(
+    max_bytes=config.CM_GRAPH_CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=config.CM_GRAPH_CACHE_TTL,
+    enabled=config.CM_GRAPH_CACHE_ENABLED,
+)
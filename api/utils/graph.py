@@ -3,15 +3,275 @@ Collective Memory Platform - Graph Traversal Utilities
 
 Utilities for traversing the knowledge graph and building context.
 """
-from typing import Optional, TYPE_CHECKING
-from collections import deque
+import heapq
+from typing import Callable, Iterator, Optional, TYPE_CHECKING
 
-from api.models import Entity, Relationship
+from sqlalchemy import String, any_, bindparam, or_
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from api.models import Entity, Relationship, db
+from api.utils.adjacency import adjacency_cache
 
 if TYPE_CHECKING:
     from api.models.user import User
 
 
+# Upper bound on keys per IN list when expanding a frontier
+IN_CHUNK_SIZE = 1000
+
+
+def _chunked(keys: list[str], size: int = IN_CHUNK_SIZE) -> Iterator[list[str]]:
+    """Yield successive slices of keys no longer than size."""
+    for i in range(0, len(keys), size):
+        yield keys[i:i + size]
+
+
+def _key_batches(keys: list[str]) -> Iterator[list[str]]:
+    """
+    Split keys for loading by key: one batch on PostgreSQL, IN-sized chunks elsewhere.
+
+    A whole result set is hydrated with one query per table however many
+    keys it has, which keeps the query count independent of result size.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        if keys:
+            yield keys
+        return
+    yield from _chunked(keys)
+
+
+def _key_filter(column, keys: list[str]):
+    """column IN keys, as one array parameter (= ANY(:keys)) on PostgreSQL."""
+    if db.engine.dialect.name == 'postgresql':
+        return column == any_(bindparam(None, keys, type_=ARRAY(String)))
+    return column.in_(keys)
+
+
+class _NeighborSource:
+    """
+    Memoized, scope-pruned neighbor lookups for path searches.
+
+    Backed by the adjacency cache when enabled, otherwise by batched
+    frontier queries. Each node is expanded at most once per search.
+    """
+
+    def __init__(self, user: 'User' = None, relationship_types: Optional[list[str]] = None):
+        self.user = user
+        self.relationship_types = set(relationship_types) if relationship_types else None
+        self.use_cache = adjacency_cache.enabled
+        self._can_access = GraphTraversal._scope_checker(user)
+        self._edges: dict[str, list[tuple]] = {}
+        self._domains: dict[str, Optional[str]] = {}
+
+    def seed(self, entity_key: str) -> bool:
+        """Register a search endpoint. Returns False if it is missing or inaccessible."""
+        if self.use_cache:
+            found, domain_key = adjacency_cache.domain_of(entity_key)
+            if not found:
+                return False
+            self._domains[entity_key] = domain_key
+            scope = adjacency_cache.node_scope(entity_key, domain_key)
+            # Entities without relationships are not in the index, check them in SQL
+            if scope is not None:
+                return self._can_access(scope)
+        return entity_key in GraphTraversal._load_entities([entity_key], self.user)
+
+    def neighbors(self, frontier: list[str]) -> dict[str, list[tuple]]:
+        """
+        Get accessible edges for each frontier node.
+
+        Returns dict of node -> [(relationship_key, other_key, relationship_type, from_key, to_key)].
+        """
+        pending = [key for key in frontier if key not in self._edges]
+        if pending:
+            if self.use_cache:
+                self._expand_cached(pending)
+            else:
+                self._expand_queried(pending)
+        return {key: self._edges[key] for key in frontier}
+
+    def _expand_cached(self, pending: list[str]) -> None:
+        for current_key in pending:
+            domain_key = self._domains.get(current_key)
+            edges = []
+            for rel_key, from_key, to_key, rel_type in adjacency_cache.edges(current_key, domain_key):
+                if self.relationship_types and rel_type not in self.relationship_types:
+                    continue
+                other_key = to_key if from_key == current_key else from_key
+                scope = adjacency_cache.node_scope(other_key, domain_key)
+                if not self._can_access(scope):
+                    continue
+                self._domains.setdefault(other_key, scope[0])
+                edges.append((rel_key, other_key, rel_type, from_key, to_key))
+            self._edges[current_key] = edges
+
+    def _expand_queried(self, pending: list[str]) -> None:
+        rels_by_node = GraphTraversal._relationships_by_node(pending)
+
+        candidates = {}
+        for current_key in pending:
+            for rel in rels_by_node.get(current_key, []):
+                if self.relationship_types and rel.relationship_type not in self.relationship_types:
+                    continue
+                other_key = rel.to_entity_key if rel.from_entity_key == current_key else rel.from_entity_key
+                candidates.setdefault(current_key, []).append((
+                    rel.relationship_key, other_key, rel.relationship_type,
+                    rel.from_entity_key, rel.to_entity_key
+                ))
+
+        others = list({edge[1] for edges in candidates.values() for edge in edges})
+        accessible = GraphTraversal._load_entities(others, self.user) if others else {}
+
+        for current_key in pending:
+            self._edges[current_key] = [
+                edge for edge in candidates.get(current_key, []) if edge[1] in accessible
+            ]
+
+
+class _PathSearch:
+    """
+    Shortest and k-shortest loopless paths over a _NeighborSource.
+
+    Uses bidirectional BFS for each shortest-path search and Yen's algorithm
+    to enumerate further paths in order of length.
+    """
+
+    def __init__(self, source: _NeighborSource, max_depth: int, directed: bool = False):
+        self.source = source
+        self.max_depth = max_depth
+        self.directed = directed
+
+    def _step(self, frontier: list[str], forward: bool) -> dict[str, list[tuple]]:
+        """Expand a frontier, keeping only edges that can be walked in this direction."""
+        adjacency = self.source.neighbors(frontier)
+        if not self.directed:
+            return adjacency
+        # Forward side walks from -> to, backward side walks to -> from
+        return {
+            node: [e for e in edges if (e[3] == node) == forward]
+            for node, edges in adjacency.items()
+        }
+
+    def shortest(
+        self,
+        start: str,
+        goal: str,
+        max_depth: int,
+        banned_nodes: frozenset = frozenset(),
+        banned_rels: frozenset = frozenset()
+    ) -> Optional[tuple[list[str], list[tuple]]]:
+        """
+        Bidirectional BFS for one shortest path from start to goal.
+
+        Returns (node_keys, edges) or None if no path of at most max_depth hops exists.
+        """
+        if start == goal:
+            return [start], []
+
+        # node -> (depth, parent_node, edge)
+        seen = ({start: (0, None, None)}, {goal: (0, None, None)})
+        frontiers = ([start], [goal])
+        depths = [0, 0]
+
+        while frontiers[0] and frontiers[1] and depths[0] + depths[1] < max_depth:
+            # Expand the smaller side first
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            this_seen, other_seen = seen[side], seen[1 - side]
+            adjacency = self._step(frontiers[side], forward=(side == 0))
+
+            best = None
+            next_frontier = []
+            for node in frontiers[side]:
+                for edge in adjacency[node]:
+                    rel_key, other_key = edge[0], edge[1]
+                    if rel_key in banned_rels or other_key in banned_nodes:
+                        continue
+                    if other_key in other_seen:
+                        length = depths[side] + 1 + other_seen[other_key][0]
+                        if length <= max_depth and (best is None or length < best[0]):
+                            best = (length, node, other_key, edge)
+                    if other_key not in this_seen:
+                        this_seen[other_key] = (depths[side] + 1, node, edge)
+                        next_frontier.append(other_key)
+
+            if best is not None:
+                _, node, meet, edge = best
+                return self._join(seen, side, node, meet, edge)
+
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+            depths[side] += 1
+
+        return None
+
+    @staticmethod
+    def _join(seen: tuple, side: int, node: str, meet: str, edge: tuple) -> tuple[list[str], list[tuple]]:
+        """Stitch the two BFS trees together at the meeting edge."""
+        def walk(tree: dict, key: str) -> tuple[list[str], list[tuple]]:
+            nodes, edges = [key], []
+            while tree[key][1] is not None:
+                _, parent, parent_edge = tree[key]
+                edges.append(parent_edge)
+                nodes.append(parent)
+                key = parent
+            return nodes, edges
+
+        near_nodes, near_edges = walk(seen[side], node)
+        far_nodes, far_edges = walk(seen[1 - side], meet)
+
+        # near_* run from node back to its root, far_* from meet back to its root
+        nodes = list(reversed(near_nodes)) + far_nodes
+        edges = list(reversed(near_edges)) + [edge] + far_edges
+        if side == 1:
+            nodes.reverse()
+            edges.reverse()
+        return nodes, edges
+
+    def k_shortest(self, start: str, goal: str, k: int) -> list[tuple[list[str], list[tuple]]]:
+        """Yen's algorithm: up to k loopless paths in order of length."""
+        first = self.shortest(start, goal, self.max_depth)
+        if first is None:
+            return []
+
+        paths = [first]
+        candidates = []
+        seen_paths = {tuple(e[0] for e in first[1])}
+        counter = 0
+
+        while len(paths) < k:
+            prev_nodes, prev_edges = paths[-1]
+            for i in range(len(prev_nodes) - 1):
+                spur_node = prev_nodes[i]
+                root_nodes, root_edges = prev_nodes[:i + 1], prev_edges[:i]
+                root_rels = tuple(e[0] for e in root_edges)
+
+                # Don't reuse the next edge of any accepted path sharing this root
+                banned_rels = frozenset(
+                    edges[i][0] for nodes, edges in paths
+                    if len(edges) > i and tuple(e[0] for e in edges[:i]) == root_rels
+                )
+                banned_nodes = frozenset(root_nodes[:-1])
+
+                spur = self.shortest(spur_node, goal, self.max_depth - i, banned_nodes, banned_rels)
+                if spur is None:
+                    continue
+
+                nodes = root_nodes[:-1] + spur[0]
+                edges = root_edges + spur[1]
+                signature = tuple(e[0] for e in edges)
+                if signature in seen_paths or len(set(nodes)) != len(nodes):
+                    continue
+                seen_paths.add(signature)
+                counter += 1
+                heapq.heappush(candidates, (len(edges), counter, nodes, edges))
+
+            if not candidates:
+                break
+            _, _, nodes, edges = heapq.heappop(candidates)
+            paths.append((nodes, edges))
+
+        return paths
+
+
 class GraphTraversal:
     """
     Utilities for traversing the knowledge graph.
@@ -19,14 +279,155 @@ class GraphTraversal:
     Provides methods for:
     - Finding connected entities
     - Building context subgraphs
-    - Path finding between entities
+    - Shortest and k-shortest path finding between entities
     """
 
+    @staticmethod
+    def _relationships_by_node(frontier: list[str]) -> dict[str, list[Relationship]]:
+        """
+        Fetch every relationship touching the frontier in set-based queries.
+
+        Returns relationships grouped by frontier node, preserving query order.
+        """
+        frontier_set = set(frontier)
+        by_node: dict[str, list[Relationship]] = {}
+        seen = set()
+
+        for chunk in _chunked(frontier):
+            rels = Relationship.query.filter(
+                or_(
+                    Relationship.from_entity_key.in_(chunk),
+                    Relationship.to_entity_key.in_(chunk)
+                )
+            ).all()
+            for rel in rels:
+                # A relationship spanning two chunks comes back twice
+                if rel.relationship_key in seen:
+                    continue
+                seen.add(rel.relationship_key)
+                if rel.from_entity_key in frontier_set:
+                    by_node.setdefault(rel.from_entity_key, []).append(rel)
+                if rel.to_entity_key in frontier_set and rel.to_entity_key != rel.from_entity_key:
+                    by_node.setdefault(rel.to_entity_key, []).append(rel)
+
+        return by_node
+
+    @staticmethod
+    def _load_entities(entity_keys: list[str], user: 'User' = None) -> dict[str, Entity]:
+        """
+        Load entities by key in batched IN queries, scope-filtered in SQL.
+
+        Returns a dict of entity_key -> Entity for entities that exist and
+        that the user can access.
+        """
+        from api.services.scope import scope_service
+
+        if not entity_keys:
+            return {}
+
+        access = scope_service.access_clause(user, Entity) if user else None
+
+        found = {}
+        for batch in _key_batches(entity_keys):
+            query = Entity.query.filter(_key_filter(Entity.entity_key, batch))
+            if access is not None:
+                query = query.filter(access)
+            for entity in query.all():
+                found[entity.entity_key] = entity
+        return found
+
+    @staticmethod
+    def _load_relationships(relationship_keys: list[str]) -> list[Relationship]:
+        """Load relationships by key in batched IN queries, preserving input order."""
+        found = {}
+        for batch in _key_batches(relationship_keys):
+            for rel in Relationship.query.filter(_key_filter(Relationship.relationship_key, batch)).all():
+                found[rel.relationship_key] = rel
+        return [found[key] for key in relationship_keys if key in found]
+
+    @staticmethod
+    def _scope_checker(user: 'User' = None) -> Callable[[Optional[tuple]], bool]:
+        """
+        Build a memoized access check for cached (domain_key, scope_type, scope_key) triples.
+
+        A graph has few distinct scopes, so can_access_scope runs once per scope
+        rather than once per entity.
+        """
+        from api.services.scope import scope_service
+
+        decisions: dict[tuple, bool] = {}
+
+        def can_access(scope: Optional[tuple]) -> bool:
+            if scope is None:
+                return False
+            if not user:
+                return True
+            if scope not in decisions:
+                domain_key, scope_type, scope_key = scope
+                decisions[scope] = scope_service.can_access_scope(user, scope_type, scope_key or domain_key)
+            return decisions[scope]
+
+        return can_access
+
+    @staticmethod
+    def _get_neighbors_cached(entity_key: str, max_hops: int, user: 'User' = None) -> dict:
+        """
+        Expand neighbors from the in-memory adjacency index.
+
+        The traversal itself never touches the database; the final entities and
+        relationships are hydrated with one batched query each.
+        """
+        found, start_domain = adjacency_cache.domain_of(entity_key)
+        if not found:
+            return {'entities': [], 'relationships': []}
+
+        can_access = GraphTraversal._scope_checker(user)
+
+        visited_entities = {entity_key}
+        visited_relationships = set()
+        entity_keys = []
+        relationship_keys = []
+
+        frontier = [(entity_key, start_domain)]
+
+        for _ in range(max_hops):
+            next_frontier = []
+            for current_key, domain_key in frontier:
+                for rel_key, from_key, to_key, _type in adjacency_cache.edges(current_key, domain_key):
+                    if rel_key not in visited_relationships:
+                        visited_relationships.add(rel_key)
+                        relationship_keys.append(rel_key)
+
+                    other_key = to_key if from_key == current_key else from_key
+
+                    if other_key not in visited_entities:
+                        visited_entities.add(other_key)
+                        scope = adjacency_cache.node_scope(other_key, domain_key)
+                        if can_access(scope):
+                            entity_keys.append(other_key)
+                            next_frontier.append((other_key, scope[0]))
+            frontier = next_frontier
+
+        # Scope is re-checked against the database in case the cache is stale
+        loaded = GraphTraversal._load_entities(entity_keys, user)
+        entities = [loaded[key] for key in entity_keys if key in loaded]
+        relationships = GraphTraversal._load_relationships(relationship_keys)
+
+        return {
+            'entities': [e.to_dict() for e in entities],
+            'relationships': [r.to_dict() for r in relationships]
+        }
+
     @staticmethod
     def get_neighbors(entity_key: str, max_hops: int = 1, user: 'User' = None) -> dict:
         """
         Get entities within N hops of the given entity.
 
+        Uses the in-memory adjacency index when enabled. Otherwise expands the
+        BFS one whole frontier at a time, so each hop costs one relationship
+        query and one (scope-filtered) entity query rather than a query per
+        visited node and neighbor.
+
         Args:
             entity_key: Starting entity key
             max_hops: Maximum hops to traverse
@@ -35,50 +436,46 @@ class GraphTraversal:
         Returns:
             dict with 'entities' and 'relationships' lists
         """
-        from api.services.scope import scope_service
+        if adjacency_cache.enabled:
+            return GraphTraversal._get_neighbors_cached(entity_key, max_hops, user)
 
         visited_entities = {entity_key}
         visited_relationships = set()
         entities = []
         relationships = []
 
-        # BFS traversal
-        queue = deque([(entity_key, 0)])
+        frontier = [entity_key]
 
-        while queue:
-            current_key, depth = queue.popleft()
+        for _ in range(max_hops):
+            if not frontier:
+                break
 
-            if depth >= max_hops:
-                continue
+            rels_by_node = GraphTraversal._relationships_by_node(frontier)
 
-            # Get relationships from this entity
-            rels = Relationship.query.filter(
-                (Relationship.from_entity_key == current_key) |
-                (Relationship.to_entity_key == current_key)
-            ).all()
+            # Walk the frontier in BFS order so output order matches node-at-a-time traversal
+            discovered = []
+            for current_key in frontier:
+                for rel in rels_by_node.get(current_key, []):
+                    if rel.relationship_key not in visited_relationships:
+                        visited_relationships.add(rel.relationship_key)
+                        relationships.append(rel)
 
-            for rel in rels:
-                if rel.relationship_key not in visited_relationships:
-                    visited_relationships.add(rel.relationship_key)
-                    relationships.append(rel)
+                    # Get the other entity
+                    other_key = rel.to_entity_key if rel.from_entity_key == current_key else rel.from_entity_key
 
-                # Get the other entity
-                other_key = rel.to_entity_key if rel.from_entity_key == current_key else rel.from_entity_key
+                    if other_key not in visited_entities:
+                        visited_entities.add(other_key)
+                        discovered.append(other_key)
 
-                if other_key not in visited_entities:
-                    visited_entities.add(other_key)
-                    entity = Entity.get_by_key(other_key)
-                    if entity:
-                        # Check scope access if user provided
-                        if user:
-                            if not scope_service.can_access_scope(
-                                user,
-                                entity.scope_type,
-                                entity.scope_key or entity.domain_key
-                            ):
-                                continue  # Skip entities user can't access
-                        entities.append(entity)
-                        queue.append((other_key, depth + 1))
+            # Missing and inaccessible entities are dropped and not expanded further
+            accessible = GraphTraversal._load_entities(discovered, user)
+
+            frontier = []
+            for key in discovered:
+                entity = accessible.get(key)
+                if entity:
+                    entities.append(entity)
+                    frontier.append(key)
 
         return {
             'entities': [e.to_dict() for e in entities],
@@ -143,9 +540,11 @@ class GraphTraversal:
 
         if relationships:
             context_lines.append("\n## Relationships\n")
+            # Both endpoints are among the matched entities, no need to reload them
+            entities_by_key = {e.entity_key: e for e in unique_entities}
             for rel in relationships:
-                from_entity = Entity.get_by_key(rel.from_entity_key)
-                to_entity = Entity.get_by_key(rel.to_entity_key)
+                from_entity = entities_by_key.get(rel.from_entity_key)
+                to_entity = entities_by_key.get(rel.to_entity_key)
                 if from_entity and to_entity:
                     context_lines.append(
                         f"- {from_entity.name} --[{rel.relationship_type}]--> {to_entity.name}"
@@ -176,22 +575,14 @@ class GraphTraversal:
         Returns:
             dict with 'entities' and 'relationships'
         """
-        from api.services.scope import scope_service
+        loaded = GraphTraversal._load_entities(list(dict.fromkeys(entity_keys)), user)
 
         entities = []
         accessible_keys = []
 
         for key in entity_keys:
-            entity = Entity.get_by_key(key)
+            entity = loaded.get(key)
             if entity:
-                # Check scope access if user provided
-                if user:
-                    if not scope_service.can_access_scope(
-                        user,
-                        entity.scope_type,
-                        entity.scope_key or entity.domain_key
-                    ):
-                        continue  # Skip entities user can't access
                 entities.append(entity)
                 accessible_keys.append(key)
 
@@ -206,3 +597,75 @@ class GraphTraversal:
             'entities': [e.to_dict() for e in entities],
             'relationships': [r.to_dict() for r in relationships]
         }
+
+    @staticmethod
+    def find_paths(
+        from_key: str,
+        to_key: str,
+        max_depth: int = 4,
+        k: int = 1,
+        relationship_types: Optional[list[str]] = None,
+        directed: bool = False,
+        user: 'User' = None
+    ) -> Optional[dict]:
+        """
+        Find the k shortest paths between two entities.
+
+        Runs a bidirectional BFS over the adjacency cache (or batched frontier
+        queries when the cache is disabled), pruning entities the user cannot
+        access. Further paths are enumerated in order of length.
+
+        Args:
+            from_key: Starting entity key
+            to_key: Target entity key
+            max_depth: Maximum number of hops in a path
+            k: Maximum number of paths to return
+            relationship_types: Only follow these relationship types
+            directed: Only follow relationships from source to target
+            user: Optional user for scope filtering
+
+        Returns:
+            dict with 'paths' and 'entities', or None if either endpoint is
+            missing or not accessible
+        """
+        source = _NeighborSource(user, relationship_types)
+        if not source.seed(from_key) or not source.seed(to_key):
+            return None
+
+        search = _PathSearch(source, max_depth=max_depth, directed=directed)
+        found = search.k_shortest(from_key, to_key, k)
+
+        # Hydrate names for every entity on any path in one query
+        path_keys = list(dict.fromkeys(key for nodes, _ in found for key in nodes))
+        loaded = GraphTraversal._load_entities(path_keys, user)
+
+        paths = []
+        for nodes, edges in found:
+            paths.append({
+                'length': len(edges),
+                'entity_keys': nodes,
+                'relationships': [
+                    {
+                        'relationship_key': rel_key,
+                        'relationship_type': rel_type,
+                        'from_entity_key': from_entity_key,
+                        'to_entity_key': to_entity_key,
+                        'direction': 'outgoing' if from_entity_key == current_key else 'incoming',
+                    }
+                    for current_key, (rel_key, _, rel_type, from_entity_key, to_entity_key) in zip(nodes, edges)
+                ],
+            })
+
+        return {
+            'from_entity_key': from_key,
+            'to_entity_key': to_key,
+            'paths': paths,
+            'entities': {
+                key: {
+                    'entity_key': key,
+                    'name': loaded[key].name,
+                    'entity_type': loaded[key].entity_type,
+                }
+                for key in path_keys if key in loaded
+            },
+        }
@@ -0,0 +1,85 @@
+"""
+Collective Memory Platform - Text Search
+
+Ranked keyword search over a text column plus selected JSON properties.
+
+On PostgreSQL a search document is a weighted tsvector (the text column
+above the properties) and queries are prefix term matches ranked with
+ts_rank. MigrationManager creates a GIN index over the same expression,
+so Postgres keeps it current on every write and matching never scans the
+table. Other databases (SQLite in tests) fall back to a case-insensitive
+LIKE on the text column, ranked exact match, then prefix, then shortest.
+"""
+import re
+
+from sqlalchemy import case, false, func, literal_column
+from sqlalchemy.dialects import postgresql
+
+# Text search configuration: no stemming or stop words, so names match as written
+SEARCH_CONFIG = 'simple'
+
+# Query terms beyond this many are ignored
+MAX_TERMS = 8
+
+
+def dialect_name() -> str:
+    """Name of the database dialect in use ('postgresql', 'sqlite', ...)."""
+    from api.models.base import db
+    return db.engine.dialect.name
+
+
+def terms(text: str) -> list[str]:
+    """Lowercased word terms of a search string."""
+    return re.findall(r'\w+', (text or '').lower())[:MAX_TERMS]
+
+
+def search_document(column, properties_column=None, properties: tuple = ()):
+    """
+    Weighted tsvector for a row: column at weight A, properties at weight B.
+
+    Only uses immutable functions, so it can be indexed. Queries must use
+    the same expression (same properties, same order) to use the index.
+    """
+    config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    document = func.setweight(func.to_tsvector(config, func.coalesce(column, '')), 'A')
+    if properties:
+        text = func.coalesce(properties_column[properties[0]].astext, '')
+        for name in properties[1:]:
+            text = text + ' ' + func.coalesce(properties_column[name].astext, '')
+        document = document.op('||')(func.setweight(func.to_tsvector(config, text), 'B'))
+    return document
+
+
+def prefix_query(text: str):
+    """tsquery matching documents that contain every term as a word prefix, or None without terms."""
+    words = terms(text)
+    if not words:
+        return None
+    return func.to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), ' & '.join(f'{w}:*' for w in words))
+
+
+def index_expression_sql(document) -> str:
+    """SQL text of a search document, for CREATE INDEX."""
+    return str(document.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+def text_match(text: str, column, document):
+    """Filter clause: rows matching text."""
+    if dialect_name() != 'postgresql':
+        return column.ilike(f'%{text}%')
+    query = prefix_query(text)
+    return document.op('@@')(query) if query is not None else false()
+
+
+def text_order(text: str, column, document) -> list:
+    """
+    ORDER BY expressions, best match first: exact match on column, then
+    text search rank (prefix on other databases), then shortest.
+    """
+    exact = case((func.lower(column) == (text or '').lower(), 0), else_=1)
+    query = prefix_query(text) if dialect_name() == 'postgresql' else None
+    if query is None:
+        return [case((func.lower(column) == (text or '').lower(), 0), (column.ilike(f'{text}%'), 1), else_=2),
+                func.length(column)]
+    return [exact, -func.ts_rank(document, query), func.length(column)]
+
@@ -0,0 +1,969 @@
+"""
+Collective Memory Platform - Vector Index
+
+Process-wide, in-memory vector index for semantic search when the pgvector
+extension is not enabled.
+
+Each table with embeddings (entities, documents, document chunks) gets a
+VectorIndex: a float32 matrix of unit-length vectors, so cosine similarity
+is a dot product and a batch of queries is scored with one matrix product
+per block of rows. Filters (entity type, domain, a user's scopes) are boolean row
+masks built once per distinct filter and reused until the index changes.
+An optional IVF mode clusters the rows and only scores the clusters
+closest to each query.
+
+Indexes are built lazily from the stored embeddings. Entity, document and
+chunk writes are applied when their session commits, and a TTL refresh picks up
+writers that bypass the hooks (other workers, bulk scripts) by reloading
+only the rows updated since the previous refresh. With CM_VECTOR_INDEX_DIR
+set, each index is also saved as a .npy snapshot that is memory-mapped on
+startup, so a restart does not re-read every vector from the database.
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from api import config
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 1536
+
+# Key of the (table, key) rows written in a session, applied on commit
+_PENDING = 'vector_index_pending'
+
+# Rows updated this close to a refresh are reloaded by the next one too,
+# in case their transaction committed after the refresh listed them
+_REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+class VectorIndex:
+    """
+    Unit-length float32 vectors for one table, with interned row attributes.
+
+    Rows are appended, or overwritten in place when their key is upserted
+    again. Removed rows are marked dead and dropped by compacted(). Each
+    attribute (e.g. entity_type) is stored as one int32 id per row into a
+    list of distinct values, so a filter mask is an isin() over ids.
+    """
+
+    # Rows scored per matrix product, bounding the temporary score matrix
+    BLOCK_ROWS = 65536
+
+    def __init__(self, attributes: Iterable[str] = (), dimensions: int = DIMENSIONS):
+        self.dimensions = dimensions
+        self.attributes = tuple(attributes)
+        self.refreshed_at = time.monotonic()
+        self.watermark: Optional[datetime] = None  # Rows updated after this are reloaded on refresh
+
+        self.keys: list[Optional[str]] = []  # None for dead rows
+        self.rows: dict[str, int] = {}
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+
+        self.values: dict[str, list] = {name: [] for name in self.attributes}
+        self.value_rows: dict[str, 'np.ndarray'] = {name: np.zeros(0, dtype=np.int32) for name in self.attributes}
+        self._value_ids: dict[str, dict] = {name: {} for name in self.attributes}
+        self._masks: dict = {}
+
+        # IVF: centroids, the cluster of each row, and where each cluster's
+        # rows start (train() lays rows out cluster by cluster; rows added
+        # later are appended after clustered_rows)
+        self.centroids: Optional['np.ndarray'] = None
+        self.clusters = np.zeros(0, dtype=np.int32)
+        self.cluster_offsets: Optional['np.ndarray'] = None
+        self.clustered_rows = 0
+        self.trained_rows = 0
+
+    @property
+    def size(self) -> int:
+        """Rows in use, dead rows included."""
+        return len(self.keys)
+
+    @property
+    def count(self) -> int:
+        """Live rows."""
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.alive.nbytes + self.clusters.nbytes + sum(
+            rows.nbytes for rows in self.value_rows.values()
+        )
+
+    def _grow(self, minimum: int) -> None:
+        """Reallocate row arrays with room for at least minimum rows."""
+        capacity = max(64, minimum, len(self.vectors) * 2)
+
+        def grown(current, shape, dtype):
+            array = np.zeros(shape, dtype=dtype)
+            array[:len(current)] = current
+            return array
+
+        self.vectors = grown(self.vectors, (capacity, self.dimensions), np.float32)
+        self.alive = grown(self.alive, capacity, bool)
+        self.clusters = grown(self.clusters, capacity, np.int32)
+        for name in self.attributes:
+            self.value_rows[name] = grown(self.value_rows[name], capacity, np.int32)
+
+    def _intern(self, name: str, value) -> int:
+        value_id = self._value_ids[name].get(value)
+        if value_id is None:
+            value_id = self._value_ids[name][value] = len(self.values[name])
+            self.values[name].append(value)
+        return value_id
+
+    # ========== Writes ==========
+
+    def upsert(self, key: str, vector, **values) -> bool:
+        """
+        Add or replace a row.
+
+        Args:
+            key: Row key (entity_key, document_key or chunk_key)
+            vector: Embedding; normalized before it is stored
+            values: Value of each attribute for the row
+
+        Returns:
+            False if the vector was malformed or zero, in which case any
+            existing row for the key is removed
+        """
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(vector)) if vector.shape[0] == self.dimensions else 0.0
+        if not norm or not np.isfinite(norm):
+            self.remove(key)
+            return False
+        vector = vector / norm
+
+        row = self.rows.get(key)
+        cluster = int(np.argmax(self.centroids @ vector)) if self.centroids is not None else 0
+        if row is not None and row < self.clustered_rows and cluster != self.clusters[row]:
+            # The row sits in its old cluster's slice; move it to the end
+            self.remove(key)
+            row = None
+        if row is None:
+            row = len(self.keys)
+            if row >= len(self.vectors):
+                self._grow(row + 1)
+            self.keys.append(key)
+            self.rows[key] = row
+
+        self.vectors[row] = vector
+        self.alive[row] = True
+        self.clusters[row] = cluster
+        for name in self.attributes:
+            self.value_rows[name][row] = self._intern(name, values.get(name))
+        self._masks.clear()
+        return True
+
+    def remove(self, key: str) -> bool:
+        """Mark a row dead. Returns True if it was present."""
+        row = self.rows.pop(key, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        self.keys[row] = None
+        self._masks.clear()
+        return True
+
+    def copy(self) -> 'VectorIndex':
+        """Return an independent copy (clusters included) that can change while this one is searched."""
+        size = self.size
+        index = VectorIndex(self.attributes, self.dimensions)
+        index.refreshed_at, index.watermark = self.refreshed_at, self.watermark
+        index.keys, index.rows = list(self.keys), dict(self.rows)
+        index.vectors = self.vectors[:size].copy()
+        index.alive = self.alive[:size].copy()
+        index.clusters = self.clusters[:size].copy()
+        for name in self.attributes:
+            index.values[name] = list(self.values[name])
+            index.value_rows[name] = self.value_rows[name][:size].copy()
+            index._value_ids[name] = dict(self._value_ids[name])
+        # Replaced, never modified, by train()
+        index.centroids, index.cluster_offsets = self.centroids, self.cluster_offsets
+        index.clustered_rows, index.trained_rows = self.clustered_rows, self.trained_rows
+        return index
+
+    def compacted(self) -> 'VectorIndex':
+        """Return an unclustered copy holding only the live rows."""
+        live = np.flatnonzero(self.alive[:self.size])
+        index = VectorIndex(self.attributes, self.dimensions)
+        index.refreshed_at, index.watermark = self.refreshed_at, self.watermark
+        index._fill(
+            [self.keys[row] for row in live],
+            self.vectors[live],
+            {name: (self.values[name], self.value_rows[name][live]) for name in self.attributes},
+        )
+        return index
+
+    def _fill(self, keys: list[str], vectors, values: dict) -> None:
+        """Set all rows at once from normalized vectors and (values, value ids) per attribute."""
+        self.keys = list(keys)
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.vectors = vectors
+        self.alive = np.ones(len(keys), dtype=bool)
+        self.clusters = np.zeros(len(keys), dtype=np.int32)
+        self.centroids, self.cluster_offsets, self.clustered_rows = None, None, 0
+        self._masks.clear()
+        for name in self.attributes:
+            distinct, ids = values[name]
+            self.values[name] = list(distinct)
+            self._value_ids[name] = {value: value_id for value_id, value in enumerate(self.values[name])}
+            self.value_rows[name] = np.asarray(ids, dtype=np.int32)
+
+    # ========== Filters ==========
+
+    def mask(self, name: str, predicate: Callable, cache_key=None) -> 'np.ndarray':
+        """
+        Boolean mask of rows whose value of attribute name satisfies predicate.
+
+        The predicate runs once per distinct value, not per row. With a
+        cache_key the mask is kept until the index next changes.
+        """
+        cached = self._masks.get((name, cache_key)) if cache_key is not None else None
+        if cached is not None:
+            return cached
+
+        ids = [value_id for value_id, value in enumerate(self.values[name]) if predicate(value)]
+        mask = np.isin(self.value_rows[name][:self.size], np.asarray(ids, dtype=np.int32))
+        if cache_key is not None:
+            self._masks[(name, cache_key)] = mask
+        return mask
+
+    # ========== Search ==========
+
+    @staticmethod
+    def _top_k(scores, rows, k: int):
+        """Keep the k highest scores per query row (unordered)."""
+        if scores.shape[1] > k:
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, best, axis=1)
+            rows = np.take_along_axis(rows, best, axis=1)
+        return scores, rows
+
+    def search(
+        self,
+        queries,
+        k: int = 10,
+        mask=None,
+        threshold: float = None,
+        nprobe: int = None
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Find the k most similar rows for each query.
+
+        Args:
+            queries: One query vector or a sequence of them
+            k: Results per query
+            mask: Optional boolean row mask (from mask()) of allowed rows
+            threshold: Optional minimum cosine similarity
+            nprobe: With a trained index, scan only this many clusters per query
+
+        Returns:
+            For each query, (key, cosine similarity) pairs, most similar first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        # Masks are built for the size at the time; rows appended since are left out
+        size = len(mask) if mask is not None else self.size
+        valid = self.alive[:size] if mask is None else self.alive[:size] & mask
+        if k <= 0 or not valid.any():
+            return [[] for _ in queries]
+
+        if self.centroids is not None and nprobe:
+            top = [self._search_clusters(query, k, valid, nprobe) for query in queries]
+        else:
+            top = [self._search_exact(queries, k, valid)]
+            top = [(top[0][0][i], top[0][1][i]) for i in range(len(queries))]
+
+        results = []
+        for scores, rows in top:
+            order = np.argsort(-scores, kind='stable')
+            hits = []
+            for i in order:
+                score = float(scores[i])
+                if threshold is not None and score < threshold:
+                    break
+                key = self.keys[rows[i]]
+                if key is not None:  # Removed while the search ran
+                    hits.append((key, score))
+            results.append(hits)
+        return results
+
+    def _search_exact(self, queries, k: int, valid):
+        """Score every allowed row, one block of rows per matrix product."""
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, len(valid), self.BLOCK_ROWS):
+            block = valid[start:start + self.BLOCK_ROWS]
+            if block.all():
+                rows = np.arange(start, start + len(block))
+                scores = queries @ self.vectors[start:start + len(block)].T
+            else:
+                rows = np.flatnonzero(block) + start
+                if not len(rows):
+                    continue
+                scores = queries @ self.vectors[rows].T
+
+            scores, rows = self._top_k(scores, np.broadcast_to(rows, scores.shape), k)
+            best_scores, best_rows = self._top_k(
+                np.concatenate([best_scores, scores], axis=1),
+                np.concatenate([best_rows, rows], axis=1),
+                k
+            )
+        return best_scores, best_rows
+
+    def _search_clusters(self, query, k: int, valid, nprobe: int):
+        """Score only the allowed rows in the nprobe clusters closest to the query."""
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        parts = []
+        for cluster in probe:
+            start, end = self.cluster_offsets[cluster], self.cluster_offsets[cluster + 1]
+            keep = np.flatnonzero(valid[start:end])
+            if len(keep):
+                parts.append(((self.vectors[start:end] @ query)[keep], keep + start))
+
+        # Rows added since training are not in the cluster slices
+        tail = self.clustered_rows + np.flatnonzero(
+            valid[self.clustered_rows:] & np.isin(self.clusters[self.clustered_rows:len(valid)], probe)
+        )
+        if len(tail):
+            parts.append((self.vectors[tail] @ query, tail))
+
+        if not parts:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        scores = np.concatenate([part[0] for part in parts])
+        rows = np.concatenate([part[1] for part in parts])
+        scores, rows = self._top_k(scores[None, :], rows[None, :], k)
+        return scores[0], rows[0]
+
+    # ========== Approximate mode ==========
+
+    @classmethod
+    def _nearest(cls, vectors, centroids):
+        """Index of the closest centroid for each vector."""
+        nearest = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), cls.BLOCK_ROWS):
+            nearest[start:start + cls.BLOCK_ROWS] = np.argmax(
+                vectors[start:start + cls.BLOCK_ROWS] @ centroids.T, axis=1
+            )
+        return nearest
+
+    def train(self, clusters: int, iterations: int = 8, seed: int = 0) -> bool:
+        """
+        Cluster the live rows (spherical k-means) for approximate search.
+
+        Trains on a sample of at most 64 rows per cluster, then lays every
+        live row out cluster by cluster (dropping dead rows), so scanning a
+        cluster is one contiguous slice. Rows upserted later are appended
+        and tagged with their nearest cluster.
+
+        Row numbers change, so train an index no search is using (e.g. a
+        compacted() copy). Returns False if there are too few rows, leaving
+        the index exact.
+        """
+        live = np.flatnonzero(self.alive[:self.size])
+        if clusters < 2 or len(live) < clusters * 4:
+            return False
+
+        rng = np.random.default_rng(seed)
+        sample = live if len(live) <= clusters * 64 else rng.choice(live, clusters * 64, replace=False)
+        data = self.vectors[sample]
+        centroids = data[rng.choice(len(data), clusters, replace=False)].copy()
+
+        for _ in range(iterations):
+            assigned = self._nearest(data, centroids)
+            order = np.argsort(assigned, kind='stable')
+            counts = np.bincount(assigned, minlength=clusters)
+            filled = counts > 0
+            sums = np.zeros_like(centroids)
+            sums[filled] = np.add.reduceat(data[order], (np.cumsum(counts) - counts)[filled], axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.where(norms == 0, 1, norms), centroids)
+        centroids = centroids.astype(np.float32)
+
+        assigned = self._nearest(self.vectors[live], centroids)
+        order = np.argsort(assigned, kind='stable')
+        rows = live[order]
+        self._fill(
+            [self.keys[row] for row in rows],
+            self.vectors[rows],
+            {name: (self.values[name], self.value_rows[name][rows]) for name in self.attributes},
+        )
+        self.centroids = centroids
+        self.clusters = assigned[order].astype(np.int32)
+        self.cluster_offsets = np.concatenate([[0], np.cumsum(np.bincount(assigned, minlength=clusters))])
+        self.clustered_rows = self.trained_rows = len(rows)
+        return True
+
+    # ========== Persistence ==========
+
+    def save(self, prefix: str) -> None:
+        """
+        Write the live rows to <prefix>.npy and <prefix>.json.
+
+        The vectors are a plain .npy array so load() can memory-map them.
+        Both files are written to temporary names and renamed, JSON last.
+        """
+        live = np.flatnonzero(self.alive[:self.size])
+        np.save(f'{prefix}.tmp.npy', self.vectors[live])
+        os.replace(f'{prefix}.tmp.npy', f'{prefix}.npy')
+
+        meta = {
+            'dimensions': self.dimensions,
+            'attributes': list(self.attributes),
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'keys': [self.keys[row] for row in live],
+            'values': {name: self.values[name] for name in self.attributes},
+            'value_rows': {name: self.value_rows[name][live].tolist() for name in self.attributes},
+        }
+        with open(f'{prefix}.tmp.json', 'w') as f:
+            json.dump(meta, f)
+        os.replace(f'{prefix}.tmp.json', f'{prefix}.json')
+
+    @classmethod
+    def load(cls, prefix: str) -> Optional['VectorIndex']:
+        """
+        Open a snapshot written by save(), memory-mapping the vectors.
+
+        The mapping is copy-on-write: rows changed in memory never touch
+        the file. Returns None if the snapshot is missing or inconsistent.
+        """
+        try:
+            with open(f'{prefix}.json') as f:
+                meta = json.load(f)
+            vectors = np.load(f'{prefix}.npy', mmap_mode='c')
+        except (OSError, ValueError) as e:
+            logger.debug(f"No usable vector index snapshot at {prefix}: {e}")
+            return None
+
+        if vectors.shape != (len(meta['keys']), meta['dimensions']):
+            logger.warning(f"Ignoring vector index snapshot at {prefix}: shape {vectors.shape} does not match its keys")
+            return None
+
+        index = cls(meta['attributes'], meta['dimensions'])
+        index.watermark = datetime.fromisoformat(meta['watermark']) if meta['watermark'] else None
+        index._fill(meta['keys'], vectors, {
+            # JSON turns tuple values (scopes) into lists
+            name: ([tuple(v) if isinstance(v, list) else v for v in meta['values'][name]], meta['value_rows'][name])
+            for name in index.attributes
+        })
+        return index
+
+
+class VectorIndexCache:
+    """
+    In-process vector indexes for the entities, documents and document_chunks tables.
+
+    Provides:
+    - Selection between the pgvector and in-process backends
+    - Lazy index builds from the stored embeddings
+    - Incremental updates from committed entity, document and chunk writes
+    - TTL refreshes that only reload rows changed since the last one
+    - Scope and attribute filters as cached row masks
+    - Optional memory-mapped snapshots that survive restarts
+    """
+
+    BACKENDS = ('auto', 'pgvector', 'memory', 'none')
+
+    # Row attributes that search filters can use, per table
+    ATTRIBUTES = {
+        'entities': ('entity_type', 'domain_key', 'scope'),
+        'documents': ('content_type',),
+        'document_chunks': ('document_key',),
+    }
+
+    def __init__(
+        self,
+        backend: str = 'auto',
+        mode: str = 'exact',
+        nprobe: int = 8,
+        ttl_seconds: int = 300,
+        directory: Optional[str] = None,
+        ivf_min_rows: int = 20000,
+        compact_threshold: int = 1024
+    ):
+        """
+        Initialize vector index cache.
+
+        Args:
+            backend: 'auto' (pgvector when enabled, else in-process),
+                'pgvector', 'memory' or 'none'
+            mode: 'exact' or 'ivf' (approximate, scanning nprobe clusters)
+            nprobe: Clusters scanned per query in ivf mode
+            ttl_seconds: Refresh an index from the database after this many seconds
+            directory: Where to keep memory-mapped snapshots (None disables them)
+            ivf_min_rows: Indexes smaller than this stay exact in ivf mode
+            compact_threshold: Minimum dead rows before an index is compacted
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown vector backend: {backend}")
+        self.setting = backend
+        self.mode = mode
+        self.nprobe = nprobe
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory
+        self.ivf_min_rows = ivf_min_rows
+        self.compact_threshold = compact_threshold
+
+        self._indexes: dict[str, VectorIndex] = {}
+        self._dirty: dict[str, set[str]] = {}
+        self._lock = threading.RLock()
+        # Per table: one build, refresh or write-back at a time, and a short
+        # lock for in-place row changes against mask computation
+        self._build_locks: dict[str, threading.Lock] = {}
+        self._row_locks: dict[str, threading.Lock] = {}
+        self._building: set[str] = set()
+        # Bumped by invalidate() and clear(), so a build that was already
+        # running does not put back an index that was dropped meanwhile
+        self._generation = 0
+        self._stats = {'searches': 0, 'builds': 0, 'refreshes': 0, 'rows_loaded': 0, 'snapshots_loaded': 0}
+
+    @property
+    def backend(self) -> Optional[str]:
+        """The backend semantic search uses: 'pgvector', 'memory' or None (unavailable)."""
+        from api.models.entity import PGVECTOR_ENABLED
+
+        if self.setting == 'auto':
+            if PGVECTOR_ENABLED:
+                return 'pgvector'
+            return 'memory' if NUMPY_AVAILABLE else None
+        if self.setting == 'pgvector':
+            return 'pgvector' if PGVECTOR_ENABLED else None
+        if self.setting == 'memory':
+            return 'memory' if NUMPY_AVAILABLE else None
+        return None
+
+    # ========== Loading ==========
+
+    @staticmethod
+    def _model(table: str):
+        from api.models import Entity, Document, DocumentChunk
+        return {'entities': Entity, 'documents': Document, 'document_chunks': DocumentChunk}[table]
+
+    @staticmethod
+    def _columns(model_cls) -> list:
+        """Columns the table's attributes are computed from."""
+        if model_cls.__tablename__ == 'entities':
+            return [model_cls.entity_type, model_cls.domain_key, model_cls.scope_type, model_cls.scope_key]
+        if model_cls.__tablename__ == 'document_chunks':
+            return [model_cls.document_key]
+        return [model_cls.content_type]
+
+    @staticmethod
+    def _values(table: str, columns: tuple) -> dict:
+        """Attribute values of a row from its _columns()."""
+        if table == 'entities':
+            entity_type, domain_key, scope_type, scope_key = columns
+            return {'entity_type': entity_type, 'domain_key': domain_key,
+                    'scope': (domain_key, scope_type, scope_key)}
+        if table == 'document_chunks':
+            return {'document_key': columns[0]}
+        return {'content_type': columns[0]}
+
+    @staticmethod
+    def _vector(value):
+        """Stored embeddings are JSON text without pgvector, arrays or lists with it."""
+        return json.loads(value) if isinstance(value, str) else value
+
+    def _load_rows(self, table: str, index: VectorIndex, keys: Optional[list[str]] = None, lock=None) -> int:
+        """
+        Upsert rows from the database: all embedded rows, or the given keys.
+
+        Keys that no longer exist or have no embedding are removed. With a
+        lock, the given keys are read first and applied while holding it.
+        Returns number of rows loaded.
+        """
+        from api.models import db
+
+        model_cls = self._model(table)
+        pk = model_cls.__table__.primary_key.columns.values()[0]
+        query = db.session.query(pk, model_cls.embedding, *self._columns(model_cls)).filter(
+            model_cls.embedding.isnot(None)
+        )
+
+        if keys is None:
+            batches = [query.yield_per(2000)]
+        else:
+            batches = [query.filter(pk.in_(keys[i:i + 1000])).all() for i in range(0, len(keys), 1000)]
+
+        loaded = 0
+        seen = set()
+        with lock or contextlib.nullcontext():
+            for batch in batches:
+                for key, embedding, *columns in batch:
+                    if index.upsert(key, self._vector(embedding), **self._values(table, columns)):
+                        seen.add(key)
+                        loaded += 1
+            for key in keys or ():
+                if key not in seen:
+                    index.remove(key)
+
+        self._stats['rows_loaded'] += loaded
+        return loaded
+
+    def _refresh(self, table: str, index: VectorIndex) -> int:
+        """
+        Bring an index up to date with the database.
+
+        Lists embedded keys with their updated_at (no vectors), drops rows
+        that are gone and reloads rows that are new or updated since the
+        index's watermark. Returns number of rows loaded or removed.
+        """
+        from api.models import db
+        from api.models.base import get_now
+
+        model_cls = self._model(table)
+        pk = model_cls.__table__.primary_key.columns.values()[0]
+        listed_at = get_now()
+
+        if not index.rows and index.watermark is None:
+            changed = self._load_rows(table, index)
+        else:
+            listed = dict(db.session.query(pk, model_cls.updated_at).filter(model_cls.embedding.isnot(None)).all())
+            removed = [key for key in index.rows if key not in listed]
+            for key in removed:
+                index.remove(key)
+            reload = [
+                key for key, updated_at in listed.items()
+                if key not in index.rows or (updated_at is not None and (
+                    index.watermark is None or updated_at > index.watermark))
+            ]
+            changed = len(removed) + (self._load_rows(table, index, reload) if reload else 0)
+
+        index.watermark = listed_at - _REFRESH_OVERLAP
+        index.refreshed_at = time.monotonic()
+        return changed
+
+    def _maintain(self, table: str, index: VectorIndex) -> VectorIndex:
+        """
+        Compact and (in ivf mode) re-cluster an index once enough has changed.
+
+        Both produce a new index, so searches still using the old one are
+        not affected.
+        """
+        clusters = len(index.centroids) if index.centroids is not None else 0
+        retrain = self.mode == 'ivf' and index.count >= self.ivf_min_rows and (
+            not clusters or index.count >= index.trained_rows * 2)
+        if retrain:
+            clusters = int(np.sqrt(index.count))
+
+        if retrain or index.size - index.count > max(self.compact_threshold, index.size // 4):
+            index = index.compacted()
+            if clusters:
+                index.train(clusters)
+        return index
+
+    def _snapshot_prefix(self, table: str) -> Optional[str]:
+        return os.path.join(self.directory, f'vectors-{table}') if self.directory else None
+
+    def _build(self, table: str) -> VectorIndex:
+        """Open the table's snapshot, if any, and refresh it; or load every row."""
+        started = time.monotonic()
+        prefix = self._snapshot_prefix(table)
+        index = VectorIndex.load(prefix) if prefix else None
+        if index is not None and index.attributes == self.ATTRIBUTES[table]:
+            self._stats['snapshots_loaded'] += 1
+        else:
+            index = VectorIndex(self.ATTRIBUTES[table])
+
+        changed = self._refresh(table, index)
+        index = self._maintain(table, index)
+        if prefix and changed:
+            self._save(prefix, index)
+
+        logger.info(
+            f"Built vector index for {table}: {index.count} rows ({changed} loaded from the database), "
+            f"{index.nbytes // 1024} KB in {(time.monotonic() - started) * 1000:.0f} ms"
+        )
+        return index
+
+    @staticmethod
+    def _save(prefix: str, index: VectorIndex) -> None:
+        try:
+            os.makedirs(os.path.dirname(prefix), exist_ok=True)
+            index.save(prefix)
+        except OSError as e:
+            logger.warning(f"Could not save vector index snapshot {prefix}: {e}")
+
+    def _table_lock(self, locks: dict, table: str) -> threading.Lock:
+        with self._lock:
+            return locks.setdefault(table, threading.Lock())
+
+    def get_index(self, table: str) -> VectorIndex:
+        """
+        Get the index for a table.
+
+        Builds it on first use, refreshes it after the TTL and applies
+        committed writes since the last call. Each table has its own build
+        lock, so a build or refresh of one table never blocks another.
+        Refreshes run on a copy, like compaction, so searches keep using
+        the current index (without waiting) until the refreshed one
+        replaces it.
+        """
+        with self._lock:
+            index = self._indexes.get(table)
+            dirty = bool(self._dirty.get(table))
+            if index is not None and not dirty and time.monotonic() - index.refreshed_at < self.ttl_seconds:
+                return index
+
+        # A first build and committed writes wait for the table's lock; a
+        # refresh already running elsewhere leaves callers the current index
+        build_lock = self._table_lock(self._build_locks, table)
+        if index is None or dirty:
+            build_lock.acquire()
+        elif not build_lock.acquire(blocking=False):
+            return index
+
+        try:
+            with self._lock:
+                index = self._indexes.get(table)
+                dirty = self._dirty.get(table, set())
+                # Writes committed from here on are applied next time
+                self._dirty[table] = set()
+                generation = self._generation
+
+            if index is None:
+                index = self._build(table)
+                self._stats['builds'] += 1
+            elif time.monotonic() - index.refreshed_at >= self.ttl_seconds:
+                index = index.copy()
+                changed = self._refresh(table, index)
+                if dirty:
+                    self._load_rows(table, index, sorted(dirty))
+                index = self._maintain(table, index)
+                self._stats['refreshes'] += 1
+                prefix = self._snapshot_prefix(table)
+                if prefix and changed:
+                    self._save(prefix, index)
+            elif dirty:
+                self._load_rows(table, index, sorted(dirty), lock=self._table_lock(self._row_locks, table))
+                index = self._maintain(table, index)
+
+            with self._lock:
+                if generation == self._generation:
+                    self._indexes[table] = index
+            return index
+        finally:
+            build_lock.release()
+
+    def ready(self, table: str) -> bool:
+        """
+        Whether a search of table can run without waiting for a first build.
+
+        Always true for pgvector. Otherwise, if the index is not built yet,
+        starts building it in a background thread and returns False, so
+        latency-sensitive callers can skip semantic search until it is ready.
+        """
+        if self.backend != 'memory':
+            return self.backend is not None
+        with self._lock:
+            if table in self._indexes:
+                return True
+            if table in self._building:
+                return False
+            self._building.add(table)
+
+        from flask import current_app
+        app = current_app._get_current_object()
+
+        def build():
+            try:
+                with app.app_context():
+                    self.get_index(table)
+            except Exception as e:
+                logger.warning(f"Background vector index build for {table} failed: {e}")
+            finally:
+                with self._lock:
+                    self._building.discard(table)
+
+        threading.Thread(target=build, name=f'vector-index-{table}', daemon=True).start()
+        return False
+
+    # ========== Write tracking ==========
+
+    def record_write(self, session, table: str, key: str) -> None:
+        """Note a written row; it is reloaded once the session commits."""
+        if session is not None:
+            session.info.setdefault(_PENDING, set()).add((table, key))
+
+    def mark_dirty(self, rows: Iterable[tuple[str, str]]) -> None:
+        """Queue committed (table, key) writes for loaded indexes."""
+        with self._lock:
+            for table, key in rows:
+                if table in self._dirty:
+                    self._dirty[table].add(key)
+
+    # ========== Search ==========
+
+    def search(
+        self,
+        table: str,
+        query_embeddings: list,
+        limit: int = 10,
+        threshold: float = None,
+        where: Optional[dict] = None,
+        user=None
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Nearest rows of a table for one or more query embeddings.
+
+        Args:
+            table: 'entities', 'documents' or 'document_chunks'
+            query_embeddings: List of query vectors, searched together
+            limit: Results per query
+            threshold: Optional minimum cosine similarity
+            where: Attribute equality filters, e.g. {'entity_type': 'Person'};
+                None values are ignored
+            user: Optional user; only rows in scopes the user can see
+                (as ScopeService.filter_query_by_scope) are returned
+
+        Returns:
+            For each query, (key, cosine similarity) pairs, most similar first
+        """
+        index = self.get_index(table)
+
+        # Rows of a published index only change under its row lock, so masks agree with each other
+        with self._table_lock(self._row_locks, table):
+            masks = [
+                index.mask(name, lambda v, value=value: v == value, cache_key=('eq', value))
+                for name, value in (where or {}).items() if value is not None
+            ]
+            if user is not None:
+                from api.services.scope import scope_service
+                context = scope_service.get_access_context(user)
+                if not context.is_admin:
+                    masks.append(index.mask(
+                        'scope', lambda scope: context.sees(*scope),
+                        cache_key=('user', context.user_key, context.version)
+                    ))
+            mask = masks[0] if masks else None
+            for other in masks[1:]:
+                mask = mask & other
+        self._stats['searches'] += 1
+
+        return index.search(
+            query_embeddings, limit, mask=mask, threshold=threshold,
+            nprobe=self.nprobe if self.mode == 'ivf' else None
+        )
+
+    def search_models(
+        self,
+        query,
+        query_embedding: list,
+        limit: int = 10,
+        threshold: float = None,
+        where: Optional[dict] = None,
+        user=None
+    ) -> list:
+        """
+        Run a model query over the rows nearest to query_embedding.
+
+        The query carries the same filters as the pgvector search, which
+        guards against rows whose scope changed since the index last saw
+        them. Results keep the index's order (most similar first).
+
+        Args:
+            query: Filtered model query (e.g. Entity.query.filter(...))
+            query_embedding: Query vector
+            limit, threshold, where, user: As for search()
+        """
+        model_cls = query.column_descriptions[0]['entity']
+        pk = model_cls.__table__.primary_key.columns.values()[0]
+
+        hits = self.search(model_cls.__tablename__, [query_embedding], limit, threshold, where, user)[0]
+        if not hits:
+            return []
+        rows = {getattr(row, pk.name): row for row in query.filter(pk.in_([key for key, _ in hits])).all()}
+        return [rows[key] for key, _ in hits if key in rows]
+
+    # ========== Management ==========
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """Drop one table's index, or every index."""
+        with self._lock:
+            self._generation += 1
+            for name in ([table] if table else list(self._indexes)):
+                self._indexes.pop(name, None)
+                self._dirty.pop(name, None)
+
+    def clear(self) -> int:
+        """Drop all indexes. Returns number of indexes cleared."""
+        with self._lock:
+            self._generation += 1
+            count = len(self._indexes)
+            self._indexes.clear()
+            self._dirty.clear()
+            return count
+
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        with self._lock:
+            tables = [
+                {
+                    'table': table,
+                    'rows': index.count,
+                    'dead_rows': index.size - index.count,
+                    'clusters': len(index.centroids) if index.centroids is not None else 0,
+                    'bytes': index.nbytes,
+                    'pending': len(self._dirty.get(table, ())),
+                    'age_seconds': round(time.monotonic() - index.refreshed_at, 1),
+                }
+                for table, index in self._indexes.items()
+            ]
+            return {
+                'backend': self.backend,
+                'mode': self.mode,
+                'nprobe': self.nprobe,
+                'ttl_seconds': self.ttl_seconds,
+                'directory': self.directory,
+                'tables': tables,
+                **self._stats,
+            }
+
+
+# Global cache instance
+vector_index_cache = VectorIndexCache(
+    backend=config.CM_VECTOR_BACKEND,
+    mode=config.CM_VECTOR_INDEX_MODE,
+    nprobe=config.CM_VECTOR_INDEX_NPROBE,
+    ttl_seconds=config.CM_VECTOR_INDEX_TTL,
+    directory=config.CM_VECTOR_INDEX_DIR or None,
+)
+
+
+# ========== Session hooks ==========
+
+@event.listens_for(Session, 'after_commit')
+def _apply_pending(session):
+    """Hand rows written in the committed transaction to loaded indexes."""
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        vector_index_cache.mark_dirty(pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    """Rolled-back writes never reached the database."""
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,246 @@
+"""
+Collective Memory MCP Server - API Client
+
+Pooled HTTP client for requests to the Collective Memory API.
+
+One long-lived httpx.AsyncClient is shared by every tool call in the
+process (or, in SSE mode, by every call on one connection), so calls reuse
+keep-alive connections instead of paying a TCP and TLS handshake each.
+HTTP/2 is used when the optional h2 package is installed.
+"""
+
+import asyncio
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 support in httpx
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+
+# Upper bounds (ms) of the latency histogram buckets; slower requests land in +inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Path segments that are keys or ids rather than route names: anything with a
+# digit, readable keys (swift-bold-keen-lion) and other long identifiers
+_DYNAMIC_SEGMENT = re.compile(r'\d|^(?:[^-]+-){3}|^.{33,}$')
+
+
+def endpoint_label(method: str, endpoint: str) -> str:
+    """Group a request by endpoint, e.g. 'POST /agents/{key}/heartbeat'."""
+    path = endpoint.split('?', 1)[0].strip('/')
+    segments = ['{key}' if _DYNAMIC_SEGMENT.search(segment) else segment for segment in path.split('/')]
+    return f"{method.upper()} /{'/'.join(segments)}"
+
+
+class LatencyHistogram:
+    """Request latencies for one endpoint, bucketed by LATENCY_BUCKETS_MS."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float, error: bool = False) -> None:
+        """Record one request."""
+        index = 0
+        while index < len(LATENCY_BUCKETS_MS) and elapsed_ms > LATENCY_BUCKETS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the given fraction of requests."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return float(LATENCY_BUCKETS_MS[index]) if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary."""
+        bounds = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + ["+inf"]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': round(self.total_ms / self.count, 2) if self.count else None,
+            'max_ms': round(self.max_ms, 2),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'buckets': dict(zip(bounds, self.buckets)),
+        }
+
+
+# Process-wide latency histograms, shared by all clients
+_latency: dict[str, LatencyHistogram] = {}
+
+
+def get_latency_stats() -> dict:
+    """Get latency histograms for every endpoint called so far."""
+    return {label: histogram.to_dict() for label, histogram in sorted(_latency.items())}
+
+
+class APIClient:
+    """
+    Long-lived, pooled client for the Collective Memory API.
+
+    The underlying httpx.AsyncClient is created on first use in the running
+    event loop and kept until aclose(). At most max_connections connections
+    are pooled, and a semaphore keeps at most max_concurrency requests in
+    flight, so a burst of tool calls queues here rather than opening a
+    connection each. Every request's latency is recorded per endpoint.
+    """
+
+    def __init__(
+        self,
+        config: Any,
+        max_connections: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Initialize API client.
+
+        Args:
+            config: Configuration object with api_endpoint and timeout
+            max_connections: Connections kept in the pool (default: config.max_connections)
+            max_concurrency: Requests in flight at once (default: config.max_concurrency)
+            http2: Use HTTP/2 if h2 is installed (default: config.http2)
+            transport: Custom httpx transport (tests)
+        """
+        self.config = config
+        self.max_connections = max_connections or config.max_connections
+        self.max_concurrency = max_concurrency or config.max_concurrency
+        self.http2 = (config.http2 if http2 is None else http2) and H2_AVAILABLE
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.requests = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the underlying connection pool is open."""
+        return self._client is not None and not self._client.is_closed
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if not self.is_open:
+            self._client = httpx.AsyncClient(
+                timeout=self.config.timeout,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self._transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        json: dict = None,
+        params: dict = None,
+        headers: dict = None,
+    ) -> httpx.Response:
+        """
+        Send a request to the API and return the response.
+
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE)
+            endpoint: API endpoint path (e.g., "/entities")
+            json: JSON body data for POST/PUT requests
+            params: Query parameters
+            headers: Extra headers (e.g. Authorization)
+        """
+        client = self._get_client()
+        label = endpoint_label(method, endpoint)
+
+        async with self._semaphore:
+            self.in_flight += 1
+            self.requests += 1
+            start = time.perf_counter()
+            error = True
+            try:
+                response = await client.request(
+                    method=method,
+                    url=f"{self.config.api_endpoint}{endpoint}",
+                    json=json,
+                    params=params,
+                    headers=headers,
+                )
+                error = response.status_code >= 500
+                return response
+            finally:
+                self.in_flight -= 1
+                _latency.setdefault(label, LatencyHistogram()).observe(
+                    (time.perf_counter() - start) * 1000, error=error
+                )
+
+    async def aclose(self) -> None:
+        """Close pooled connections. The client reopens on next use."""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+
+    def get_stats(self) -> dict:
+        """Get pool statistics."""
+        return {
+            'open': self.is_open,
+            'http2': self.http2,
+            'max_connections': self.max_connections,
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+        }
+
+
+# Client for the current SSE connection, if any (see use_connection_client)
+_connection_client: ContextVar[Optional[APIClient]] = ContextVar('connection_client', default=None)
+
+# Process-wide client, used in stdio mode and outside SSE connections
+_default_client: Optional[APIClient] = None
+
+
+def use_connection_client(client: APIClient) -> None:
+    """Route API requests made in the current async context (SSE connection) through client."""
+    _connection_client.set(client)
+
+
+def get_api_client() -> APIClient:
+    """Get the API client for the current connection, or the process-wide one."""
+    global _default_client
+
+    client = _connection_client.get()
+    if client is not None:
+        return client
+    if _default_client is None:
+        from .config import config
+        _default_client = APIClient(config)
+    return _default_client
+
+
+async def close_api_client() -> None:
+    """Close the process-wide client (on server shutdown)."""
+    if _default_client is not None:
+        await _default_client.aclose()
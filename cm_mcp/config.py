@@ -64,8 +64,17 @@ class MCPConfig:
 
     # Server settings
     timeout: int = int(os.getenv("CM_MCP_TIMEOUT", "30"))
+
+    # API connection pool (one pooled client per process, or per SSE connection)
+    http2: bool = os.getenv("CM_MCP_HTTP2", "true").lower() == "true"  # Needs the h2 package
+    max_connections: int = int(os.getenv("CM_MCP_MAX_CONNECTIONS", "10"))
+    max_concurrency: int = int(os.getenv("CM_MCP_MAX_CONCURRENCY", "8"))  # Requests in flight at once
     debug: bool = os.getenv("CM_MCP_DEBUG", "false").lower() == "true"
 
+    # SSE connections
+    max_sessions: int = int(os.getenv("CM_MCP_MAX_SESSIONS", "500"))  # Concurrent connections (0 = unlimited)
+    session_idle_seconds: int = int(os.getenv("CM_MCP_SESSION_IDLE_SECONDS", "3600"))  # Evict idle connections (0 = never)
+
     @property
     def api_endpoint(self) -> str:
         """Get full API endpoint URL"""
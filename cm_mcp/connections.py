@@ -0,0 +1,253 @@
+"""
+Collective Memory MCP Server - Sessions
+
+Per-connection state for the MCP server.
+
+In stdio mode the process serves one client, and uses one process-wide
+session. In SSE mode every connection gets its own MCPSession, holding its
+identity, counters, PAT, pooled API client and background housekeeping, so
+connections never see each other's state. A SessionRegistry tracks the
+open connections, sends heartbeats for quiet ones and evicts idle ones.
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional
+
+from .api_client import APIClient, use_connection_client
+from .tools.utils import set_session_pat
+
+
+def new_session_state() -> dict:
+    """Initial state of a session, before the agent has identified."""
+    return {
+        "agent_id": None,
+        "agent_key": None,
+        "client": None,         # Client type: claude-code, claude-desktop, etc.
+        "model_key": None,      # Model key from DB
+        "model_id": None,       # Model API identifier (e.g., claude-opus-4-5-20251101)
+        "model_name": None,     # Model display name
+        "persona": None,        # Persona role: backend-code, frontend-code, architect
+        "persona_key": None,    # Resolved persona key from API
+        "persona_name": None,   # Display name
+        "focus": None,          # Current work focus
+        "affinity_warning": None,  # Warning if persona doesn't match client
+        "registered": False,
+        # Repository context (from git remote detection)
+        "repository_key": None,     # Repository key (from /repositories/lookup)
+        "repository_url": None,     # Normalized repository URL
+        # Current milestone tracking (from heartbeat response)
+        "current_milestone": None,  # {key, name, status, started_at}
+        # Tool call counting for milestone metrics
+        "tool_call_count": 0,               # Total tool calls this session
+        "milestone_start_tool_count": 0,    # Tool count when milestone started
+        # Work session activity tracking
+        "active_session_key": None,         # Current active work session key
+        "last_session_activity_update": None,  # Timestamp of last activity update
+    }
+
+
+class MCPSession:
+    """
+    State for one MCP client.
+
+    state is the dict tool handlers receive as session_state. Requests made
+    while the session is active (see activate) use its PAT and its pooled
+    API client; client=None uses the process-wide client.
+    """
+
+    def __init__(self, pat: Optional[str] = None, client: Optional[APIClient] = None):
+        self.session_id = uuid.uuid4().hex
+        self.pat = pat
+        self.client = client
+        self.state = new_session_state()
+        self.connected_at = time.time()
+        self.last_active = time.monotonic()
+        self.last_heartbeat: Optional[float] = None
+        self.connection_task: Optional[asyncio.Task] = None
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def activate(self) -> None:
+        """Make this the current session for the running async context."""
+        _current_session.set(self)
+        if self.pat:
+            set_session_pat(self.pat)
+        if self.client is not None:
+            use_connection_client(self.client)
+
+    def touch(self) -> None:
+        """Record client activity, postponing idle eviction."""
+        self.last_active = time.monotonic()
+
+    @property
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_active
+
+    def heartbeat_due(self, interval: float) -> bool:
+        """Whether a registered session has gone interval seconds without a heartbeat."""
+        if not self.state.get("registered"):
+            return False
+        return self.last_heartbeat is None or time.monotonic() - self.last_heartbeat >= interval
+
+    async def _run(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        # Tasks run in a copy of the creator's context; switch it to this session
+        self.activate()
+        return await request()
+
+    def start_housekeeping(self, name: str, request: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Run a housekeeping request in the background, unless one is already in flight.
+
+        The request coroutine must handle its own errors. It runs with this
+        session active, whichever context starts it.
+        """
+        task = self._tasks.get(name)
+        if task is None or task.done():
+            task = asyncio.create_task(self._run(request))
+            self._tasks[name] = task
+        return task
+
+    async def aclose(self) -> None:
+        """Cancel housekeeping and release pooled connections."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        if self.client is not None:
+            await self.client.aclose()
+
+    def get_stats(self) -> dict:
+        """Get session statistics."""
+        return {
+            'session_id': self.session_id,
+            'agent_id': self.state.get("agent_id"),
+            'registered': bool(self.state.get("registered")),
+            'tool_calls': self.state.get("tool_call_count", 0),
+            'idle_seconds': round(self.idle_seconds, 1),
+            'in_flight': self.client.in_flight if self.client is not None else 0,
+        }
+
+
+# Session for the current connection (see MCPSession.activate)
+_current_session: ContextVar[Optional[MCPSession]] = ContextVar('current_session', default=None)
+
+# Process-wide session, used in stdio mode and outside SSE connections
+_default_session: Optional[MCPSession] = None
+
+
+def get_default_session() -> MCPSession:
+    """Get the process-wide session."""
+    global _default_session
+    if _default_session is None:
+        _default_session = MCPSession()
+    return _default_session
+
+
+def current_session() -> MCPSession:
+    """Get the session for the current connection, or the process-wide one."""
+    return _current_session.get() or get_default_session()
+
+
+class SessionRegistry:
+    """
+    Open SSE connections.
+
+    A single maintenance task serves every connection: each sweep it sends a
+    heartbeat for registered sessions that have not had one for
+    heartbeat_interval seconds (tool calls also heartbeat), and evicts
+    sessions idle for more than idle_seconds by cancelling their connection.
+    """
+
+    def __init__(self, max_sessions: int = 500, idle_seconds: float = 3600, sweep_seconds: float = 30):
+        """
+        Initialize session registry.
+
+        Args:
+            max_sessions: Connections accepted at once (0 = unlimited)
+            idle_seconds: Evict connections idle this long (0 = never)
+            sweep_seconds: How often to heartbeat and evict
+        """
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.sweep_seconds = sweep_seconds
+        self.sessions: dict[str, MCPSession] = {}
+        self._maintenance: Optional[asyncio.Task] = None
+
+        self.peak = 0
+        self.opened = 0
+        self.closed = 0
+        self.evicted = 0
+        self.rejected = 0
+
+    def open(self, session: MCPSession) -> bool:
+        """Track a new connection. Returns False if the server is full."""
+        if self.max_sessions and len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            return False
+        self.sessions[session.session_id] = session
+        self.opened += 1
+        self.peak = max(self.peak, len(self.sessions))
+        return True
+
+    async def close(self, session: MCPSession) -> None:
+        """Stop tracking a connection and release its resources."""
+        if self.sessions.pop(session.session_id, None) is not None:
+            self.closed += 1
+        await session.aclose()
+
+    def evict_idle(self) -> list[MCPSession]:
+        """Cancel connections idle for more than idle_seconds."""
+        if not self.idle_seconds:
+            return []
+        idle = [s for s in self.sessions.values() if s.idle_seconds > self.idle_seconds]
+        for session in idle:
+            self.evicted += 1
+            if session.connection_task is not None:
+                session.connection_task.cancel()
+        return idle
+
+    def sweep(self, heartbeat: Callable[[], Awaitable[Any]], heartbeat_interval: float) -> None:
+        """Evict idle sessions and start heartbeats for quiet ones."""
+        evicted = self.evict_idle()
+        for session in list(self.sessions.values()):
+            if session not in evicted and session.heartbeat_due(heartbeat_interval):
+                session.start_housekeeping("heartbeat", heartbeat)
+
+    def start(self, heartbeat: Callable[[], Awaitable[Any]], heartbeat_interval: float) -> None:
+        """Start the maintenance task in the running event loop."""
+        async def run():
+            while True:
+                await asyncio.sleep(self.sweep_seconds)
+                try:
+                    self.sweep(heartbeat, heartbeat_interval)
+                except Exception as e:
+                    print(f"SSE: Session maintenance failed: {e}", file=sys.stderr)
+
+        if self._maintenance is None or self._maintenance.done():
+            self._maintenance = asyncio.create_task(run())
+
+    async def shutdown(self) -> None:
+        """Stop maintenance and close every session."""
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            self._maintenance = None
+        for session in list(self.sessions.values()):
+            await self.close(session)
+
+    def get_stats(self) -> dict:
+        """Get connection statistics."""
+        sessions = list(self.sessions.values())
+        return {
+            'active': len(sessions),
+            'registered': sum(1 for s in sessions if s.state.get("registered")),
+            'in_flight': sum(s.client.in_flight for s in sessions if s.client is not None),
+            'peak': self.peak,
+            'opened': self.opened,
+            'closed': self.closed,
+            'evicted': self.evicted,
+            'rejected': self.rejected,
+            'max_sessions': self.max_sessions,
+            'idle_timeout_seconds': self.idle_seconds,
+            'max_idle_seconds': round(max((s.idle_seconds for s in sessions), default=0), 1),
+        }
@@ -10,7 +10,9 @@ Supports two transport modes:
 """
 
 import asyncio
+import contextlib
 import sys
+import time
 from mcp.server import Server
 import mcp.types as types
 import mcp.server.stdio
@@ -22,7 +24,7 @@ try:
     from mcp.server.sse import SseServerTransport
     from starlette.applications import Starlette
     from starlette.routing import Route
-    from starlette.responses import Response
+    from starlette.responses import JSONResponse, Response
     import uvicorn
     SSE_AVAILABLE = True
 except ImportError:
@@ -31,11 +33,17 @@ except ImportError:
 # Import aggregated tool definitions and handlers
 from .tools import TOOL_DEFINITIONS, TOOL_HANDLERS
 
-# Import specific functions needed for heartbeat unread notice
-from .tools import get_messages
+# Formats the heartbeat's unread previews for the unread notice
+from .tools.message import format_message
 
-# Import session PAT setter for SSE multi-user mode
-from .tools.utils import set_session_pat
+# Request headers carrying the current session's PAT
+from .tools.utils import api_headers
+
+# Pooled API client shared by tool calls and housekeeping requests
+from .api_client import APIClient, close_api_client, get_api_client, get_latency_stats
+
+# Per-connection sessions for SSE multi-user mode
+from .connections import MCPSession, SessionRegistry, current_session, get_default_session
 
 
 # Server instructions for Claude
@@ -147,10 +155,11 @@ record_milestone(name="Waiting for OAuth credentials", status="blocked", propert
 - update_entity: Update entity properties or type
 - extract_entities_from_text: NER extraction from text
 
-### RELATIONSHIP OPERATIONS (3 tools)
+### RELATIONSHIP OPERATIONS (4 tools)
 - list_relationships: View connections between entities
 - create_relationship: Link entities (WORKS_ON, KNOWS, USES, CREATED, etc.)
 - delete_relationship: Remove a relationship from the graph
+- find_path: Find the shortest paths connecting two entities
 
 ### CONTEXT/RAG OPERATIONS (2 tools)
 - get_context: Get relevant context for a query (primary RAG tool)
@@ -216,52 +225,29 @@ def get_server_instructions() -> str:
 # Create server
 server = Server(name=config.name)
 
-# Session state - initialized with agent identity on startup
-_session_state = {
-    "agent_id": None,
-    "agent_key": None,
-    "client": None,         # Client type: claude-code, claude-desktop, etc.
-    "model_key": None,      # Model key from DB
-    "model_id": None,       # Model API identifier (e.g., claude-opus-4-5-20251101)
-    "model_name": None,     # Model display name
-    "persona": None,        # Persona role: backend-code, frontend-code, architect
-    "persona_key": None,    # Resolved persona key from API
-    "persona_name": None,   # Display name
-    "focus": None,          # Current work focus
-    "affinity_warning": None,  # Warning if persona doesn't match client
-    "registered": False,
-    # Repository context (from git remote detection)
-    "repository_key": None,     # Repository key (from /repositories/lookup)
-    "repository_url": None,     # Normalized repository URL
-    # Current milestone tracking (from heartbeat response)
-    "current_milestone": None,  # {key, name, status, started_at}
-    # Tool call counting for milestone metrics
-    "tool_call_count": 0,               # Total tool calls this session
-    "milestone_start_tool_count": 0,    # Tool count when milestone started
-    # Work session activity tracking
-    "active_session_key": None,         # Current active work session key
-    "last_session_activity_update": None,  # Timestamp of last activity update
-}
-
 
 @server.list_tools()
 async def list_tools() -> list[types.Tool]:
     """List available tools - returns all tool definitions from cm_mcp.tools"""
+    current_session().touch()
     return TOOL_DEFINITIONS
 
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
     """Handle tool calls by dispatching to appropriate tool functions"""
+    session = current_session()
+    session.touch()
+    state = session.state
 
     # Increment tool call counter for milestone metrics
-    _session_state["tool_call_count"] += 1
+    state["tool_call_count"] += 1
 
     # Tools that don't require registration (identity-related tools)
     identity_tools = ("identify", "get_my_identity")
 
     # Enforce registration for all other tools
-    if name not in identity_tools and not _session_state.get("registered"):
+    if name not in identity_tools and not state.get("registered"):
         return [types.TextContent(
             type="text",
             text="## Registration Required\n\n"
@@ -281,55 +267,47 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
     # Send heartbeat on every tool call (if registered) to keep agent active
     # Skip for identify/get_my_identity since they handle registration themselves
     # Skip for get_messages/mark_* since those are message-related
-    unread_count = 0
-    autonomous_count = 0
+    # Housekeeping runs in the background, concurrently with the tool handler
     message_tools = ("get_messages", "mark_message_read", "mark_all_messages_read", "send_message", "link_message_entities")
-    if _session_state.get("registered") and name not in ("identify", "get_my_identity", *message_tools):
-        try:
-            unread_count, autonomous_count = await send_heartbeat()
-        except Exception:
-            pass  # Don't fail tool call if heartbeat fails
-
-    # Update work session activity periodically to prevent auto-close
-    # This slides the session expiration whenever we're actively using tools
-    if _session_state.get("registered") and _session_state.get("active_session_key"):
-        try:
-            await update_session_activity()
-        except Exception:
-            pass  # Don't fail tool call if session update fails
+    heartbeat_task = None
+    if state.get("registered") and name not in ("identify", "get_my_identity", *message_tools):
+        # Work session activity rides along with the heartbeat when it is due
+        heartbeat_task = session.start_housekeeping("heartbeat", send_heartbeat)
+    elif state.get("registered") and session_activity_due():
+        # Update work session activity periodically to prevent auto-close
+        session.start_housekeeping("session_activity", update_session_activity)
 
     # Helper to append unread/autonomous notice to results with message preview
-    async def maybe_append_unread_notice(result: list[types.TextContent]) -> list[types.TextContent]:
+    def maybe_append_unread_notice(result: list[types.TextContent]) -> list[types.TextContent]:
         if name in message_tools:
             return result
         if unread_count > 0 or autonomous_count > 0:
-            # Fetch and preview unread messages so AI can act on them
-            try:
-                messages_result = await get_messages({"unread_only": True, "limit": 5}, config, _session_state)
-                if messages_result and len(messages_result) > 0:
-                    # Extract text content from the result
-                    messages_text = messages_result[0].text if hasattr(messages_result[0], 'text') else str(messages_result[0])
-
-                    if autonomous_count > 0:
-                        notice = f"\n\n---\n🤖 **AUTONOMOUS TASK(S) - IMMEDIATE ACTION REQUIRED**\n\n"
-                        notice += f"You have {autonomous_count} autonomous task(s) that require your immediate attention.\n"
-                        notice += "**You MUST:**\n"
-                        notice += "1. Read the task request below\n"
-                        notice += "2. Acknowledge with `send_message(reply_to=\"msg-key\", message_type=\"acknowledged\", content=\"Starting...\")`\n"
-                        notice += "3. Complete the work\n"
-                        notice += "4. Reply when done with `send_message(reply_to=\"msg-key\", content=\"Done: ...\")`\n\n"
-                    else:
-                        notice = f"\n\n---\n📬 **UNREAD MESSAGES - PLEASE REVIEW**\n\n"
-                        notice += f"You have {unread_count} unread message(s).\n"
-                        notice += "**Action:** Review and respond to any that need your attention.\n"
-                        notice += "Use `mark_message_read` for informational messages, or `send_message(reply_to=...)` to respond.\n\n"
-
-                    notice += "**Messages:**\n"
-                    notice += messages_text
-                    notice += "\n\n---"
-                    result.append(types.TextContent(type="text", text=notice))
-            except Exception:
-                # Fall back to simple notice if fetching fails
+            # Preview the unread messages the heartbeat returned so AI can act on them,
+            # without a get_messages round-trip on every tool call
+            preview = state.get("unread_preview") or []
+            if preview:
+                messages_text = "".join(format_message(msg, state.get("agent_key")) for msg in preview).rstrip()
+
+                if autonomous_count > 0:
+                    notice = f"\n\n---\n🤖 **AUTONOMOUS TASK(S) - IMMEDIATE ACTION REQUIRED**\n\n"
+                    notice += f"You have {autonomous_count} autonomous task(s) that require your immediate attention.\n"
+                    notice += "**You MUST:**\n"
+                    notice += "1. Read the task request below\n"
+                    notice += "2. Acknowledge with `send_message(reply_to=\"msg-key\", message_type=\"acknowledged\", content=\"Starting...\")`\n"
+                    notice += "3. Complete the work\n"
+                    notice += "4. Reply when done with `send_message(reply_to=\"msg-key\", content=\"Done: ...\")`\n\n"
+                else:
+                    notice = f"\n\n---\n📬 **UNREAD MESSAGES - PLEASE REVIEW**\n\n"
+                    notice += f"You have {unread_count} unread message(s).\n"
+                    notice += "**Action:** Review and respond to any that need your attention.\n"
+                    notice += "Use `mark_message_read` for informational messages, or `send_message(reply_to=...)` to respond.\n\n"
+
+                notice += "**Messages:**\n"
+                notice += messages_text
+                notice += "\n\n---"
+                result.append(types.TextContent(type="text", text=notice))
+            else:
+                # Counts only, e.g. from a server without previews
                 if autonomous_count > 0:
                     notice = f"\n\n---\n🤖 **AUTONOMOUS TASK(S):** You have {autonomous_count} autonomous task(s) waiting. Use `get_messages` to see details and take action."
                 else:
@@ -344,7 +322,7 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
         if name in milestone_tools:
             return result
 
-        milestone = _session_state.get("current_milestone")
+        milestone = state.get("current_milestone")
         if milestone and milestone.get("status") == "started":
             # Calculate elapsed time if we have started_at
             elapsed_str = ""
@@ -376,110 +354,124 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
     # Dispatch to tool handler using TOOL_HANDLERS lookup
     handler = TOOL_HANDLERS.get(name)
     if handler:
-        result = await handler(arguments, config, _session_state)
+        result = await handler(arguments, config, state)
     else:
         result = [types.TextContent(type="text", text=f"Unknown tool: {name}")]
 
+    # Use this call's heartbeat counts if they are back already, otherwise
+    # the last known ones - the result never waits for the heartbeat
+    if heartbeat_task is not None and heartbeat_task.done():
+        unread_count, autonomous_count = heartbeat_task.result()
+    else:
+        unread_count = state.get("unread_messages", 0)
+        autonomous_count = state.get("autonomous_tasks", 0)
+
+    # Reading messages makes the last known counts stale until the next heartbeat
+    if name in ("get_messages", "mark_message_read", "mark_all_messages_read"):
+        state["unread_messages"] = 0
+        state["autonomous_tasks"] = 0
+        state["unread_preview"] = []
+
     # Append notices: first unread messages, then milestone reminder
-    result = await maybe_append_unread_notice(result)
+    result = maybe_append_unread_notice(result)
     result = maybe_append_milestone_reminder(result)
     return result
 
 
 async def register_agent():
     """Register this agent with the Collective Memory API and resolve persona"""
-    import httpx
-
+    state = current_session().state
     if not config.has_identity:
         return False
 
+    http_client = get_api_client()
+    headers = api_headers(config)
+
     try:
-        async with httpx.AsyncClient(timeout=config.timeout) as http_client:
-            # Detect client type
-            detected_client = config.detected_client
-            _session_state["client"] = detected_client
-
-            # Build registration payload with new fields
-            registration_data = {
-                "agent_id": config.agent_id,
-                "capabilities": config.capabilities_list,
-            }
-
-            # Add client type
-            if detected_client:
-                registration_data["client"] = detected_client
-
-            # Add model_key if configured
-            if config.model_key:
-                registration_data["model_key"] = config.model_key
-                _session_state["model_key"] = config.model_key
-
-            # Add focus if configured
-            if config.focus:
-                registration_data["focus"] = config.focus
-                _session_state["focus"] = config.focus
-
-            # Resolve persona to persona_key if configured
-            persona_key = None
-            if config.persona:
-                try:
-                    personas_response = await http_client.get(
-                        f"{config.api_endpoint}/personas/by-role/{config.persona}"
-                    )
-                    if personas_response.status_code == 200:
-                        personas_data = personas_response.json()
-                        if personas_data.get("success"):
-                            persona = personas_data.get("data", {})
-                            persona_key = persona.get("persona_key")
-                            _session_state["persona_key"] = persona_key
-                            _session_state["persona_name"] = persona.get("name")
-                except Exception:
-                    pass  # Will try to create persona later
+        # Detect client type
+        detected_client = config.detected_client
+        state["client"] = detected_client
 
-                if persona_key:
-                    registration_data["persona_key"] = persona_key
+        # Build registration payload with new fields
+        registration_data = {
+            "agent_id": config.agent_id,
+            "capabilities": config.capabilities_list,
+        }
 
-            # Register the agent
-            response = await http_client.post(
-                f"{config.api_endpoint}/agents/register",
-                json=registration_data
-            )
-            if response.status_code in (200, 201):
-                data = response.json()
-                if data.get("success"):
-                    agent_data = data.get("data", {})
-                    _session_state["agent_id"] = config.agent_id
-                    _session_state["agent_key"] = agent_data.get("agent_key")
-                    _session_state["persona"] = config.persona
-                    _session_state["registered"] = True
-
-                    # Store affinity warning if present
-                    if agent_data.get("affinity_warning"):
-                        _session_state["affinity_warning"] = agent_data.get("affinity_warning")
-                        print(f"  Affinity notice: {agent_data.get('affinity_warning')}", file=sys.stderr)
-
-            # Send initial heartbeat to mark as active
-            if _session_state.get("registered"):
-                await http_client.post(
-                    f"{config.api_endpoint}/agents/{config.agent_id}/heartbeat"
+        # Add client type
+        if detected_client:
+            registration_data["client"] = detected_client
+
+        # Add model_key if configured
+        if config.model_key:
+            registration_data["model_key"] = config.model_key
+            state["model_key"] = config.model_key
+
+        # Add focus if configured
+        if config.focus:
+            registration_data["focus"] = config.focus
+            state["focus"] = config.focus
+
+        # Resolve persona to persona_key if configured
+        persona_key = None
+        if config.persona:
+            try:
+                personas_response = await http_client.request(
+                    "GET", f"/personas/by-role/{config.persona}", headers=headers
                 )
-                print(f"  Initial heartbeat sent", file=sys.stderr)
+                if personas_response.status_code == 200:
+                    personas_data = personas_response.json()
+                    if personas_data.get("success"):
+                        persona = personas_data.get("data", {})
+                        persona_key = persona.get("persona_key")
+                        state["persona_key"] = persona_key
+                        state["persona_name"] = persona.get("name")
+            except Exception:
+                pass  # Will try to create persona later
 
-            # If persona wasn't found earlier, try to create it
-            if config.persona and not _session_state.get("persona_key"):
-                print(f"Persona '{config.persona}' not found, creating...", file=sys.stderr)
-                persona_data = await _create_persona(http_client)
-                if persona_data:
-                    _session_state["persona_key"] = persona_data.get("persona_key")
-                    _session_state["persona_name"] = persona_data.get("name")
+            if persona_key:
+                registration_data["persona_key"] = persona_key
 
-            return _session_state["registered"]
+        # Register the agent
+        response = await http_client.request(
+            "POST", "/agents/register", json=registration_data, headers=headers
+        )
+        if response.status_code in (200, 201):
+            data = response.json()
+            if data.get("success"):
+                agent_data = data.get("data", {})
+                state["agent_id"] = config.agent_id
+                state["agent_key"] = agent_data.get("agent_key")
+                state["persona"] = config.persona
+                state["registered"] = True
+
+                # Store affinity warning if present
+                if agent_data.get("affinity_warning"):
+                    state["affinity_warning"] = agent_data.get("affinity_warning")
+                    print(f"  Affinity notice: {agent_data.get('affinity_warning')}", file=sys.stderr)
+
+        # Send initial heartbeat to mark as active
+        if state.get("registered"):
+            await http_client.request(
+                "POST", f"/agents/{config.agent_id}/heartbeat", headers=headers
+            )
+            print(f"  Initial heartbeat sent", file=sys.stderr)
+
+        # If persona wasn't found earlier, try to create it
+        if config.persona and not state.get("persona_key"):
+            print(f"Persona '{config.persona}' not found, creating...", file=sys.stderr)
+            persona_data = await _create_persona(http_client, headers)
+            if persona_data:
+                state["persona_key"] = persona_data.get("persona_key")
+                state["persona_name"] = persona_data.get("name")
+
+        return state["registered"]
     except Exception as e:
         print(f"Agent registration failed: {e}", file=sys.stderr)
         return False
 
 
-async def _create_persona(http_client) -> dict | None:
+async def _create_persona(http_client, headers: dict) -> dict | None:
     """Auto-create a persona from config environment variables"""
     # Build persona name from config or role
     name = config.persona_name or f"Auto-{config.persona.replace('-', ' ').title()}"
@@ -504,9 +496,8 @@ async def _create_persona(http_client) -> dict | None:
     }
 
     try:
-        response = await http_client.post(
-            f"{config.api_endpoint}/personas",
-            json=persona_payload
+        response = await http_client.request(
+            "POST", "/personas", json=persona_payload, headers=headers
         )
         if response.status_code in (200, 201):
             data = response.json()
@@ -522,6 +513,7 @@ async def _create_persona(http_client) -> dict | None:
 
 async def startup_checks():
     """Perform startup checks and report status"""
+    state = current_session().state
     print("=" * 60, file=sys.stderr)
     print(f"Starting MCP Server: {config.server_name} v{config.version}", file=sys.stderr)
     print(f"API: {config.api_url}", file=sys.stderr)
@@ -575,12 +567,12 @@ async def startup_checks():
         print("\nRegistering agent...", file=sys.stderr)
         registered = await register_agent()
         if registered:
-            print(f"  Agent Key: {_session_state['agent_key']}", file=sys.stderr)
-            print(f"  Client: {_session_state.get('client', 'unknown')}", file=sys.stderr)
-            if _session_state.get("persona_name"):
-                print(f"  Acting as: {_session_state['persona_name']}", file=sys.stderr)
-            if _session_state.get("focus"):
-                print(f"  Focus: {_session_state['focus']}", file=sys.stderr)
+            print(f"  Agent Key: {state['agent_key']}", file=sys.stderr)
+            print(f"  Client: {state.get('client', 'unknown')}", file=sys.stderr)
+            if state.get("persona_name"):
+                print(f"  Acting as: {state['persona_name']}", file=sys.stderr)
+            if state.get("focus"):
+                print(f"  Focus: {state['focus']}", file=sys.stderr)
         else:
             print("  Registration failed - will retry on first API call", file=sys.stderr)
 
@@ -604,6 +596,22 @@ _heartbeat_running = False
 # Session activity update interval (10 minutes)
 SESSION_ACTIVITY_INTERVAL = 600
 
+def session_activity_due() -> bool:
+    """Whether the active work session should have its activity updated."""
+    from datetime import datetime, timezone
+
+    state = current_session().state
+    if not state.get("active_session_key"):
+        return False
+
+    # Check if enough time has passed since last update
+    last_update = state.get("last_session_activity_update")
+    if last_update:
+        elapsed = (datetime.now(timezone.utc) - last_update).total_seconds()
+        if elapsed < SESSION_ACTIVITY_INTERVAL:
+            return False  # Not enough time passed
+    return True
+
 
 async def update_session_activity() -> bool:
     """Update work session activity to prevent auto-close.
@@ -611,39 +619,30 @@ async def update_session_activity() -> bool:
     Called periodically during tool usage to slide the session expiration.
     Returns True if update was sent, False otherwise.
     """
-    import httpx
     from datetime import datetime, timezone
 
-    session_key = _session_state.get("active_session_key")
-    if not session_key:
+    state = current_session().state
+    session_key = state.get("active_session_key")
+    if not session_activity_due():
         return False
-
-    # Check if enough time has passed since last update
-    last_update = _session_state.get("last_session_activity_update")
     now = datetime.now(timezone.utc)
 
-    if last_update:
-        elapsed = (now - last_update).total_seconds()
-        if elapsed < SESSION_ACTIVITY_INTERVAL:
-            return False  # Not enough time passed
-
     try:
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            response = await client.post(
-                f"{config.api_endpoint}/work-sessions/{session_key}/activity"
-            )
-            if response.status_code == 200:
-                _session_state["last_session_activity_update"] = now
-                if config.debug:
-                    print(f"  Session activity updated for {session_key}", file=sys.stderr)
-                return True
-            else:
-                # Session might have been closed/expired
-                if response.status_code == 404 or response.status_code == 400:
-                    _session_state["active_session_key"] = None
-                if config.debug:
-                    print(f"  Session activity update failed: {response.status_code}", file=sys.stderr)
-                return False
+        response = await get_api_client().request(
+            "POST", f"/work-sessions/{session_key}/activity", headers=api_headers(config)
+        )
+        if response.status_code == 200:
+            state["last_session_activity_update"] = now
+            if config.debug:
+                print(f"  Session activity updated for {session_key}", file=sys.stderr)
+            return True
+        else:
+            # Session might have been closed/expired
+            if response.status_code == 404 or response.status_code == 400:
+                state["active_session_key"] = None
+            if config.debug:
+                print(f"  Session activity update failed: {response.status_code}", file=sys.stderr)
+            return False
     except Exception as e:
         if config.debug:
             print(f"  Session activity update error: {e}", file=sys.stderr)
@@ -653,45 +652,64 @@ async def update_session_activity() -> bool:
 async def send_heartbeat() -> tuple[int, int]:
     """Send a heartbeat to keep the agent active.
 
+    When the work session's activity update is due it is sent in the same
+    request, so a tool call costs one housekeeping round-trip.
+
     Returns tuple of (unread_messages, autonomous_tasks) counts.
     """
-    import httpx
+    from datetime import datetime, timezone
 
-    agent_id = _session_state.get("agent_id")
+    session = current_session()
+    state = session.state
+    agent_id = state.get("agent_id")
     if not agent_id:
         return 0, 0
 
+    params = {"compact": "true"}
+    session_key = state.get("active_session_key") if session_activity_due() else None
+    if session_key:
+        params["session_key"] = session_key
+
     try:
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            response = await client.post(
-                f"{config.api_endpoint}/agents/{agent_id}/heartbeat"
-            )
-            if response.status_code == 200:
-                data = response.json()
-                agent_data = data.get("data", {})
-                unread = agent_data.get("unread_messages", 0)
-                autonomous = agent_data.get("autonomous_tasks", 0)
-                _session_state["unread_messages"] = unread
-                _session_state["autonomous_tasks"] = autonomous
-
-                # Capture current milestone from heartbeat response
-                milestone = agent_data.get("current_milestone")
-                _session_state["current_milestone"] = milestone
-
-                if config.debug:
-                    print(f"  Heartbeat sent for {agent_id}", file=sys.stderr)
-                if autonomous > 0:
-                    print(f"  🤖 AUTONOMOUS TASK(S): {autonomous} task(s) require your attention - work on them and reply!", file=sys.stderr)
-                elif unread > 0:
-                    print(f"  ⚠️  You have {unread} unread message(s) - use get_messages to check them", file=sys.stderr)
-                if milestone and milestone.get("status") == "started":
-                    print(f"  🎯 CURRENT MILESTONE: {milestone.get('name')}", file=sys.stderr)
-
-                return unread, autonomous
-            else:
-                if config.debug:
-                    print(f"  Heartbeat failed: {response.status_code}", file=sys.stderr)
-                return 0, 0
+        response = await get_api_client().request(
+            "POST", f"/agents/{agent_id}/heartbeat",
+            params=params, headers=api_headers(config)
+        )
+        if response.status_code == 200:
+            session.last_heartbeat = time.monotonic()
+            data = response.json()
+            agent_data = data.get("data", {})
+            unread = agent_data.get("unread_messages", 0)
+            autonomous = agent_data.get("autonomous_tasks", 0)
+            state["unread_messages"] = unread
+            state["autonomous_tasks"] = autonomous
+            state["unread_preview"] = agent_data.get("unread_preview") or []
+
+            if session_key:
+                if agent_data.get("session_active"):
+                    state["last_session_activity_update"] = datetime.now(timezone.utc)
+                elif "session_active" in agent_data:
+                    # Session was closed or expired
+                    state["active_session_key"] = None
+
+            # Capture current milestone from heartbeat response
+            milestone = agent_data.get("current_milestone")
+            state["current_milestone"] = milestone
+
+            if config.debug:
+                print(f"  Heartbeat sent for {agent_id}", file=sys.stderr)
+            if autonomous > 0:
+                print(f"  🤖 AUTONOMOUS TASK(S): {autonomous} task(s) require your attention - work on them and reply!", file=sys.stderr)
+            elif unread > 0:
+                print(f"  ⚠️  You have {unread} unread message(s) - use get_messages to check them", file=sys.stderr)
+            if milestone and milestone.get("status") == "started":
+                print(f"  🎯 CURRENT MILESTONE: {milestone.get('name')}", file=sys.stderr)
+
+            return unread, autonomous
+        else:
+            if config.debug:
+                print(f"  Heartbeat failed: {response.status_code}", file=sys.stderr)
+            return 0, 0
     except Exception as e:
         if config.debug:
             print(f"  Heartbeat error: {e}", file=sys.stderr)
@@ -701,13 +719,14 @@ async def send_heartbeat() -> tuple[int, int]:
 async def heartbeat_loop():
     """Background task that sends periodic heartbeats"""
     global _heartbeat_running
+    state = current_session().state
     _heartbeat_running = True
 
     # Wait for initial registration to complete
     await asyncio.sleep(5)
 
     while _heartbeat_running:
-        if _session_state.get("registered"):
+        if state.get("registered"):
             await send_heartbeat()
         await asyncio.sleep(HEARTBEAT_INTERVAL)
 
@@ -741,6 +760,12 @@ async def main_stdio():
             except asyncio.CancelledError:
                 pass
 
+        # Release pooled API connections
+        await close_api_client()
+        if config.debug:
+            for endpoint, stats in get_latency_stats().items():
+                print(f"  {endpoint}: {stats['count']} calls, mean {stats['mean_ms']}ms, p95 <= {stats['p95_ms']}ms", file=sys.stderr)
+
 
 def create_sse_app():
     """Create Starlette ASGI app for SSE transport"""
@@ -750,23 +775,40 @@ def create_sse_app():
     # Create SSE transport
     sse_transport = SseServerTransport("/messages/")
 
+    # Open connections, with one maintenance task for heartbeats and idle eviction
+    sessions = SessionRegistry(
+        max_sessions=config.max_sessions,
+        idle_seconds=config.session_idle_seconds,
+    )
+
     async def handle_sse(request):
-        """Handle SSE connections with per-client PAT authentication"""
+        """Handle SSE connections, each with its own session and per-client PAT authentication"""
         # Extract PAT from Authorization header for multi-user SSE mode
         # Format: "Bearer <pat>" or just "<pat>"
+        pat = None
         auth_header = request.headers.get("authorization", "")
         if auth_header:
             if auth_header.lower().startswith("bearer "):
                 pat = auth_header[7:].strip()
             else:
                 pat = auth_header.strip()
-            if pat:
-                set_session_pat(pat)
-                if config.debug:
-                    print(f"SSE: Client authenticated with PAT (length: {len(pat)})", file=sys.stderr)
+            if pat and config.debug:
+                print(f"SSE: Client authenticated with PAT (length: {len(pat)})", file=sys.stderr)
         elif config.debug:
             print("SSE: No Authorization header - using server PAT (if configured)", file=sys.stderr)
 
+        # Identity, counters and pooled API connections for this client, released on disconnect
+        session = MCPSession(pat=pat or None, client=APIClient(config))
+        if not session.pat and get_default_session().state.get("registered"):
+            # Clients on the server PAT share the agent registered at startup
+            session.state.update(get_default_session().state, tool_call_count=0, milestone_start_tool_count=0)
+        if not sessions.open(session):
+            await session.aclose()
+            return JSONResponse({"error": "Too many connections"}, status_code=503)
+        session.connection_task = asyncio.current_task()
+        session.activate()
+        sessions.start(send_heartbeat, HEARTBEAT_INTERVAL)
+
         try:
             async with sse_transport.connect_sse(
                 request.scope, request.receive, request._send
@@ -791,18 +833,29 @@ def create_sse_app():
         except Exception as e:
             # Log unexpected errors but don't crash the server
             print(f"SSE: Connection error: {type(e).__name__}: {e}", file=sys.stderr)
+        finally:
+            await sessions.close(session)
         return Response()
 
     async def health_check(request):
-        """Health check endpoint"""
-        return Response(
-            content='{"status":"healthy","server":"collective-memory-mcp"}',
-            media_type="application/json"
-        )
+        """Health check endpoint, with connection metrics and CM API latency per endpoint"""
+        return JSONResponse({
+            "status": "healthy",
+            "server": "collective-memory-mcp",
+            "connections": sessions.get_stats(),
+            "api_latency": get_latency_stats(),
+        })
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        await sessions.shutdown()
+        await close_api_client()
 
     # Create Starlette app with standard routes
     inner_app = Starlette(
         debug=config.debug,
+        lifespan=lifespan,
         routes=[
             Route("/health", health_check, methods=["GET"]),
             Route("/sse", handle_sse, methods=["GET"]),
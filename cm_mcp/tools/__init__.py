@@ -29,6 +29,7 @@ from .relationship import (
     list_relationships,
     create_relationship,
     delete_relationship,
+    find_path,
 )
 
 # Context tools - REFACTORED (definitions + handlers)
@@ -156,6 +157,7 @@ __all__ = [
     'list_relationships',
     'create_relationship',
     'delete_relationship',
+    'find_path',
     # Context tools
     'get_context',
     'get_entity_context',
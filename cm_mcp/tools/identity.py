@@ -98,58 +98,6 @@ RETURNS: Your new identity details after the change.""",
 # HELPER FUNCTIONS
 # ============================================================
 
-async def _detect_project_from_api(config: Any, session_state: dict, repo_url: str) -> dict | None:
-    """
-    Query API to find project by repository URL.
-
-    Uses the new /repositories/lookup endpoint which returns:
-    - repository: The Repository record (if found)
-    - projects: Array of Project records linked to this repository (with teams)
-
-    Returns dict with project and teams info if found, None otherwise.
-    For backwards compatibility, returns structure similar to old /projects/lookup.
-    """
-    try:
-        from urllib.parse import quote
-        encoded_url = quote(repo_url, safe='')
-        result = await _make_request(
-            config,
-            "GET",
-            f"/repositories/lookup?url={encoded_url}",
-        )
-        if result.get('success'):
-            data = result.get('data', {})
-            repository = data.get('repository')
-            projects = data.get('projects', [])
-
-            if repository:
-                # Store repository info in session_state
-                session_state['repository_key'] = repository.get('repository_key')
-                session_state['repository_url'] = repository.get('repository_url')
-
-                # Return first project if available (most common case)
-                if projects:
-                    # Projects already include teams from the lookup endpoint
-                    first_project = projects[0]
-                    return {
-                        'project': first_project,
-                        'teams': first_project.get('teams', []),
-                        'repository': repository,
-                        'all_projects': projects  # Include all in case caller needs them
-                    }
-                else:
-                    # Repository exists but no projects linked
-                    return {
-                        'project': None,
-                        'teams': [],
-                        'repository': repository,
-                        'all_projects': []
-                    }
-        return None
-    except Exception:
-        return None
-
-
 def _detect_project_from_git() -> dict | None:
     """
     Detect project from git remote URL.
@@ -214,74 +162,6 @@ def _get_working_directory_name() -> str | None:
         return None
 
 
-async def _fetch_user_projects(config: Any) -> list:
-    """
-    Fetch projects accessible to the authenticated user (via their team memberships).
-
-    Returns a list of project dicts with project_key, name, repository_name, etc.
-    """
-    try:
-        result = await _make_request(
-            config,
-            "GET",
-            "/projects",
-            params={"include_teams": "true"}
-        )
-        if result.get("success"):
-            return result.get("data", {}).get("projects", [])
-        return []
-    except Exception:
-        return []
-
-
-def _match_directory_to_project(dir_name: str, projects: list) -> dict | None:
-    """
-    Try to match a directory name to a project.
-
-    Matching strategy (in order of confidence):
-    1. Exact match on repository_name (case-insensitive)
-    2. Exact match on project name (case-insensitive)
-    3. Normalized match (replace - with _, etc.)
-
-    Returns the matched project dict or None if no confident match.
-    """
-    if not dir_name or not projects:
-        return None
-
-    dir_lower = dir_name.lower()
-    dir_normalized = dir_lower.replace('-', '_').replace(' ', '_')
-
-    # First pass: exact match on repository_name
-    for project in projects:
-        repo_name = project.get('repository_name', '')
-        if repo_name and repo_name.lower() == dir_lower:
-            return project
-
-    # Second pass: exact match on project name
-    for project in projects:
-        name = project.get('name', '')
-        if name and name.lower() == dir_lower:
-            return project
-
-    # Third pass: normalized match on repository_name
-    for project in projects:
-        repo_name = project.get('repository_name', '')
-        if repo_name:
-            repo_normalized = repo_name.lower().replace('-', '_').replace(' ', '_')
-            if repo_normalized == dir_normalized:
-                return project
-
-    # Fourth pass: normalized match on project name
-    for project in projects:
-        name = project.get('name', '')
-        if name:
-            name_normalized = name.lower().replace('-', '_').replace(' ', '_')
-            if name_normalized == dir_normalized:
-                return project
-
-    return None
-
-
 def _format_project_selection_prompt(projects: list, dir_name: str | None = None) -> str:
     """
     Format a prompt asking the user to select a project.
@@ -741,324 +621,81 @@ async def identify(
         return [types.TextContent(type="text", text=output)]
 
     try:
-        # Detect project - priority: explicit > git remote > directory name
+        # Project detection runs on the server from what we can see locally:
+        # explicit project_key > git remote > directory name
         git_project = _detect_project_from_git()
-        detected_project_key = None
-        detected_project_name = None
-        detected_db_project = None  # Project from database (via /projects/lookup)
-        project_teams = []  # Teams associated with the project
-        project_detection_method = None  # Track how project was detected
-        user_projects = []  # Will be populated if needed for fallback
-        working_dir_name = None  # Current directory name
-
-        # 1. Check for explicit project_key first
-        if explicit_project_key:
-            try:
-                project_result = await _make_request(
-                    config,
-                    "GET",
-                    f"/projects/{explicit_project_key}",
-                    params={"include_teams": "true"}
-                )
-                if project_result.get("success"):
-                    detected_db_project = project_result.get("data", {}).get("project")
-                    if detected_db_project:
-                        detected_project_key = detected_db_project.get('project_key')
-                        detected_project_name = detected_db_project.get('name')
-                        project_teams = detected_db_project.get('teams', [])
-                        project_detection_method = "explicit"
-            except Exception:
-                pass
-
-        # 2. Try git remote detection
-        if not detected_project_key and git_project:
-            # Use git remote info for project context
-            detected_project_name = git_project['repo']
-
-            # Query API to find project by repository URL
-            api_project_data = await _detect_project_from_api(config, session_state, git_project['url'])
-            if api_project_data:
-                detected_db_project = api_project_data.get('project')
-                project_teams = api_project_data.get('teams', [])
-                if detected_db_project:
-                    detected_project_key = detected_db_project.get('project_key')
-                    detected_project_name = detected_db_project.get('name') or detected_project_name
-                    project_detection_method = "git_remote"
-
-        # 3. Try directory name matching (fallback when no git remote)
-        if not detected_project_key:
-            working_dir_name = _get_working_directory_name()
-            if working_dir_name:
-                # Fetch user's projects for matching
-                user_projects = await _fetch_user_projects(config)
-                if user_projects:
-                    matched_project = _match_directory_to_project(working_dir_name, user_projects)
-                    if matched_project:
-                        detected_db_project = matched_project
-                        detected_project_key = matched_project.get('project_key')
-                        detected_project_name = matched_project.get('name')
-                        project_teams = matched_project.get('teams', [])
-                        project_detection_method = "directory_match"
-
-        # 4. If still no match, show project selection prompt (but continue with registration)
-        project_selection_prompt = ""
-        if not detected_project_key and not explicit_project_key:
-            # Fetch projects if not already fetched
-            if not user_projects:
-                user_projects = await _fetch_user_projects(config)
-            if user_projects:
-                project_selection_prompt = _format_project_selection_prompt(user_projects, working_dir_name)
-
-        # Fetch existing agents for this user to help with identity selection
-        # Don't filter by client - show all agents and let relevance scoring handle it
-        existing_agents = await _fetch_existing_agents_for_user(config)
-
-        # Check if the provided agent_id matches an existing agent
-        # Account for auto-suffix: cc-wayne-cm might match cc-wayne-cm-wh
-        existing_agent_ids = [a.get("agent_id") for a in existing_agents]
-        agent_id_is_existing = agent_id in existing_agent_ids
-
-        # Also check if provided agent_id is a prefix of any existing agent (before suffix)
-        agent_id_matches_prefix = any(
-            existing_id.startswith(agent_id + "-") or existing_id == agent_id
-            for existing_id in existing_agent_ids
-        )
-
-        # Build the existing agents display (will be shown in output later)
-        existing_agents_display = ""
-        if existing_agents and not agent_id_is_existing and not agent_id_matches_prefix:
-            # Only show existing agents if the provided agent_id is truly NEW
-            existing_agents_display = _format_existing_agents(
-                existing_agents,
-                client_type,
-                detected_project_name
-            )
-
-        # Resolve model_id to model_key if provided
-        resolved_model_key = model_key
-        model_name = None
-        model_resolved = False  # Track if we successfully found the model
-
-        if model_id and not model_key:
-            # First try looking up by model_id
-            try:
-                model_result = await _make_request(
-                    config,
-                    "GET",
-                    f"/models/by-model-id/{model_id}"
-                )
-                if model_result.get("success"):
-                    model_data = model_result.get("data", {})
-                    resolved_model_key = model_data.get("model_key")
-                    model_name = model_data.get("name")
-                    model_resolved = True
-            except Exception:
-                pass
-
-            # If model_id lookup failed and it looks like a UUID, try as model_key
-            if not model_resolved and len(model_id) == 36 and model_id.count('-') == 4:
-                try:
-                    model_result = await _make_request(
-                        config,
-                        "GET",
-                        f"/models/{model_id}"
-                    )
-                    if model_result.get("success"):
-                        model_data = model_result.get("data", {})
-                        resolved_model_key = model_data.get("model_key") or model_id
-                        model_name = model_data.get("name")
-                        model_resolved = True
-                except Exception:
-                    pass
-        elif model_key:
-            # If model_key was provided directly, look it up
-            try:
-                model_result = await _make_request(
-                    config,
-                    "GET",
-                    f"/models/{model_key}"
-                )
-                if model_result.get("success"):
-                    model_data = model_result.get("data", {})
-                    model_name = model_data.get("name")
-                    model_resolved = True
-            except Exception:
-                pass
+        working_dir_name = _get_working_directory_name()
 
-        # Build registration payload
-        registration_data = {
+        bootstrap_data = {
             "agent_id": agent_id,
+            "client": client_type,
+            "model_id": model_id,
+            "model_key": model_key,
+            "persona": persona,
+            "focus": focus,
             "capabilities": config.capabilities_list if hasattr(config, 'capabilities_list') else ["search", "create", "update"],
+            "team_key": explicit_team_key,
+            "team_slug": explicit_team_slug,
+            "project_key": explicit_project_key,
+            "directory_name": working_dir_name,
         }
+        if git_project:
+            bootstrap_data["repository_url"] = git_project['url']
+            bootstrap_data["project_name"] = git_project['repo']
 
-        if client_type:
-            registration_data["client"] = client_type
-            # Map client type to client_key (e.g., 'claude-code' → 'client-claude-code')
-            client_key = f"client-{client_type}" if not client_type.startswith("client-") else client_type
-            registration_data["client_key"] = client_key
-        if resolved_model_key:
-            registration_data["model_key"] = resolved_model_key
-        if focus:
-            registration_data["focus"] = focus
-
-        # Add project info if detected
-        if detected_project_key:
-            registration_data["project_key"] = detected_project_key
-        if detected_project_name:
-            registration_data["project_name"] = detected_project_name
-
-        # Fetch user info BEFORE registration to get team_key
-        # We need this for: user initials, membership slug, team resolution, and domain context
-        user_initials = None
-        membership_slug = None
-        resolved_team_key = None
-        resolved_team_name = None
-        team_detected_from_project = False  # Track how team was detected
-        user_data = {}
-        teams = []
-        available_scopes = []
-        default_scope = {}
-
-        if has_pat:
-            try:
-                me_result = await _make_request(config, "GET", "/auth/me")
-                if me_result.get("success"):
-                    me_data = me_result.get("data", {})
-                    user_data = me_data.get("user", {})
-                    teams = me_data.get("teams", [])
-                    available_scopes = me_data.get("available_scopes", [])
-                    default_scope = me_data.get("default_scope", {})
-                    user_initials = user_data.get("initials", "").lower()
-
-                    # Resolve team from explicit params or auto-detect
-                    if explicit_team_key:
-                        team = next((t for t in teams if t.get('team_key') == explicit_team_key), None)
-                        if team:
-                            resolved_team_key = explicit_team_key
-                            resolved_team_name = team.get('name')
-                            membership_slug = team.get('membership_slug')
-                    elif explicit_team_slug:
-                        team = next((t for t in teams if t.get('slug') == explicit_team_slug), None)
-                        if team:
-                            resolved_team_key = team.get('team_key')
-                            resolved_team_name = team.get('name')
-                            membership_slug = team.get('membership_slug')
-                    elif teams:
-                        # Auto-detect team from project name or agent_id
-                        # Priority: 1) detected project name, 2) agent_id pattern
-
-                        # First, try to match detected project name against team names/slugs
-                        if detected_project_name and not resolved_team_key:
-                            project_name_normalized = detected_project_name.lower().replace('-', ' ').replace('_', ' ')
-                            for t in teams:
-                                team_slug = t.get('slug', '').lower().replace('-', ' ').replace('_', ' ')
-                                team_name = t.get('name', '').lower().replace('-', ' ').replace('_', ' ')
-                                # Check if project name matches team slug or name
-                                if team_slug and (team_slug == project_name_normalized or project_name_normalized in team_slug or team_slug in project_name_normalized):
-                                    resolved_team_key = t.get('team_key')
-                                    resolved_team_name = t.get('name')
-                                    membership_slug = t.get('membership_slug')
-                                    team_detected_from_project = True
-                                    break
-                                elif team_name and (team_name == project_name_normalized or project_name_normalized in team_name or team_name in project_name_normalized):
-                                    resolved_team_key = t.get('team_key')
-                                    resolved_team_name = t.get('name')
-                                    membership_slug = t.get('membership_slug')
-                                    team_detected_from_project = True
-                                    break
-
-                        # Second, try to match agent_id against team names/slugs
-                        if agent_id and not resolved_team_key:
-                            agent_id_lower = agent_id.lower().replace('-', ' ').replace('_', ' ')
-                            for t in teams:
-                                team_slug = t.get('slug', '').lower().replace('-', ' ').replace('_', ' ')
-                                team_name = t.get('name', '').lower()
-                                if team_slug and team_slug in agent_id_lower:
-                                    resolved_team_key = t.get('team_key')
-                                    resolved_team_name = t.get('name')
-                                    membership_slug = t.get('membership_slug')
-                                    break
-                                elif team_name and team_name in agent_id_lower:
-                                    resolved_team_key = t.get('team_key')
-                                    resolved_team_name = t.get('name')
-                                    membership_slug = t.get('membership_slug')
-                                    break
-
-                        # Third, use project's associated teams from /projects/lookup
-                        # Prefer 'owner' role, then 'contributor', then any
-                        if not resolved_team_key and project_teams:
-                            # Sort by role priority: owner > contributor > viewer
-                            role_priority = {'owner': 0, 'contributor': 1, 'viewer': 2}
-                            sorted_teams = sorted(
-                                project_teams,
-                                key=lambda x: role_priority.get(x.get('role', 'viewer'), 3)
-                            )
-                            for pt in sorted_teams:
-                                pt_team_key = pt.get('team_key')
-                                # Check if user is a member of this team
-                                user_team = next((t for t in teams if t.get('team_key') == pt_team_key), None)
-                                if user_team:
-                                    resolved_team_key = pt_team_key
-                                    resolved_team_name = user_team.get('name')
-                                    membership_slug = user_team.get('membership_slug')
-                                    team_detected_from_project = True
-                                    break
-            except Exception:
-                pass  # Continue without user info
-
-        # Use membership_slug if available (team-specific), otherwise fall back to user_initials
-        suffix = membership_slug or user_initials
-
-        # Auto-suffix agent_id with suffix (if not already present)
-        if suffix and agent_id:
-            if not agent_id.endswith(f'-{suffix}'):
-                # Check if agent_id already has a short alphanumeric suffix that we should replace
-                parts = agent_id.rsplit('-', 1)
-                if len(parts) == 2 and len(parts[1]) <= 10 and parts[1].replace('-', '').isalnum():
-                    # Replace existing suffix with user's suffix
-                    agent_id = f"{parts[0]}-{suffix}"
-                else:
-                    # Append suffix
-                    agent_id = f"{agent_id}-{suffix}"
-
-        # Add team_key to registration if resolved
-        if resolved_team_key:
-            registration_data["team_key"] = resolved_team_key
-
-        # Resolve persona to persona_key
-        persona_key = None
-        if persona:
-            try:
-                personas_result = await _make_request(
-                    config,
-                    "GET",
-                    "/personas/by-role/" + persona
-                )
-                if personas_result.get("success"):
-                    persona_data = personas_result.get("data", {})
-                    persona_key = persona_data.get("persona_key")
-                    if persona_key:
-                        registration_data["persona_key"] = persona_key
-            except Exception:
-                pass
-
-        # Register with CM
+        # Resolve user, teams, project, model and persona, register, and
+        # find the active work session - all in one request
         result = await _make_request(
             config,
             "POST",
-            "/agents/register",
-            json=registration_data
+            "/agents/bootstrap",
+            json={k: v for k, v in bootstrap_data.items() if v is not None}
         )
 
         if result.get("success"):
-            agent_data = result.get("data", {})
+            context = result.get("data", {})
+            agent_data = context.get("agent", {})
+            # The server suffixes agent_id with the user's membership slug or initials
+            requested_agent_id = agent_id
+            agent_id = agent_data.get("agent_id") or agent_id
+
+            detected_db_project = context.get("project")
+            detected_project_key = detected_db_project.get("project_key") if detected_db_project else None
+            detected_project_name = context.get("project_name")
+            project_teams = detected_db_project.get("teams", []) if detected_db_project else []
+            project_detection_method = context.get("project_detection_method")
+
+            # No project detected - offer the user's projects to pick from
+            project_selection_prompt = ""
+            if not detected_project_key and not explicit_project_key and context.get("projects"):
+                project_selection_prompt = _format_project_selection_prompt(context["projects"], working_dir_name)
+
+            # Only show existing agents if the provided agent_id is truly NEW
+            # Account for auto-suffix: cc-wayne-cm might match cc-wayne-cm-wh
+            existing_agents = context.get("existing_agents", [])
+            agent_id_matches_existing = any(
+                existing.get("agent_id") == requested_agent_id
+                or (existing.get("agent_id") or "").startswith(requested_agent_id + "-")
+                for existing in existing_agents
+            )
+            existing_agents_display = ""
+            if existing_agents and not agent_id_matches_existing:
+                existing_agents_display = _format_existing_agents(existing_agents, client_type, detected_project_name)
+
+            model = context.get("model")
+            model_resolved = model is not None
+            model_name = model.get("name") if model else None
+            persona_data = context.get("persona")
+            persona_key = persona_data.get("persona_key") if persona_data else None
 
             # Update session state
             session_state["agent_id"] = agent_id
             session_state["agent_key"] = agent_data.get("agent_key")
             session_state["persona"] = persona
             session_state["persona_key"] = persona_key
-            session_state["model_key"] = resolved_model_key if model_resolved else None
+            if persona_data:
+                session_state["persona_name"] = persona_data.get("name")
+            session_state["model_key"] = model.get("model_key") if model else None
             session_state["model_id"] = model_id
             session_state["model_name"] = model_name
             session_state["model_resolved"] = model_resolved
@@ -1078,6 +715,10 @@ async def identify(
                 session_state["project_owner"] = git_project.get('owner')
                 session_state["project_repo"] = git_project.get('repo')
                 session_state["repository_url"] = git_project.get('url')
+            repository = context.get("repository")
+            if repository:
+                session_state["repository_key"] = repository.get("repository_key")
+                session_state["repository_url"] = repository.get("repository_url")
             if detected_project_key:
                 session_state["project_key"] = detected_project_key
             if detected_project_name:
@@ -1089,7 +730,8 @@ async def identify(
                 session_state["db_project"] = detected_db_project
                 session_state["db_project_key"] = detected_db_project.get('project_key')
 
-            # Store user info (already fetched before registration)
+            # Store user info
+            user_data = context.get("user") or {}
             if user_data:
                 session_state["user_key"] = user_data.get("user_key")
                 session_state["user_email"] = user_data.get("email")
@@ -1107,66 +749,37 @@ async def identify(
                 if domain_data:
                     session_state["domain_name"] = domain_data.get("name")
 
-            # Store teams info
-            session_state["teams"] = teams
-
-            # Store scopes info
-            session_state["available_scopes"] = available_scopes
-            session_state["default_scope"] = default_scope
-
-            # Set active team if resolved (already done before registration)
-            if resolved_team_key:
-                session_state["active_team_key"] = resolved_team_key
-                session_state["active_team_name"] = resolved_team_name
-                session_state["membership_slug"] = membership_slug
+            # Store teams and scopes info
+            session_state["teams"] = context.get("teams", [])
+            session_state["available_scopes"] = context.get("available_scopes", [])
+            session_state["default_scope"] = context.get("default_scope", {})
+
+            # Set active team if resolved
+            team = context.get("team")
+            if team:
+                session_state["active_team_key"] = team.get("team_key")
+                session_state["active_team_name"] = team.get("name")
+                session_state["membership_slug"] = team.get("membership_slug")
                 # Determine detection method for display
-                if explicit_team_key:
-                    session_state["active_team_method"] = "explicit_team_key"
-                elif explicit_team_slug:
-                    session_state["active_team_method"] = "explicit_team_slug"
-                elif team_detected_from_project:
+                team_method = context.get("team_method")
+                if team_method == "project":
                     session_state["active_team_method"] = f"auto (from project: {detected_project_name})"
-                else:
+                elif team_method == "agent_id":
                     session_state["active_team_method"] = "auto (from agent_id)"
+                else:
+                    session_state["active_team_method"] = team_method
                 # Update default scope to team
                 session_state["default_scope"] = {
                     "scope_type": "team",
-                    "scope_key": resolved_team_key
+                    "scope_key": team.get("team_key")
                 }
 
-            # Try to resolve persona name
-            if persona:
-                try:
-                    personas_result = await _make_request(
-                        config,
-                        "GET",
-                        "/personas",
-                        params={"role": persona}
-                    )
-                    if personas_result.get("success"):
-                        personas = personas_result.get("data", {}).get("personas", [])
-                        if personas:
-                            session_state["persona_name"] = personas[0].get("name")
-                except Exception:
-                    pass
-
-            # Check for active work session
-            active_work_session = None
-            try:
-                work_session_result = await _make_request(
-                    config,
-                    "GET",
-                    "/work-sessions/active"
-                )
-                if work_session_result.get("success"):
-                    active_work_session = work_session_result.get("data", {}).get("session")
-                    if active_work_session:
-                        session_state["active_work_session"] = active_work_session
-                        # Track active session key for automatic activity updates
-                        session_state["active_session_key"] = active_work_session.get("session_key")
-                        session_state["last_session_activity_update"] = None  # Will update on next tool call
-            except Exception:
-                pass  # Continue without work session info
+            # Track active work session for automatic activity updates
+            active_work_session = context.get("work_session")
+            if active_work_session:
+                session_state["active_work_session"] = active_work_session
+                session_state["active_session_key"] = active_work_session.get("session_key")
+                session_state["last_session_activity_update"] = None  # Will update on next tool call
 
             output = "# Identity Confirmed\n\n"
             output += f"Welcome to Collective Memory (CM)!\n\n"
@@ -336,6 +336,56 @@ async def send_message(
         return [types.TextContent(type="text", text=f"Error sending message: {str(e)}")]
 
 
+def format_message(msg: dict, my_agent_key: str = None) -> str:
+    """Format one message (as returned by the API) for get_messages and unread notices."""
+    from_key = msg.get("from_key")
+    to_key = msg.get("to_key")
+    is_mine = from_key == my_agent_key
+    is_to_me = to_key == my_agent_key
+    is_autonomous = msg.get("autonomous", False)
+    scope = msg.get("scope", "broadcast-domain")
+
+    # Status indicators
+    if is_autonomous:
+        status = "🤖"  # Autonomous task
+    elif msg.get("priority") == "urgent":
+        status = "⚠️"
+    elif msg.get("priority") == "high":
+        status = "🚨"
+    else:
+        status = "📭"
+
+    output = f"{status} **{from_key}**"
+    if is_mine:
+        output += " (you)"
+    if to_key:
+        output += f" → {to_key}"
+        if is_to_me:
+            output += " (you)"
+    output += f"\n"
+
+    # Autonomous task banner
+    if is_autonomous and not is_mine:
+        output += f"   🤖 **AUTONOMOUS TASK** - Work on this and reply when complete\n"
+
+    output += f"   *{msg.get('message_type')}* in #{msg.get('channel')} [{scope}]"
+    # Show team scope if set
+    if msg.get('team_key'):
+        output += f" 👥"
+    output += "\n"
+
+    # Content
+    content = msg.get("content", {})
+    if isinstance(content, dict):
+        text = content.get("text", str(content))
+    else:
+        text = str(content)
+    output += f"   {text}\n"
+
+    output += f"   Key: {msg.get('message_key')}\n\n"
+    return output
+
+
 async def get_messages(
     arguments: dict,
     config: Any,
@@ -404,21 +454,21 @@ async def get_messages(
             if not messages:
                 return [types.TextContent(type="text", text="No messages found.")]
 
-            # Auto-mark retrieved messages as read (if we have an agent_key)
+            # Auto-mark retrieved messages as read (if we have an agent_key), in one request
             marked_count = 0
-            if my_agent_key:
-                for msg in messages:
-                    if not msg.get("is_read", False):
-                        try:
-                            await _make_request(
-                                config,
-                                "POST",
-                                f"/messages/mark-read/{msg.get('message_key')}",
-                                params={"reader_key": my_agent_key}
-                            )
-                            marked_count += 1
-                        except Exception:
-                            pass  # Don't fail the whole operation if marking fails
+            unread_keys = [msg.get("message_key") for msg in messages if not msg.get("is_read", False)]
+            if my_agent_key and unread_keys:
+                try:
+                    mark_result = await _make_request(
+                        config,
+                        "POST",
+                        "/messages/mark-read",
+                        json={"reader_key": my_agent_key, "message_keys": unread_keys}
+                    )
+                    if mark_result.get("success"):
+                        marked_count = mark_result.get("data", {}).get("marked_count", 0)
+                except Exception:
+                    pass  # Don't fail the whole operation if marking fails
 
             output = f"## Messages"
             if channel:
@@ -429,51 +479,7 @@ async def get_messages(
             output += ")\n\n"
 
             for msg in messages:
-                from_key = msg.get("from_key")
-                to_key = msg.get("to_key")
-                is_mine = from_key == my_agent_key
-                is_to_me = to_key == my_agent_key
-                is_autonomous = msg.get("autonomous", False)
-                scope = msg.get("scope", "broadcast-domain")
-
-                # Status indicators
-                if is_autonomous:
-                    status = "🤖"  # Autonomous task
-                elif msg.get("priority") == "urgent":
-                    status = "⚠️"
-                elif msg.get("priority") == "high":
-                    status = "🚨"
-                else:
-                    status = "📭"
-
-                output += f"{status} **{from_key}**"
-                if is_mine:
-                    output += " (you)"
-                if to_key:
-                    output += f" → {to_key}"
-                    if is_to_me:
-                        output += " (you)"
-                output += f"\n"
-
-                # Autonomous task banner
-                if is_autonomous and not is_mine:
-                    output += f"   🤖 **AUTONOMOUS TASK** - Work on this and reply when complete\n"
-
-                output += f"   *{msg.get('message_type')}* in #{msg.get('channel')} [{scope}]"
-                # Show team scope if set
-                if msg.get('team_key'):
-                    output += f" 👥"
-                output += "\n"
-
-                # Content
-                content = msg.get("content", {})
-                if isinstance(content, dict):
-                    text = content.get("text", str(content))
-                else:
-                    text = str(content)
-                output += f"   {text}\n"
-
-                output += f"   Key: {msg.get('message_key')}\n\n"
+                output += format_message(msg, my_agent_key)
 
             return [types.TextContent(type="text", text=output)]
         else:
@@ -92,6 +92,34 @@ RETURNS: Confirmation of deletion.""",
             "required": ["relationship_key"]
         }
     ),
+    types.Tool(
+        name="find_path",
+        description="""Find the shortest paths connecting two entities in the knowledge graph.
+
+USE THIS WHEN: You want to know how two entities are related, even when they are not directly connected.
+
+EXAMPLES:
+- Shortest path: {"from_entity_key": "ent-sarah", "to_entity_key": "ent-react"}
+- Top 3 paths within 3 hops: {"from_entity_key": "ent-sarah", "to_entity_key": "ent-react", "max_depth": 3, "k": 3}
+- Only follow some types: {"from_entity_key": "ent-sarah", "to_entity_key": "ent-react", "relationship_types": ["WORKS_ON", "USES"]}
+
+Relationships are followed in either direction unless directed is true.
+Entities outside your accessible scopes are never traversed.
+
+RETURNS: Up to k paths ordered by length, each as a chain of entities and relationships.""",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "from_entity_key": {"type": "string", "description": "Entity to start from"},
+                "to_entity_key": {"type": "string", "description": "Entity to reach"},
+                "max_depth": {"type": "integer", "description": "Maximum hops in a path (default 4, max 6)", "default": 4},
+                "k": {"type": "integer", "description": "Number of shortest paths to return (default 1, max 10)", "default": 1},
+                "relationship_types": {"type": "array", "items": {"type": "string"}, "description": "Only follow these relationship types"},
+                "directed": {"type": "boolean", "description": "Only follow relationships from source to target (default false)", "default": False}
+            },
+            "required": ["from_entity_key", "to_entity_key"]
+        }
+    ),
 ]
 
 
@@ -250,6 +278,78 @@ async def delete_relationship(
         return [types.TextContent(type="text", text=f"Error deleting relationship: {str(e)}")]
 
 
+async def find_path(
+    arguments: dict,
+    config: Any,
+    session_state: dict,
+) -> list[types.TextContent]:
+    """
+    Find the shortest paths between two entities.
+
+    Args:
+        from_entity_key: Entity to start from
+        to_entity_key: Entity to reach
+        max_depth: Maximum hops in a path (default 4)
+        k: Number of paths to return (default 1)
+        relationship_types: Optional list of relationship types to follow
+        directed: Only follow relationships from source to target
+    """
+    from_entity_key = arguments.get("from_entity_key")
+    to_entity_key = arguments.get("to_entity_key")
+
+    if not from_entity_key:
+        return [types.TextContent(type="text", text="Error: from_entity_key is required")]
+    if not to_entity_key:
+        return [types.TextContent(type="text", text="Error: to_entity_key is required")]
+
+    # Get agent_id from session state or fall back to config
+    agent_id = session_state.get("agent_id") or getattr(config, "agent_id", None)
+
+    try:
+        params = {
+            "max_depth": arguments.get("max_depth", 4),
+            "k": arguments.get("k", 1),
+        }
+        if arguments.get("relationship_types"):
+            params["types"] = ",".join(arguments["relationship_types"])
+        if arguments.get("directed"):
+            params["directed"] = "true"
+
+        result = await _make_request(
+            config,
+            "GET",
+            f"/entities/{from_entity_key}/path/{to_entity_key}",
+            params=params,
+            agent_id=agent_id,
+        )
+
+        if result.get("success"):
+            data = result.get("data", {})
+            paths = data.get("paths", [])
+            entities = data.get("entities", {})
+            if not paths:
+                return [types.TextContent(type="text", text=f"No path found within {params['max_depth']} hops.")]
+
+            def label(key: str) -> str:
+                entity = entities.get(key)
+                return f"{entity['name']} ({entity['entity_type']})" if entity else key
+
+            output = f"Found {len(paths)} path(s):\n\n"
+            for i, path in enumerate(paths, 1):
+                output += f"**Path {i}** ({path['length']} hops)\n"
+                output += f"  {label(path['entity_keys'][0])}\n"
+                for key, rel in zip(path["entity_keys"][1:], path["relationships"]):
+                    arrow = f"-[{rel['relationship_type']}]->" if rel["direction"] == "outgoing" else f"<-[{rel['relationship_type']}]-"
+                    output += f"  {arrow} {label(key)}\n"
+                output += "\n"
+            return [types.TextContent(type="text", text=output)]
+        else:
+            return [types.TextContent(type="text", text=f"Error: {result.get('msg', 'Unknown error')}")]
+
+    except Exception as e:
+        return [types.TextContent(type="text", text=f"Error finding path: {str(e)}")]
+
+
 # ============================================================
 # TOOL HANDLERS MAPPING
 # ============================================================
@@ -258,4 +358,5 @@ TOOL_HANDLERS = {
     "list_relationships": list_relationships,
     "create_relationship": create_relationship,
     "delete_relationship": delete_relationship,
+    "find_path": find_path,
 }
\ No newline at end of file
@@ -9,6 +9,8 @@ import mcp.types as types
 from contextvars import ContextVar
 from typing import Any, Optional
 
+from ..api_client import get_api_client
+
 
 # Context variable for per-session PAT (used in SSE multi-user mode)
 # This allows each SSE connection to have its own authentication
@@ -25,6 +27,29 @@ def get_session_pat() -> Optional[str]:
     return _session_pat.get()
 
 
+def api_headers(config: Any, agent_id: str = None) -> dict:
+    """
+    Build headers for a request to the Collective Memory API.
+
+    Args:
+        config: Configuration object with optional pat
+        agent_id: Agent ID to include in X-Agent-Id header for activity tracking
+    """
+    headers = {}
+    if agent_id:
+        headers['X-Agent-Id'] = agent_id
+
+    # Include PAT authentication
+    # Priority: 1) Per-session PAT (SSE multi-user), 2) Config PAT (env/stdio)
+    session_pat = get_session_pat()
+    if session_pat:
+        headers['Authorization'] = f'Bearer {session_pat}'
+    elif hasattr(config, 'pat') and config.pat:
+        headers['Authorization'] = f'Bearer {config.pat}'
+
+    return headers
+
+
 async def _make_request(
     config: Any,
     method: str,
@@ -36,6 +61,8 @@ async def _make_request(
     """
     Make HTTP request to the Collective Memory API.
 
+    Uses the pooled API client, so consecutive calls reuse connections.
+
     Args:
         config: Configuration object with api_endpoint, timeout, and optional pat
         method: HTTP method (GET, POST, PUT, DELETE)
@@ -47,30 +74,18 @@ async def _make_request(
     Returns:
         Parsed JSON response as dict
     """
-    headers = {}
-    if agent_id:
-        headers['X-Agent-Id'] = agent_id
-
-    # Include PAT authentication
-    # Priority: 1) Per-session PAT (SSE multi-user), 2) Config PAT (env/stdio)
-    session_pat = get_session_pat()
-    if session_pat:
-        headers['Authorization'] = f'Bearer {session_pat}'
-    elif hasattr(config, 'pat') and config.pat:
-        headers['Authorization'] = f'Bearer {config.pat}'
+    headers = api_headers(config, agent_id)
 
     try:
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            url = f"{config.api_endpoint}{endpoint}"
-            response = await client.request(
-                method=method,
-                url=url,
-                json=json,
-                params=params,
-                headers=headers if headers else None,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await get_api_client().request(
+            method,
+            endpoint,
+            json=json,
+            params=params,
+            headers=headers if headers else None,
+        )
+        response.raise_for_status()
+        return response.json()
     except httpx.RequestError as e:
         # Connection/transport issues (DNS, refused port, etc.)
         raise RuntimeError(
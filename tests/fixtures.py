@@ -4,10 +4,13 @@ Collective Memory Platform - Test Data Factory
 CMDataFactory provides lazy-loaded, session-scoped test fixtures
 following Jai API patterns for practical scenario testing.
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
 from datetime import datetime, timezone
 import uuid
 
+if TYPE_CHECKING:
+    from api.models import Team, User
+
 
 class CMDataFactory:
     """
@@ -104,7 +107,6 @@ class CMDataFactory:
                 'entity_type': 'Person',
                 'name': 'Test Entity',
                 'properties': {'role': 'tester'},
-                'context_domain': 'test',
                 'confidence': 1.0,
                 'source': 'test-factory'
             },
@@ -112,7 +114,6 @@ class CMDataFactory:
                 'entity_type': 'Person',
                 'name': 'John Tester',
                 'properties': {'email': 'john@test.com', 'role': 'developer'},
-                'context_domain': 'work.testing',
                 'confidence': 1.0,
                 'source': 'test-factory'
             },
@@ -120,7 +121,6 @@ class CMDataFactory:
                 'entity_type': 'Project',
                 'name': 'Test Project',
                 'properties': {'status': 'active', 'priority': 'high'},
-                'context_domain': 'work.testing',
                 'confidence': 1.0,
                 'source': 'test-factory'
             },
@@ -128,7 +128,6 @@ class CMDataFactory:
                 'entity_type': 'Technology',
                 'name': 'Python',
                 'properties': {'version': '3.11', 'category': 'language'},
-                'context_domain': 'technology',
                 'confidence': 1.0,
                 'source': 'test-factory'
             },
@@ -136,7 +135,6 @@ class CMDataFactory:
                 'entity_type': 'Organization',
                 'name': 'Test Corp',
                 'properties': {'industry': 'technology'},
-                'context_domain': 'business',
                 'confidence': 1.0,
                 'source': 'test-factory'
             }
@@ -155,7 +153,6 @@ class CMDataFactory:
             entity_type=entity_type,
             name=name,
             properties=kwargs.get('properties', {}),
-            context_domain=kwargs.get('context_domain', 'test'),
             confidence=kwargs.get('confidence', 1.0),
             source=kwargs.get('source', 'test-factory')
         )
@@ -215,6 +212,40 @@ class CMDataFactory:
         self._created_objects.append(relationship)
         return relationship
 
+    # ========== User & Team Fixtures ==========
+
+    def create_user(self, email: str, role: str = 'user', **kwargs) -> 'User':
+        """Create a new user (password hash is a placeholder)."""
+        from api.models import User
+
+        user = User(
+            email=email,
+            password_hash='test-hash',
+            first_name=kwargs.get('first_name', 'Test'),
+            last_name=kwargs.get('last_name', 'User'),
+            role=role,
+            domain_key=kwargs.get('domain_key')
+        )
+        user.save()
+
+        self._created_objects.append(user)
+        return user
+
+    def create_team(self, name: str, domain_key: str = None, **kwargs) -> 'Team':
+        """Create a new team."""
+        from api.models import Team
+
+        team = Team(
+            name=name,
+            slug=kwargs.get('slug', name.lower().replace(' ', '-')),
+            domain_key=domain_key,
+            status=kwargs.get('status', 'active')
+        )
+        team.save()
+
+        self._created_objects.append(team)
+        return team
+
     # ========== Persona Fixtures ==========
 
     @property
@@ -0,0 +1,270 @@
+"""
+Collective Memory Platform - Activity Tests
+
+Tests for activity recording, the write-behind activity buffer and partitioning.
+"""
+import threading
+import time
+
+import pytest
+
+from api.services.activity_buffer import ActivityBuffer
+
+
+class RecordingBuffer(ActivityBuffer):
+    """Activity buffer that records batches instead of inserting them."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._app = object()  # Enables the worker thread
+        self.written_batches = []
+        self.fail_next = 0
+
+    def _write(self, rows):
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            raise RuntimeError("Write failed")
+        self.written_batches.append([row['n'] for row in rows])
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestActivityBuffer:
+    """Tests for ActivityBuffer batching, draining and backpressure. These run without a database."""
+
+    @pytest.mark.model
+    def test_flushes_on_batch_size(self):
+        """A full batch is written without waiting for flush_ms."""
+        buffer = RecordingBuffer(batch_size=10, flush_ms=60000)
+        for n in range(25):
+            buffer.add({'n': n})
+
+        assert _wait_for(lambda: len(buffer.written_batches) == 2)
+        assert buffer.written_batches == [list(range(10)), list(range(10, 20))]
+        assert buffer.get_stats()['pending'] == 5
+        buffer.shutdown()
+
+    @pytest.mark.model
+    def test_flushes_on_timer(self):
+        """A partial batch is written once its oldest row has waited flush_ms."""
+        buffer = RecordingBuffer(batch_size=100, flush_ms=50)
+        for n in range(3):
+            buffer.add({'n': n})
+
+        assert _wait_for(lambda: buffer.written_batches == [[0, 1, 2]])
+        buffer.shutdown()
+
+    @pytest.mark.model
+    def test_flush_and_shutdown_drain(self):
+        """flush() and shutdown() write every buffered row."""
+        buffer = RecordingBuffer(batch_size=100, flush_ms=60000)
+        buffer.add({'n': 0})
+        assert buffer.flush(timeout=2)
+        assert buffer.written_batches == [[0]]
+
+        buffer.add({'n': 1})
+        buffer.add({'n': 2})
+        buffer.shutdown(timeout=2)
+        assert buffer.written_batches == [[0], [1, 2]]
+        assert buffer.get_stats()['written'] == 3
+
+    @pytest.mark.model
+    def test_backpressure(self):
+        """A full buffer is written immediately and producers are never lost under load."""
+        buffer = RecordingBuffer(batch_size=1000, flush_ms=60000, max_pending=20, block_ms=1000)
+
+        def produce(offset):
+            for n in range(100):
+                buffer.add({'n': offset + n})
+
+        threads = [threading.Thread(target=produce, args=(i * 100,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        buffer.shutdown(timeout=2)
+
+        written = sorted(n for batch in buffer.written_batches for n in batch)
+        assert written == list(range(400))
+        assert all(len(batch) <= 20 for batch in buffer.written_batches)
+        assert buffer.get_stats()['dropped'] == 0
+
+    @pytest.mark.model
+    def test_drops_when_full(self):
+        """Rows are dropped, not queued without bound, if the writer cannot keep up."""
+        buffer = RecordingBuffer(batch_size=1000, flush_ms=60000, max_pending=2, block_ms=10)
+        buffer._ensure_worker = lambda: None  # No writer
+
+        assert [buffer.add({'n': n}) for n in range(4)] == [True, True, False, False]
+        assert buffer.get_stats()['dropped'] == 2
+
+    @pytest.mark.model
+    def test_failed_batches_are_counted(self):
+        """A failing write is logged and counted, and later batches still land."""
+        buffer = RecordingBuffer(batch_size=2, flush_ms=60000)
+        buffer.fail_next = 1
+        for n in range(4):
+            buffer.add({'n': n})
+        buffer.shutdown(timeout=2)
+
+        assert buffer.written_batches == [[2, 3]]
+        assert buffer.get_stats()['failed'] == 2
+
+
+class TestActivityService:
+    """Tests for ActivityService recording."""
+
+    @pytest.mark.integration
+    def test_record_sync_mode(self, app, db):
+        """In sync mode a recorded activity is readable straight away."""
+        from api.models import Activity
+        from api.services.activity import activity_service
+
+        with app.app_context():
+            activity = activity_service.record_search(actor='test-agent', query='buffered', result_count=2)
+            try:
+                stored = Activity.get_by_key(activity.activity_key)
+                assert stored is not None
+                assert stored.extra_data['query'] == 'buffered'
+            finally:
+                db.session.execute(
+                    Activity.__table__.delete().where(Activity.activity_key == activity.activity_key)
+                )
+                db.session.commit()
+
+
+class TestActivityPartitions:
+    """Tests for daily activity partitions and partition-drop retention."""
+
+    @pytest.fixture
+    def partitioned(self, app, db):
+        """Skip unless the activities table is partitioned."""
+        from api.models import Activity
+
+        with app.app_context():
+            if not Activity.is_partitioned():
+                pytest.skip("activities table is not partitioned")
+            yield Activity
+
+    @pytest.mark.integration
+    def test_upcoming_partitions(self, partitioned, db):
+        """Upcoming days get partitions, and rows stranded in the default partition move into them."""
+        from datetime import timedelta
+        from sqlalchemy import text
+        from api.models.base import get_now
+
+        Activity = partitioned
+        day = get_now().date() + timedelta(days=30)
+        name = Activity.partition_name(day)
+        start, _ = Activity._day_bounds(day)
+        created = []
+        try:
+            db.session.execute(Activity.__table__.insert(), [{
+                'activity_key': 'partition-test', 'activity_type': 'entity_read',
+                'actor': 'test', 'extra_data': {}, 'created_at': start + timedelta(hours=1),
+            }])
+            db.session.commit()
+
+            created.extend(Activity.ensure_partitions(days_ahead=30))
+
+            assert name in created
+            assert day in Activity.list_partitions()
+            located = db.session.execute(
+                text("SELECT tableoid::regclass::text FROM activities WHERE activity_key = 'partition-test'")
+            ).scalar()
+            assert located == name
+        finally:
+            db.session.rollback()
+            for partition in created or [name]:
+                db.session.execute(text(f"DROP TABLE IF EXISTS {partition}"))
+            db.session.commit()
+
+    @pytest.mark.integration
+    def test_expired_partitions_are_dropped(self, partitioned, db):
+        """Partitions past retention are detached and dropped; recent ones stay."""
+        from datetime import timedelta
+        from sqlalchemy import text
+        from api.models.base import get_now
+        from api.services.activity import activity_service
+
+        Activity = partitioned
+        old_day = get_now().date() - timedelta(days=Activity.RETENTION_DAYS + 2)
+        old_name = Activity.partition_name(old_day)
+        Activity._create_partition(old_day)
+        db.session.commit()
+
+        result = activity_service.run_maintenance()
+
+        assert old_name in result['detached']
+        assert old_day not in Activity.list_partitions()
+        assert get_now().date() in Activity.list_partitions()
+        assert db.session.execute(text("SELECT to_regclass(:name)"), {'name': old_name}).scalar() is None
+
+
+class TestActivityRollups:
+    """Tests for minute, hour and day activity rollups."""
+
+    @pytest.mark.model
+    def test_granularity_for_bucket(self):
+        """Timelines read the coarsest rollup that divides the bucket size."""
+        from api.models.activity_rollup import ActivityRollup
+
+        assert ActivityRollup.granularity_for(1) == 'minute'
+        assert ActivityRollup.granularity_for(15) == 'minute'
+        assert ActivityRollup.granularity_for(60) == 'hour'
+        assert ActivityRollup.granularity_for(180) == 'hour'
+        assert ActivityRollup.granularity_for(1440) == 'day'
+
+    @pytest.mark.model
+    def test_cover_uses_coarsest_aligned_segments(self):
+        """A range is split into whole days, whole hours and minute edges."""
+        from datetime import datetime, timedelta, timezone
+        from api.models.activity_rollup import ActivityRollup
+
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        since = (now - timedelta(days=3)).replace(hour=22, minute=30)
+        until = (now - timedelta(days=1)).replace(hour=2, minute=15)
+        segments = ActivityRollup.cover(since, until)
+
+        assert [g for g, _, _ in segments] == ['minute', 'hour', 'day', 'hour', 'minute']
+        assert segments[0][1] == since and segments[-1][2] == until
+        for (_, _, end), (_, start, _) in zip(segments, segments[1:]):
+            assert end == start
+
+    @pytest.mark.integration
+    def test_rollups_match_raw_activities(self, app, db):
+        """Rollups maintained on record give the same summary and timeline as raw rows."""
+        from datetime import timedelta
+        from api.models import Activity, ActivityRollup
+        from api.models.base import get_now
+        from api.services.activity import activity_service
+
+        with app.app_context():
+            domain_key = 'rollup-test-domain'
+            since = ActivityRollup.floor(get_now() - timedelta(hours=2), 'hour')
+            recorded = []
+            try:
+                for n in range(30):
+                    recorded.append(activity_service.record_agent_heartbeat(
+                        actor=f'rollup-agent-{n % 3}', agent_key='rollup-agent', domain_key=domain_key
+                    ))
+                recorded.append(activity_service.record_search(actor='rollup-agent-0', domain_key=domain_key))
+
+                assert ActivityRollup.get_summary(since=since, domain_key=domain_key) == \
+                    Activity.get_summary(since=since, domain_key=domain_key)
+                assert ActivityRollup.get_summary(since=since, domain_key=domain_key)['total'] == 31
+                for bucket_minutes in (5, 60, 1440):
+                    start = ActivityRollup.floor(since, ActivityRollup.granularity_for(bucket_minutes))
+                    assert ActivityRollup.get_timeline(bucket_minutes=bucket_minutes, since=since, domain_key=domain_key) == \
+                        Activity.get_timeline(bucket_minutes=bucket_minutes, since=start, domain_key=domain_key)
+            finally:
+                db.session.execute(Activity.__table__.delete().where(
+                    Activity.activity_key.in_([a.activity_key for a in recorded])
+                ))
+                db.session.execute(ActivityRollup.__table__.delete().where(ActivityRollup.domain_key == domain_key))
+                db.session.commit()
@@ -0,0 +1,201 @@
+"""
+Collective Memory Platform - Adjacency Cache Tests
+
+Tests for the in-memory CSR adjacency index. These run without a database.
+"""
+import threading
+
+import pytest
+
+from api.utils.adjacency import AdjacencyCache, AdjacencyIndex
+
+TEAM = ('acme.com', 'team', 'team-a')
+DOMAIN = ('acme.com', 'domain', 'acme.com')
+OTHER = ('other.com', None, None)
+
+
+def _rows():
+    return [
+        ('r1', 'a', 'b', 'WORKS_ON', DOMAIN, TEAM),
+        ('r2', 'b', 'c', 'USES', TEAM, DOMAIN),
+        ('r3', 'c', 'a', 'DEPENDS_ON', DOMAIN, DOMAIN),
+        ('r4', 'c', 'x', 'RELATES_TO', DOMAIN, OTHER),
+        ('r5', 'd', 'd', 'SELF', DOMAIN, DOMAIN),
+    ]
+
+
+def _edge_keys(index, node):
+    return sorted(edge[0] for edge in index.edges(node))
+
+
+class TestAdjacencyIndex:
+    """Tests for AdjacencyIndex CSR construction and overlay."""
+
+    @pytest.mark.model
+    def test_edges_in_both_directions(self):
+        """Each relationship is reachable from both endpoints."""
+        index = AdjacencyIndex.from_rows('acme.com', _rows())
+
+        assert _edge_keys(index, 'a') == ['r1', 'r3']
+        assert _edge_keys(index, 'c') == ['r2', 'r3', 'r4']
+        assert _edge_keys(index, 'x') == ['r4']
+        assert _edge_keys(index, 'd') == ['r5']
+        assert _edge_keys(index, 'missing') == []
+        assert list(index.edges('b'))[0] == ('r1', 'a', 'b', 'WORKS_ON')
+
+    @pytest.mark.model
+    def test_node_scopes_are_interned(self):
+        """Node scopes are stored once per distinct scope triple."""
+        index = AdjacencyIndex.from_rows('acme.com', _rows())
+
+        assert index.node_scope('b') == TEAM
+        assert index.node_scope('x') == OTHER
+        assert index.node_scope('missing') is None
+        assert len(index.scopes) == 3
+
+    @pytest.mark.model
+    def test_overlay_add_and_remove(self):
+        """Incremental changes are visible before compaction."""
+        index = AdjacencyIndex.from_rows('acme.com', _rows())
+
+        index.add_edge(('r6', 'a', 'new', 'WORKS_ON'), DOMAIN, TEAM)
+        assert index.remove_edge('r1', 'a', 'b') is True
+        assert index.remove_edge('r1', 'a', 'b') is False
+
+        assert _edge_keys(index, 'a') == ['r3', 'r6']
+        assert _edge_keys(index, 'b') == ['r2']
+        assert _edge_keys(index, 'new') == ['r6']
+        assert index.node_scope('new') == TEAM
+        assert index.edge_count == 5
+
+        assert index.remove_edge('r6', 'a', 'new') is True
+        assert _edge_keys(index, 'new') == []
+
+    @pytest.mark.model
+    def test_compaction_preserves_edges(self):
+        """Folding the overlay into the CSR arrays keeps the same graph."""
+        index = AdjacencyIndex.from_rows('acme.com', _rows())
+        index.add_edge(('r6', 'a', 'new', 'WORKS_ON'), DOMAIN, TEAM)
+        index.remove_edge('r2', 'b', 'c')
+        index.set_node_scope('c', TEAM)
+
+        compacted = index.compacted()
+
+        assert compacted.overlay_size == 0
+        for node in ('a', 'b', 'c', 'd', 'x', 'new'):
+            assert _edge_keys(compacted, node) == _edge_keys(index, node)
+            assert compacted.node_scope(node) == index.node_scope(node)
+
+
+class TestAdjacencyCache:
+    """Tests for AdjacencyCache eviction and incremental updates."""
+
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        """Provide a cache whose indexes are built from in-memory rows."""
+        graphs = {
+            'acme.com': _rows(),
+            'other.com': [('r4', 'c', 'x', 'RELATES_TO', DOMAIN, OTHER)],
+        }
+        cache = AdjacencyCache(max_bytes=10 * 1024 * 1024, ttl_seconds=300)
+        monkeypatch.setattr(
+            cache, '_build_index',
+            lambda domain_key: AdjacencyIndex.from_rows(domain_key, graphs.get(domain_key, []))
+        )
+        return cache
+
+    @pytest.mark.model
+    def test_lazy_build_per_domain(self, cache):
+        """Indexes are built on first use and reused afterwards."""
+        assert sorted(e[0] for e in cache.edges('x', 'other.com')) == ['r4']
+        assert sorted(e[0] for e in cache.edges('a', 'acme.com')) == ['r1', 'r3']
+        cache.edges('a', 'acme.com')
+
+        stats = cache.get_stats()
+        assert stats['builds'] == 2
+        assert stats['hits'] == 1
+        assert cache.domain_of('x') == (True, 'other.com')
+
+    @pytest.mark.model
+    def test_lru_eviction(self, cache):
+        """Least recently used domains are evicted to stay within budget."""
+        cache.get_index('acme.com')
+        cache.get_index('other.com')
+        cache.max_bytes = cache.get_index('other.com').nbytes
+
+        cache.get_index('other.com')
+        cache._evict()
+
+        stats = cache.get_stats()
+        assert [d['domain_key'] for d in stats['domains']] == ['other.com']
+        assert stats['evictions'] == 1
+
+    @pytest.mark.model
+    def test_relationship_updates(self, cache):
+        """Saved and deleted relationships are applied to every loaded index they touch."""
+        cache.get_index('acme.com')
+        cache.get_index('other.com')
+
+        class Rel:
+            relationship_key = 'r4'
+            from_entity_key = 'c'
+            to_entity_key = 'y'
+            relationship_type = 'RELATES_TO'
+
+        class Ent:
+            def __init__(self, key, scope):
+                self.entity_key = key
+                self.domain_key, self.scope_type, self.scope_key = scope
+
+        # r4 re-pointed from c->x to c->y, where y is in acme.com
+        cache.relationship_saved(Rel(), Ent('c', DOMAIN), Ent('y', TEAM), previous=('c', 'x'))
+        assert sorted(e[0] for e in cache.edges('x', 'acme.com')) == []
+        assert sorted(e[0] for e in cache.edges('x', 'other.com')) == []
+        assert sorted(e[0] for e in cache.edges('y', 'acme.com')) == ['r4']
+
+        cache.relationship_deleted('r1', 'a', 'b')
+        assert sorted(e[0] for e in cache.edges('a', 'acme.com')) == ['r3']
+
+        cache.entity_changed(Ent('b', DOMAIN))
+        assert cache.node_scope('b', 'acme.com') == DOMAIN
+
+    @pytest.mark.model
+    def test_compaction_threshold(self, cache):
+        """Large overlays are folded back into a fresh CSR index."""
+        cache.compact_threshold = 2
+        index = cache.get_index('acme.com')
+
+        cache.relationship_deleted('r1', 'a', 'b')
+        cache.relationship_deleted('r2', 'b', 'c')
+
+        assert cache.get_index('acme.com') is not index
+        assert cache.get_index('acme.com').overlay_size == 0
+        assert cache.get_stats()['compactions'] == 1
+
+    @pytest.mark.model
+    def test_concurrent_misses_build_once(self, cache, monkeypatch):
+        """Threads missing the same domain wait for one build instead of each building it."""
+        build = cache._build_index
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_build(domain_key):
+            calls.append(domain_key)
+            started.set()
+            release.wait(5)
+            return build(domain_key)
+
+        monkeypatch.setattr(cache, '_build_index', slow_build)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_index('acme.com'))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        assert cache.get_index('other.com').domain_key == 'other.com'  # Other domains are not blocked
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert calls == ['acme.com', 'other.com']
+        assert len(results) == 4 and all(index is results[0] for index in results)
@@ -0,0 +1,120 @@
+"""
+Collective Memory Platform - Agent Tests
+
+Tests for agent bootstrap: startup context resolution and registration.
+"""
+import pytest
+
+from api.services.agent_bootstrap import AgentBootstrapService
+
+
+TEAMS = [
+    {'team_key': 'team-api', 'name': 'API Team', 'slug': 'api', 'membership_slug': 'wh'},
+    {'team_key': 'team-web', 'name': 'Web', 'slug': 'dashboard', 'membership_slug': None},
+]
+
+
+class TestAgentBootstrapService:
+    """Tests for the matching rules identify() relies on. These run without a database."""
+
+    @pytest.mark.model
+    def test_match_directory_priority(self):
+        """Exact repository names win over project names, then normalized names are tried."""
+        projects = [
+            {'project_key': 'p1', 'name': 'collective-memory', 'repository_name': 'cm-api'},
+            {'project_key': 'p2', 'name': 'Other', 'repository_name': 'collective-memory'},
+            {'project_key': 'p3', 'name': 'My Project', 'repository_name': None},
+        ]
+        match = AgentBootstrapService.match_directory
+
+        assert match('collective-memory', projects)['project_key'] == 'p2'
+        assert match('CM-API', projects)['project_key'] == 'p1'
+        assert match('my_project', projects)['project_key'] == 'p3'
+        assert match('unrelated', projects) is None
+        assert match(None, projects) is None
+
+    @pytest.mark.model
+    def test_resolve_team_priority(self):
+        """Explicit team > project name > agent_id > the project's own teams."""
+        resolve = AgentBootstrapService.resolve_team
+        project = {'teams': [
+            {'team_key': 'team-web', 'role': 'viewer'},
+            {'team_key': 'team-api', 'role': 'owner'},
+        ]}
+
+        assert resolve(TEAMS, team_slug='dashboard', project_name='api') == (TEAMS[1], 'explicit_team_slug')
+        assert resolve(TEAMS, team_key='team-unknown') == (None, 'explicit_team_key')
+        assert resolve(TEAMS, project_name='dashboard-ui', agent_id='cc-api') == (TEAMS[1], 'project')
+        assert resolve(TEAMS, project_name='unrelated', agent_id='cc-api-auth') == (TEAMS[0], 'agent_id')
+        assert resolve(TEAMS, project=project, agent_id='cc-misc') == (TEAMS[0], 'project')
+        assert resolve([], project=project) == (None, None)
+
+
+class TestAgentBootstrapRoute:
+    """Tests for POST /api/agents/bootstrap."""
+
+    @pytest.fixture
+    def member(self, factory, db):
+        """A domain user in one team, with a project the team owns."""
+        from api.models import Agent, Domain, Project, Session, TeamMembership, TeamProject
+
+        domain = Domain(name='Bootstrap Test', slug='bootstrap-test')
+        domain.save()
+        user = factory.create_user('bootstrap@example.com', domain_key=domain.domain_key,
+                                   first_name='Wayne', last_name='Hall')
+        team = factory.create_team('Bootstrap Team', domain_key=domain.domain_key, slug='bootstrap')
+        membership = TeamMembership(team_key=team.team_key, user_key=user.user_key, role='member', slug='wh')
+        membership.save()
+        project = Project(name='Bootstrap Project', repository_name='bootstrap-repo', domain_key=domain.domain_key)
+        project.save()
+        association = TeamProject(team_key=team.team_key, project_key=project.project_key, role='owner')
+        association.save()
+
+        yield user, team, project
+
+        db.session.rollback()
+        db.session.query(Session).filter_by(user_key=user.user_key).delete()
+        db.session.query(Agent).filter_by(user_key=user.user_key).delete()
+        db.session.query(TeamProject).filter_by(team_project_key=association.team_project_key).delete()
+        db.session.query(Project).filter_by(project_key=project.project_key).delete()
+        db.session.query(TeamMembership).filter_by(membership_key=membership.membership_key).delete()
+        db.session.commit()
+        factory.cleanup()
+        db.session.delete(domain)
+        db.session.commit()
+
+    @pytest.mark.integration
+    def test_bootstrap_registers_with_context(self, member, api_client):
+        """One request detects the project and team, applies the membership slug and registers."""
+        user, team, project = member
+
+        response = api_client.post('/api/agents/bootstrap', json={
+            'agent_id': 'cc-bootstrap-test',
+            'client': 'claude-code',
+            'model_id': 'no-such-model',
+            'directory_name': 'bootstrap-repo',
+        }, headers={'Authorization': f'Bearer {user.pat}'})
+        data = response.get_json()['data']
+
+        assert response.status_code == 201
+        assert data['agent']['agent_id'] == 'cc-bootstrap-wh'
+        assert data['agent']['team_key'] == team.team_key
+        assert data['agent']['project_key'] == project.project_key
+        assert data['agent']['session_key']
+        assert data['project_detection_method'] == 'directory_match'
+        assert data['team']['team_key'] == team.team_key and data['team_method'] == 'project'
+        assert [t['team_key'] for t in data['teams']] == [team.team_key]
+        assert data['model'] is None
+        assert data['existing_agents'] == []
+        assert 'pat' not in data['user']
+
+        # Reconnecting finds the agent registered above
+        response = api_client.post('/api/agents/bootstrap', json={
+            'agent_id': 'cc-bootstrap-test', 'client': 'claude-code',
+        }, headers={'Authorization': f'Bearer {user.pat}'})
+        data = response.get_json()['data']
+
+        assert response.status_code == 200
+        assert [a['agent_id'] for a in data['existing_agents']] == ['cc-bootstrap-wh']
+        assert data['project'] is None
+        assert [p['project_key'] for p in data['projects']] == [project.project_key]
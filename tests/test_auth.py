@@ -0,0 +1,110 @@
+"""
+Collective Memory Platform - Auth Tests
+
+Tests for the token cache and throttled session activity writes.
+"""
+from datetime import timedelta
+
+import pytest
+
+from api.services.auth_cache import AuthCache
+
+
+class TestAuthCache:
+    """Tests for AuthCache bookkeeping. These run without a database."""
+
+    @pytest.mark.model
+    def test_bounded_and_invalidated_by_user_and_session(self):
+        """Least recently used tokens are evicted, and invalidation drops every token of a user."""
+        from api.models import User, Session
+        from api.models.base import get_now
+
+        cache = AuthCache(ttl_seconds=60, max_entries=2)
+        alice, bob = User(user_key='alice', email='a@example.com'), User(user_key='bob', email='b@example.com')
+        session = Session(session_key='s1', user_key='alice', expires_at=get_now() + timedelta(hours=1))
+
+        cache.put('session', 'cookie-a', alice, session)
+        cache.put('pat', 'pat-a', alice)
+        cache.put('pat', 'pat-b', bob)
+
+        assert cache.get_stats()['entries'] == 2 and cache.evictions == 1
+        assert cache.invalidate_session('s1') is False  # Evicted first
+        assert cache.invalidate_user('alice') == 1
+        assert cache.invalidate_user('bob') == 1
+        assert cache.get_stats()['entries'] == 0
+
+    @pytest.mark.model
+    def test_never_outlives_session(self):
+        """Expired sessions are not cached, and a disabled cache stores nothing."""
+        from api.models import User, Session
+        from api.models.base import get_now
+
+        user = User(user_key='alice', email='a@example.com')
+        expired = Session(session_key='s1', user_key='alice', expires_at=get_now() - timedelta(seconds=1))
+
+        cache = AuthCache(ttl_seconds=60)
+        cache.put('session', 'cookie-a', user, expired)
+        assert cache.get('session', 'cookie-a') is None
+
+        disabled = AuthCache(ttl_seconds=0)
+        disabled.put('pat', 'pat-a', user)
+        assert disabled.get_stats()['entries'] == 0
+
+
+class TestCachedAuthentication:
+    """Tests for cached PAT and session authentication through the API."""
+
+    @pytest.fixture
+    def user(self, factory, db):
+        from api.models import Session
+
+        user = factory.create_user('auth-cache@example.com')
+        yield user
+        db.session.rollback()
+        db.session.query(Session).filter_by(user_key=user.user_key).delete()
+        db.session.commit()
+        factory.cleanup()
+
+    @pytest.mark.integration
+    def test_pat_cached_until_rotated(self, user, api_client):
+        """Repeated PAT requests are cache hits, and the old PAT stops working once rotated."""
+        from api.services.auth_cache import auth_cache
+
+        old_pat = user.pat
+        headers = {'Authorization': f'Bearer {old_pat}'}
+        assert api_client.get('/api/auth/me', headers=headers).status_code == 200
+
+        hits = auth_cache.hits
+        assert api_client.get('/api/auth/me', headers=headers).status_code == 200
+        assert auth_cache.hits == hits + 1
+
+        response = api_client.post('/api/auth/pat/regenerate', headers=headers)
+        new_pat = response.get_json()['data']['pat']
+
+        assert api_client.get('/api/auth/me', headers=headers).status_code == 401
+        assert api_client.get('/api/auth/me', headers={'Authorization': f'Bearer {new_pat}'}).status_code == 200
+
+    @pytest.mark.integration
+    def test_session_activity_throttled_and_logout(self, user, api_client, db):
+        """Reads within the touch interval do not write, and logout invalidates the cookie."""
+        from api.models import Session
+        from api.models.base import get_now
+
+        session = Session.create_for_user(user.user_key)
+        stale = get_now() - timedelta(hours=1)
+        session.last_activity_at = stale
+        session.save()
+        api_client.set_cookie('cm_session', session.token)
+
+        assert api_client.get('/api/auth/me').status_code == 200
+        db.session.expire_all()
+        touched = Session.get_by_key(session.session_key).last_activity_at
+        assert touched > stale
+
+        assert api_client.get('/api/auth/me').status_code == 200
+        db.session.expire_all()
+        assert Session.get_by_key(session.session_key).last_activity_at == touched
+
+        assert api_client.post('/api/auth/logout').status_code == 200
+        api_client.set_cookie('cm_session', session.token)
+        assert api_client.get('/api/auth/me').status_code == 401
@@ -400,3 +400,83 @@ class TestConversationScenarios:
         # Messages belong to the conversation
         for msg in conversation_scenario['messages']:
             assert msg.conversation_key == conversation_scenario['conversation'].conversation_key
+
+
+class TestAsgiChatStream:
+    """Load test for chat streams served on the ASGI event loop."""
+
+    @pytest.fixture
+    def streaming(self, app, db, factory, monkeypatch):
+        """A conversation, the ASGI app, and a fake model streaming at a fixed rate."""
+        from api import config
+        from api.asgi import create_asgi_app
+        from api.models import ChatMessage
+        from api.providers import FakeProvider, ProviderRegistry
+
+        class CountingProvider(FakeProvider):
+            """Fake provider that records how many streams were open at once."""
+
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.open = 0
+                self.peak = 0
+
+            async def stream_completion(self, *args, **kwargs):
+                self.open += 1
+                self.peak = max(self.peak, self.open)
+                try:
+                    async for chunk in super().stream_completion(*args, **kwargs):
+                        yield chunk
+                finally:
+                    self.open -= 1
+
+        provider = CountingProvider(tokens_per_second=20, tokens=10)  # 0.5s per stream
+        monkeypatch.setattr(config, 'CM_CHAT_MODEL', 'fake-load')
+        monkeypatch.setitem(ProviderRegistry._providers, 'fake', provider)
+
+        persona = factory.get_persona('asgi', role='asgi-load-tester')
+        conversation_key = factory.get_conversation('asgi', persona=persona).conversation_key
+        yield create_asgi_app(app), conversation_key, provider
+
+        db.session.rollback()
+        ChatMessage.query.filter_by(conversation_key=conversation_key).delete()
+        db.session.commit()
+
+    @pytest.mark.conversation
+    def test_concurrent_streams_share_event_loop(self, streaming):
+        """Concurrent streams overlap on one loop instead of queueing for threads."""
+        import asyncio
+        import time
+
+        import httpx
+
+        asgi, conversation_key, provider = streaming
+        streams = 24
+        url = f'/api/conversations/{conversation_key}/messages/stream'
+
+        async def run():
+            transport = httpx.ASGITransport(app=asgi)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test', timeout=30) as client:
+                missing = await client.post(url, json={})
+                responses = await asyncio.gather(*[
+                    client.post(url, json={'content': f'load test message {i}'}) for i in range(streams)
+                ])
+            return missing, responses
+
+        start = time.perf_counter()
+        missing, responses = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        assert missing.status_code == 400
+        assert missing.json()['msg'] == 'content is required'
+
+        for response in responses:
+            assert response.status_code == 200
+            assert response.headers['content-type'].startswith('text/event-stream')
+            events = [json.loads(line[6:]) for line in response.text.splitlines() if line.startswith('data: ')]
+            assert ''.join(e['content'] for e in events if e['type'] == 'content').startswith('load test message')
+            assert events[-1]['type'] == 'done' and events[-1]['message_key']
+
+        # Every stream was open at once; serially (or on 8 threads) this would take 12s (1.5s)
+        assert provider.peak == streams
+        assert elapsed < streams * 0.5 / 4
@@ -0,0 +1,356 @@
+"""
+Collective Memory Platform - Embedding Service Tests
+
+Tests for the two-tier embedding cache using the fake embedding client,
+and for deferred loading of stored vectors.
+"""
+import time
+
+import pytest
+from sqlalchemy import event
+
+from api.services.embedding import (
+    EmbeddingCache, EmbeddingService, FakeEmbeddingClient, pack_embedding, unpack_embedding
+)
+
+
+def make_service(max_entries: int = 100, persist: bool = False) -> EmbeddingService:
+    service = EmbeddingService(cache=EmbeddingCache(max_entries=max_entries, persist=persist))
+    service._client = FakeEmbeddingClient()
+    return service
+
+
+class TestEmbeddingCache:
+    """Tests for the in-process tier."""
+
+    @pytest.mark.model
+    def test_pack_round_trip(self):
+        """Vectors are stored as float32 bytes."""
+        packed = pack_embedding([0.5, -1.25, 3.0])
+        assert len(packed) == 12
+        assert unpack_embedding(packed) == [0.5, -1.25, 3.0]
+
+    @pytest.mark.model
+    def test_batch_only_embeds_misses(self):
+        """Cached and duplicate texts are not sent to the provider."""
+        service = make_service()
+
+        first = service.get_embeddings_batch(['alpha', 'beta', 'alpha'])
+        second = service.get_embeddings_batch(['beta', 'gamma'])
+
+        assert service.client.calls == [['alpha', 'beta'], ['gamma']]
+        assert first[0] == first[2]
+        assert second[0] == first[1]
+        assert service.get_embedding('gamma') == second[1]
+
+        stats = service.get_cache_stats()
+        assert stats['memory_hits'] == 2
+        assert stats['misses'] == 3
+        assert stats['memory_entries'] == 3
+
+    @pytest.mark.model
+    def test_lru_bound(self):
+        """The in-memory tier evicts least recently used vectors."""
+        service = make_service(max_entries=2)
+
+        service.get_embedding('one')
+        service.get_embedding('two')
+        service.get_embedding('one')
+        service.get_embedding('three')
+        service.get_embedding('one')
+
+        stats = service.get_cache_stats()
+        assert stats['memory_entries'] == 2
+        assert stats['evictions'] == 1
+        assert len(service.client.calls) == 3
+
+    @pytest.mark.model
+    def test_use_cache_false(self):
+        """use_cache=False always calls the provider."""
+        service = make_service()
+        service.get_embedding('text', use_cache=False)
+        service.get_embedding('text', use_cache=False)
+
+        assert len(service.client.calls) == 2
+        assert service.get_cache_stats()['memory_entries'] == 0
+
+
+class TestEmbeddingStore:
+    """Tests for the shared embedding_cache table."""
+
+    @pytest.mark.integration
+    def test_store_shared_between_services(self, app, db):
+        """A second process (fresh memory tier) reuses stored vectors."""
+        from api.models import CachedEmbedding
+
+        text = 'persistent embedding cache test'
+        with app.app_context():
+            writer = make_service(persist=True)
+            expected = writer.get_embedding(text)
+
+            reader = make_service(persist=True)
+            assert reader.get_embedding(text) == expected
+            assert reader.client.calls == []
+            assert reader.get_cache_stats()['store_hits'] == 1
+
+            CachedEmbedding.query.filter_by(text_hash=EmbeddingCache.text_hash(text)).delete()
+            db.session.commit()
+
+    @pytest.mark.integration
+    def test_fake_vectors_never_reach_the_real_provider(self, app, db):
+        """Vectors stored by the fake provider are cached under their own model key."""
+        from api.models import CachedEmbedding
+
+        class RealClient(FakeEmbeddingClient):
+            """Stands in for the OpenAI client: not the fake provider, different vectors."""
+            @staticmethod
+            def embed(text, dimensions):
+                return FakeEmbeddingClient.embed(f'real {text}', dimensions)
+
+        text = 'fake versus real provider text'
+        with app.app_context():
+            try:
+                fake = make_service(persist=True)
+                fake_vector = fake.get_embedding(text)
+
+                real = EmbeddingService(cache=EmbeddingCache(persist=True))
+                real._client = type('OpenAI', (), {'embeddings': RealClient()})()
+                assert real.cache_model == EmbeddingService.MODEL
+                assert real.get_embedding(text) != fake_vector
+                assert real.get_cache_stats()['store_hits'] == 0
+                assert len(real.client.embeddings.calls) == 1
+            finally:
+                CachedEmbedding.query.filter_by(text_hash=EmbeddingCache.text_hash(text)).delete()
+                db.session.commit()
+
+    @pytest.mark.integration
+    def test_store_leaves_caller_session_alone(self, factory, db, monkeypatch):
+        """Cache reads and writes, and their failures, neither commit nor roll back the caller's changes."""
+        from api.models import CachedEmbedding, Entity
+
+        text = 'caller session embedding text'
+        entity = factory.create_entity('Concept', 'Pending cache change')
+        entity.name = 'Pending cache change (edited)'
+        service = make_service(persist=True)
+
+        service.get_embedding(text)
+        assert entity in db.session.dirty
+
+        def store_down(*args, **kwargs):
+            raise RuntimeError('store down')
+        monkeypatch.setattr(CachedEmbedding, 'put_many', store_down)
+        service.get_embedding('another caller session text')
+        assert entity in db.session.dirty
+        assert service.get_cache_stats()['store_errors'] == 1
+
+        db.session.rollback()
+        assert Entity.get_by_key(entity.entity_key).name == 'Pending cache change'
+        CachedEmbedding.query.filter_by(text_hash=EmbeddingCache.text_hash(text)).delete()
+        db.session.commit()
+
+
+class TestEmbeddingQueue:
+    """Tests for the background embedding pipeline."""
+
+    @pytest.fixture
+    def queue(self, app):
+        """Provide a worker-thread queue bound to the app with a fresh fake provider."""
+        from api.services.embedding_queue import EmbeddingQueue
+
+        queue = EmbeddingQueue(
+            embedding_service=make_service(),
+            batch_size=8,
+            max_wait_ms=50,
+            backoff_base=0.01,
+        )
+        queue.init_app(app)
+        yield queue
+        queue.shutdown()
+
+    @pytest.mark.integration
+    def test_micro_batches_and_bulk_write_back(self, queue, factory, db):
+        """Queued entities are embedded in batches and written back."""
+        from api.models import Entity
+
+        entities = [factory.create_entity('Concept', f'Queued concept {i}') for i in range(20)]
+        for entity in entities:
+            queue.enqueue_entity(entity.entity_key)
+        assert queue.flush(timeout=10)
+
+        client = queue.embedding_service.client
+        assert sum(len(call) for call in client.calls) == 20
+        assert max(len(call) for call in client.calls) == 8
+        assert queue.get_stats()['embedded'] == 20
+
+        db.session.expire_all()
+        for entity in entities:
+            assert Entity.get_by_key(entity.entity_key).embedding is not None
+
+    @pytest.mark.integration
+    def test_retries_with_backoff(self, queue, factory):
+        """Provider failures are retried until they succeed."""
+        entity = factory.create_entity('Concept', 'Flaky concept')
+        queue.embedding_service.client.fail_next = 2
+
+        queue.enqueue_entity(entity.entity_key)
+        assert queue.flush(timeout=10)
+
+        stats = queue.get_stats()
+        assert stats['retries'] == 2
+        assert stats['embedded'] == 1
+        assert stats['failed'] == 0
+
+    @pytest.mark.integration
+    def test_inline_leaves_caller_session_and_retries_on_worker(self, app, factory, db):
+        """Inline processing neither commits the caller's session nor sleeps through its retries."""
+        from api.models import Entity
+        from api.services.embedding_queue import EmbeddingQueue
+
+        entity = factory.create_entity('Concept', 'Inline concept')
+        other = factory.create_entity('Concept', 'Pending concept')
+        queue = EmbeddingQueue(embedding_service=make_service(), sync=True, backoff_base=0.5)
+        queue.embedding_service.client.fail_next = 1
+
+        entity_key, other_key = entity.entity_key, other.entity_key  # Loaded before the edit, so nothing autoflushes it
+        other.name = 'Pending concept (edited)'
+        started = time.monotonic()
+        queue.enqueue_entity(entity_key)
+        assert time.monotonic() - started < 0.25
+        assert other in db.session.dirty
+
+        try:
+            assert queue.flush(timeout=10)
+        finally:
+            queue.shutdown()
+        assert queue.get_stats()['retries'] == 1
+        assert other in db.session.dirty
+
+        db.session.rollback()
+        assert Entity.get_by_key(entity_key).embedding is not None
+        assert Entity.get_by_key(other_key).name == 'Pending concept'
+
+    @pytest.mark.integration
+    def test_backfill(self, factory, db):
+        """Backfill embeds every row with a NULL embedding."""
+        from api.models import Entity
+        from api.services.embedding_queue import EmbeddingQueue
+
+        entities = [factory.create_entity('Concept', f'Backfill concept {i}') for i in range(5)]
+        queue = EmbeddingQueue(embedding_service=make_service(), batch_size=2)
+
+        queue.backfill(kinds=['entity'])
+
+        db.session.expire_all()
+        for entity in entities:
+            assert Entity.get_by_key(entity.entity_key).embedding is not None
+        assert queue.get_stats()['failed'] == 0
+
+
+# ========== Deferred vectors ==========
+
+BENCH_PREFIX = 'bench-embedding-'
+BENCH_ENTITIES = 10000
+
+
+def _vector_value(model_cls, seed: int):
+    """A 1536-dimension vector in the column's storage format."""
+    from api.services.embedding_queue import EmbeddingQueue
+    return EmbeddingQueue._column_value(model_cls, [((seed + i) % 997) / 997.0 for i in range(1536)])
+
+
+def _recorded(engine, statements: list):
+    """Listener appending each (statement, parameters) executed on engine."""
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+    event.listen(engine, 'before_cursor_execute', record)
+    return record
+
+
+def _payload_bytes(db, statement, parameters) -> int:
+    """Approximate size of the values a recorded statement returns."""
+    rows = db.session.connection().exec_driver_sql(statement, parameters)
+    return sum(len(str(value)) for row in rows for value in row if value is not None)
+
+
+def _selects_vector(statement: str, table: str) -> bool:
+    """Whether a SELECT fetches the raw embedding column of table."""
+    columns = statement.split(' FROM ', 1)[0].replace(f'{table}.embedding IS NOT NULL', '')
+    return f'{table}.embedding' in columns
+
+
+class TestDeferredEmbeddings:
+    """Tests that list queries and serializers leave vectors in the database."""
+
+    @pytest.mark.integration
+    def test_serializers_do_not_load_vectors(self, factory, db):
+        """to_dict reports has_embedding from SQL and loads the vector only when asked."""
+        from api.models import Entity, Document
+
+        entity = factory.create_entity('Concept', 'Deferred vector')
+        document = Document(title='Deferred vector', content='text')
+        document.save()
+        factory._created_objects.append(document)
+        db.session.execute(Entity.__table__.update().where(Entity.entity_key == entity.entity_key).values(
+            embedding=_vector_value(Entity, 1)))
+        db.session.execute(Document.__table__.update().where(Document.document_key == document.document_key).values(
+            embedding=_vector_value(Document, 2)))
+        db.session.commit()
+
+        statements = []
+        record = _recorded(db.engine, statements)
+        try:
+            entity_dict = Entity.query.filter_by(entity_key=entity.entity_key).one().to_dict()
+            document_dict = Document.query.filter_by(document_key=document.document_key).one().to_dict()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert statements
+        assert not any(_selects_vector(s, 'entities') or _selects_vector(s, 'documents') for s, _ in statements)
+        assert entity_dict['has_embedding'] and document_dict['has_embedding']
+        assert 'embedding' not in entity_dict and 'embedding' not in document_dict
+
+        assert Entity.get_by_key(entity.entity_key).to_dict(include_embedding=True)['embedding'] is not None
+        assert factory.create_entity('Concept', 'No vector').to_dict()['has_embedding'] is False
+
+    @pytest.mark.slow
+    @pytest.mark.integration
+    def test_benchmark_entity_list(self, app, db):
+        """Bytes and time for listing 10k embedded entities, with and without the vector."""
+        from sqlalchemy.orm import undefer
+        from api.models import Entity
+
+        with app.app_context():
+            db.session.execute(Entity.__table__.insert(), [
+                {'entity_key': f'{BENCH_PREFIX}{i}', 'entity_type': 'Concept', 'name': f'Bench {i}',
+                 'properties': {}, 'embedding': _vector_value(Entity, i)}
+                for i in range(BENCH_ENTITIES)
+            ])
+            db.session.commit()
+            try:
+                listing = Entity.query.filter(Entity.entity_key.like(f'{BENCH_PREFIX}%'))
+                timings = {}
+                for label, query in (('eager', listing.options(undefer(Entity.embedding))), ('deferred', listing)):
+                    db.session.expunge_all()
+                    statements = []
+                    record = _recorded(db.engine, statements)
+                    started = time.perf_counter()
+                    try:
+                        results = [e.to_dict() for e in query.all()]
+                    finally:
+                        elapsed = time.perf_counter() - started
+                        event.remove(db.engine, 'before_cursor_execute', record)
+                    timings[label] = (elapsed, sum(_payload_bytes(db, *s) for s in statements))
+                    assert len(results) == BENCH_ENTITIES
+                    assert all(r['has_embedding'] for r in results)
+            finally:
+                db.session.rollback()
+                db.session.execute(Entity.__table__.delete().where(Entity.entity_key.like(f'{BENCH_PREFIX}%')))
+                db.session.commit()
+
+        (eager_seconds, eager_bytes), (deferred_seconds, deferred_bytes) = timings['eager'], timings['deferred']
+        print(
+            f"\nList and serialize {BENCH_ENTITIES} embedded entities:\n"
+            f"  vector loaded:   {eager_bytes / 1e6:.1f} MB, {eager_seconds * 1000:.0f} ms\n"
+            f"  vector deferred: {deferred_bytes / 1e6:.1f} MB, {deferred_seconds * 1000:.0f} ms"
+        )
+        assert deferred_bytes * 10 < eager_bytes
+        assert deferred_seconds < eager_seconds
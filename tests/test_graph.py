@@ -0,0 +1,349 @@
+"""
+Collective Memory Platform - Graph Traversal Tests
+
+Tests for GraphTraversal, including a benchmark on a synthetic graph.
+"""
+import random
+import time
+from collections import deque
+
+import pytest
+
+from tests.conftest import count_queries
+
+
+def reference_neighbors(entity_key: str, max_hops: int = 1, user=None) -> dict:
+    """Node-at-a-time BFS used before batched frontier expansion."""
+    from api.models import Entity, Relationship
+    from api.services.scope import scope_service
+
+    visited_entities = {entity_key}
+    visited_relationships = set()
+    entities = []
+    relationships = []
+    queue = deque([(entity_key, 0)])
+
+    while queue:
+        current_key, depth = queue.popleft()
+        if depth >= max_hops:
+            continue
+
+        rels = Relationship.query.filter(
+            (Relationship.from_entity_key == current_key) |
+            (Relationship.to_entity_key == current_key)
+        ).all()
+
+        for rel in rels:
+            if rel.relationship_key not in visited_relationships:
+                visited_relationships.add(rel.relationship_key)
+                relationships.append(rel)
+
+            other_key = rel.to_entity_key if rel.from_entity_key == current_key else rel.from_entity_key
+            if other_key not in visited_entities:
+                visited_entities.add(other_key)
+                entity = Entity.get_by_key(other_key)
+                if entity:
+                    if user and not scope_service.can_access_scope(
+                        user, entity.scope_type, entity.scope_key or entity.domain_key
+                    ):
+                        continue
+                    entities.append(entity)
+                    queue.append((other_key, depth + 1))
+
+    return {
+        'entities': [e.to_dict() for e in entities],
+        'relationships': [r.to_dict() for r in relationships]
+    }
+
+
+def _keys(result: dict) -> tuple[set, set]:
+    return (
+        {e['entity_key'] for e in result['entities']},
+        {r['relationship_key'] for r in result['relationships']},
+    )
+
+
+class TestGraphTraversal:
+    """Tests for GraphTraversal neighbor expansion."""
+
+    @pytest.mark.integration
+    def test_neighbors_match_reference(self, factory):
+        """Batched traversal returns the same subgraph as node-at-a-time BFS."""
+        from api.utils.graph import GraphTraversal
+
+        scenario = factory.create_project_scenario()
+        start = scenario['developer'].entity_key
+
+        for hops in (1, 2, 3):
+            expected = reference_neighbors(start, max_hops=hops)
+            actual = GraphTraversal.get_neighbors(start, max_hops=hops)
+            assert _keys(actual) == _keys(expected)
+
+    @pytest.mark.integration
+    def test_neighbors_query_count_per_hop(self, factory, db):
+        """Each hop costs one relationship query and one entity query."""
+        from api.utils.graph import GraphTraversal
+
+        hub = factory.create_entity('Project', 'Hub')
+        spokes = [factory.create_entity('Concept', f'Spoke {i}') for i in range(10)]
+        for spoke in spokes:
+            factory.create_relationship(hub, spoke, 'RELATES_TO')
+            leaf = factory.create_entity('Concept', f'Leaf of {spoke.name}')
+            factory.create_relationship(spoke, leaf, 'RELATES_TO')
+
+        hub_key = hub.entity_key
+        spoke_keys = [s.entity_key for s in spokes]
+        with count_queries(db.engine) as counter:
+            result = GraphTraversal._relationships_by_node([hub_key])
+            GraphTraversal._load_entities(spoke_keys)
+        assert counter['count'] == 2
+        assert len(result[hub_key]) == 10
+
+        result = GraphTraversal.get_neighbors(hub_key, max_hops=2)
+        assert len(result['entities']) == 20
+        assert len(result['relationships']) == 20
+
+    @pytest.mark.integration
+    def test_cached_neighbors_match_reference(self, factory, monkeypatch):
+        """Traversal over the adjacency cache returns the same subgraph."""
+        from api.utils.adjacency import adjacency_cache
+        from api.utils.graph import GraphTraversal
+
+        scenario = factory.create_project_scenario()
+        start = scenario['developer'].entity_key
+
+        monkeypatch.setattr(adjacency_cache, 'enabled', True)
+        adjacency_cache.clear()
+        try:
+            for hops in (1, 2, 3):
+                expected = reference_neighbors(start, max_hops=hops)
+                actual = GraphTraversal.get_neighbors(start, max_hops=hops)
+                assert _keys(actual) == _keys(expected)
+        finally:
+            adjacency_cache.clear()
+
+
+class _FakeSource:
+    """In-memory neighbor source for _PathSearch."""
+
+    def __init__(self, edges):
+        self.adjacency = {}
+        for rel_key, from_key, to_key in edges:
+            edge = (rel_key, to_key, 'RELATES_TO', from_key, to_key)
+            self.adjacency.setdefault(from_key, []).append(edge)
+            self.adjacency.setdefault(to_key, []).append((rel_key, from_key, 'RELATES_TO', from_key, to_key))
+
+    def neighbors(self, frontier):
+        return {key: self.adjacency.get(key, []) for key in frontier}
+
+
+class TestPathSearch:
+    """Tests for bidirectional BFS and k-shortest paths. These run without a database."""
+
+    EDGES = [
+        ('r1', 'a', 'b'), ('r2', 'b', 'c'), ('r3', 'c', 'd'),
+        ('r4', 'a', 'e'), ('r5', 'e', 'd'),
+        ('r6', 'a', 'f'), ('r7', 'f', 'g'), ('r8', 'g', 'h'), ('r9', 'h', 'd'),
+        ('r10', 'e', 'd'),
+    ]
+
+    def _search(self, max_depth=4, directed=False):
+        from api.utils.graph import _PathSearch
+        return _PathSearch(_FakeSource(self.EDGES), max_depth=max_depth, directed=directed)
+
+    @pytest.mark.model
+    def test_shortest_path(self):
+        """The shortest path is found from either side."""
+        nodes, edges = self._search().shortest('a', 'd', 4)
+        assert len(edges) == 2
+        assert nodes[0] == 'a' and nodes[-1] == 'd'
+
+        nodes, edges = self._search().shortest('d', 'a', 4)
+        assert nodes[1] == 'e'
+        assert [e[0] for e in edges][1] == 'r4'
+
+    @pytest.mark.model
+    def test_max_depth(self):
+        """Paths longer than max_depth are not returned."""
+        assert self._search().shortest('b', 'e', 1) is None
+        assert len(self._search().shortest('b', 'e', 2)[1]) == 2
+
+    @pytest.mark.model
+    def test_k_shortest_in_length_order(self):
+        """Parallel relationships yield distinct paths, shortest first."""
+        paths = self._search().k_shortest('a', 'd', 10)
+        signatures = [tuple(e[0] for e in edges) for _, edges in paths]
+
+        assert [len(s) for s in signatures] == [2, 2, 3, 4]
+        assert set(signatures[:2]) == {('r4', 'r5'), ('r4', 'r10')}
+        assert signatures[2:] == [('r1', 'r2', 'r3'), ('r6', 'r7', 'r8', 'r9')]
+
+    @pytest.mark.model
+    def test_directed(self):
+        """Directed search only walks relationships from source to target."""
+        assert self._search(directed=True).shortest('d', 'a', 4) is None
+        assert len(self._search(directed=True).shortest('a', 'd', 4)[1]) == 2
+
+
+class TestFindPaths:
+    """Tests for GraphTraversal.find_paths."""
+
+    @pytest.mark.integration
+    def test_find_paths(self, factory, monkeypatch):
+        """Paths are found through the database and the adjacency cache."""
+        from api.utils.adjacency import adjacency_cache
+        from api.utils.graph import GraphTraversal
+
+        scenario = factory.create_project_scenario()
+        start = scenario['company'].entity_key
+        goal = scenario['technology'].entity_key
+
+        for enabled in (False, True):
+            monkeypatch.setattr(adjacency_cache, 'enabled', enabled)
+            adjacency_cache.clear()
+            result = GraphTraversal.find_paths(start, goal)
+
+            assert len(result['paths']) == 1
+            path = result['paths'][0]
+            assert path['entity_keys'] == [
+                start, scenario['developer'].entity_key, scenario['project'].entity_key, goal
+            ]
+            assert [r['direction'] for r in path['relationships']] == ['incoming', 'outgoing', 'outgoing']
+            assert result['entities'][goal]['name'] == 'Flask'
+
+            assert GraphTraversal.find_paths(start, goal, max_depth=2)['paths'] == []
+            assert GraphTraversal.find_paths(start, goal, relationship_types=['WORKS_ON'])['paths'] == []
+            assert GraphTraversal.find_paths(start, goal, directed=True)['paths'] == []
+            assert GraphTraversal.find_paths(start, 'missing-entity') is None
+        adjacency_cache.clear()
+
+    @pytest.mark.integration
+    def test_get_path_drops_paths_with_deleted_relationships(self, factory, monkeypatch):
+        """Relationship.get_path skips paths whose relationships are gone instead of raising."""
+        from api.models import Relationship
+        from api.utils.adjacency import adjacency_cache
+        from api.utils.graph import GraphTraversal
+
+        scenario = factory.create_project_scenario()
+        start = scenario['company'].entity_key
+        goal = scenario['technology'].entity_key
+        monkeypatch.setattr(adjacency_cache, 'enabled', True)
+        adjacency_cache.clear()
+
+        path = Relationship.get_path(start, goal)[0]
+        assert [r.relationship_key for r in path] == [
+            r['relationship_key'] for r in GraphTraversal.find_paths(start, goal)['paths'][0]['relationships']
+        ]
+
+        # As if a writer that bypasses the cache hooks had deleted the last hop
+        load = GraphTraversal._load_relationships
+        monkeypatch.setattr(GraphTraversal, '_load_relationships', staticmethod(
+            lambda keys: [r for r in load(keys) if r.relationship_key != path[-1].relationship_key]
+        ))
+        assert Relationship.get_path(start, goal) == []
+        adjacency_cache.clear()
+
+
+# ========== Benchmark ==========
+
+BENCH_PREFIX = 'bench-graph-'
+BENCH_ENTITIES = 20000
+BENCH_EDGES = 100000
+BENCH_HUB_DEGREE = 300
+
+
+@pytest.fixture(scope='module')
+def synthetic_graph(app, db):
+    """
+    Bulk-load a synthetic graph of 100k edges with one hub entity.
+
+    Removed again at the end of the module.
+    """
+    from api.models import Entity, Relationship
+
+    rng = random.Random(42)
+    entity_keys = [f'{BENCH_PREFIX}e{i}' for i in range(BENCH_ENTITIES)]
+    hub_key = entity_keys[0]
+
+    edges = set()
+    for other in rng.sample(entity_keys[1:], BENCH_HUB_DEGREE):
+        edges.add((hub_key, other))
+    while len(edges) < BENCH_EDGES:
+        a, b = rng.sample(entity_keys[1:], 2)
+        edges.add((a, b))
+
+    with app.app_context():
+        db.session.execute(Entity.__table__.insert(), [
+            {'entity_key': key, 'entity_type': 'Concept', 'name': key, 'properties': {}}
+            for key in entity_keys
+        ])
+        db.session.execute(Relationship.__table__.insert(), [
+            {
+                'relationship_key': f'{BENCH_PREFIX}r{i}',
+                'from_entity_key': a,
+                'to_entity_key': b,
+                'relationship_type': 'RELATES_TO',
+                'properties': {},
+            }
+            for i, (a, b) in enumerate(edges)
+        ])
+        db.session.commit()
+
+        yield hub_key
+
+        db.session.execute(
+            Relationship.__table__.delete().where(Relationship.relationship_key.like(f'{BENCH_PREFIX}%'))
+        )
+        db.session.execute(
+            Entity.__table__.delete().where(Entity.entity_key.like(f'{BENCH_PREFIX}%'))
+        )
+        db.session.commit()
+
+
+class TestGraphBenchmark:
+    """Benchmark batched vs node-at-a-time neighbor expansion."""
+
+    @pytest.mark.slow
+    @pytest.mark.integration
+    def test_two_hop_hub_expansion(self, app, db, synthetic_graph, monkeypatch):
+        """2-hop expansion around a hub on a 100k-edge graph."""
+        from api.utils.graph import GraphTraversal
+
+        with app.app_context():
+            with count_queries(db.engine) as reference_counter:
+                started = time.perf_counter()
+                expected = reference_neighbors(synthetic_graph, max_hops=2)
+                reference_seconds = time.perf_counter() - started
+
+            with count_queries(db.engine) as batched_counter:
+                started = time.perf_counter()
+                actual = GraphTraversal.get_neighbors(synthetic_graph, max_hops=2)
+                batched_seconds = time.perf_counter() - started
+
+            from api.utils.adjacency import adjacency_cache
+            monkeypatch.setattr(adjacency_cache, 'enabled', True)
+            adjacency_cache.clear()
+
+            started = time.perf_counter()
+            adjacency_cache.get_index(None)
+            build_seconds = time.perf_counter() - started
+
+            with count_queries(db.engine) as cached_counter:
+                started = time.perf_counter()
+                cached = GraphTraversal.get_neighbors(synthetic_graph, max_hops=2)
+                cached_seconds = time.perf_counter() - started
+            adjacency_cache.clear()
+
+        print(
+            f"\n2-hop neighbors on {BENCH_EDGES} edges: "
+            f"{len(actual['entities'])} entities, {len(actual['relationships'])} relationships\n"
+            f"  node-at-a-time: {reference_counter['count']} queries, {reference_seconds * 1000:.0f} ms\n"
+            f"  batched:        {batched_counter['count']} queries, {batched_seconds * 1000:.0f} ms\n"
+            f"  cached:         {cached_counter['count']} queries, {cached_seconds * 1000:.0f} ms "
+            f"(index build {build_seconds * 1000:.0f} ms)"
+        )
+
+        assert _keys(actual) == _keys(expected)
+        assert _keys(cached) == _keys(expected)
+        assert batched_counter['count'] < reference_counter['count']
+        assert cached_counter['count'] <= batched_counter['count']
@@ -0,0 +1,85 @@
+"""
+Collective Memory Platform - Heartbeat Tests
+
+Tests for coalesced agent heartbeats.
+"""
+import contextlib
+from datetime import timedelta
+
+import pytest
+
+from api.services.heartbeat import HeartbeatService
+
+
+class RecordingHeartbeats(HeartbeatService):
+    """Heartbeat service that records flushes instead of writing them."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._app = type('FakeApp', (), {'app_context': staticmethod(contextlib.nullcontext)})()
+        self._ensure_worker = lambda: None  # Flush explicitly
+        self.flushed = []
+
+    def _write(self, pending):
+        self.flushed.append(dict(pending))
+
+
+class TestHeartbeatService:
+    """Tests for HeartbeatService coalescing. These run without a database."""
+
+    @pytest.mark.model
+    def test_coalesces_to_latest_heartbeat(self):
+        """Repeated heartbeats become one write per agent with the newest timestamp."""
+        from api.models.base import get_now
+
+        heartbeats = RecordingHeartbeats(flush_seconds=60)
+        now = get_now()
+        heartbeats.touch('agent-a', now)
+        heartbeats.touch('agent-a', now + timedelta(seconds=5))
+        heartbeats.touch('agent-a', now + timedelta(seconds=2))
+        heartbeats.touch('agent-b', now)
+
+        assert heartbeats.last_seen('agent-a') == now + timedelta(seconds=5)
+        assert heartbeats.flush() == 2
+        assert heartbeats.flushed == [{'agent-a': now + timedelta(seconds=5), 'agent-b': now}]
+        assert heartbeats.flush() == 0
+        assert heartbeats.get_stats()['touched'] == 4
+        assert heartbeats.get_stats()['written'] == 2
+
+
+class TestCompactHeartbeat:
+    """Tests for POST /agents/<id>/heartbeat?compact=true."""
+
+    @pytest.mark.integration
+    def test_previews_unread_messages(self, factory, api_client, db):
+        """The compact heartbeat carries the newest unread messages, so the MCP server need not fetch them."""
+        from api.models import Inbox, Message
+
+        user = factory.create_user('compact-heartbeat@example.com')
+        agent = factory.get_agent('compact-heartbeat', user_key=user.user_key)
+        headers = {'Authorization': f'Bearer {user.pat}'}
+        url = f'/api/agents/{agent.agent_id}/heartbeat?compact=true'
+
+        data = api_client.post(url, headers=headers).get_json()['data']
+        assert data['unread_messages'] == 0
+        assert data['unread_preview'] == []
+
+        sent = []
+        try:
+            for i in range(7):
+                message = Message(
+                    channel='heartbeat-test', from_key='heartbeat-sender', to_key=agent.agent_key,
+                    scope='agent-agent', message_type='message', content={'text': f'hello {i}'}
+                )
+                message.save()
+                sent.append(message.message_key)
+
+            data = api_client.post(url, headers=headers).get_json()['data']
+            assert data['unread_messages'] == 7
+            assert [m['message_key'] for m in data['unread_preview']] == sent[:-6:-1]
+            assert data['unread_preview'][0]['content'] == {'text': 'hello 6'}
+        finally:
+            db.session.rollback()
+            Message.query.filter(Message.message_key.in_(sent)).delete(synchronize_session=False)
+            Inbox.query.filter_by(reader_key=agent.agent_key).delete(synchronize_session=False)
+            db.session.commit()
@@ -0,0 +1,224 @@
+"""
+Collective Memory Platform - Inbox Tests
+
+Tests for per-reader inboxes against the full unread query, and bulk
+mark-read.
+"""
+import pytest
+from sqlalchemy import event
+
+from tests.conftest import count_queries
+
+
+READERS = ['inbox-agent', 'inbox-user']
+
+
+@pytest.fixture
+def send(app, db):
+    """Send messages in a test domain; removes them and the test inboxes afterwards."""
+    from api.models import Message, MessageRead, Inbox
+
+    with app.app_context():
+        created = []
+
+        def send(scope='agent-agent', autonomous=False, **kwargs):
+            kwargs.setdefault('to_key', 'inbox-agent')
+            message = Message(
+                channel='inbox-test', from_key='inbox-sender', scope=scope,
+                message_type='message', content={'text': 'hi'}, autonomous=autonomous,
+                domain_key='inbox-domain', **kwargs
+            )
+            message.save()
+            created.append(message.message_key)
+            return message
+
+        yield send
+
+        db.session.rollback()
+        MessageRead.query.filter(MessageRead.message_key.in_(created)).delete(synchronize_session=False)
+        Message.query.filter(Message.message_key.in_(created)).delete(synchronize_session=False)
+        Inbox.query.filter(Inbox.reader_key.in_(READERS)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def _expected(domain_key='inbox-domain', team_keys=('inbox-team',)):
+    """(unread, autonomous) for the test agent from the full query."""
+    from api.models import Message
+    from api.models.message_read import MessageRead
+
+    messages = Message.query.filter(
+        Message.visible_to_agent('inbox-agent', team_keys=list(team_keys), domain_key=domain_key),
+        ~Message.message_key.in_(
+            MessageRead.query.with_entities(MessageRead.message_key).filter_by(reader_key='inbox-agent')
+        )
+    ).all()
+    return len(messages), sum(1 for m in messages if m.autonomous)
+
+
+def _counts(domain_key='inbox-domain', team_keys=('inbox-team',)):
+    from api.models import Inbox
+    return Inbox.get_counts('inbox-agent', team_keys=list(team_keys), domain_key=domain_key)
+
+
+class TestInbox:
+    """Tests for Inbox maintenance on send, read and delete."""
+
+    @pytest.mark.integration
+    def test_follows_sends_reads_and_deletes(self, send, db):
+        """Counts and rows match the full query through fan-out, reads and deletes."""
+        from api.models import Message, MessageRead, Inbox
+
+        direct = [send(), send(autonomous=True), send()]
+        send(scope='broadcast-domain', to_key=None)
+        send(to_key='someone-else')
+
+        assert _counts() == _expected() == (4, 1)
+
+        # Broadcast and team fan-out into the existing inbox
+        send(scope='broadcast-team', to_key=None, team_key='inbox-team', autonomous=True)
+        send(scope='broadcast-team', to_key=None, team_key='other-team')
+        domain_wide = send(scope='broadcast-domain', to_key=None)
+        assert _counts() == _expected() == (6, 2)
+
+        MessageRead.mark_read(direct[0].message_key, 'inbox-agent')
+        MessageRead.mark_read(direct[1].message_key, 'inbox-agent')
+        MessageRead.mark_read(direct[1].message_key, 'inbox-agent')
+        domain_wide.delete()
+        assert _counts() == _expected() == (3, 1)
+
+        # Deleting a read record makes the message unread again
+        db.session.delete(MessageRead.get_read_record(direct[0].message_key, 'inbox-agent'))
+        db.session.commit()
+        # Readdressing a message moves it out of the inbox
+        direct[2].to_key = 'someone-else'
+        direct[2].save()
+        assert _counts() == _expected() == (3, 1)
+
+        unread = Message.get_for_agent('inbox-agent', team_keys=['inbox-team'], domain_key='inbox-domain',
+                                       unread_only=True, limit=1000)
+        assert len(unread) == 3
+        assert [m.created_at for m in unread] == sorted((m.created_at for m in unread), reverse=True)
+        assert Inbox.check(READERS) == []
+
+    @pytest.mark.integration
+    def test_lookups_do_not_scan_history(self, send, db):
+        """Once built, an unread count is one query and an unread page two, whatever was read before."""
+        from api.models import Message, MessageRead
+
+        for message in [send() for _ in range(30)]:
+            MessageRead.mark_read(message.message_key, 'inbox-agent')
+        send(scope='broadcast-team', to_key=None, team_key='inbox-team')
+        _counts()
+
+        with count_queries(db.engine) as counter:
+            assert Message.get_unread_count('inbox-agent', team_keys=['inbox-team'], domain_key='inbox-domain') == 1
+        assert counter['count'] == 1
+
+        with count_queries(db.engine) as counter:
+            Message.get_for_agent('inbox-agent', team_keys=['inbox-team'], domain_key='inbox-domain',
+                                  unread_only=True)
+        assert counter['count'] == 2
+
+        # Different domain and teams change visibility and rebuild the inbox
+        assert _counts('other-domain', ()) == _expected('other-domain', ()) == (0, 0)
+
+    @pytest.mark.integration
+    def test_build_leaves_caller_session_alone(self, send, db):
+        """Counting builds the inbox on its own connection, without flushing or committing the caller's changes."""
+        from api.models import Message
+
+        send()
+        pending = Message(
+            channel='inbox-test', from_key='inbox-sender', to_key='inbox-agent', scope='agent-agent',
+            message_type='message', content={'text': 'pending'}, domain_key='inbox-domain'
+        )
+        db.session.add(pending)
+
+        assert _counts() == (1, 0)
+        assert pending in db.session.new
+
+        db.session.rollback()
+        assert _counts() == _expected() == (1, 0)
+
+    @pytest.mark.integration
+    def test_check_and_rebuild(self, send, db):
+        """check() reports an inbox that drifted from the full query and rebuild() repairs it."""
+        from api.models import Message, Inbox, InboxMessage
+
+        send(scope='agent-user', to_key='inbox-user')
+        send(scope='broadcast-domain', to_key=None)
+        user_unread = Message.get_for_user('inbox-user', domain_key='inbox-domain', unread_only=True)
+        assert len(user_unread) == 2
+        assert Inbox.check(['inbox-user']) == []
+
+        InboxMessage.query.filter_by(reader_key='inbox-user', message_key=user_unread[0].message_key).delete()
+        db.session.commit()
+
+        problems = Inbox.check(READERS)
+        assert [(p['reader_key'], p['missing'], p['extra']) for p in problems] == [('inbox-user', 1, 0)]
+
+        assert Inbox.rebuild(['inbox-user']) == 1
+        assert Inbox.check(READERS) == []
+        assert Inbox.get_counts('inbox-user', domain_key='inbox-domain', reader_type='user') == (2, 0)
+
+
+class TestBulkMarkRead:
+    """Tests for POST /messages/mark-read."""
+
+    @pytest.fixture
+    def headers(self, factory, db):
+        user = factory.create_user('bulk-read@example.com')
+        yield {'Authorization': f'Bearer {user.pat}'}
+        factory.cleanup()
+
+    @staticmethod
+    def _read_inserts(engine, statements):
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT INTO message_reads'):
+                statements.append(statement)
+        event.listen(engine, 'before_cursor_execute', record)
+        return record
+
+    @pytest.mark.integration
+    def test_marks_keys_with_one_upsert(self, send, headers, api_client, db):
+        """Listed keys are marked with one INSERT; read and unknown keys are skipped."""
+        from api.models import Inbox, MessageRead
+
+        keys = [send().message_key for _ in range(4)]
+        MessageRead.mark_read(keys[0], 'inbox-agent')
+        _counts()
+
+        statements = []
+        record = self._read_inserts(db.engine, statements)
+        try:
+            response = api_client.post('/api/messages/mark-read', headers=headers, json={
+                'reader_key': 'inbox-agent', 'message_keys': keys[:3] + ['no-such-message']
+            })
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        data = response.get_json()['data']
+        assert data['marked_count'] == 2
+        assert sorted(data['message_keys']) == sorted(keys[1:3])
+        assert len(statements) == 1
+        assert _counts() == _expected() == (1, 0)
+        assert Inbox.check(READERS) == []
+
+    @pytest.mark.integration
+    def test_marks_up_to_cursor(self, send, headers, api_client):
+        """up_to marks every unread message created by then, and nothing after."""
+        from api.models import Message
+
+        early = [send() for _ in range(3)]
+        late = send()
+
+        response = api_client.post('/api/messages/mark-read', headers=headers, json={
+            'reader_key': 'inbox-agent', 'up_to': early[-1].created_at.isoformat()
+        })
+        assert response.get_json()['data']['marked_count'] == 3
+
+        unread = Message.get_for_agent('inbox-agent', unread_only=True)
+        assert [m.message_key for m in unread] == [late.message_key]
+
+        response = api_client.post('/api/messages/mark-read', headers=headers, json={'reader_key': 'inbox-agent'})
+        assert response.status_code == 400
@@ -0,0 +1,154 @@
+"""
+Collective Memory Platform - MCP API Client Tests
+
+Tests for the pooled API client and per-connection sessions used by the MCP server.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from cm_mcp import api_client
+from cm_mcp.api_client import APIClient, LatencyHistogram, endpoint_label
+
+
+def _config(**overrides):
+    values = {
+        'api_endpoint': 'http://cm.test/api',
+        'timeout': 5,
+        'http2': False,
+        'max_connections': 4,
+        'max_concurrency': 2,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class TestEndpointLabel:
+    """Tests for grouping requests by endpoint."""
+
+    @pytest.mark.model
+    def test_keys_are_collapsed(self):
+        """Keys and ids are replaced so one endpoint gets one histogram."""
+        assert endpoint_label('post', '/agents/swift-bold-keen-lion/heartbeat') == 'POST /agents/{key}/heartbeat'
+        assert endpoint_label('GET', '/work-sessions/active') == 'GET /work-sessions/active'
+        assert endpoint_label('POST', '/messages/mark-all-read') == 'POST /messages/mark-all-read'
+        assert endpoint_label('GET', '/entities/ent-123?limit=5') == 'GET /entities/{key}'
+
+    @pytest.mark.model
+    def test_histogram_percentiles(self):
+        """Percentiles report the upper bound of the bucket they fall in."""
+        histogram = LatencyHistogram()
+        for elapsed_ms in [3] * 90 + [40] * 9 + [20000]:
+            histogram.observe(elapsed_ms)
+
+        stats = histogram.to_dict()
+        assert stats['count'] == 100
+        assert stats['p50_ms'] == 5
+        assert stats['p95_ms'] == 50
+        assert stats['p99_ms'] == 50
+        assert stats['buckets']['+inf'] == 1
+
+
+class TestAPIClient:
+    """Tests for connection reuse, concurrency limits and latency tracking."""
+
+    @pytest.mark.model
+    def test_reuses_one_pool_and_bounds_concurrency(self, monkeypatch):
+        """Requests share one httpx client and at most max_concurrency run at once."""
+        monkeypatch.setattr(api_client, '_latency', {})
+        active = {'now': 0, 'peak': 0}
+
+        async def handler(request):
+            active['now'] += 1
+            active['peak'] = max(active['peak'], active['now'])
+            await asyncio.sleep(0.01)
+            active['now'] -= 1
+            return httpx.Response(200, json={'path': request.url.path})
+
+        client = APIClient(_config(), transport=httpx.MockTransport(handler))
+
+        async def run():
+            first = client._get_client()
+            responses = await asyncio.gather(*[
+                client.request('POST', f'/agents/agent-{n}/heartbeat') for n in range(6)
+            ])
+            assert client._get_client() is first
+            await client.aclose()
+            return responses
+
+        responses = asyncio.run(run())
+
+        assert [r.json()['path'] for r in responses] == [f'/api/agents/agent-{n}/heartbeat' for n in range(6)]
+        assert active['peak'] == 2
+        assert not client.is_open
+        assert api_client.get_latency_stats()['POST /agents/{key}/heartbeat']['count'] == 6
+
+
+class TestSessions:
+    """Tests for per-connection MCP sessions and the connection registry."""
+
+    @pytest.mark.model
+    def test_connections_are_isolated(self):
+        """Each connection sees its own state, PAT and pooled client."""
+        from cm_mcp.connections import MCPSession, current_session
+        from cm_mcp.tools.utils import api_headers
+
+        async def connection(pat):
+            session = MCPSession(pat=pat, client=APIClient(_config()))
+            session.activate()
+            await asyncio.sleep(0)
+            current_session().state['agent_id'] = f'agent-{pat}'
+            await asyncio.sleep(0.01)
+            seen = (current_session().state['agent_id'], api_headers(_config(pat=''))['Authorization'],
+                    api_client.get_api_client() is session.client)
+            await session.aclose()
+            return seen
+
+        async def run():
+            return await asyncio.gather(connection('one'), connection('two'))
+
+        assert asyncio.run(run()) == [
+            ('agent-one', 'Bearer one', True),
+            ('agent-two', 'Bearer two', True),
+        ]
+
+    @pytest.mark.model
+    def test_registry_heartbeats_and_evicts(self):
+        """A sweep heartbeats quiet registered sessions in their own context and evicts idle ones."""
+        from cm_mcp.connections import MCPSession, SessionRegistry, current_session
+
+        registry = SessionRegistry(max_sessions=2, idle_seconds=60)
+        beats = []
+
+        async def heartbeat():
+            beats.append(current_session().state['agent_id'])
+
+        async def run():
+            busy, idle = MCPSession(pat='busy'), MCPSession(pat='idle')
+            for session, name in ((busy, 'busy'), (idle, 'idle')):
+                session.state.update(agent_id=name, registered=True)
+                assert registry.open(session)
+            assert not registry.open(MCPSession())
+
+            idle.connection_task = asyncio.create_task(asyncio.sleep(10))
+            idle.last_active -= 120
+            registry.sweep(heartbeat, heartbeat_interval=300)
+            await asyncio.sleep(0.01)
+
+            assert idle.connection_task.cancelled()
+            await registry.close(idle)
+
+            # A heartbeat is only due again after the interval
+            busy.last_heartbeat = time.monotonic()
+            registry.sweep(heartbeat, heartbeat_interval=300)
+            await asyncio.sleep(0.01)
+            await registry.shutdown()
+
+        asyncio.run(run())
+
+        assert beats == ['busy']
+        stats = registry.get_stats()
+        assert (stats['active'], stats['opened'], stats['evicted'], stats['rejected'], stats['peak']) == (0, 2, 1, 1, 2)
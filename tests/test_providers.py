@@ -8,6 +8,12 @@ import asyncio
 from unittest.mock import patch, MagicMock, AsyncMock
 
 
+async def _async_iter(items):
+    """Async iterator over items, like the SDK's async streaming responses."""
+    for item in items:
+        yield item
+
+
 class TestAnthropicProvider:
     """Tests for Anthropic provider model resolution."""
 
@@ -231,7 +237,7 @@ class TestGoogleProviderStreaming:
         mock_response_stream = [mock_chunk]
 
         mock_client = MagicMock()
-        mock_client.models.generate_content_stream.return_value = mock_response_stream
+        mock_client.aio.models.generate_content_stream = AsyncMock(return_value=_async_iter(mock_response_stream))
         mock_genai.Client.return_value = mock_client
 
         with patch.dict('sys.modules', {'google.genai': mock_genai, 'google.genai.types': mock_genai_types}):
@@ -282,7 +288,7 @@ class TestGoogleProviderStreaming:
         mock_config = MagicMock()
         mock_genai_types.GenerateContentConfig.return_value = mock_config
         mock_client = MagicMock()
-        mock_client.models.generate_content_stream.return_value = []
+        mock_client.aio.models.generate_content_stream = AsyncMock(return_value=_async_iter([]))
         mock_genai.Client.return_value = mock_client
 
         with patch('api.providers.google.genai', mock_genai):
@@ -317,7 +323,7 @@ class TestGoogleProviderStreaming:
 
         # Empty response stream
         mock_client = MagicMock()
-        mock_client.models.generate_content_stream.return_value = []
+        mock_client.aio.models.generate_content_stream = AsyncMock(return_value=_async_iter([]))
         mock_genai.Client.return_value = mock_client
 
         with patch('api.providers.google.genai', mock_genai):
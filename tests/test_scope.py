@@ -0,0 +1,82 @@
+"""
+Collective Memory Platform - Scope Service Tests
+
+Tests for the per-request access context used by scope checks.
+"""
+import pytest
+
+from tests.conftest import count_queries
+
+
+@pytest.fixture
+def team_user(factory):
+    """A regular user in the default domain who belongs to one team."""
+    from api import config
+    from api.models.domain import Domain
+
+    domain = Domain.get_by_slug(config.CM_DEFAULT_DOMAIN)
+    user = factory.create_user('scope-member@example.com', domain_key=domain.domain_key)
+    team = factory.create_team('Scope Team', domain_key=domain.domain_key)
+    other = factory.create_team('Scope Other', domain_key=domain.domain_key)
+    team.add_member(user.user_key, role='member')
+    yield user, team, other
+
+    # Memberships aren't tracked by the factory
+    team.remove_member(user.user_key)
+    other.remove_member(user.user_key)
+
+
+class TestAccessContext:
+    """Tests for ScopeService access contexts."""
+
+    @pytest.mark.integration
+    def test_resolved_once(self, app, db, team_user):
+        """Repeated scope checks reuse one membership query."""
+        from api.models import Entity
+        from api.services.scope import scope_service
+
+        user, team, other = team_user
+        user.user_key  # Load attributes expired by the fixture's commits
+        team_key, other_key = team.team_key, other.team_key
+        with app.test_request_context():
+            with count_queries(db.engine) as counter:
+                for _ in range(20):
+                    assert scope_service.can_access_scope(user, 'team', team_key)
+                    assert not scope_service.can_access_scope(user, 'team', other_key)
+                    scope_service.filter_query_by_scope(Entity.query, user, Entity)
+                    scope_service.access_clause(user, Entity)
+            assert counter['count'] == 1
+
+    @pytest.mark.integration
+    def test_invalidated_on_membership_change(self, app, team_user):
+        """Joining, leaving and archiving teams take effect within the request."""
+        from api.services.scope import scope_service
+
+        user, team, other = team_user
+        with app.test_request_context():
+            assert not scope_service.can_access_scope(user, 'team', other.team_key)
+
+            other.add_member(user.user_key, role='viewer')
+            assert scope_service.can_access_scope(user, 'team', other.team_key)
+            assert not scope_service.can_write_to_scope(user, 'team', other.team_key)
+
+            other.remove_member(user.user_key)
+            assert not scope_service.can_access_scope(user, 'team', other.team_key)
+
+            team.status = 'archived'
+            team.save()
+            assert not scope_service.can_access_scope(user, 'team', team.team_key)
+
+    @pytest.mark.integration
+    def test_accessible_scopes(self, app, team_user):
+        """Team scopes carry the membership role."""
+        from api.services.scope import scope_service
+
+        user, team, _ = team_user
+        scopes = scope_service.get_user_accessible_scopes(user)
+
+        team_scopes = [s for s in scopes if s['scope_type'] == 'team']
+        assert team_scopes == [{
+            'scope_type': 'team', 'scope_key': team.team_key, 'name': 'Scope Team', 'access_level': 'member'
+        }]
+        assert scope_service.get_default_scope(user) == {'scope_type': 'team', 'scope_key': team.team_key}
@@ -0,0 +1,158 @@
+"""
+Collective Memory Platform - Search Tests
+
+Tests for ranked keyword search, hybrid (keyword + semantic) search and
+the search routes.
+"""
+import numpy as np
+import pytest
+
+from tests.conftest import count_queries
+
+
+def _vector(*texts: str, weights=None) -> list[float]:
+    """Unit vector mixing the fake embeddings of texts."""
+    from api.services.embedding import FakeEmbeddingClient
+    weights = weights or [1.0] * len(texts)
+    vector = sum(w * np.asarray(FakeEmbeddingClient.embed(t, 1536)) for w, t in zip(weights, texts))
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+@pytest.fixture
+def hybrid_entities(factory, vector_index_cache):
+    """
+    Entities for the keyword 'hybridterm' with embeddings around _vector('hybridterm'):
+
+    exact: exact name match, unrelated embedding
+    both: name match and the query's own embedding
+    semantic: no name match, embedding close to the query
+    other: name match, unrelated embedding, another type
+    """
+    from api.models import Entity
+    from api.services.embedding_queue import EmbeddingQueue
+
+    specs = {
+        'exact': ('HybridTest', 'hybridterm', _vector('hybrid unrelated 1')),
+        'both': ('HybridTest', 'hybridterm notes', _vector('hybridterm')),
+        'semantic': ('HybridTest', 'Unrelated name', _vector('hybridterm', 'hybrid near', weights=[1, 0.5])),
+        'other': ('HybridOther', 'hybridterm plan', _vector('hybrid unrelated 2')),
+    }
+    entities = {}
+    for name, (entity_type, entity_name, vector) in specs.items():
+        entity = factory.create_entity(entity_type, entity_name)
+        entity.embedding = EmbeddingQueue._column_value(Entity, vector)
+        entity.save()
+        entities[name] = entity
+    return entities
+
+
+class TestHybridSearch:
+    """Tests for Entity.search_hybrid and /search/hybrid."""
+
+    @pytest.mark.integration
+    def test_fuses_ranks_in_one_query(self, hybrid_entities, db):
+        """Weighted RRF scores rank entities in both lists first; the weight and type filter apply in SQL."""
+        from api.models import Entity
+
+        query = _vector('hybridterm')
+        Entity.search_hybrid('hybridterm', query, limit=5)  # Build the vector index
+
+        with count_queries(db.engine) as counter:
+            results = Entity.search_hybrid('hybridterm', query, limit=5, keyword_weight=0.5, entity_type='HybridTest')
+        assert counter['count'] == 1
+
+        keys = [e.entity_key for e, _ in results]
+        assert keys[:3] == [hybrid_entities[n].entity_key for n in ('both', 'exact', 'semantic')]
+        assert hybrid_entities['other'].entity_key not in keys
+
+        scores = {e.entity_key: s for e, s in results}
+        both, exact, semantic = (scores[hybrid_entities[n].entity_key] for n in ('both', 'exact', 'semantic'))
+        assert both == {'score': pytest.approx(0.5 / 62 + 0.5 / 61), 'keyword_rank': 2, 'semantic_rank': 1}
+        assert exact['keyword_rank'] == 1
+        assert semantic['keyword_rank'] is None and semantic['semantic_rank'] == 2
+        assert [s['score'] for _, s in results] == sorted((s['score'] for _, s in results), reverse=True)
+
+        # All weight on keywords puts the exact name first; the type filter runs before the limit
+        keyword_first = Entity.search_hybrid('hybridterm', query, limit=2, keyword_weight=1.0, entity_type='HybridTest')
+        assert [e.entity_key for e, _ in keyword_first] == [hybrid_entities['exact'].entity_key,
+                                                            hybrid_entities['both'].entity_key]
+        other = Entity.search_hybrid('hybridterm', query, limit=1, entity_type='HybridOther')
+        assert [e.entity_key for e, _ in other] == [hybrid_entities['other'].entity_key]
+
+    @pytest.mark.integration
+    def test_route_returns_scores(self, hybrid_entities, factory, api_client):
+        """/search/hybrid filters by type and returns each entity's score and ranks."""
+        user = factory.create_user('hybrid-search@example.com', role='admin')
+
+        response = api_client.get('/api/search/hybrid?query=hybridterm&type=HybridOther&keyword_weight=0.5',
+                                  headers={'Authorization': f'Bearer {user.pat}'})
+        entities = response.get_json()['data']['entities']
+        assert [e['entity_key'] for e in entities] == [hybrid_entities['other'].entity_key]
+        assert entities[0]['keyword_rank'] == 1 and entities[0]['score'] > 0
+
+
+@pytest.fixture
+def text_entities(factory):
+    """Entities for the keyword 'textsearch': exact name, name word, name prefix, property match, no match."""
+    specs = {
+        'exact': ('Textsearch', {}),
+        'word': ('Textsearch Widget', {}),
+        'prefix': ('Textsearchable notes', {}),
+        'property': ('Quiet gadget', {'description': 'Mentions textsearch in passing'}),
+        'none': ('Unrelated entry', {'note': 'textsearch outside the search properties'}),
+    }
+    return {
+        name: factory.create_entity('TextSearchTest', entity_name, properties=properties)
+        for name, (entity_name, properties) in specs.items()
+    }
+
+
+class TestTextSearch:
+    """Tests for ranked keyword search (api.utils.text_search) over entities."""
+
+    @pytest.mark.integration
+    def test_ranked_matches_use_index(self, text_entities, db):
+        """Exact names rank first, then name words, then properties; the GIN index serves the match."""
+        from sqlalchemy import text
+        from api.models import Entity
+
+        results = Entity.search_by_name('textsearch', limit=10)
+        keys = [e.entity_key for e in results if e.entity_type == 'TextSearchTest']
+        assert keys == [text_entities[n].entity_key for n in ('exact', 'word', 'prefix', 'property')]
+
+        # Every term must match; 'note' is not a search property
+        assert [e.entity_key for e in Entity.search_by_name('quiet textsearch')] == [text_entities['property'].entity_key]
+        assert Entity.search_by_name('passing gadget widget') == []
+        assert Entity.search_by_name('!!') == []
+
+        query = Entity.query.filter(Entity.text_match('textsearch')).order_by(*Entity.text_order('textsearch'))
+        sql = str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+        with db.engine.connect() as conn:
+            conn.execute(text('SET enable_seqscan = off'))
+            plan = '\n'.join(row[0] for row in conn.execute(text(f'EXPLAIN {sql}')))
+            lookup = '\n'.join(row[0] for row in conn.execute(
+                text("EXPLAIN SELECT * FROM entities WHERE lower(name) = 'textsearch'")))
+        assert 'ix_entities_search' in plan
+        assert 'ix_entities_name_lower' in lookup
+
+    @pytest.mark.integration
+    def test_fallback_without_postgres(self, text_entities, monkeypatch):
+        """Other databases match names with LIKE, ranked exact, prefix, then shortest."""
+        from api.models import Entity
+        from api.utils import text_search
+
+        monkeypatch.setattr(text_search, 'dialect_name', lambda: 'sqlite')
+        results = Entity.search_by_name('textsearch', limit=10)
+        keys = [e.entity_key for e in results if e.entity_type == 'TextSearchTest']
+        assert keys == [text_entities[n].entity_key for n in ('exact', 'word', 'prefix')]
+
+    @pytest.mark.integration
+    def test_entities_route_ranks_search(self, text_entities, factory, api_client):
+        """/entities?search= returns ranked matches with the total."""
+        user = factory.create_user('text-search@example.com', role='admin')
+
+        response = api_client.get('/api/entities?search=textsearch%20widget&type=TextSearchTest',
+                                  headers={'Authorization': f'Bearer {user.pat}'})
+        data = response.get_json()['data']
+        assert data['total'] == 1
+        assert data['entities'][0]['entity_key'] == text_entities['word'].entity_key
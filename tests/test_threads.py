@@ -0,0 +1,101 @@
+"""
+Collective Memory Platform - Message Thread Tests
+
+Tests for loading message threads with recursive queries.
+"""
+import pytest
+
+from tests.conftest import count_queries
+
+
+@pytest.fixture
+def thread(app, db):
+    """
+    A root with a 15-deep reply chain and a second, branching reply.
+
+    Returns the messages in creation order; removed afterwards.
+    """
+    from api.models import Message
+
+    with app.app_context():
+        created = []
+
+        def reply(parent=None, entity_keys=None):
+            message = Message(
+                channel='thread-test', from_key='thread-sender', scope='broadcast-domain',
+                message_type='message', content={'text': f'message {len(created)}'},
+                domain_key='thread-domain', entity_keys=entity_keys or [],
+                reply_to_key=parent.message_key if parent else None
+            )
+            message.save()
+            created.append(message)
+            return message
+
+        root = reply(entity_keys=['ent-root'])
+        chain = root
+        for i in range(15):
+            chain = reply(chain, entity_keys=['ent-deep'] if i == 14 else None)
+        branch = reply(root, entity_keys=['ent-root', 'ent-branch'])
+        reply(branch)
+        reply(branch)
+
+        yield created
+
+        db.session.rollback()
+        Message.query.filter(Message.message_key.in_([m.message_key for m in created])).delete(synchronize_session=False)
+        db.session.commit()
+
+
+class TestMessageThread:
+    """Tests for Message.get_thread and related thread queries."""
+
+    @pytest.mark.integration
+    def test_whole_thread_in_one_query(self, thread, db):
+        """A deep thread loads with depth, reply counts and entity keys in one query, from any message."""
+        from api.models import Message
+
+        root, deepest, branch = thread[0], thread[15], thread[16]
+        deepest_key = deepest.message_key
+
+        with count_queries(db.engine) as counter:
+            loaded = Message.get_thread(deepest_key, max_depth=None)
+        assert counter['count'] == 1
+
+        assert loaded['root'].message_key == root.message_key
+        assert loaded['message_count'] == len(thread)
+        assert loaded['depth'] == 15
+        assert loaded['reply_count'] == 2
+        assert sorted(loaded['entity_keys']) == ['ent-branch', 'ent-deep', 'ent-root']
+
+        nodes = loaded['nodes']
+        assert nodes[deepest.message_key]['depth'] == 15
+        assert nodes[deepest.message_key]['reply_count'] == 0
+        assert nodes[branch.message_key]['reply_count'] == 2
+        assert [r['message'].message_key for r in loaded['replies']] == [thread[1].message_key, branch.message_key]
+
+        # By default replies stop 10 levels below the root, as they always have
+        default = Message.get_thread(deepest_key)
+        assert default['depth'] == Message.DEFAULT_THREAD_DEPTH == 10
+        assert deepest_key not in default['nodes']
+
+        # Depth-limited loads keep exact reply counts at the cut
+        shallow = Message.get_thread(root.message_key, max_depth=3)
+        assert shallow['depth'] == 3
+        assert shallow['nodes'][thread[3].message_key]['reply_count'] == 1
+
+    @pytest.mark.integration
+    def test_subtree_keys_and_reply_counts(self, thread, db):
+        """Subtree keys and batch reply counts each take one query."""
+        from api.models import Message
+
+        branch = thread[16]
+        all_keys = [m.message_key for m in thread]
+        with count_queries(db.engine) as counter:
+            keys = Message.get_subtree_keys(branch.message_key)
+            counts = Message.get_reply_counts(all_keys)
+        assert counter['count'] == 2
+
+        assert keys == {m.message_key for m in thread[16:]}
+        assert counts[thread[0].message_key] == 2
+        assert counts[branch.message_key] == 2
+        assert thread[15].message_key not in counts
@@ -0,0 +1,426 @@
+"""
+Collective Memory Platform - Vector Index Tests
+
+Tests for the in-process vector index used for semantic search when
+pgvector is not enabled. Index tests run without a database.
+"""
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from api.utils.vector_index import VectorIndex
+
+ATTRIBUTES = ('entity_type', 'scope')
+
+
+def _random_index(rows: int = 500, dimensions: int = 32, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(rows, dimensions)).astype(np.float32)
+    index = VectorIndex(ATTRIBUTES, dimensions)
+    for i, vector in enumerate(vectors):
+        index.upsert(f'k{i}', vector, entity_type='Person' if i % 3 == 0 else 'Project',
+                     scope=('acme.com', 'team', f'team-{i % 5}'))
+    return index, vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _brute_force(vectors, query, k, allowed=None):
+    scores = vectors @ (query / np.linalg.norm(query))
+    order = [i for i in np.argsort(-scores) if allowed is None or allowed(i)]
+    return [f'k{i}' for i in order[:k]]
+
+
+class TestVectorIndex:
+    """Tests for VectorIndex search, masks, updates and snapshots."""
+
+    @pytest.mark.model
+    def test_batched_top_k_matches_brute_force(self):
+        """A batch of queries returns the same top k as scoring every row, with and without masks."""
+        index, vectors = _random_index()
+        index.BLOCK_ROWS = 64  # Exercise merging across blocks
+        queries = np.random.default_rng(1).normal(size=(3, 32)).astype(np.float32)
+
+        results = index.search(queries, k=10)
+        for query, hits in zip(queries, results):
+            assert [key for key, _ in hits] == _brute_force(vectors, query, 10)
+            scores = [score for _, score in hits]
+            assert scores == sorted(scores, reverse=True)
+
+        people = index.mask('entity_type', lambda value: value == 'Person', cache_key='Person')
+        teams = index.mask('scope', lambda scope: scope[2] in ('team-1', 'team-2'))
+        assert index.mask('entity_type', lambda value: False, cache_key='Person') is people
+        hits = index.search(queries[0], k=5, mask=people & teams)[0]
+        assert [key for key, _ in hits] == _brute_force(
+            vectors, queries[0], 5, allowed=lambda i: i % 3 == 0 and i % 5 in (1, 2))
+
+        best = hits[0][1]
+        assert [key for key, _ in index.search(queries[0], k=5, mask=people & teams, threshold=best)[0]] == [hits[0][0]]
+
+    @pytest.mark.model
+    def test_upsert_remove_and_compact(self):
+        """Overwritten and removed rows are reflected at once; compaction keeps the live rows."""
+        index, vectors = _random_index(rows=100)
+        query = vectors[7]
+
+        assert index.search(query, k=1)[0][0][0] == 'k7'
+        index.upsert('k7', -query, entity_type='Person', scope=('acme.com', 'team', 'team-0'))
+        index.upsert('new', query * 3, entity_type='Concept', scope=('acme.com', 'user', 'u1'))
+        assert index.search(query, k=1)[0] == [('new', pytest.approx(1.0))]
+
+        assert index.remove('new') is True
+        assert index.remove('new') is False
+        assert index.upsert('k8', np.zeros(32)) is False  # Zero vectors can't be ranked and drop the row
+        assert 'k8' not in index.rows
+        hits = [key for key, _ in index.search(query, k=100)[0]]
+        assert 'new' not in hits and 'k8' not in hits and hits[-1] == 'k7'
+
+        compacted = index.compacted()
+        assert compacted.size == compacted.count == 99
+        concepts = compacted.mask('entity_type', lambda value: value == 'Concept')
+        assert not concepts.any()
+        assert [key for key, _ in compacted.search(query, k=100)[0]] == hits
+
+    @pytest.mark.model
+    def test_clustered_search_recall(self):
+        """IVF mode finds nearly all exact neighbours while scoring a fraction of the rows."""
+        rng = np.random.default_rng(2)
+        centers = rng.normal(size=(50, 64))
+        data = centers[rng.integers(0, 50, 5000)] + rng.normal(scale=0.3, size=(5000, 64))
+        index = VectorIndex((), 64)
+        for i, vector in enumerate(data):
+            index.upsert(f'k{i}', vector)
+        queries = centers[:20] + rng.normal(scale=0.3, size=(20, 64))
+
+        exact = index.search(queries, k=10)
+        assert index.train(70) is True
+        approximate = index.search(queries, k=10, nprobe=8)
+
+        found = sum(len({k for k, _ in a} & {k for k, _ in e}) for a, e in zip(approximate, exact))
+        assert found / 200 >= 0.9
+
+        # Rows added or moved after training join their nearest cluster
+        index.upsert('late', queries[0])
+        index.upsert('k0', queries[1])
+        assert index.search(queries[0], k=1, nprobe=8)[0][0][0] == 'late'
+        assert index.search(queries[1], k=1, nprobe=8)[0][0][0] == 'k0'
+        index.remove('late')
+        assert index.search(queries[0], k=1, nprobe=8)[0][0][0] != 'late'
+
+    @pytest.mark.model
+    def test_snapshot_round_trip(self, tmp_path):
+        """Snapshots are memory-mapped on load and never written through."""
+        index, vectors = _random_index(rows=50)
+        index.remove('k3')
+        prefix = str(tmp_path / 'vectors-entities')
+        index.save(prefix)
+
+        loaded = VectorIndex.load(prefix)
+        assert isinstance(loaded.vectors, np.memmap)
+        assert loaded.count == 49 and 'k3' not in loaded.rows
+        assert loaded.values['scope'][0] == ('acme.com', 'team', 'team-0')
+        assert loaded.search(vectors[10], k=5) == index.search(vectors[10], k=5)
+        people = loaded.mask('entity_type', lambda value: value == 'Person')
+        assert people.sum() == sum(1 for i in range(50) if i % 3 == 0 and i != 3)
+
+        loaded.upsert('k10', -vectors[10], entity_type='Person', scope=('acme.com', 'team', 'team-0'))
+        loaded.upsert('k99', vectors[10], entity_type='Person', scope=('acme.com', 'team', 'team-0'))
+        assert VectorIndex.load(prefix).search(vectors[10], k=1)[0][0][0] == 'k10'
+
+        (tmp_path / 'vectors-entities.npy').write_bytes(b'truncated')
+        assert VectorIndex.load(prefix) is None
+
+
+class TestVectorIndexCacheLocking:
+    """Tests for per-table builds and refreshes. These run without a database."""
+
+    @pytest.mark.model
+    def test_refresh_runs_on_a_copy_without_blocking(self, monkeypatch):
+        """A slow refresh of one table blocks neither that table's searches nor other tables."""
+        from api.utils.vector_index import VectorIndexCache
+
+        cache = VectorIndexCache(backend='memory')
+        monkeypatch.setattr(cache, '_build', lambda table: _random_index(rows=50)[0])
+        entities = cache.get_index('entities')
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_refresh(table, index):
+            started.set()
+            release.wait(5)
+            index.remove('k0')
+            return 1
+
+        monkeypatch.setattr(cache, '_refresh', slow_refresh)
+        cache.ttl_seconds = 0
+        refreshed = []
+        thread = threading.Thread(target=lambda: refreshed.append(cache.get_index('entities')))
+        thread.start()
+        assert started.wait(5)
+
+        try:
+            assert cache.get_index('documents').count == 50  # Other tables build meanwhile
+            assert cache.get_index('entities') is entities  # Searches use the current index
+            assert cache.search('entities', [entities.vectors[0]], limit=1)[0][0][0] == 'k0'
+        finally:
+            release.set()
+            thread.join(5)
+
+        assert refreshed[0] is not entities and 'k0' not in refreshed[0].rows
+        assert 'k0' in entities.rows
+
+
+def _embed(text: str) -> list[float]:
+    """A unit vector for text, close to every other _embed() vector and far from unrelated rows."""
+    from api.services.embedding import FakeEmbeddingClient
+    shared = np.asarray(FakeEmbeddingClient.embed('vector index test', 1536))
+    vector = 2 * shared + np.asarray(FakeEmbeddingClient.embed(text, 1536))
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _stored(model_cls, text: str):
+    """Embedding of text in the column's storage format."""
+    from api.services.embedding_queue import EmbeddingQueue
+    return EmbeddingQueue._column_value(model_cls, _embed(text))
+
+
+class TestSemanticSearchWithoutPgvector:
+    """Tests for Entity and Document semantic search on the in-process index."""
+
+    @pytest.fixture
+    def scoped_entities(self, factory):
+        """Embedded entities in a test domain: domain-wide, in the user's team, in another team, personal."""
+        from api import config
+        from api.models import Entity
+        from api.models.domain import Domain
+
+        domain_key = Domain.get_by_slug(config.CM_DEFAULT_DOMAIN).domain_key
+        user = factory.create_user('vector-index@example.com', domain_key=domain_key)
+        team = factory.create_team('Vector Team', domain_key=domain_key)
+        other = factory.create_team('Vector Other', domain_key=domain_key)
+        team.add_member(user.user_key, role='member')
+
+        entities = {}
+        for name, scope_type, scope_key in (
+            ('domain', 'domain', domain_key),
+            ('team', 'team', team.team_key),
+            ('other-team', 'team', other.team_key),
+            ('personal', 'user', user.user_key),
+        ):
+            entity = factory.create_entity('VectorTest', f'Vector {name}')
+            entity.domain_key, entity.scope_type, entity.scope_key = domain_key, scope_type, scope_key
+            entity.embedding = _stored(Entity, f'Vector {name}')
+            entity.save()
+            entities[name] = entity
+        yield user, entities, domain_key
+
+        team.remove_member(user.user_key)
+
+    @pytest.mark.integration
+    def test_scoped_search_follows_writes(self, scoped_entities, vector_index_cache, db):
+        """Results are ranked, scope-filtered by row masks, and follow committed writes."""
+        from api.models import Entity
+        from api.services.embedding_queue import EmbeddingQueue
+
+        user, entities, domain_key = scoped_entities
+        query = _embed('Vector team')
+        assert vector_index_cache.backend == 'memory'
+
+        results = Entity.search_semantic(query, limit=10, user=user)
+        builds = vector_index_cache.get_stats()['builds']
+        keys = [e.entity_key for e in results]
+        assert keys[0] == entities['team'].entity_key
+        assert set(keys) >= {entities[n].entity_key for n in ('domain', 'team', 'personal')}
+        assert entities['other-team'].entity_key not in keys
+
+        by_domain = Entity.search_semantic(query, limit=10, domain_key=domain_key, entity_type='VectorTest')
+        assert {e.entity_key for e in by_domain} == {e.entity_key for e in entities.values()}
+        assert Entity.search_semantic(query, limit=10, domain_key='no-such-domain', entity_type='VectorTest') == []
+        assert [e.entity_key for e in Entity.search_semantic(query, limit=5, threshold=0.99,
+                                                              domain_key=domain_key)] == [entities['team'].entity_key]
+
+        # A moved scope, a bulk re-embed by the queue and a delete are all visible to the next search
+        personal = entities['personal']
+        personal.scope_type, personal.scope_key = 'team', 'not-my-team'
+        personal.save()
+        queue = EmbeddingQueue(embedding_service=SimpleNamespace(get_embeddings_batch=lambda texts: [query] * len(texts)),
+                               sync=True)
+        queue.enqueue('entity', [entities['domain'].entity_key])
+        entities['team'].delete()
+
+        keys = [e.entity_key for e in Entity.search_semantic(query, limit=10, user=user)]
+        assert keys[0] == entities['domain'].entity_key
+        assert personal.entity_key not in keys
+        assert entities['team'].entity_key not in keys
+        assert vector_index_cache.get_stats()['builds'] == builds
+
+    @pytest.mark.integration
+    def test_semantic_route_and_documents(self, factory, vector_index_cache, api_client):
+        """/search/semantic returns entities and documents instead of a pgvector error."""
+        from api.models import Entity, Document
+
+        user = factory.create_user('vector-route@example.com', role='admin')
+        entity = factory.create_entity('Concept', 'Vector route entity')
+        entity.embedding = _stored(Entity, 'vector route')
+        entity.save()
+        document = Document(title='Vector route document', content='text', content_type='note',
+                            embedding=_stored(Document, 'vector route'))
+        document.save()
+        factory._created_objects.append(document)
+
+        response = api_client.get('/api/search/semantic?query=vector%20route&limit=3',
+                                  headers={'Authorization': f'Bearer {user.pat}'})
+        data = response.get_json()['data']
+        assert 'entities_error' not in data and 'documents_error' not in data
+        assert data['entities'][0]['entity_key'] == entity.entity_key
+        assert data['documents'][0]['document_key'] == document.document_key
+
+        markdown = Document.search_semantic(_embed('vector route'), content_type='markdown')
+        assert document.document_key not in [d.document_key for d in markdown]
+
+    @pytest.mark.integration
+    def test_context_does_not_wait_for_build(self, app, vector_index_cache):
+        """ContextService skips semantic search while the index builds in the background."""
+        from api.services.context import ContextService
+
+        with app.app_context():
+            assert vector_index_cache.ready('entities') is False
+            ContextService(cache_ttl=0).get_context('vector context')
+
+            deadline = time.monotonic() + 60
+            while not vector_index_cache.ready('entities') and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert vector_index_cache.ready('entities') is True
+
+
+INGEST_CONTENT = """Intro paragraph for the chunk test.
+
+# Storage
+
+Chunks are stored with their offsets so a passage can be found in the source.
+
+# Retrieval
+
+Semantic search ranks chunks rather than whole documents.
+"""
+
+
+class TestDocumentChunks:
+    """Tests for chunk-level document storage, embedding and search."""
+
+    @pytest.mark.model
+    def test_chunk_offsets_locate_content(self):
+        """Every chunk's [start_offset, end_offset) span is its content in the source."""
+        from api.services.document_processor import DocumentProcessor
+
+        processor = DocumentProcessor(chunk_size=120, overlap=30)
+        content = INGEST_CONTENT + '\n## Long\n\n' + 'A sentence that repeats. ' * 40
+        chunks = processor.process_markdown(content, title='Offsets')
+
+        assert len(chunks) > 4
+        for chunk in chunks:
+            assert content[chunk.start_offset:chunk.end_offset] == chunk.content
+        assert [c.chunk_index for c in chunks] == list(range(len(chunks)))
+
+    @pytest.mark.integration
+    def test_ingest_reembeds_changed_chunks_and_searches_them(self, factory, vector_index_cache, api_client, db):
+        """Ingest stores embedded chunks; re-ingest only embeds changed ones; search and context return chunks."""
+        from api.models import Document, DocumentChunk
+        from api.services import embedding_queue
+        from api.services.context import ContextService
+
+        user = factory.create_user('chunk-ingest@example.com', role='admin')
+        headers = {'Authorization': f'Bearer {user.pat}'}
+
+        response = api_client.post('/api/documents/ingest', headers=headers,
+                                   json={'title': 'Chunk test', 'content': INGEST_CONTENT})
+        assert response.status_code == 201
+        data = response.get_json()['data']
+        document = Document.get_by_key(data['document']['document_key'])
+        factory._created_objects.append(document)
+        assert data['chunks_queued'] == len(data['chunks']) == 3
+        for chunk in data['chunks']:
+            assert INGEST_CONTENT[chunk['start_offset']:chunk['end_offset']] == chunk['content']
+            assert chunk['has_embedding']
+
+        embedded = embedding_queue.get_stats()['embedded']
+        changed = INGEST_CONTENT.replace('rather than whole documents', 'instead of document prefixes')
+        response = api_client.post('/api/documents/ingest', headers=headers, json={
+            'document_key': document.document_key, 'title': 'Chunk test', 'content': changed})
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data['chunks_queued'] == 1
+        assert embedding_queue.get_stats()['embedded'] == embedded + 2  # The changed chunk and the document
+        assert DocumentChunk.query.filter_by(document_key=document.document_key).count() == 3
+
+        retrieval = next(c for c in document.chunks if c.section_header == 'Retrieval')
+        retrieval.embedding = _stored(DocumentChunk, 'chunk retrieval')
+        retrieval.save()
+
+        hits = DocumentChunk.search_semantic(_embed('chunk retrieval'), limit=3)
+        assert hits[0].chunk_key == retrieval.chunk_key
+        assert DocumentChunk.search_semantic(_embed('chunk retrieval'), document_key='no-such-document') == []
+
+        response = api_client.get('/api/search/semantic?query=chunk%20retrieval&include_entities=false',
+                                  headers=headers)
+        assert 'documents_error' not in response.get_json()['data']
+
+        service = ContextService(cache_ttl=0)
+        service._embedding_service = SimpleNamespace(get_embedding=lambda text: _embed('chunk retrieval'))
+        for table in ('entities', 'documents', 'document_chunks'):
+            vector_index_cache.get_index(table)
+        context = service.get_context('chunk retrieval', use_cache=False).context_text
+        assert '### Chunk test: Retrieval' in context
+        assert 'instead of document prefixes' in context
+
+        document.delete()
+        factory._created_objects.remove(document)
+        assert DocumentChunk.query.filter_by(document_key=document.document_key).count() == 0
+
+
+class TestVectorIndexBenchmark:
+    """Exact vs clustered search over a large in-process index."""
+
+    @pytest.mark.slow
+    def test_benchmark_search(self):
+        """Query time at 100k x 1536 for exact and IVF search, with recall."""
+        rng = np.random.default_rng(3)
+        rows, dimensions = 100000, 1536
+        centers = rng.normal(size=(200, dimensions)).astype(np.float32)
+        index = VectorIndex((), dimensions)
+        index._fill(
+            [f'k{i}' for i in range(rows)],
+            np.empty((rows, dimensions), dtype=np.float32),
+            {},
+        )
+        for start in range(0, rows, 10000):
+            block = centers[rng.integers(0, 200, 10000)] + rng.normal(scale=0.5, size=(10000, dimensions))
+            index.vectors[start:start + 10000] = block / np.linalg.norm(block, axis=1, keepdims=True)
+        queries = centers[:32] + rng.normal(scale=0.5, size=(32, dimensions)).astype(np.float32)
+
+        started = time.perf_counter()
+        exact = [index.search(query, k=10)[0] for query in queries]
+        exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        started = time.perf_counter()
+        index.search(queries, k=10)
+        batched_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        started = time.perf_counter()
+        index.train(int(np.sqrt(rows)))
+        train_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        approximate = [index.search(query, k=10, nprobe=16)[0] for query in queries]
+        ivf_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        recall = sum(len({k for k, _ in a} & {k for k, _ in e}) for a, e in zip(approximate, exact)) / (10 * len(queries))
+        print(
+            f"\nSearch {rows} x {dimensions} vectors, top 10, per query:\n"
+            f"  exact: {exact_ms:.1f} ms ({batched_ms:.1f} ms batched)\n"
+            f"  ivf (nprobe 16): {ivf_ms:.1f} ms, recall {recall:.2f} (trained in {train_s:.1f} s)"
+        )
+        assert recall >= 0.9
+        assert ivf_ms < exact_ms
@@ -1,7 +1,7 @@
 /**
  * Collective Memory MCP Tool Documentation
  *
- * This file contains comprehensive documentation for all 46 MCP tools
+ * This file contains comprehensive documentation for all 47 MCP tools
  * available in Collective Memory, organized by category.
  */
 
@@ -54,7 +54,7 @@ export const TOOL_CATEGORIES: ToolCategory[] = [
     slug: 'relationships',
     description: 'Connect entities and explore graph structure',
     icon: '🔗',
-    toolCount: 3,
+    toolCount: 4,
   },
   {
     name: 'Context & RAG',
@@ -563,6 +563,67 @@ export const TOOL_DOCS: Record<string, ToolDoc> = {
     tips: ['Use list_relationships first to confirm the correct key before deleting.'],
   },
 
+  find_path: {
+    name: 'find_path',
+    category: 'Relationships',
+    categorySlug: 'relationships',
+    description: 'Find the shortest paths connecting two entities in the knowledge graph.',
+    parameters: [
+      {
+        name: 'from_entity_key',
+        type: 'string',
+        required: true,
+        description: 'Entity to start from',
+      },
+      {
+        name: 'to_entity_key',
+        type: 'string',
+        required: true,
+        description: 'Entity to reach',
+      },
+      {
+        name: 'max_depth',
+        type: 'integer',
+        required: false,
+        description: 'Maximum hops in a path (max 6)',
+        default: '4',
+      },
+      {
+        name: 'k',
+        type: 'integer',
+        required: false,
+        description: 'Number of shortest paths to return (max 10)',
+        default: '1',
+      },
+      {
+        name: 'relationship_types',
+        type: 'array',
+        required: false,
+        description: 'Only follow these relationship types',
+      },
+      {
+        name: 'directed',
+        type: 'boolean',
+        required: false,
+        description: 'Only follow relationships from source to target',
+        default: 'false',
+      },
+    ],
+    returns: 'Up to k paths ordered by length, each as a chain of entities and relationships.',
+    examples: [
+      { description: 'Shortest path', code: '{"from_entity_key": "ent-sarah", "to_entity_key": "ent-react"}' },
+      {
+        description: 'Top 3 paths over selected types',
+        code: '{"from_entity_key": "ent-sarah", "to_entity_key": "ent-react", "k": 3, "relationship_types": ["WORKS_ON", "USES"]}',
+      },
+    ],
+    relatedTools: ['list_relationships', 'get_entity_context'],
+    tips: [
+      'Relationships are followed in either direction unless directed is true.',
+      'Entities outside your accessible scopes are never traversed.',
+    ],
+  },
+
   // ==========================================================
   // Context Tools
   // ==========================================================